@@ -10,9 +10,11 @@ from django_ratelimit.decorators import ratelimit
 from datetime import timedelta
 from carbon.utils import get_dashboard_analytics
 from carbon.advanced_utils import (
-    calculate_monthly_trends, predict_carbon_trajectory,
-    calculate_industry_benchmarks, calculate_carbon_roi
+    calculate_monthly_trends, calculate_industry_benchmarks, calculate_carbon_roi
 )
+from carbon.benchmarking_service import industry_leaderboard
+from carbon.forecast_snapshots import get_trajectory
+from carbon.scenario_simulation import simulate_scenarios
 
 
 @method_decorator(ratelimit(key='user', rate='100/h', method='GET'), name='get')
@@ -55,7 +57,7 @@ class TrendsAnalyticsView(APIView):
         trends = calculate_monthly_trends(request.user.company, months)
         
         # Get predictions for next 6 months
-        predictions = predict_carbon_trajectory(request.user.company, 6)
+        predictions = get_trajectory(request.user.company, 6)
         
         return Response({
             'trends': trends,
@@ -285,35 +287,21 @@ class BenchmarkingView(APIView):
         if 'error' in benchmarks:
             return Response(benchmarks, status=status.HTTP_404_NOT_FOUND)
         
-        # Add competitive intelligence
-        from companies.models import Company
-        from carbon.models import CarbonFootprint
-        
-        # Get top performers in industry
-        industry_companies = Company.objects.filter(
-            industry=request.user.company.industry
-        ).exclude(id=request.user.company.id)
-        
-        top_performers = []
-        for company in industry_companies[:5]:  # Limit to top 5
-            latest_footprint = CarbonFootprint.objects.filter(
-                company=company,
-                status='verified'
-            ).order_by('-created_at').first()
-            
-            if latest_footprint:
-                top_performers.append({
-                    'company_name': company.name,
-                    'employees': company.employees,
-                    'emissions_per_employee': float(latest_footprint.total_emissions) / max(company.employees, 1),
-                    'total_emissions': float(latest_footprint.total_emissions),
-                })
-        
-        # Sort by emissions per employee
-        top_performers.sort(key=lambda x: x['emissions_per_employee'])
+        # Top performers across the whole industry, ranked in the database
+        top_performers = [
+            {
+                'company_name': leader['name'],
+                'employees': leader['employees'],
+                'emissions_per_employee': leader['emissions_per_employee'],
+                'total_emissions': leader['total_emissions'],
+            }
+            for leader in industry_leaderboard(
+                request.user.company.industry, 3, exclude_company_id=request.user.company.id
+            )
+        ]
         
         benchmarks['competitive_analysis'] = {
-            'top_performers': top_performers[:3],  # Top 3 performers
+            'top_performers': top_performers,
             'improvement_opportunities': self._get_improvement_opportunities(benchmarks),
         }
         
@@ -366,14 +354,14 @@ class PredictiveAnalyticsView(APIView):
         months_ahead = int(request.query_params.get('months', 6))
         months_ahead = min(months_ahead, 12)  # Limit to 12 months
         
-        # Get carbon trajectory predictions
-        predictions = predict_carbon_trajectory(request.user.company, months_ahead)
+        # Get carbon trajectory predictions (precomputed nightly)
+        predictions = get_trajectory(request.user.company, months_ahead)
         
         if 'error' in predictions:
             return Response(predictions, status=status.HTTP_400_BAD_REQUEST)
         
         # Add scenario analysis
-        scenarios = self._generate_scenarios(request.user.company, months_ahead)
+        scenarios = self._generate_scenarios(request.user.company, months_ahead, predictions)
         
         # Add recommendations based on predictions
         recommendations = self._generate_predictive_recommendations(predictions)
@@ -385,36 +373,12 @@ class PredictiveAnalyticsView(APIView):
             'confidence_score': self._calculate_confidence_score(predictions),
         })
     
-    def _generate_scenarios(self, company, months_ahead):
-        """Generate different scenarios (conservative, optimistic, aggressive)"""
-        base_predictions = predict_carbon_trajectory(company, months_ahead)
-        
-        if 'error' in base_predictions:
-            return []
-        
-        scenarios = []
-        base_growth = base_predictions.get('trends', {})
-        
-        # Conservative scenario (slower offset growth)
-        conservative_offsets_growth = base_growth.get('offsets_growth_rate', 10) * 0.5
-        scenarios.append({
-            'name': 'Conservative',
-            'description': 'Maintaining current pace of offset purchases',
-            'carbon_neutral_months': base_predictions.get('insights', {}).get('carbon_neutral_in_months', None),
-            'offset_growth_rate': conservative_offsets_growth,
-        })
-        
-        # Aggressive scenario (accelerated offset purchases)
-        aggressive_offsets_growth = base_growth.get('offsets_growth_rate', 10) * 2
-        aggressive_neutral_months = max((base_predictions.get('insights', {}).get('carbon_neutral_in_months', 12) or 12) - 3, 1)
-        scenarios.append({
-            'name': 'Aggressive',
-            'description': 'Doubling offset purchase investments',
-            'carbon_neutral_months': aggressive_neutral_months,
-            'offset_growth_rate': aggressive_offsets_growth,
-        })
+    def _generate_scenarios(self, company, months_ahead, base_predictions=None):
+        """Simulate conservative, current-pace and aggressive offset scenarios"""
+        if base_predictions is None:
+            base_predictions = get_trajectory(company, months_ahead)
         
-        return scenarios
+        return simulate_scenarios(base_predictions)
     
     def _generate_predictive_recommendations(self, predictions):
         """Generate actionable recommendations based on predictions"""
@@ -0,0 +1,252 @@
+"""
+Activity ledger ingestion and totals
+
+CarbonFootprintData is an append-only ledger: imports, integrations and chat
+extraction add one row per activity and period, and scope totals are
+aggregated from the ledger when they are read instead of being written back
+to CarbonFootprint. ingest_activities validates a batch of rows and inserts
+it with bulk_create; the company/period and company/activity/period indexes
+keep time-range and activity scans on the ledger to index range reads.
+
+bulk_create doesn't send post_save, so ingestion drops the stored
+completeness scores of the footprints it wrote to itself.
+"""
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from numbers import Number
+from typing import Dict, Iterable, List, Optional, Tuple
+import uuid
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .emission_factors import EmissionFactor
+from .guidance_service import GuidanceService
+from .models import CarbonFootprint, CarbonFootprintData, FootprintCompleteness
+from .periods import parse_reporting_period
+
+BATCH_SIZE = 1000
+
+# Activity -> scope number, for rows that don't give one
+ACTIVITY_SCOPES = {
+    activity: int(scope[-1])
+    for scope, activities in GuidanceService.SCOPE_ACTIVITIES.items()
+    for activity in activities
+}
+
+SOURCES = {key for key, _ in CarbonFootprintData.SOURCE_CHOICES}
+
+
+def _decimal(value, field: str) -> Decimal:
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError(f'{field} must be a number')
+
+
+def _whole_number(value) -> Optional[str]:
+    """
+    A number read from a spreadsheet as its integer text ("2.0" -> "2"),
+    or None if value isn't a whole number
+
+    pandas reads a column of years or scopes as int64, or as float64 once
+    the column has a blank cell.
+    """
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return str(int(number)) if number.is_integer() else None
+
+
+def _uuid(value) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _scope(row: Dict) -> int:
+    scope = row.get('scope')
+    if scope in (None, ''):
+        scope = ACTIVITY_SCOPES.get(row['activity_type'])
+        if scope is None:
+            raise ValueError('scope is required for activity type %s' % row['activity_type'])
+        return scope
+    scope = str(scope).lower().replace('scope', '').strip()
+    scope = _whole_number(scope) or scope
+    if scope not in ('1', '2', '3'):
+        raise ValueError('scope must be 1, 2 or 3')
+    return int(scope)
+
+
+def _period_start(row: Dict, footprint: Optional[CarbonFootprint]) -> date:
+    value = row.get('period_start') or row.get('period')
+    if isinstance(value, Number):
+        # An annual period read as a number (2024 or 2024.0)
+        value = _whole_number(value) or str(value)
+    if isinstance(value, str) and len(value) == 10:
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            pass
+    if value:
+        period = parse_reporting_period(value if isinstance(value, date) else str(value))
+        if period is None:
+            raise ValueError(f'Unrecognised period: {value}')
+        return period[0]
+    if footprint is not None and footprint.period_start:
+        return footprint.period_start
+    raise ValueError('period_start is required')
+
+
+def build_entry(company, row: Dict, source: str = 'import',
+                footprint: Optional[CarbonFootprint] = None) -> CarbonFootprintData:
+    """
+    Unsaved ledger row for one activity
+
+    Args:
+        company: Company the activity belongs to
+        row: activity_type, co2e (tCO2e; calculated_emissions from chat
+            extraction is accepted too), and optionally scope, quantity,
+            unit, factor_id and period_start/period
+        source: One of CarbonFootprintData.SOURCE_CHOICES
+        footprint: Footprint the activity is reported towards, if any
+
+    Raises:
+        ValueError: If the row is incomplete or malformed
+    """
+    if not row.get('activity_type'):
+        raise ValueError('activity_type is required')
+    co2e = row.get('co2e', row.get('calculated_emissions'))
+    if co2e in (None, ''):
+        raise ValueError('co2e is required')
+
+    return CarbonFootprintData(
+        company=company,
+        footprint=footprint,
+        activity_type=row['activity_type'],
+        scope=_scope(row),
+        quantity=_decimal(row.get('quantity') or 0, 'quantity'),
+        unit=row.get('unit') or '',
+        factor_id=row.get('factor_id') or None,
+        co2e=_decimal(co2e, 'co2e'),
+        period_start=_period_start(row, footprint),
+        source=source,
+    )
+
+
+def ingest_activities(company, rows: Iterable[Dict], source: str = 'import',
+                      footprint: Optional[CarbonFootprint] = None,
+                      batch_size: int = BATCH_SIZE) -> Tuple[List[CarbonFootprintData], List[str]]:
+    """
+    Validate and bulk insert activity rows for a company
+
+    Rows may name a footprint_id of the company's; otherwise they go to
+    footprint (or no footprint). Footprint and emission factor ids are each
+    looked up in one query. Invalid rows are skipped and reported.
+
+    Returns:
+        (created ledger rows, "Row n: reason" messages for skipped rows)
+    """
+    if source not in SOURCES:
+        raise ValueError(f'Unknown source: {source}')
+
+    rows = list(rows)
+    footprint_ids = {_uuid(row['footprint_id']) for row in rows if row.get('footprint_id')} - {None}
+    footprints = {
+        fp.id: fp for fp in CarbonFootprint.objects.filter(company=company, id__in=footprint_ids)
+    } if footprint_ids else {}
+    factor_ids = {_uuid(row['factor_id']) for row in rows if row.get('factor_id')} - {None}
+    known_factors = set(
+        EmissionFactor.objects.filter(pk__in=factor_ids).order_by().values_list('pk', flat=True)
+    ) if factor_ids else set()
+
+    entries, errors = [], []
+    for index, row in enumerate(rows, start=1):
+        try:
+            row_footprint = footprint
+            if row.get('footprint_id'):
+                row_footprint = footprints.get(_uuid(row['footprint_id']))
+                if row_footprint is None:
+                    raise ValueError('footprint not found')
+            if row.get('factor_id'):
+                factor_id = _uuid(row['factor_id'])
+                if factor_id is None:
+                    raise ValueError(f"factor_id is not a valid id: {row['factor_id']}")
+                if factor_id not in known_factors:
+                    raise ValueError('emission factor not found')
+                row = dict(row, factor_id=factor_id)
+            entries.append(build_entry(company, row, source, row_footprint))
+        except (TypeError, ValueError) as e:
+            errors.append(f'Row {index}: {e}')
+
+    with transaction.atomic():
+        created = CarbonFootprintData.objects.bulk_create(entries, batch_size=batch_size)
+        touched = {entry.footprint_id for entry in entries if entry.footprint_id}
+        if touched:
+            FootprintCompleteness.objects.filter(footprint_id__in=touched).delete()
+    return created, errors
+
+
+def ledger_entries(company, start: Optional[date] = None, end: Optional[date] = None,
+                   footprint: Optional[CarbonFootprint] = None):
+    """A company's ledger rows, optionally limited to a period range or a footprint"""
+    entries = CarbonFootprintData.objects.filter(company=company)
+    if start:
+        entries = entries.filter(period_start__gte=start)
+    if end:
+        entries = entries.filter(period_start__lte=end)
+    if footprint is not None:
+        entries = entries.filter(footprint=footprint)
+    return entries
+
+
+def _scope_sums():
+    return {
+        f'scope{scope}_emissions': Sum('co2e', filter=Q(scope=scope))
+        for scope, _ in CarbonFootprintData.SCOPE_CHOICES
+    }
+
+
+def _as_totals(sums: Dict) -> Dict:
+    totals = {
+        key: float(sums.get(key) or 0)
+        for key in ('scope1_emissions', 'scope2_emissions', 'scope3_emissions')
+    }
+    totals['total_emissions'] = sum(totals.values())
+    return totals
+
+
+def scope_totals(entries) -> Dict:
+    """Scope 1/2/3 and total tCO2e of a ledger queryset, in one aggregate"""
+    return _as_totals(entries.aggregate(**_scope_sums()))
+
+
+def footprint_scope_totals(footprint_ids) -> Dict[object, Dict]:
+    """Ledger scope totals for many footprints in one grouped query"""
+    rows = (
+        CarbonFootprintData.objects
+        .filter(footprint_id__in=footprint_ids)
+        .order_by()
+        .values('footprint_id')
+        .annotate(**_scope_sums())
+    )
+    return {row['footprint_id']: _as_totals(row) for row in rows}
+
+
+def activity_totals(entries) -> List[Dict]:
+    """tCO2e and row count per activity type, largest first"""
+    rows = (
+        entries.order_by()
+        .values('activity_type', 'scope')
+        .annotate(co2e=Sum('co2e'), entries=Count('id'))
+        .order_by('-co2e', 'activity_type')
+    )
+    return [
+        {'activity_type': row['activity_type'], 'scope': row['scope'],
+         'co2e': float(row['co2e'] or 0), 'entries': row['entries']}
+        for row in rows
+    ]
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CarbonFootprint, CarbonOffset, OffsetPurchase
+from .models import AICallLog, CarbonFootprint, CarbonOffset, OffsetPurchase
 
 
 @admin.register(CarbonFootprint)
@@ -24,3 +24,17 @@ class OffsetPurchaseAdmin(admin.ModelAdmin):
     list_filter = ['status', 'purchase_date']
     search_fields = ['company__name', 'offset__name']
     readonly_fields = ['id', 'total_co2_offset', 'total_price', 'purchase_date']
+
+
+@admin.register(AICallLog)
+class AICallLogAdmin(admin.ModelAdmin):
+    list_display = ['feature', 'model_name', 'company', 'outcome', 'latency_ms', 'prompt_tokens', 'response_tokens', 'created_at']
+    list_filter = ['feature', 'outcome', 'cache_hit', 'created_at']
+    search_fields = ['feature', 'model_name']
+    readonly_fields = [field.name for field in AICallLog._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
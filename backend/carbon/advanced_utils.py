@@ -3,37 +3,55 @@ Advanced carbon calculation utilities for Phase 4
 Enhanced with industry benchmarking and predictive analytics
 """
 from decimal import Decimal
+from statistics import pstdev
 from typing import Dict, List, Optional
-from datetime import datetime, timedelta
-from django.db.models import Sum, Avg, Q
+from datetime import datetime, time, timedelta
+from django.db.models import Sum, Q
 from django.utils import timezone
 
+from .periods import add_months
+
 
 def calculate_monthly_trends(company, months=12) -> List[Dict]:
     """
     Calculate detailed monthly trends with predictions
+    
+    Buckets are calendar months; footprints are placed by their
+    period_start/period_end rather than by when they were entered.
     """
     from carbon.models import CarbonFootprint, OffsetPurchase
     from ewaste.models import EwasteEntry
     
     trends = []
-    end_date = timezone.now()
+    first_month = add_months(timezone.now().date().replace(day=1), -(months - 1))
+    window_end = add_months(first_month, months)
+    
+    # Footprints overlapping the window, spread over the months their
+    # reporting period covers (a quarterly footprint counts a third per month)
+    footprint_rows = list(CarbonFootprint.objects.filter(
+        company=company,
+        period_start__lt=window_end,
+        period_end__gte=first_month
+    ).values_list('period_start', 'period_end', 'scope1_emissions', 'scope2_emissions', 'scope3_emissions'))
     
     for i in range(months):
-        month_start = end_date - timedelta(days=30 * (months - 1 - i))
-        month_end = end_date - timedelta(days=30 * (months - 2 - i)) if i < months - 1 else end_date
+        month_first_day = add_months(first_month, i)
+        next_month_first_day = add_months(month_first_day, 1)
+        month_start = timezone.make_aware(datetime.combine(month_first_day, time.min))
+        month_end = timezone.make_aware(datetime.combine(next_month_first_day, time.min))
         
         # Carbon footprint data
-        footprints = CarbonFootprint.objects.filter(
-            company=company,
-            created_at__gte=month_start,
-            created_at__lt=month_end
-        ).aggregate(
-            total_emissions=Sum('total_emissions'),
-            scope1=Sum('scope1_emissions'),
-            scope2=Sum('scope2_emissions'),
-            scope3=Sum('scope3_emissions'),
-        )
+        footprints = {'scope1': 0.0, 'scope2': 0.0, 'scope3': 0.0}
+        for period_start, period_end, *scopes in footprint_rows:
+            overlap = (
+                min(period_end + timedelta(days=1), next_month_first_day) - max(period_start, month_first_day)
+            ).days
+            if overlap <= 0:
+                continue
+            share = overlap / ((period_end - period_start).days + 1)
+            for key, value in zip(('scope1', 'scope2', 'scope3'), scopes):
+                footprints[key] += float(value or 0) * share
+        footprints['total_emissions'] = footprints['scope1'] + footprints['scope2'] + footprints['scope3']
         
         # Offset purchases
         purchases = OffsetPurchase.objects.filter(
@@ -57,19 +75,19 @@ def calculate_monthly_trends(company, months=12) -> List[Dict]:
         )
         
         # Calculate monthly carbon balance
-        emissions = float(footprints['total_emissions'] or 0)
+        emissions = footprints['total_emissions']
         offsets = float(purchases['total_offsets'] or 0)
         ewaste_credits = float(ewaste['credits_generated'] or 0)
         net_balance = emissions - (offsets + ewaste_credits)
         
         trends.append({
-            'month': month_start.strftime('%Y-%m'),
+            'month': month_first_day.strftime('%Y-%m'),
             'date': month_start.isoformat(),
             'emissions': {
                 'total': emissions,
-                'scope1': float(footprints['scope1'] or 0),
-                'scope2': float(footprints['scope2'] or 0),
-                'scope3': float(footprints['scope3'] or 0),
+                'scope1': footprints['scope1'],
+                'scope2': footprints['scope2'],
+                'scope3': footprints['scope3'],
             },
             'offsets': {
                 'purchased': offsets,
@@ -100,38 +118,42 @@ def predict_carbon_trajectory(company, months_ahead=6) -> Dict:
     if len(trends) < 3:
         return {'error': 'Insufficient data for predictions'}
     
-    # Calculate growth rates
-    recent_trends = trends[-6:]  # Last 6 months
+    # Fit emissions with Holt-Winters; refitted only when the monthly series changes
+    from carbon.forecasting import ForecastEngine
+    
+    emissions_model = ForecastEngine().model_for_series(
+        f"forecast_model_{company.id}_monthly_emissions",
+        [datetime.fromisoformat(trend['date']).date() for trend in trends],
+        [trend['emissions']['total'] for trend in trends],
+    )
+    emissions_forecast = emissions_model.forecast(months_ahead)
+    avg_emissions_growth = (
+        emissions_model.trend / emissions_model.level if emissions_model.level > 0 else 0
+    )
     
-    emissions_growth = []
+    # Offsets follow purchase decisions rather than a smooth process, so keep
+    # compounding their recent month-over-month growth
+    recent_trends = trends[-6:]  # Last 6 months
     offsets_growth = []
     
     for i in range(1, len(recent_trends)):
-        prev_emissions = recent_trends[i-1]['emissions']['total']
-        curr_emissions = recent_trends[i]['emissions']['total']
-        
-        if prev_emissions > 0:
-            emissions_growth.append((curr_emissions - prev_emissions) / prev_emissions)
-        
         prev_offsets = recent_trends[i-1]['offsets']['total']
         curr_offsets = recent_trends[i]['offsets']['total']
         
         if prev_offsets > 0:
             offsets_growth.append((curr_offsets - prev_offsets) / prev_offsets)
     
-    # Calculate average growth rates
-    avg_emissions_growth = sum(emissions_growth) / len(emissions_growth) if emissions_growth else 0
     avg_offsets_growth = sum(offsets_growth) / len(offsets_growth) if offsets_growth else 0.1  # Assume 10% default growth
+    offsets_volatility = pstdev(offsets_growth) if len(offsets_growth) > 1 else 0.1  # Assume 10% default volatility
     
     # Project future performance
     last_month = trends[-1]
     predictions = []
     
-    current_emissions = last_month['emissions']['total']
     current_offsets = last_month['offsets']['total']
     
     for i in range(1, months_ahead + 1):
-        future_emissions = current_emissions * (1 + avg_emissions_growth) ** i
+        future_emissions = float(emissions_forecast['point'][i - 1])
         future_offsets = current_offsets * (1 + avg_offsets_growth) ** i
         
         neutrality_percentage = (future_offsets / max(future_emissions, 1)) * 100
@@ -143,6 +165,9 @@ def predict_carbon_trajectory(company, months_ahead=6) -> Dict:
         predictions.append({
             'month_offset': i,
             'projected_emissions': future_emissions,
+            'projected_emissions_lower': float(emissions_forecast['lower'][i - 1]),
+            'projected_emissions_upper': float(emissions_forecast['upper'][i - 1]),
+            'projected_emissions_std': float(emissions_forecast['std'][i - 1]),
             'projected_offsets': future_offsets,
             'neutrality_percentage': min(neutrality_percentage, 100),
             'carbon_neutral': neutrality_percentage >= 100,
@@ -153,6 +178,9 @@ def predict_carbon_trajectory(company, months_ahead=6) -> Dict:
         'trends': {
             'emissions_growth_rate': avg_emissions_growth * 100,  # Convert to percentage
             'offsets_growth_rate': avg_offsets_growth * 100,
+            'offsets_growth_volatility': offsets_volatility * 100,
+            'current_offsets': current_offsets,
+            'forecast_method': emissions_model.method,
         },
         'insights': {
             'carbon_neutral_in_months': next((p['month_offset'] for p in predictions if p['carbon_neutral']), None),
@@ -161,82 +189,81 @@ def predict_carbon_trajectory(company, months_ahead=6) -> Dict:
     }
 
 
+def truncate_trajectory(trajectory: Dict, months_ahead: int) -> Dict:
+    """
+    Cut a predict_carbon_trajectory result down to a shorter horizon
+    """
+    if 'error' in trajectory:
+        return trajectory
+    predictions = trajectory['predictions'][:months_ahead]
+    return dict(
+        trajectory,
+        predictions=predictions,
+        insights=dict(
+            trajectory['insights'],
+            carbon_neutral_in_months=next((p['month_offset'] for p in predictions if p['carbon_neutral']), None),
+        ),
+    )
+
+
 def calculate_industry_benchmarks(company) -> Dict:
     """
     Calculate industry benchmarks and company positioning
-    """
-    from companies.models import Company
-    from carbon.models import CarbonFootprint
     
-    # Get industry peers
-    industry_companies = Company.objects.filter(
-        industry=company.industry
-    ).exclude(id=company.id)
-    
-    if not industry_companies.exists():
-        return {'error': 'No industry peers found for benchmarking'}
+    The company's verified emissions for its latest reporting year are ranked
+    against peers in the same industry (and size band, when it has enough
+    companies) from the precomputed IndustryEmissionDistribution rows.
+    """
+    from carbon.emission_distributions import company_year_totals, peer_distribution
     
-    # Calculate industry averages
-    industry_footprints = CarbonFootprint.objects.filter(
-        company__in=industry_companies,
-        status='verified'
-    ).aggregate(
-        avg_total=Avg('total_emissions'),
-        avg_scope1=Avg('scope1_emissions'),
-        avg_scope2=Avg('scope2_emissions'),
-        avg_scope3=Avg('scope3_emissions'),
-    )
+    # Company's verified emissions for its latest year
+    year_totals = company_year_totals(company.id)
+    if not year_totals:
+        return {'error': 'No verified footprint found for company'}
     
-    # Get company's latest footprint
-    company_footprint = CarbonFootprint.objects.filter(
-        company=company,
-        status='verified'
-    ).order_by('-created_at').first()
+    year = max(year_totals)
+    company_entry = year_totals[year]
+    peers = peer_distribution(company, year, company_entry)
     
-    if not company_footprint:
-        return {'error': 'No verified footprint found for company'}
+    if peers is None:
+        return {'error': 'No industry peers found for benchmarking'}
     
     # Calculate company vs industry performance
-    industry_avg_total = float(industry_footprints['avg_total'] or 0)
-    company_total = float(company_footprint.total_emissions)
-    
-    # Calculate percentile ranking
-    better_performers = CarbonFootprint.objects.filter(
-        company__in=industry_companies,
-        status='verified',
-        total_emissions__lt=company_total
-    ).count()
+    industry_avg_total = peers['averages']['total']
+    company_total = company_entry[0]
     
-    total_industry_companies = industry_companies.count()
-    percentile = (better_performers / total_industry_companies * 100) if total_industry_companies > 0 else 50
+    # Share of peers that emit more than the company
+    percentile_ranking = 100 - peers['percent_below']
     
     # Performance indicators
     performance_vs_industry = ((company_total - industry_avg_total) / industry_avg_total * 100) if industry_avg_total > 0 else 0
     
     return {
         'industry': company.industry,
-        'industry_size': total_industry_companies,
+        'industry_size': peers['peer_count'],
+        'size_band': peers['size_band'],
+        'year': year,
         'company_performance': {
             'total_emissions': company_total,
             'emissions_per_employee': company_total / (company.employees or 1),
-            'percentile_ranking': round(100 - percentile, 1),  # Higher percentile = better performance
+            'percentile_ranking': round(percentile_ranking, 1),  # Higher percentile = better performance
         },
         'industry_averages': {
             'total_emissions': industry_avg_total,
-            'scope1_emissions': float(industry_footprints['avg_scope1'] or 0),
-            'scope2_emissions': float(industry_footprints['avg_scope2'] or 0),
-            'scope3_emissions': float(industry_footprints['avg_scope3'] or 0),
+            'scope1_emissions': peers['averages']['scope1'],
+            'scope2_emissions': peers['averages']['scope2'],
+            'scope3_emissions': peers['averages']['scope3'],
         },
         'comparison': {
             'vs_industry_average': round(performance_vs_industry, 1),
             'performance_category': (
-                'top_performer' if percentile >= 75 else
-                'above_average' if percentile >= 50 else
-                'below_average' if percentile >= 25 else
+                'top_performer' if percentile_ranking >= 75 else
+                'above_average' if percentile_ranking >= 50 else
+                'below_average' if percentile_ranking >= 25 else
                 'needs_improvement'
             ),
         },
-        'recommendations': generate_performance_recommendations(company_total, industry_avg_total, percentile)
+        'recommendations': generate_performance_recommendations(company_total, industry_avg_total, percentile_ranking)
     }
 
 
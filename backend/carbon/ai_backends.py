@@ -0,0 +1,213 @@
+"""
+Offline stand-in for the Gemini SDK, for load and benchmark testing
+
+With ``AI_BACKEND = 'fake'`` the AI services get a FakeGenerativeModel instead
+of ``genai.GenerativeModel``. It never touches the network but behaves like a
+real model from the caller's point of view: each call sleeps for a latency
+drawn from a configurable distribution, a share of calls fail or hang until the
+request deadline, streaming calls release their text in chunks over the
+response time, and responses carry usage metadata. That keeps the deadline,
+circuit breaker, coalescing and telemetry code paths on the same footing as in
+production, so a load test shows how workers saturate under model latency
+rather than how fast the instant mock responses are.
+
+Response text is a canned extraction for conversational prompts, otherwise the
+owning service's mock response, otherwise the first complete JSON example in
+the prompt (the vision and compliance prompts spell out their output format).
+"""
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional
+import json
+import math
+import random
+import threading
+import time
+
+from django.conf import settings
+
+DEFAULT_FAKE_BACKEND = {
+    'latency_distribution': 'lognormal',  # fixed | exponential | lognormal
+    'latency_median_ms': 800,
+    'latency_p95_ms': 2500,
+    'vision_latency_median_ms': 3000,
+    'vision_latency_p95_ms': 8000,
+    'error_rate': 0.0,  # share of calls raising FakeBackendError
+    'hang_rate': 0.0,  # share of calls that never answer before the deadline
+    'hang_seconds': 600,  # how long a hung call blocks when the caller sets no deadline
+    'stream_first_chunk_share': 0.3,  # share of the latency spent before the first chunk
+    'stream_chunk_chars': 40,
+    'seed': None,
+}
+
+
+# Streamed field first, like the model is asked to write it
+FAKE_CONVERSATION_RESPONSE = {
+    'ai_response': (
+        "Thanks - I've recorded 450 kWh of electricity for last month, which is about "
+        "0.20 tCO2e of Scope 2 emissions. Was that for your main office or another site?"
+    ),
+    'extracted_data': {
+        'activity_type': 'electricity_consumption',
+        'scope': 2,
+        'quantity': 450,
+        'unit': 'kWh',
+        'emission_factor': 0.453,
+        'emission_factor_source': 'US average grid factor',
+        'calculated_emissions': 0.204,
+        'confidence': 0.9,
+    },
+    'validation': {'status': 'ok', 'anomalies': [], 'warnings': []},
+    'clarifying_questions': ['Which site does this bill cover?'],
+    'suggested_actions': [{
+        'type': 'update_footprint',
+        'field': 'scope2_emissions',
+        'operation': 'add',
+        'value': 0.204,
+        'requires_confirmation': True,
+    }],
+}
+
+
+class FakeBackendError(Exception):
+    """Injected upstream failure (stands in for the SDK's API errors)"""
+
+
+class FakeDeadlineExceeded(FakeBackendError):
+    """The call ran past its request_options timeout"""
+
+
+def fake_backend_enabled() -> bool:
+    return getattr(settings, 'AI_BACKEND', 'gemini') == 'fake'
+
+
+def get_fake_backend_config() -> Dict[str, Any]:
+    config = dict(DEFAULT_FAKE_BACKEND)
+    config.update(getattr(settings, 'AI_FAKE_BACKEND', {}) or {})
+    return config
+
+
+class LatencyDistribution:
+    """
+    Response time model parameterised by its median and 95th percentile
+
+    'lognormal' matches the long right tail of hosted LLM latency, 'exponential'
+    is memoryless with the given median, and 'fixed' always returns the median.
+    """
+
+    Z_95 = 1.6449
+
+    def __init__(self, distribution: str, median_ms: float, p95_ms: Optional[float] = None, rng=None):
+        if distribution not in ('fixed', 'exponential', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.distribution = distribution
+        self.median_ms = max(float(median_ms), 0.0)
+        self.p95_ms = max(float(p95_ms or median_ms), self.median_ms)
+        self.rng = rng or random.Random()
+
+    def sample_ms(self) -> float:
+        if self.distribution == 'fixed' or self.median_ms == 0:
+            return self.median_ms
+        if self.distribution == 'exponential':
+            return self.rng.expovariate(math.log(2) / self.median_ms)
+        sigma = math.log(self.p95_ms / self.median_ms) / self.Z_95
+        return self.rng.lognormvariate(math.log(self.median_ms), sigma)
+
+
+def first_json_example(prompt: str) -> Optional[str]:
+    """The first substring of the prompt that parses as a JSON object, if any"""
+    decoder = json.JSONDecoder()
+    index = prompt.find('{')
+    while index != -1:
+        try:
+            value, end = decoder.raw_decode(prompt, index)
+        except json.JSONDecodeError:
+            index = prompt.find('{', index + 1)
+            continue
+        if isinstance(value, dict):
+            return prompt[index:end]
+        index = prompt.find('{', end)
+    return None
+
+
+class FakeGenerativeModel:
+    """Drop-in for genai.GenerativeModel.generate_content with injected latency and faults"""
+
+    def __init__(self, model_name: str, responder: Optional[Callable[[str], Any]] = None,
+                 vision: bool = False, config: Optional[Dict[str, Any]] = None):
+        self.model_name = f"fake/{model_name}"
+        self.responder = responder
+        self.config = config or get_fake_backend_config()
+        # random.Random isn't safe to share between threads making calls
+        self._rng_lock = threading.Lock()
+        self._rng = random.Random(self.config.get('seed'))
+        prefix = 'vision_' if vision else ''
+        self.latency = LatencyDistribution(
+            self.config['latency_distribution'],
+            self.config[f'{prefix}latency_median_ms'],
+            self.config[f'{prefix}latency_p95_ms'],
+            rng=self._rng,
+        )
+
+    def generate_content(self, contents, stream: bool = False, request_options: Optional[dict] = None, **kwargs):
+        prompt = self._prompt_text(contents)
+        with self._rng_lock:
+            latency = self.latency.sample_ms() / 1000
+            roll = self._rng.random()
+        timeout = (request_options or {}).get('timeout')
+
+        if roll < self.config['hang_rate']:
+            latency = math.inf
+        elif roll < self.config['hang_rate'] + self.config['error_rate']:
+            # Errors come back quickly, like a 5xx from the API
+            time.sleep(min(latency, 0.1))
+            raise FakeBackendError('Injected upstream error')
+
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise FakeDeadlineExceeded(f'Fake model call exceeded {timeout}s')
+        if math.isinf(latency):
+            time.sleep(self.config['hang_seconds'])
+            raise FakeDeadlineExceeded('Fake model call hung without a deadline')
+
+        text = self._response_text(prompt)
+        if stream:
+            return self._stream(prompt, text, latency)
+        time.sleep(latency)
+        return self._response(prompt, text)
+
+    def _stream(self, prompt: str, text: str, latency: float):
+        size = max(int(self.config['stream_chunk_chars']), 1)
+        chunks = [text[start:start + size] for start in range(0, len(text), size)] or ['']
+        first_chunk = latency * self.config['stream_first_chunk_share']
+        between_chunks = (latency - first_chunk) / len(chunks)
+
+        time.sleep(first_chunk)
+        for index, chunk in enumerate(chunks):
+            if index:
+                time.sleep(between_chunks)
+            # Usage metadata arrives with the final chunk, as with the real SDK
+            last = index == len(chunks) - 1
+            yield self._response(prompt, text if last else None, chunk)
+
+    @staticmethod
+    def _prompt_text(contents) -> str:
+        if isinstance(contents, str):
+            return contents
+        return '\n'.join(part for part in contents if isinstance(part, str))
+
+    def _response_text(self, prompt: str) -> str:
+        if '"ai_response"' in prompt:
+            return json.dumps(FAKE_CONVERSATION_RESPONSE)
+        if self.responder:
+            return json.dumps(self.responder(prompt))
+        return first_json_example(prompt) or '{}'
+
+    @staticmethod
+    def _response(prompt: str, full_text: Optional[str], text: Optional[str] = None):
+        usage = None
+        if full_text is not None:
+            usage = SimpleNamespace(
+                prompt_token_count=len(prompt) // 4,
+                candidates_token_count=len(full_text) // 4,
+            )
+        return SimpleNamespace(text=full_text if text is None else text, usage_metadata=usage)
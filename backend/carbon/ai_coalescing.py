@@ -0,0 +1,132 @@
+"""
+Request coalescing ("singleflight") for expensive AI calls
+
+When several users open the same benchmark or action plan at once, identical
+prompts reach Gemini in parallel. SingleFlight lets the first caller make the
+call while concurrent callers with the same key wait for its result: threads in
+the same process wait on an Event, and other workers wait on a short-lived
+cache lock and pick the result up from the cache.
+
+Only results the caller marks as publishable (real model answers, not
+fallbacks) are shared through the cache, and every waiter gets its own copy
+of the result so callers can't see each other's changes to it.
+"""
+from typing import Any, Callable, Dict, Optional
+import copy
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def prompt_key(*parts: str) -> str:
+    """Stable key for a prompt (and anything else that changes the answer)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or '').encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class _InFlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run a function at most once at a time per key, sharing its result"""
+
+    def __init__(self, namespace: str, wait_timeout=None, result_timeout=None, poll_interval=0.05):
+        self.namespace = namespace
+        self.wait_timeout = wait_timeout or getattr(settings, 'AI_COALESCE_WAIT_TIMEOUT', 30)
+        self.result_timeout = result_timeout or getattr(settings, 'AI_COALESCE_RESULT_TTL', 30)
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+        self.stats = {'calls': 0, 'shared': 0}
+
+    def do(self, key: str, fn: Callable[[], Any],
+           publish: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Call fn, or wait for a concurrent call with the same key and return
+        (a copy of) its result instead
+
+        If the call in progress takes longer than wait_timeout the waiter gives
+        up and calls fn itself, so a hung leader can't block everyone.
+
+        Args:
+            publish: Called with fn's result; the result is only shared with
+                other workers through the cache if it returns True
+                (default: always)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _InFlightCall()
+
+        if not leader:
+            if call.done.wait(self.wait_timeout):
+                self.stats['shared'] += 1
+                if call.error is not None:
+                    raise call.error
+                return copy.deepcopy(call.result)
+            logger.warning(f"Coalesced {self.namespace} call {key[:12]} timed out waiting; calling directly")
+            return fn()
+
+        try:
+            result = self._do_across_workers(key, fn, publish)
+            call.result = copy.deepcopy(result)
+            return result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            call.done.set()
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def _do_across_workers(self, key: str, fn: Callable[[], Any],
+                           publish: Optional[Callable[[Any], bool]] = None) -> Any:
+        lock_key = f"singleflight_{self.namespace}_lock_{key}"
+        result_key = f"singleflight_{self.namespace}_result_{key}"
+
+        shared = cache.get(result_key)
+        if shared is not None:
+            self.stats['shared'] += 1
+            return shared['value']
+
+        if cache.add(lock_key, 1, self.wait_timeout):
+            try:
+                self.stats['calls'] += 1
+                result = fn()
+                if publish is None or publish(result):
+                    cache.set(result_key, {'value': result}, self.result_timeout)
+                return result
+            finally:
+                cache.delete(lock_key)
+
+        # Another worker holds the lock - wait for it to publish the result
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            shared = cache.get(result_key)
+            if shared is not None:
+                self.stats['shared'] += 1
+                return shared['value']
+            if cache.get(lock_key) is None:
+                break  # leader finished without publishing (crashed, or fell back)
+
+        self.stats['calls'] += 1
+        return fn()
+
+
+# Shared by every GeminiAIService in the process
+gemini_singleflight = SingleFlight('gemini')
@@ -0,0 +1,65 @@
+"""
+Per-company cache for expensive AI results (benchmark, action plan, trajectory)
+
+Keys combine the feature, the company id, the company's cache version and a
+hash of the data the prompt is built from, so a result is only reused for the
+same tenant asking the same question about the same numbers. Saving or
+deleting one of the company's footprints bumps its version (see
+carbon/signals.py), which retires every cached result for that company at once
+without having to enumerate keys.
+"""
+from typing import Any
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+
+# Versions outlive any cached result so a bump can't be lost to eviction first
+VERSION_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def _version_key(company_id) -> str:
+    return f"ai_results_version_{company_id}"
+
+
+def _fresh_version() -> int:
+    # Seeded from the clock so a version recreated after eviction can't
+    # collide with one that still has results cached under it
+    return int(time.time() * 1000)
+
+
+def get_company_cache_version(company_id) -> int:
+    key = _version_key(company_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_company_ai_results(company_id):
+    """Retire every cached AI result for the company"""
+    key = _version_key(company_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), VERSION_TIMEOUT)
+
+
+def input_hash(inputs: Any) -> str:
+    """Stable hash of the JSON-able data a prompt is built from"""
+    payload = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def company_result_key(feature: str, company_id, inputs: Any) -> str:
+    """
+    Cache key for an AI result
+
+    Build the key once, before calling the model, and store the result under
+    it: if the company's data changes while the call is in flight the result
+    lands under the retired version instead of being served as current.
+    """
+    version = get_company_cache_version(company_id)
+    return f"ai_{feature}_{company_id}_v{version}_{input_hash(inputs)}"
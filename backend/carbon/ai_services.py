@@ -8,7 +8,15 @@ from decimal import Decimal
 import google.generativeai as genai
 from django.conf import settings
 from django.core.cache import cache
+from django.db.models import F
 from .models import CarbonFootprint
+from .image_preprocessing import VisionImagePreprocessor
+from .ai_backends import FakeGenerativeModel, fake_backend_enabled
+from .ai_coalescing import gemini_singleflight, prompt_key
+from .ai_result_cache import company_result_key
+from .validation_rules import RuleBasedValidator
+from .circuit_breaker import CallDeadlineExceeded, CircuitOpenError, gemini_breaker
+from .ai_telemetry import ai_call_context, estimate_tokens, model_name, record_ai_call, track_ai_call
 from companies.models import Company
 
 logger = logging.getLogger(__name__)
@@ -19,7 +27,12 @@ class GeminiAIService:
     def __init__(self):
         # Configure Gemini AI with proper API key validation
         api_key = getattr(settings, 'GEMINI_API_KEY', None)
-        if api_key and api_key != 'your-gemini-api-key-here':
+        if fake_backend_enabled():
+            self.model = FakeGenerativeModel(
+                'gemini-2.5-flash-lite-preview-09-2025', responder=self._get_mock_response
+            )
+            logger.info("Gemini AI service using the fake latency-injecting backend")
+        elif api_key and api_key != 'your-gemini-api-key-here':
             try:
                 genai.configure(api_key=api_key)
                 self.model = genai.GenerativeModel('gemini-2.5-flash-lite-preview-09-2025')
@@ -31,38 +44,96 @@ class GeminiAIService:
             logger.warning("Gemini API key not configured or is placeholder. AI features will use mock responses.")
             self.model = None
     
-    def _call_gemini(self, prompt: str) -> Dict[str, Any]:
-        """Make a call to Gemini AI with error handling"""
+    @staticmethod
+    def _parse_json_response(response_text: str) -> Dict[str, Any]:
+        """Parse model output as JSON, tolerating prose or code fences around it"""
+        response_text = response_text.strip()
+        
+        # Try to parse as JSON first
         try:
-            if self.model:
-                response = self.model.generate_content(prompt)
-                response_text = response.text.strip()
-                
-                # Try to parse as JSON first
+            return json.loads(response_text)
+        except json.JSONDecodeError:
+            # If not JSON, try to extract JSON from the response
+            import re
+            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+            if json_match:
                 try:
-                    return json.loads(response_text)
+                    return json.loads(json_match.group())
                 except json.JSONDecodeError:
-                    # If not JSON, try to extract JSON from the response
-                    import re
-                    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                    if json_match:
-                        try:
-                            return json.loads(json_match.group())
-                        except json.JSONDecodeError:
-                            pass
-                    
-                    # If still no JSON, create a structured response
-                    return {
-                        "response": response_text,
-                        "source": "gemini_ai",
-                        "success": True
-                    }
-            else:
-                # Return mock response for development
-                return self._get_mock_response(prompt)
-        except Exception as e:
-            logger.error(f"Gemini AI call failed: {str(e)}")
+                    pass
+            
+            # If still no JSON, create a structured response
+            return {
+                "response": response_text,
+                "source": "gemini_ai",
+                "success": True
+            }
+    
+    def _call_gemini(self, prompt: str, on_fallback=None) -> Dict[str, Any]:
+        """
+        Make a call to Gemini AI with error handling
+        
+        Identical prompts issued concurrently (e.g. a team opening the same
+        benchmark page) share a single upstream call.
+        
+        Args:
+            on_fallback: Called with the reason when the result is the mock
+                response rather than a model answer (callers use it to keep
+                fallbacks out of their caches)
+        """
+        if not self.model:
+            # Return mock response for development
+            record_ai_call(prompt_tokens=estimate_tokens(prompt), outcome='mock')
+            if on_fallback is not None:
+                on_fallback('mock')
             return self._get_mock_response(prompt)
+        
+        if not getattr(settings, 'AI_COALESCE_ENABLED', True):
+            return self._generate(prompt, on_fallback=on_fallback)
+        
+        called = []
+        
+        def leader_call():
+            called.append(True)
+            fallbacks = []
+            # The fallback reasons travel with the result so coalesced callers see them too
+            return self._generate(prompt, on_fallback=fallbacks.append), fallbacks
+        
+        key = prompt_key(str(getattr(self.model, 'model_name', '')), prompt)
+        # Mock fallbacks stay local; only real model answers are shared across workers
+        result, fallbacks = gemini_singleflight.do(key, leader_call, publish=lambda shared: not shared[1])
+        if not called:
+            # Shared another caller's in-flight result
+            record_ai_call(model=model_name(self.model), outcome='coalesced', cache_hit=True)
+        if on_fallback is not None:
+            for reason in fallbacks:
+                on_fallback(reason)
+        return result
+    
+    def _generate(self, prompt: str, on_fallback=None) -> Dict[str, Any]:
+        """
+        Single Gemini request under the circuit breaker, falling back to the
+        mock response on failure, timeout or while the breaker is open
+        
+        Args:
+            on_fallback: Called with the reason when the mock response is used
+        """
+        with track_ai_call(None, self.model, prompt) as call:
+            def request():
+                response = self.model.generate_content(
+                    prompt,
+                    request_options={'timeout': gemini_breaker.call_timeout}
+                )
+                call.set_response(response)
+                return self._parse_json_response(response.text)
+            
+            def fallback(reason):
+                call.outcome = reason
+                if on_fallback is not None:
+                    on_fallback(reason)
+                return self._get_mock_response(prompt)
+            
+            return gemini_breaker.call(request, fallback=fallback)
     
     def _get_mock_response(self, prompt: str) -> Dict[str, Any]:
         """Generate mock AI responses for development"""
@@ -136,12 +207,143 @@ class ConversationalAIService:
         user_message: str,
         conversation_history: List[Dict[str, str]],
         current_footprint: Optional[CarbonFootprint],
-        company_context: Dict[str, Any]
+        company_context: Dict[str, Any],
+        conversation_summary: str = ''
     ) -> Dict[str, Any]:
         """
         Extract emissions data from conversational input with full context awareness.
         This is the core method for Phase 1 MVP conversational intelligence.
         """
+        fast_result = self._try_fast_path(user_message)
+        if fast_result:
+            return fast_result
+        
+        prompt = self._build_extraction_prompt(
+            user_message, conversation_history, current_footprint, company_context,
+            conversation_summary
+        )
+        with ai_call_context('conversational_extraction'):
+            result = self.ai_service._call_gemini(prompt)
+        return self._ensure_extraction_structure(result)
+    
+    def stream_extraction(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, str]],
+        current_footprint: Optional[CarbonFootprint],
+        company_context: Dict[str, Any],
+        conversation_summary: str = ''
+    ):
+        """
+        Streaming variant of extract_from_conversation
+        
+        Yields ('token', text) events carrying the ai_response text as the model
+        writes it, then a single ('result', dict) event with the full parsed
+        extraction once the JSON is complete.
+        """
+        from .streaming import JSONStringFieldStreamer
+        
+        fast_result = self._try_fast_path(user_message)
+        if fast_result:
+            yield 'token', fast_result['ai_response']
+            yield 'result', fast_result
+            return
+        
+        prompt = self._build_extraction_prompt(
+            user_message, conversation_history, current_footprint, company_context,
+            conversation_summary
+        )
+        model = self.ai_service.model
+        
+        if not model or not gemini_breaker.allow_request():
+            record_ai_call(
+                feature='conversational_extraction',
+                prompt_tokens=estimate_tokens(prompt),
+                outcome='mock' if not model else 'circuit_open'
+            )
+            result = self._ensure_extraction_structure(self.ai_service._get_mock_response(prompt))
+            yield 'token', result['ai_response']
+            yield 'result', result
+            return
+        
+        streamer = JSONStringFieldStreamer('ai_response')
+        chunks = []
+        with track_ai_call('conversational_extraction', model, prompt) as call:
+            try:
+                last_chunk = None
+                for chunk in model.generate_content(
+                    prompt,
+                    stream=True,
+                    request_options={'timeout': gemini_breaker.call_timeout}
+                ):
+                    last_chunk = chunk
+                    text = chunk.text
+                    chunks.append(text)
+                    delta = streamer.feed(text)
+                    if delta:
+                        yield 'token', delta
+                # Usage metadata arrives with the final chunk
+                call.set_response(last_chunk, ''.join(chunks))
+                result = self.ai_service._parse_json_response(''.join(chunks))
+                gemini_breaker.record_success()
+            except Exception as e:
+                call.outcome = 'error'
+                gemini_breaker.record_failure()
+                logger.error(f"Gemini streaming call failed: {str(e)}")
+                if streamer.value:
+                    # Text already reached the user - don't contradict it with a mock
+                    result = {'ai_response': streamer.value}
+                else:
+                    result = self.ai_service._get_mock_response(prompt)
+        
+        result = self._ensure_extraction_structure(result)
+        if not streamer.value and result.get('ai_response'):
+            # Model put ai_response somewhere we couldn't stream it from
+            yield 'token', result['ai_response']
+        yield 'result', result
+    
+    @staticmethod
+    def _try_fast_path(user_message: str) -> Optional[Dict[str, Any]]:
+        """Answer simple, unambiguous inputs with the rule-based parser instead of Gemini"""
+        if not getattr(settings, 'AI_CONVERSATION_FAST_PATH_ENABLED', True):
+            return None
+        from .conversation_parser import RuleBasedExtractor, record_fast_path
+        
+        try:
+            result = RuleBasedExtractor().extract(user_message)
+        except Exception as e:
+            logger.error(f"Rule-based extraction failed: {str(e)}")
+            result = None
+        record_fast_path(result is not None)
+        return result
+    
+    @staticmethod
+    def _ensure_extraction_structure(result: Any) -> Dict[str, Any]:
+        """Fill in any keys of the extraction schema the model (or mock) left out"""
+        if not isinstance(result, dict):
+            result = {
+                "extracted_data": None,
+                "validation": {"status": "error", "anomalies": [], "warnings": []},
+                "ai_response": "I had trouble processing that input. Could you try rephrasing?",
+                "clarifying_questions": [],
+                "suggested_actions": []
+            }
+        result.setdefault("extracted_data", None)
+        result.setdefault("validation", {})
+        result.setdefault("ai_response", result.get("response") or "Processing...")
+        result.setdefault("clarifying_questions", [])
+        result.setdefault("suggested_actions", [])
+        return result
+    
+    def _build_extraction_prompt(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, str]],
+        current_footprint: Optional[CarbonFootprint],
+        company_context: Dict[str, Any],
+        conversation_summary: str = ''
+    ) -> str:
+        """Build the context-rich extraction prompt"""
         
         # Build context-rich prompt
         company_name = company_context.get('name', 'Unknown Company')
@@ -161,14 +363,14 @@ Current Footprint (Period: {current_footprint.reporting_period}):
         else:
             footprint_context = "No existing footprint data. This will be the first entry."
         
-        # Format conversation history (last 10 messages)
-        history_text = ""
-        if conversation_history:
-            recent_history = conversation_history[-10:]  # Last 10 messages
-            history_text = "\n".join([
-                f"{msg['role'].upper()}: {msg['content']}"
-                for msg in recent_history
-            ])
+        # Format conversation history (already trimmed to the token budget by
+        # ConversationMemory) behind the rolling summary of older turns
+        history_text = "\n".join([
+            f"{msg['role'].upper()}: {msg['content']}"
+            for msg in conversation_history or []
+        ])
+        if conversation_summary:
+            history_text = f"{conversation_summary}\n\n{history_text}".strip()
         
         prompt = f"""You are an expert ESG data extraction assistant for {company_name}, a {industry} company with {employees} employees.
 
@@ -199,8 +401,9 @@ Context Awareness Rules:
 - If user mentions currency (e.g., "$500 electricity bill"), note that you need kWh for accuracy
 - If values seem unusually high/low compared to current footprint, flag it
 
-Respond in this EXACT JSON format (no additional text):
+Respond in this EXACT JSON format (no additional text), with "ai_response" as the first key:
 {{
+  "ai_response": "Natural language response to the user, confirming what was extracted and any questions",
   "extracted_data": {{
     "activity_type": "electricity_consumption | fuel_combustion | vehicle_fuel | business_travel | etc",
     "scope": 1 | 2 | 3,
@@ -219,7 +422,6 @@ Respond in this EXACT JSON format (no additional text):
     "warnings": ["list of data quality concerns"],
     "comparison_to_current": "how this compares to existing footprint"
   }},
-  "ai_response": "Natural language response to the user, confirming what was extracted and any questions",
   "clarifying_questions": ["specific questions if data is ambiguous or incomplete"],
   "suggested_actions": [
     {{
@@ -238,19 +440,7 @@ IMPORTANT:
 - Be conversational and helpful in ai_response
 - Flag any data that seems off (e.g., 10x higher than usual)"""
         
-        result = self.ai_service._call_gemini(prompt)
-        
-        # Ensure result has required structure
-        if not isinstance(result, dict):
-            result = {
-                "extracted_data": None,
-                "validation": {"status": "error", "anomalies": [], "warnings": []},
-                "ai_response": "I had trouble processing that input. Could you try rephrasing?",
-                "clarifying_questions": [],
-                "suggested_actions": []
-            }
-        
-        return result
+        return prompt
     
     def predict_next_value(
         self,
@@ -295,7 +485,8 @@ Provide prediction with confidence interval in this JSON format:
   "confidence_score": <0.0-1.0>
 }}"""
         
-        return self.ai_service._call_gemini(prompt)
+        with ai_call_context('conversational_prediction'):
+            return self.ai_service._call_gemini(prompt)
     
     def generate_proactive_guidance(
         self,
@@ -355,25 +546,50 @@ Respond in JSON format:
   "completeness_score": <0-100>
 }}"""
         
-        return self.ai_service._call_gemini(prompt)
+        with ai_call_context('proactive_guidance'):
+            return self.ai_service._call_gemini(prompt)
+
 
+def _footprint_inputs(footprint: CarbonFootprint) -> Dict[str, Any]:
+    """The footprint values AI prompts are built from, for result cache keys"""
+    return {
+        'id': str(footprint.id),
+        'reporting_period': footprint.reporting_period,
+        'scope1': str(footprint.scope1_emissions),
+        'scope2': str(footprint.scope2_emissions),
+        'scope3': str(footprint.scope3_emissions),
+        'total': str(footprint.total_emissions),
+    }
 
 class AIDataValidator:
     """AI-powered data validation service"""
     
     def __init__(self):
         self.ai_service = GeminiAIService()
+        self.rule_validator = RuleBasedValidator()
     
     def validate_emission_data(self, carbon_footprint: CarbonFootprint) -> Dict[str, Any]:
-        """Validate carbon emission data using AI"""
-        cache_key = f"ai_validation_{carbon_footprint.id}"
+        """
+        Validate carbon emission data
+        
+        Deterministic rules settle clear passes and clear failures; only
+        borderline footprints are sent to Gemini, and its findings are merged
+        with the rule findings. If Gemini falls back to the mock response the
+        rule result is returned uncached, with ai_fallback set to the reason.
+        """
+        company = carbon_footprint.company
+        rule_result = self.rule_validator.validate(carbon_footprint, company)
+        if not rule_result.needs_llm:
+            return rule_result.as_response()
+        
+        cache_key = company_result_key('validation', company.id, _footprint_inputs(carbon_footprint))
         cached_result = cache.get(cache_key)
         
         if cached_result:
+            record_ai_call(feature='data_validation', company=carbon_footprint.company_id, outcome='cache_hit', cache_hit=True)
             return cached_result
         
-        company = carbon_footprint.company
-        
+        borderline = "\n".join(f"        - {reason}" for reason in rule_result.borderline_reasons)
         prompt = f"""
         Analyze this carbon emission data for anomalies and quality issues:
         
@@ -390,6 +606,9 @@ class AIDataValidator:
         - Scope 3 Emissions: {carbon_footprint.scope3_emissions} tCO2e
         - Total Emissions: {carbon_footprint.total_emissions} tCO2e
         
+        Automated checks flagged these points for review:
+{borderline}
+        
         Please analyze and provide your response in this exact JSON format:
         {{
             "validation_score": <number 0-100>,
@@ -418,13 +637,45 @@ class AIDataValidator:
         IMPORTANT: Respond ONLY with valid JSON, no additional text.
         """
         
-        result = self.ai_service._call_gemini(prompt)
+        fallbacks = []
+        with ai_call_context('data_validation', company=carbon_footprint.company_id):
+            ai_result = self.ai_service._call_gemini(prompt, on_fallback=fallbacks.append)
+        if fallbacks:
+            # The model didn't answer; its mock findings would only skew the rules'
+            result = rule_result.as_response()
+            result['ai_fallback'] = fallbacks[0]
+            return result
+        result = self._merge_validation(rule_result, ai_result)
         
         # Cache result for 1 hour
         cache.set(cache_key, result, 3600)
         
         return result
     
+    @staticmethod
+    def _merge_validation(rule_result, ai_result: Any) -> Dict[str, Any]:
+        """Combine rule findings with the model's, keeping the response schema"""
+        merged = rule_result.as_response()
+        merged['validation_method'] = 'rules+ai'
+        if not isinstance(ai_result, dict):
+            return merged
+        
+        seen = {(anomaly['field'], anomaly['message']) for anomaly in merged['anomalies']}
+        for anomaly in ai_result.get('anomalies') or []:
+            if isinstance(anomaly, dict) and (anomaly.get('field'), anomaly.get('message')) not in seen:
+                merged['anomalies'].append(anomaly)
+        merged['suggestions'].extend(
+            suggestion for suggestion in ai_result.get('suggestions') or [] if isinstance(suggestion, dict)
+        )
+        
+        ai_score = ai_result.get('validation_score')
+        if isinstance(ai_score, (int, float)):
+            # Take the lower score so neither side can mask the other's findings
+            merged['validation_score'] = min(merged['validation_score'], int(ai_score))
+        if not merged['industry_comparison']:
+            merged['industry_comparison'] = ai_result.get('industry_comparison')
+        return merged
+    
     def suggest_emission_factors(self, activity_description: str, industry: str) -> Dict[str, Any]:
         """Suggest appropriate emission factors for activities"""
         prompt = f"""
@@ -459,7 +710,8 @@ class AIDataValidator:
         IMPORTANT: Respond ONLY with valid JSON, no additional text.
         """
         
-        return self.ai_service._call_gemini(prompt)
+        with ai_call_context('emission_factor_suggestion'):
+            return self.ai_service._call_gemini(prompt)
 
 class AIBenchmarkingService:
     """AI-powered benchmarking and industry comparison"""
@@ -469,18 +721,24 @@ class AIBenchmarkingService:
     
     def benchmark_company_performance(self, company: Company) -> Dict[str, Any]:
         """Benchmark company against industry peers using AI"""
-        cache_key = f"ai_benchmark_{company.id}"
-        cached_result = cache.get(cache_key)
-        
-        if cached_result:
-            return cached_result
-        
         # Get company's latest carbon footprint
         latest_footprint = company.carbon_footprints.order_by('-created_at').first()
         
         if not latest_footprint:
             return {"error": "No carbon footprint data available"}
         
+        # Peer data isn't part of the key; peers' changes are picked up when the entry expires
+        cache_key = company_result_key('benchmark', company.id, {
+            'industry': company.industry,
+            'employees': company.employees,
+            'footprint': _footprint_inputs(latest_footprint),
+        })
+        cached_result = cache.get(cache_key)
+        
+        if cached_result:
+            record_ai_call(feature='benchmarking', company=company, outcome='cache_hit', cache_hit=True)
+            return cached_result
+        
         # Get industry peer data for context
         industry_peers = Company.objects.filter(
             industry=company.industry
@@ -519,10 +777,13 @@ class AIBenchmarkingService:
         Format as JSON with actionable insights.
         """
         
-        result = self.ai_service._call_gemini(prompt)
+        fallbacks = []
+        with ai_call_context('benchmarking', company=company):
+            result = self.ai_service._call_gemini(prompt, on_fallback=fallbacks.append)
         
-        # Cache result for 6 hours
-        cache.set(cache_key, result, 21600)
+        # Cache result for 6 hours, unless it is the mock fallback
+        if not fallbacks:
+            cache.set(cache_key, result, 21600)
         
         return result
 
@@ -534,17 +795,22 @@ class AIActionPlanGenerator:
     
     def generate_action_plan(self, company: Company) -> Dict[str, Any]:
         """Generate personalized sustainability action plan"""
-        cache_key = f"ai_action_plan_{company.id}"
-        cached_result = cache.get(cache_key)
-        
-        if cached_result:
-            return cached_result
-        
         latest_footprint = company.carbon_footprints.order_by('-created_at').first()
         
         if not latest_footprint:
             return {"error": "No carbon footprint data available"}
         
+        cache_key = company_result_key('action_plan', company.id, {
+            'industry': company.industry,
+            'employees': company.employees,
+            'footprint': _footprint_inputs(latest_footprint),
+        })
+        cached_result = cache.get(cache_key)
+        
+        if cached_result:
+            record_ai_call(feature='action_plan', company=company, outcome='cache_hit', cache_hit=True)
+            return cached_result
+        
         prompt = f"""
         Create a personalized sustainability action plan for this company:
         
@@ -585,10 +851,13 @@ class AIActionPlanGenerator:
         Format as JSON with structured action items.
         """
         
-        result = self.ai_service._call_gemini(prompt)
+        fallbacks = []
+        with ai_call_context('action_plan', company=company):
+            result = self.ai_service._call_gemini(prompt, on_fallback=fallbacks.append)
         
-        # Cache result for 24 hours
-        cache.set(cache_key, result, 86400)
+        # Cache result for 24 hours, unless it is the mock fallback
+        if not fallbacks:
+            cache.set(cache_key, result, 86400)
         
         return result
 
@@ -600,14 +869,10 @@ class AIPredictiveAnalytics:
     
     def predict_carbon_trajectory(self, company: Company, growth_plans: Dict[str, Any] = None) -> Dict[str, Any]:
         """Predict future carbon emissions based on historical data and growth plans"""
-        cache_key = f"ai_trajectory_{company.id}"
-        cached_result = cache.get(cache_key)
-        
-        if cached_result:
-            return cached_result
-        
-        # Get historical emissions data
-        historical_footprints = company.carbon_footprints.order_by('created_at')[:3]
+        # Get the three most recent reporting periods, oldest first
+        historical_footprints = list(
+            company.carbon_footprints.order_by(F('period_start').desc(nulls_last=True), '-created_at')[:3]
+        )[::-1]
         
         if len(historical_footprints) < 2:
             return {"error": "Insufficient historical data for prediction"}
@@ -630,6 +895,18 @@ class AIPredictiveAnalytics:
             "sustainability_investments": "moderate"
         }
         
+        cache_key = company_result_key('trajectory', company.id, {
+            'industry': company.industry,
+            'employees': company.employees,
+            'historical_data': historical_data,
+            'growth_plans': growth_data,
+        })
+        cached_result = cache.get(cache_key)
+        
+        if cached_result:
+            record_ai_call(feature='trajectory_prediction', company=company, outcome='cache_hit', cache_hit=True)
+            return cached_result
+        
         prompt = f"""
         Predict carbon emission trajectory based on historical data and business growth:
         
@@ -671,10 +948,13 @@ class AIPredictiveAnalytics:
         Format as JSON with yearly breakdown.
         """
         
-        result = self.ai_service._call_gemini(prompt)
+        fallbacks = []
+        with ai_call_context('trajectory_prediction', company=company):
+            result = self.ai_service._call_gemini(prompt, on_fallback=fallbacks.append)
         
-        # Cache result for 12 hours
-        cache.set(cache_key, result, 43200)
+        # Cache result for 12 hours, unless it is the mock fallback
+        if not fallbacks:
+            cache.set(cache_key, result, 43200)
         
         return result
 
@@ -692,7 +972,10 @@ class GeminiVisionService:
     def __init__(self):
         """Initialize Gemini Vision API client"""
         api_key = getattr(settings, 'GEMINI_API_KEY', None)
-        if api_key and api_key != 'your-gemini-api-key-here':
+        if fake_backend_enabled():
+            self.model = FakeGenerativeModel('gemini-2.0-flash-exp', vision=True)
+            logger.info("Gemini Vision service using the fake latency-injecting backend")
+        elif api_key and api_key != 'your-gemini-api-key-here':
             try:
                 genai.configure(api_key=api_key)
                 self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
@@ -703,6 +986,276 @@ class GeminiVisionService:
         else:
             logger.warning("Gemini API key not configured. Vision extraction will return mock data.")
             self.model = None
+        
+        # Downscale/recompress images before upload unless explicitly disabled
+        if getattr(settings, 'AI_VISION_PREPROCESSING_ENABLED', True):
+            self.preprocessor = VisionImagePreprocessor()
+        else:
+            self.preprocessor = None
+    
+    def _prepare_image(self, image) -> tuple:
+        """
+        Turn a PIL image into the content part sent to Gemini Vision
+        
+        Returns:
+            (content_part, preprocessing_stats or None)
+        """
+        if not self.preprocessor:
+            return image, None
+        return self.preprocessor.process(image)
+    
+    def _render_pdf_page(self, pdf_document, page_index: int = 0):
+        """Rasterize a PDF page just large enough for the preprocessing target"""
+        import PIL.Image
+        import io
+        import fitz  # PyMuPDF
+        
+        page = pdf_document[page_index]
+        if self.preprocessor:
+            zoom = self.preprocessor.pdf_zoom(page.rect.width, page.rect.height)
+        else:
+            zoom = 300 / 72  # 72 DPI is default, render at 300 DPI
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        return PIL.Image.open(io.BytesIO(pix.tobytes("png")))
+    
+    # Words that mark a page as carrying consumption or billing data
+    PAGE_RELEVANCE_KEYWORDS = [
+        'kwh', 'mwh', 'therm', 'm3', 'cubic', 'usage', 'consumption', 'meter',
+        'reading', 'billing period', 'service period', 'amount due', 'total',
+        'electricity', 'gas', 'water', 'supplier', 'account',
+    ]
+    
+    def _score_pdf_page(self, page) -> float:
+        """Cheap relevance score from the page's text layer (no rasterization)"""
+        text = page.get_text().lower()
+        keyword_hits = sum(text.count(keyword) for keyword in self.PAGE_RELEVANCE_KEYWORDS)
+        text_density = min(len(text) / 1500.0, 1.0)
+        return keyword_hits + text_density
+    
+    def _select_pdf_pages(self, pdf_document) -> List[int]:
+        """
+        Pick which pages to send to the model, in page order
+        
+        The first page is always kept (account and period details usually live
+        there). Scanned PDFs without a text layer score zero everywhere and
+        fall back to the leading pages.
+        """
+        max_pages = getattr(settings, 'AI_VISION_MAX_PDF_PAGES', 4)
+        page_count = len(pdf_document)
+        if page_count <= max_pages:
+            return list(range(page_count))
+        
+        scores = [(self._score_pdf_page(pdf_document[index]), index) for index in range(1, page_count)]
+        relevant = [index for score, index in sorted(scores, key=lambda item: (-item[0], item[1])) if score >= 1]
+        if not relevant:
+            return list(range(max_pages))
+        return sorted([0] + relevant[:max_pages - 1])
+    
+    def _generate_vision(self, contents: list, feature: str):
+        """Gemini Vision request with a deadline, guarded by the shared circuit breaker"""
+        timeout = getattr(settings, 'AI_VISION_CALL_TIMEOUT', 60)
+        prompt_text = contents[0] if contents and isinstance(contents[0], str) else ''
+        with track_ai_call(feature, self.model, prompt_text) as call:
+            def request():
+                response = self.model.generate_content(contents, request_options={'timeout': timeout})
+                call.set_response(response)
+                return response
+            
+            try:
+                return gemini_breaker.call(request, timeout=timeout)
+            except CircuitOpenError:
+                call.outcome = 'circuit_open'
+                raise
+            except CallDeadlineExceeded:
+                call.outcome = 'timeout'
+                raise
+    
+    def _extract_page(self, prompt: str, image) -> Dict[str, Any]:
+        """Run one page image through the model and return its parsed JSON"""
+        import re
+        image_part, _ = self._prepare_image(image)
+        response = self._generate_vision([prompt, image_part], 'utility_bill_extraction')
+        response_text = response.text.strip()
+        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group())
+        return json.loads(response_text)
+    
+    def _extract_from_pdf_pages(self, prompt: str, pdf_document, start_time: float) -> Dict[str, Any]:
+        """
+        Extract a multi-page PDF
+        
+        Pages are rasterized one at a time on the calling thread (PyMuPDF
+        documents are not thread-safe) and handed to a bounded thread pool for
+        preprocessing and the model call, so rendering overlaps with requests.
+        """
+        import contextvars
+        import time
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        
+        page_indexes = self._select_pdf_pages(pdf_document)
+        max_workers = min(len(page_indexes), getattr(settings, 'AI_VISION_PAGE_WORKERS', 3))
+        
+        page_results = []
+        errors = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for page_index in page_indexes:
+                image = self._render_pdf_page(pdf_document, page_index)
+                # Copy the caller's context so telemetry keeps its company attribution
+                context = contextvars.copy_context()
+                futures[executor.submit(context.run, self._extract_page, prompt, image)] = page_index + 1
+            
+            for future in as_completed(futures):
+                page_number = futures[future]
+                try:
+                    page_results.append((page_number, future.result()))
+                except Exception as e:
+                    logger.warning(f"Extraction failed for PDF page {page_number}: {str(e)}")
+                    errors.append(f"page {page_number}: {str(e)}")
+        
+        processing_time = int((time.time() - start_time) * 1000)
+        if not page_results:
+            return {
+                'success': False,
+                'extracted_data': {},
+                'confidence_score': 0.0,
+                'processing_time_ms': processing_time,
+                'error': '; '.join(errors) or 'No pages extracted',
+                'fields': []
+            }
+        
+        extracted_data, fields, confidence_score = self._merge_page_results(page_results)
+        logger.info(
+            f"Extracted {len(fields)} fields from PDF pages {sorted(p for p, _ in page_results)} "
+            f"of {len(pdf_document)} with {confidence_score}% confidence"
+        )
+        
+        return {
+            'success': True,
+            'extracted_data': extracted_data,
+            'confidence_score': confidence_score,
+            'processing_time_ms': processing_time,
+            'pages_processed': sorted(page_number for page_number, _ in page_results),
+            'page_count': len(pdf_document),
+            'fields': fields
+        }
+    
+    # Consumption and cost add up across pages that cover different periods or meters
+    ADDITIVE_FIELDS = ('kwh_consumed', 'cubic_meters_gas', 'liters_water', 'total_cost')
+    COVERAGE_FIELDS = ('billing_period_start', 'billing_period_end', 'meter_number')
+    
+    @staticmethod
+    def _merge_ranked(ranked: List[tuple]) -> tuple:
+        """Most confident non-null value per field (earlier page wins ties)"""
+        merged = {}
+        sources = {}
+        for confidence, page_number, data in ranked:
+            for field_name, field_value in data.items():
+                if field_value is None or merged.get(field_name) is not None:
+                    continue
+                merged[field_name] = field_value
+                sources[field_name] = (confidence, page_number)
+        return merged, sources
+    
+    @classmethod
+    def _merge_page_results(cls, page_results: List[tuple]) -> tuple:
+        """
+        Merge per-page JSON into a single extraction
+        
+        Each field takes the non-null value from the most confident page
+        (earlier page wins ties). Statements whose pages cover several billing
+        periods or meters are the exception: pages whose non-null period/meter
+        fields agree form one line item (a summary page and the matching
+        detail page fill in each other's fields), consumption and cost are
+        summed over the line items and the billing period spans all of them.
+        The line items
+        are returned under extracted_data['line_items']. Overall confidence is
+        the mean confidence of the pages that contributed at least one field.
+        
+        Returns:
+            (extracted_data, fields, confidence_score)
+        """
+        ranked = []
+        for page_number, data in page_results:
+            data = dict(data)
+            confidence = float(data.pop('confidence', 80.0) or 0.0)
+            ranked.append((confidence, page_number, data))
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        
+        extracted_data, sources = cls._merge_ranked(ranked)
+        fields = [
+            {
+                'field_name': field_name,
+                'field_value': field_value,
+                'confidence': sources[field_name][0],
+                'bounding_box': None,
+                'page_number': sources[field_name][1]
+            }
+            for field_name, field_value in extracted_data.items()
+        ]
+        contributing = {page_number: confidence for confidence, page_number in sources.values()}
+        
+        # Pages that give a period or meter and some consumption or cost
+        coverage = []
+        for item in ranked:
+            data = item[2]
+            key = {f: data[f] for f in cls.COVERAGE_FIELDS if data.get(f) is not None}
+            if not key or all(data.get(f) is None for f in cls.ADDITIVE_FIELDS):
+                continue
+            for group_key, group in coverage:
+                if all(group_key.get(f, value) == value for f, value in key.items()):
+                    group_key.update(key)
+                    group.append(item)
+                    break
+            else:
+                coverage.append((key, [item]))
+        
+        if len(coverage) > 1:
+            line_items = []
+            for _, group in coverage:
+                item, item_sources = cls._merge_ranked(group)
+                item['page_numbers'] = sorted(page_number for _, page_number, _ in group)
+                item['confidence'] = min(confidence for confidence, _ in item_sources.values())
+                line_items.append(item)
+                contributing.update({page_number: confidence for confidence, page_number, _ in group})
+            line_items.sort(key=lambda item: (str(item.get('billing_period_start') or ''), item['page_numbers']))
+            
+            summed = {}
+            for field_name in cls.ADDITIVE_FIELDS:
+                values = [item[field_name] for item in line_items if item.get(field_name) is not None]
+                if values:
+                    summed[field_name] = round(sum(float(value) for value in values), 4)
+            starts = [item['billing_period_start'] for item in line_items if item.get('billing_period_start')]
+            ends = [item['billing_period_end'] for item in line_items if item.get('billing_period_end')]
+            if starts:
+                summed['billing_period_start'] = min(starts)
+            if ends:
+                summed['billing_period_end'] = max(ends)
+            
+            extracted_data.update(summed)
+            extracted_data['line_items'] = line_items
+            fields = [field for field in fields if field['field_name'] not in summed]
+            for field_name, field_value in summed.items():
+                parts = [item for item in line_items if item.get(field_name) is not None]
+                fields.append({
+                    'field_name': field_name,
+                    'field_value': field_value,
+                    'confidence': min(item['confidence'] for item in parts),
+                    'bounding_box': None,
+                    'page_number': None,
+                    'page_numbers': sorted(page for item in parts for page in item['page_numbers'])
+                })
+        
+        # Keep keys the model returned as null on every page
+        for _, _, data in ranked:
+            for field_name in data:
+                extracted_data.setdefault(field_name, None)
+        
+        confidence_score = (
+            round(sum(contributing.values()) / len(contributing), 2) if contributing else 0.0
+        )
+        return extracted_data, fields, confidence_score
     
     def extract_from_utility_bill(
         self,
@@ -731,6 +1284,7 @@ class GeminiVisionService:
                     'total_cost': float,
                     'currency': 'USD',
                     'account_number': str,
+                    'meter_number': str,
                     'supplier_name': str,
                     'meter_reading_start': float,
                     'meter_reading_end': float
@@ -765,6 +1319,7 @@ Required fields to extract:
 - total_cost (as float)
 - currency (e.g., USD, EUR, GBP)
 - account_number (string)
+- meter_number (string if available)
 - supplier_name (string)
 - meter_reading_start (float if available)
 - meter_reading_end (float if available)
@@ -823,20 +1378,16 @@ Include a "confidence" score (0-100) based on image quality and clarity.
                     # Open PDF from bytes
                     pdf_document = fitz.open(stream=file_data, filetype="pdf")
                     
-                    # Get first page (utility bills are usually single page or first page has key info)
-                    page = pdf_document[0]
-                    
-                    # Render page to image (300 DPI for good quality)
-                    zoom = 300 / 72  # 72 DPI is default, we want 300 DPI
-                    mat = fitz.Matrix(zoom, zoom)
-                    pix = page.get_pixmap(matrix=mat)
-                    
-                    # Convert to PIL Image
-                    img_data = pix.tobytes("png")
-                    image = PIL.Image.open(io.BytesIO(img_data))
+                    # Multi-page invoices and quarterly statements: extract relevant pages in parallel
+                    if len(pdf_document) > 1:
+                        try:
+                            return self._extract_from_pdf_pages(prompt, pdf_document, start_time)
+                        finally:
+                            pdf_document.close()
                     
+                    image = self._render_pdf_page(pdf_document, 0)
                     pdf_document.close()
-                    logger.info(f"Converted PDF to image for extraction (page 1 of {len(pdf_document)})")
+                    logger.info("Converted single-page PDF to image for extraction")
                     
                 except ImportError:
                     logger.warning("PyMuPDF not installed - returning mock data for PDF")
@@ -856,7 +1407,8 @@ Include a "confidence" score (0-100) based on image quality and clarity.
                 image = PIL.Image.open(io.BytesIO(file_data))
             
             # Call Gemini Vision API
-            response = self.model.generate_content([prompt, image])
+            image_part, preprocessing = self._prepare_image(image)
+            response = self._generate_vision([prompt, image_part], 'utility_bill_extraction')
             response_text = response.text.strip()
             
             # Parse JSON response
@@ -883,6 +1435,7 @@ Include a "confidence" score (0-100) based on image quality and clarity.
                 'extracted_data': extracted_data,
                 'confidence_score': float(confidence_score),
                 'processing_time_ms': processing_time,
+                'preprocessing': preprocessing,
                 'fields': []  # TODO: Implement field-level extraction with bounding boxes
             }
             
@@ -955,9 +1508,10 @@ If the meter reading is unclear, provide your best estimate and lower the confid
             import PIL.Image
             import io
             image = PIL.Image.open(io.BytesIO(image_data))
+            image_part, preprocessing = self._prepare_image(image)
             
             # Call Gemini Vision
-            response = self.model.generate_content([prompt, image])
+            response = self._generate_vision([prompt, image_part], 'meter_photo_reading')
             response_text = response.text.strip()
             
             # Parse response
@@ -975,7 +1529,8 @@ If the meter reading is unclear, provide your best estimate and lower the confid
                 'success': True,
                 **result,
                 'confidence_score': float(confidence),
-                'processing_time_ms': processing_time
+                'processing_time_ms': processing_time,
+                'preprocessing': preprocessing
             }
             
         except Exception as e:
@@ -1077,9 +1632,10 @@ Return ONLY valid JSON:
                 return self.extract_from_fuel_receipt(b'', 'image/jpeg')
             
             image = PIL.Image.open(io.BytesIO(file_data))
+            image_part, preprocessing = self._prepare_image(image)
             
             # Call Gemini Vision
-            response = self.model.generate_content([prompt, image])
+            response = self._generate_vision([prompt, image_part], 'fuel_receipt_extraction')
             response_text = response.text.strip()
             
             # Parse response
@@ -1102,7 +1658,8 @@ Return ONLY valid JSON:
                 'success': True,
                 'extracted_data': extracted_data,
                 'confidence_score': float(confidence),
-                'processing_time_ms': processing_time
+                'processing_time_ms': processing_time,
+                'preprocessing': preprocessing
             }
             
         except Exception as e:
@@ -0,0 +1,263 @@
+"""
+Telemetry for AI calls: latency, token usage, outcome and cache hits
+
+Every Gemini call site wraps the request in ``track_ai_call``. The feature name
+and company come from the surrounding ``ai_call_context`` so service methods
+don't have to thread them through every helper. Records are buffered in memory
+and written to AICallLog with bulk_create, so telemetry adds no query to the
+request that made the call in the common case.
+
+Reports are aggregated in the database: counts and token sums with one
+grouped query, latency percentiles from a per-group latency histogram whose
+size doesn't depend on how many calls were logged.
+"""
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional
+import atexit
+import contextvars
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, When
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+_call_context: contextvars.ContextVar = contextvars.ContextVar('ai_call_context', default={})
+
+
+@contextmanager
+def ai_call_context(feature: Optional[str] = None, company=None):
+    """Attribute AI calls made inside the block to a feature and company"""
+    context = dict(_call_context.get())
+    if feature:
+        context['feature'] = feature
+    if company is not None:
+        context['company_id'] = getattr(company, 'id', company)
+    token = _call_context.set(context)
+    try:
+        yield
+    finally:
+        _call_context.reset(token)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) when the API doesn't report usage"""
+    return len(text or '') // 4
+
+
+def model_name(model) -> str:
+    name = getattr(model, 'model_name', None)
+    return name if isinstance(name, str) else ''
+
+
+class TelemetryBuffer:
+    """Collects AICallLog rows in memory and writes them in batches"""
+
+    def __init__(self, max_size=None, flush_interval=None):
+        self.max_size = max_size or getattr(settings, 'AI_TELEMETRY_BUFFER_SIZE', 50)
+        self.flush_interval = flush_interval or getattr(settings, 'AI_TELEMETRY_FLUSH_INTERVAL', 30)
+        self._records = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+            due = (
+                len(self._records) >= self.max_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        from .models import AICallLog
+
+        with self._lock:
+            records, self._records = self._records, []
+            self._last_flush = time.monotonic()
+        if not records:
+            return 0
+        try:
+            AICallLog.objects.bulk_create(records)
+        except Exception as e:
+            # Telemetry must never break the call it describes
+            logger.error(f"Failed to write {len(records)} AI telemetry records: {str(e)}")
+            return 0
+        return len(records)
+
+    def clear(self):
+        with self._lock:
+            self._records = []
+
+    def pending(self) -> int:
+        return len(self._records)
+
+
+telemetry_buffer = TelemetryBuffer()
+atexit.register(telemetry_buffer.flush)
+
+
+def record_ai_call(feature: Optional[str] = None, model: str = '', prompt_tokens: int = 0,
+                   response_tokens: int = 0, latency_ms: int = 0, outcome: str = 'success',
+                   cache_hit: bool = False, company=None):
+    """Buffer one AICallLog row, filling feature/company from the current context"""
+    if not getattr(settings, 'AI_TELEMETRY_ENABLED', True):
+        return
+    from .models import AICallLog
+
+    context = _call_context.get()
+    company_id = getattr(company, 'id', company) if company is not None else context.get('company_id')
+    telemetry_buffer.add(AICallLog(
+        feature=feature or context.get('feature') or 'unattributed',
+        model_name=model or '',
+        company_id=company_id,
+        prompt_tokens=prompt_tokens,
+        response_tokens=response_tokens,
+        latency_ms=latency_ms,
+        outcome=outcome,
+        cache_hit=cache_hit,
+        created_at=timezone.now(),
+    ))
+
+
+class TrackedCall:
+    """Mutable state of a call in progress; see track_ai_call"""
+
+    def __init__(self, prompt_text: str):
+        self.outcome = 'success'
+        self.prompt_tokens = estimate_tokens(prompt_text)
+        self.response_tokens = 0
+        self.finished = False
+
+    def set_response(self, response, response_text: Optional[str] = None):
+        """Take token counts from the response's usage metadata, or estimate them"""
+        if self.finished:
+            return  # deadline already passed and the call was recorded
+        usage = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(usage, 'prompt_token_count', None)
+        response_tokens = getattr(usage, 'candidates_token_count', None)
+        if isinstance(prompt_tokens, int):
+            self.prompt_tokens = prompt_tokens
+        if isinstance(response_tokens, int):
+            self.response_tokens = response_tokens
+        else:
+            if response_text is None:
+                try:
+                    response_text = response.text
+                except Exception:
+                    response_text = ''
+            self.response_tokens = estimate_tokens(response_text if isinstance(response_text, str) else '')
+
+
+@contextmanager
+def track_ai_call(feature: Optional[str], model, prompt_text: str = ''):
+    """
+    Record latency, tokens and outcome of the AI call made inside the block
+
+    An exception leaving the block is recorded as an error and re-raised. Set
+    ``call.outcome`` for results that aren't a plain success (timeouts,
+    fallbacks) and call ``call.set_response(response)`` with the SDK response.
+    """
+    call = TrackedCall(prompt_text)
+    started = time.monotonic()
+    try:
+        yield call
+    except Exception:
+        if call.outcome == 'success':
+            call.outcome = 'error'
+        raise
+    finally:
+        call.finished = True
+        record_ai_call(
+            feature=feature,
+            model=model_name(model),
+            prompt_tokens=call.prompt_tokens,
+            response_tokens=call.response_tokens,
+            latency_ms=int((time.monotonic() - started) * 1000),
+            outcome=call.outcome,
+        )
+
+
+ERROR_OUTCOMES = ('error', 'timeout')
+
+# Calls answered without a model request: their latency is the mock's, not Gemini's
+UNSENT_OUTCOMES = ('mock', 'circuit_open')
+
+# Latency histogram buckets: 10ms below 1s, 100ms below 10s, 1s above
+LATENCY_BUCKET = Case(
+    When(latency_ms__lt=1000, then=F('latency_ms') / 10 * 10),
+    When(latency_ms__lt=10000, then=F('latency_ms') / 100 * 100),
+    default=F('latency_ms') / 1000 * 1000,
+    output_field=IntegerField(),
+)
+
+
+def _histogram_percentile(histogram, total, fraction):
+    """Nearest-rank percentile from ascending (bucket, count) pairs, as the bucket's lower bound"""
+    if not total:
+        return None
+    rank = max(math.ceil(fraction * total), 1)
+    seen = 0
+    for bucket, count in histogram:
+        seen += count
+        if seen >= rank:
+            return bucket
+    return histogram[-1][0]
+
+
+def summarize_calls(calls, group_by: Iterable[str]) -> list:
+    """
+    Per-group latency percentiles and token spend for an AICallLog queryset
+
+    Two grouped queries, whatever the number of calls. Latency percentiles
+    only count calls that reached the model (cache hits and coalesced calls
+    are reported separately; mock and circuit-open fallbacks are left out)
+    and have the resolution of LATENCY_BUCKET.
+    """
+    group_by = list(group_by)
+    calls = calls.order_by()
+    totals = calls.values(*group_by).annotate(
+        calls=Count('id'),
+        cache_hits=Count('id', filter=Q(cache_hit=True)),
+        errors=Count('id', filter=Q(outcome__in=ERROR_OUTCOMES)),
+        prompt_tokens=Sum('prompt_tokens'),
+        response_tokens=Sum('response_tokens'),
+    )
+
+    histograms: Dict[tuple, list] = {}
+    for row in (
+        calls.filter(cache_hit=False).exclude(outcome__in=UNSENT_OUTCOMES)
+        .annotate(latency_bucket=LATENCY_BUCKET)
+        .values(*group_by, 'latency_bucket')
+        .annotate(count=Count('id'))
+        .order_by('latency_bucket')
+    ):
+        key = tuple(row[field] for field in group_by)
+        histograms.setdefault(key, []).append((row['latency_bucket'], row['count']))
+
+    summary = []
+    for row in totals:
+        key = tuple(row[field] for field in group_by)
+        histogram = histograms.get(key, [])
+        reached_model = sum(count for _, count in histogram)
+        entry = {field: str(value) if value is not None else None for field, value in zip(group_by, key)}
+        entry.update({
+            'calls': row['calls'],
+            'cache_hits': row['cache_hits'],
+            'errors': row['errors'],
+            'prompt_tokens': row['prompt_tokens'] or 0,
+            'response_tokens': row['response_tokens'] or 0,
+        })
+        entry['total_tokens'] = entry['prompt_tokens'] + entry['response_tokens']
+        entry['cache_hit_rate'] = round(row['cache_hits'] / row['calls'], 4)
+        entry['error_rate'] = round(row['errors'] / row['calls'], 4)
+        entry['p50_latency_ms'] = _histogram_percentile(histogram, reached_model, 0.5)
+        entry['p95_latency_ms'] = _histogram_percentile(histogram, reached_model, 0.95)
+        summary.append(entry)
+    summary.sort(key=lambda entry: -entry['total_tokens'])
+    return summary
@@ -2,14 +2,15 @@
 AI-powered API views for Phase 5: Smart Data Management & Validation
 """
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.settings import api_settings
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django_ratelimit.decorators import ratelimit
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from django.core.cache import cache
 from django.shortcuts import get_object_or_404
+from django.http import Http404
 from django.utils import timezone
 from django.db import models
 from decimal import Decimal
@@ -23,6 +24,8 @@ from .ai_services import (
     AIActionPlanGenerator,
     AIPredictiveAnalytics
 )
+from .ai_telemetry import ai_call_context
+from .streaming import EventStreamRenderer
 
 logger = logging.getLogger(__name__)
 
@@ -115,7 +118,6 @@ def ai_suggest_emission_factors(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @ratelimit(key='user', rate='20/h', method='GET')
-@cache_page(60 * 60 * 6)  # Cache for 6 hours
 def ai_benchmark_company(request):
     """
     AI-powered company benchmarking against industry peers
@@ -241,6 +243,8 @@ def ai_service_health(request):
     """
     try:
         from django.conf import settings
+        from .conversation_parser import get_fast_path_stats
+        from .circuit_breaker import gemini_breaker
         
         health_status = {
             'ai_features_enabled': getattr(settings, 'ENABLE_AI_FEATURES', False),
@@ -259,6 +263,10 @@ def ai_service_health(request):
                 'benchmarking': '20/hour',
                 'action_plans': '10/hour',
                 'predictions': '5/hour'
+            },
+            'conversation_fast_path': get_fast_path_stats(),
+            'circuit_breakers': {
+                'gemini': gemini_breaker.get_state()
             }
         }
         
@@ -271,6 +279,65 @@ def ai_service_health(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+
+# Longest window the telemetry report will scan
+MAX_TELEMETRY_DAYS = 90
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@ratelimit(key='user', rate='60/h', method='GET')
+def ai_telemetry_report(request):
+    """
+    Latency percentiles, token spend and cache hit rates for AI calls
+    
+    GET /api/v1/carbon/ai/telemetry/?days=7
+    
+    days is capped at MAX_TELEMETRY_DAYS. Superusers see every company; other users only see calls made for their
+    own company.
+    """
+    try:
+        from datetime import timedelta
+        from .ai_telemetry import summarize_calls, telemetry_buffer
+        from .models import AICallLog
+        
+        try:
+            days = min(max(int(request.query_params.get('days', 7)), 1), MAX_TELEMETRY_DAYS)
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'days must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Include calls still waiting in this process's buffer
+        telemetry_buffer.flush()
+        
+        calls = AICallLog.objects.filter(created_at__gte=timezone.now() - timedelta(days=days))
+        if not request.user.is_superuser:
+            if not request.user.company:
+                return Response(
+                    {'error': 'User must be associated with a company'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            calls = calls.filter(company_id=request.user.company_id)
+        
+        by_feature = summarize_calls(calls, ['feature'])
+        
+        return Response({
+            'period_days': days,
+            'total_calls': sum(entry['calls'] for entry in by_feature),
+            'by_feature': by_feature,
+            'by_company': summarize_calls(calls, ['company_id', 'feature']),
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"AI telemetry report error: {str(e)}")
+        return Response(
+            {'error': 'Telemetry report failed'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @ratelimit(key='user', rate='100/h', method='POST')
@@ -330,6 +397,142 @@ def ai_conversational_data_entry(request):
 # Smart Data Entry System - Phase 1 MVP Endpoints
 # ============================================================================
 
+def _start_conversation_turn(request):
+    """
+    Validate a conversational extraction request, resolve its session and
+    footprint, and save the user's message
+    
+    Returns:
+        (turn, None) on success, where turn is a dict of the resolved context,
+        or (None, error Response)
+    """
+    from .models import ConversationSession, ConversationMessage
+    from .conversation_memory import ConversationMemory
+    
+    # Get request data. Any client-supplied conversation_history is ignored -
+    # the history comes from the session's stored messages.
+    message = request.data.get('message', '').strip()
+    footprint_id = request.data.get('current_footprint_id')
+    session_id = request.data.get('session_id')
+    
+    if not message:
+        return None, Response(
+            {'error': 'message is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Get user's company
+    if not request.user.company:
+        return None, Response(
+            {'error': 'User must be associated with a company'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    company = request.user.company
+    
+    # Get or create conversation session
+    if session_id:
+        session = get_object_or_404(
+            ConversationSession,
+            id=session_id,
+            company=company
+        )
+    else:
+        # Create new session
+        session = ConversationSession.objects.create(
+            company=company,
+            created_by=request.user,
+            status='active',
+            title=f"Conversation {timezone.now().strftime('%Y-%m-%d %H:%M')}"
+        )
+        session.participants.add(request.user)
+    
+    # Get current footprint
+    current_footprint = None
+    if footprint_id:
+        current_footprint = get_object_or_404(
+            CarbonFootprint,
+            id=footprint_id,
+            company=company
+        )
+    elif session.footprint:
+        current_footprint = session.footprint
+    else:
+        # Get most recent footprint
+        current_footprint = company.carbon_footprints.order_by('-created_at').first()
+    
+    # Build company context
+    company_context = {
+        'name': company.name,
+        'industry': company.industry,
+        'employees': company.employees,
+    }
+    
+    # Compile the server-side history before this turn's message is added
+    memory = ConversationMemory(session)
+    conversation_context = memory.get_context()
+    
+    # Save user message
+    user_message = ConversationMessage.objects.create(
+        session=session,
+        author=request.user,
+        role='user',
+        content=message
+    )
+    
+    return {
+        'message': message,
+        'conversation_history': conversation_context['messages'],
+        'conversation_summary': conversation_context['summary'],
+        'memory': memory,
+        'session': session,
+        'current_footprint': current_footprint,
+        'company_context': company_context,
+        'user_message': user_message,
+    }, None
+
+
+def _finish_conversation_turn(turn, extraction_result, processing_time):
+    """
+    Save the assistant's reply, update session statistics and build the
+    response payload shared by the blocking and streaming endpoints
+    """
+    from .models import ConversationMessage
+    
+    session = turn['session']
+    
+    # Save AI response message
+    ai_message = ConversationMessage.objects.create(
+        session=session,
+        role='assistant',
+        content=extraction_result.get('ai_response') or 'Processing...',
+        extracted_data=extraction_result.get('extracted_data'),
+        confidence_score=extraction_result.get('extracted_data', {}).get('confidence', 0) * 100 if extraction_result.get('extracted_data') else None,
+        processed_at=timezone.now(),
+        processing_time_ms=processing_time
+    )
+    turn['memory'].record_messages(turn['user_message'], ai_message)
+    
+    # Update session statistics
+    if extraction_result.get('extracted_data'):
+        session.record_extraction(
+            confidence=ai_message.confidence_score,
+            emissions=extraction_result['extracted_data'].get('calculated_emissions')
+        )
+    
+    return {
+        'success': True,
+        'session_id': str(session.id),
+        'message_id': str(ai_message.id),
+        'extracted_data': extraction_result.get('extracted_data'),
+        'validation': extraction_result.get('validation', {}),
+        'ai_response': extraction_result.get('ai_response'),
+        'clarifying_questions': extraction_result.get('clarifying_questions', []),
+        'suggested_actions': extraction_result.get('suggested_actions', []),
+        'processing_time_ms': processing_time,
+        'session_summary': session.get_summary()
+    }
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @ratelimit(key='user', rate='100/h', method='POST')
@@ -341,135 +544,26 @@ def ai_extract_from_conversation(request):
     """
     try:
         from .ai_services import ConversationalAIService
-        from .models import ConversationSession, ConversationMessage
         import time
         
-        # Get request data
-        message = request.data.get('message', '').strip()
-        conversation_history = request.data.get('conversation_history', [])
-        footprint_id = request.data.get('current_footprint_id')
-        session_id = request.data.get('session_id')
-        company_id = request.data.get('company_id')
-        
-        if not message:
-            return Response(
-                {'error': 'message is required'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Get user's company
-        if not request.user.company:
-            return Response(
-                {'error': 'User must be associated with a company'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        company = request.user.company
-        
-        # Get or create conversation session
-        if session_id:
-            session = get_object_or_404(
-                ConversationSession,
-                id=session_id,
-                company=company
-            )
-        else:
-            # Create new session
-            session = ConversationSession.objects.create(
-                company=company,
-                created_by=request.user,
-                status='active',
-                title=f"Conversation {timezone.now().strftime('%Y-%m-%d %H:%M')}"
-            )
-            session.participants.add(request.user)
-        
-        # Get current footprint
-        current_footprint = None
-        if footprint_id:
-            current_footprint = get_object_or_404(
-                CarbonFootprint,
-                id=footprint_id,
-                company=company
-            )
-        elif session.footprint:
-            current_footprint = session.footprint
-        else:
-            # Get most recent footprint
-            current_footprint = company.carbon_footprints.order_by('-created_at').first()
-        
-        # Build company context
-        company_context = {
-            'name': company.name,
-            'industry': company.industry,
-            'employees': company.employees,
-        }
-        
-        # Save user message
         start_time = time.time()
-        user_message = ConversationMessage.objects.create(
-            session=session,
-            author=request.user,
-            role='user',
-            content=message
-        )
+        turn, error_response = _start_conversation_turn(request)
+        if error_response:
+            return error_response
         
         # Call AI service
         ai_service = ConversationalAIService()
-        extraction_result = ai_service.extract_from_conversation(
-            user_message=message,
-            conversation_history=conversation_history,
-            current_footprint=current_footprint,
-            company_context=company_context
-        )
+        with ai_call_context(company=turn['session'].company_id):
+            extraction_result = ai_service.extract_from_conversation(
+                user_message=turn['message'],
+                conversation_history=turn['conversation_history'],
+                current_footprint=turn['current_footprint'],
+                company_context=turn['company_context'],
+                conversation_summary=turn['conversation_summary']
+            )
         
         processing_time = int((time.time() - start_time) * 1000)
-        
-        # Save AI response message
-        ai_message = ConversationMessage.objects.create(
-            session=session,
-            role='assistant',
-            content=extraction_result.get('ai_response', 'Processing...'),
-            extracted_data=extraction_result.get('extracted_data'),
-            confidence_score=extraction_result.get('extracted_data', {}).get('confidence', 0) * 100 if extraction_result.get('extracted_data') else None,
-            processed_at=timezone.now(),
-            processing_time_ms=processing_time
-        )
-        
-        # Update session statistics
-        if extraction_result.get('extracted_data'):
-            session.data_entries_count += 1
-            
-            # Calculate emissions added
-            emissions_added = extraction_result['extracted_data'].get('calculated_emissions', 0)
-            if emissions_added:
-                session.total_emissions_added += Decimal(str(emissions_added))
-            
-            # Update average confidence
-            if session.data_entries_count > 0:
-                messages_with_data = session.messages.filter(
-                    extracted_data__isnull=False,
-                    confidence_score__isnull=False
-                )
-                if messages_with_data.exists():
-                    avg_confidence = messages_with_data.aggregate(
-                        models.Avg('confidence_score')
-                    )['confidence_score__avg']
-                    session.average_confidence = avg_confidence or 0
-            
-            session.save()
-        
-        # Prepare response
-        response_data = {
-            'success': True,
-            'session_id': str(session.id),
-            'message_id': str(ai_message.id),
-            'extracted_data': extraction_result.get('extracted_data'),
-            'validation': extraction_result.get('validation', {}),
-            'ai_response': extraction_result.get('ai_response'),
-            'clarifying_questions': extraction_result.get('clarifying_questions', []),
-            'suggested_actions': extraction_result.get('suggested_actions', []),
-            'processing_time_ms': processing_time,
-            'session_summary': session.get_summary()
-        }
+        response_data = _finish_conversation_turn(turn, extraction_result, processing_time)
         
         return Response(response_data, status=status.HTTP_200_OK)
         
@@ -481,6 +575,87 @@ def ai_extract_from_conversation(request):
         )
 
 
+@api_view(['POST'])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer])
+@permission_classes([IsAuthenticated])
+@ratelimit(key='user', rate='100/h', method='POST')
+def ai_extract_from_conversation_stream(request):
+    """
+    Streaming variant of ai_extract_from_conversation (server-sent events)
+    
+    POST /api/v1/carbon/ai/extract-from-conversation/stream/
+    
+    Same request body as the blocking endpoint. The response is
+    text/event-stream with these events:
+    - session: {session_id, user_message_id} - sent immediately
+    - token: {text} - ai_response text as the model generates it
+    - result: the same payload the blocking endpoint returns, sent once the
+      model's JSON is complete and the assistant message has been saved
+    - error: {error}
+    """
+    from django.http import StreamingHttpResponse
+    from .ai_services import ConversationalAIService
+    from .streaming import sse_event
+    import time
+    
+    start_time = time.time()
+    try:
+        turn, error_response = _start_conversation_turn(request)
+    except Http404:
+        raise
+    except Exception as e:
+        logger.error(f"Conversational extraction error: {str(e)}", exc_info=True)
+        return Response(
+            {'error': f'Extraction service error: {str(e)}'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    if error_response:
+        return error_response
+    
+    def event_stream():
+        session = turn['session']
+        yield sse_event('session', {
+            'session_id': str(session.id),
+            'user_message_id': str(turn['user_message'].id),
+        })
+        
+        try:
+            ai_service = ConversationalAIService()
+            extraction_result = None
+            # The generator is resumed after each yield, so the telemetry
+            # context is set around each step rather than across the yields
+            events = ai_service.stream_extraction(
+                user_message=turn['message'],
+                conversation_history=turn['conversation_history'],
+                current_footprint=turn['current_footprint'],
+                company_context=turn['company_context'],
+                conversation_summary=turn['conversation_summary']
+            )
+            while True:
+                with ai_call_context(company=session.company_id):
+                    step = next(events, None)
+                if step is None:
+                    break
+                event, payload = step
+                if event == 'token':
+                    yield sse_event('token', {'text': payload})
+                else:
+                    extraction_result = payload
+            
+            processing_time = int((time.time() - start_time) * 1000)
+            response_data = _finish_conversation_turn(turn, extraction_result, processing_time)
+            yield sse_event('result', response_data)
+            
+        except Exception as e:
+            logger.error(f"Conversational streaming error: {str(e)}", exc_info=True)
+            yield sse_event('error', {'error': f'Extraction service error: {str(e)}'})
+    
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # disable proxy buffering (nginx)
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @ratelimit(key='user', rate='100/h', method='POST')
@@ -806,102 +981,30 @@ def upload_document(request):
                 company=company
             )
         
+        # Identical content already stored for this company shares its blob
+        from .document_processing import find_original_document, process_document
+        content_hash = UploadedDocument.compute_content_hash(uploaded_file)
+        original = find_original_document(company, content_hash)
+        
         # Create UploadedDocument instance
         document = UploadedDocument.objects.create(
             company=company,
             uploaded_by=request.user,
             conversation_session=conversation_session,
-            file=uploaded_file,
+            file=original.file.name if original else uploaded_file,
             file_name=uploaded_file.name,
             file_size=uploaded_file.size,
             mime_type=uploaded_file.content_type,
+            content_hash=content_hash,
+            duplicate_of=original,
             document_type=document_type,
             extraction_status='pending',
             footprint=footprint
         )
         
-        # Trigger AI extraction (synchronous for now - can be made async with Celery later)
-        try:
-            from .ai_services import GeminiVisionService
-            from .models import DocumentExtractionField
-            
-            vision_service = GeminiVisionService()
-            document.extraction_status = 'processing'
-            document.save(update_fields=['extraction_status'])
-            
-            # Read file data
-            document.file.seek(0)
-            file_data = document.file.read()
-            
-            # Choose extraction method based on document type
-            if document_type == 'utility_bill':
-                result = vision_service.extract_from_utility_bill(
-                    file_data,
-                    uploaded_file.content_type,
-                    document_type
-                )
-            elif document_type == 'meter_photo':
-                result = vision_service.read_meter_photo(
-                    file_data,
-                    meter_type='electricity'  # TODO: Make this dynamic
-                )
-            elif document_type in ['fuel_receipt', 'travel_receipt']:
-                result = vision_service.extract_from_fuel_receipt(
-                    file_data,
-                    uploaded_file.content_type
-                )
-            else:
-                # Generic extraction for invoices and other types
-                result = vision_service.extract_from_utility_bill(
-                    file_data,
-                    uploaded_file.content_type,
-                    document_type
-                )
-            
-            # Update document with extraction results
-            if result.get('success'):
-                document.extraction_status = 'completed'
-                document.extracted_data = result.get('extracted_data', {})
-                document.confidence_score = Decimal(str(result.get('confidence_score', 0)))
-                document.processing_time_ms = result.get('processing_time_ms', 0)
-                document.gemini_model_used = 'gemini-2.0-flash-exp'
-                
-                # Create DocumentExtractionField instances for each extracted field
-                for field_name, field_value in document.extracted_data.items():
-                    if field_value is not None:
-                        # Determine field type
-                        field_type = 'text'
-                        if isinstance(field_value, (int, float)):
-                            field_type = 'number'
-                        elif 'date' in field_name.lower():
-                            field_type = 'date'
-                        elif 'cost' in field_name.lower() or 'price' in field_name.lower():
-                            field_type = 'currency'
-                        
-                        DocumentExtractionField.objects.create(
-                            document=document,
-                            field_name=field_name,
-                            field_value=str(field_value),
-                            field_type=field_type,
-                            confidence=document.confidence_score
-                        )
-                
-                logger.info(
-                    f"Document extraction completed: {document.id} "
-                    f"(confidence: {document.confidence_score}%)"
-                )
-            else:
-                document.extraction_status = 'failed'
-                document.extraction_error = result.get('error', 'Unknown extraction error')
-                logger.error(f"Document extraction failed: {document.id} - {document.extraction_error}")
-            
-            document.save()
-            
-        except Exception as e:
-            document.extraction_status = 'failed'
-            document.extraction_error = str(e)
-            document.save()
-            logger.error(f"Document extraction exception: {document.id} - {str(e)}", exc_info=True)
+        # Reuse a previous extraction of the same content, otherwise run AI extraction
+        # (synchronous here - batch uploads go through the Celery task)
+        reused_from = process_document(document)
         
         logger.info(
             f"Document uploaded: {document.id} by {request.user.email} "
@@ -917,6 +1020,8 @@ def upload_document(request):
                 'mime_type': document.mime_type,
                 'document_type': document.document_type,
                 'extraction_status': document.extraction_status,
+                'duplicate_of': str(document.duplicate_of_id) if document.duplicate_of_id else None,
+                'reused_extraction': reused_from is not None,
                 'created_at': document.created_at.isoformat(),
                 'message': 'Document uploaded successfully. Extraction will begin shortly.'
             },
@@ -931,6 +1036,170 @@ def upload_document(request):
         )
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@ratelimit(key='user', rate='10/h', method='POST')
+def upload_document_batch(request):
+    """
+    Upload many documents at once for background AI extraction
+    
+    POST /api/v1/carbon/ai/upload-documents/batch/
+    
+    Accepts multipart/form-data with:
+    - files: One or more document files (PDF, JPG, PNG) and/or zip archives of them
+    - document_type: Applied to every document in the batch
+    
+    Files are spooled to disk while uploading (never buffered in memory),
+    stored, and extracted by Celery workers with a per-company concurrency cap.
+    
+    Returns:
+    - batch_id: UUID to poll at /ai/document-batches/<batch_id>/
+    - progress: Aggregate extraction status counts
+    - documents: Created documents
+    - rejected: Files that were skipped and why
+    """
+    from .upload_handlers import HashingTemporaryFileUploadHandler
+    from .document_processing import create_document_batch, DOCUMENT_TYPES
+    from .tasks import extract_uploaded_document
+    
+    # Must be set before the multipart body is parsed
+    request._request.upload_handlers = [HashingTemporaryFileUploadHandler(request._request)]
+    
+    try:
+        # Validate company association
+        try:
+            company = request.user.company
+        except AttributeError:
+            company = None
+        if not company:
+            return Response(
+                {'error': 'User must be associated with a company'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        uploaded_files = request.FILES.getlist('files') or request.FILES.getlist('file')
+        if not uploaded_files:
+            return Response(
+                {'error': 'No files provided. Include one or more files in multipart/form-data.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        document_type = request.data.get('document_type', 'other')
+        if document_type not in DOCUMENT_TYPES:
+            return Response(
+                {
+                    'error': f'Invalid document_type: {document_type}',
+                    'valid_types': DOCUMENT_TYPES
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        batch, documents, rejected = create_document_batch(
+            company, request.user, document_type, uploaded_files
+        )
+        
+        # Identical files are extracted once; their copies are settled with the result
+        queued_hashes = set()
+        for document in documents:
+            if document.content_hash and document.content_hash in queued_hashes:
+                continue
+            queued_hashes.add(document.content_hash)
+            extract_uploaded_document.delay(str(document.id))
+        
+        logger.info(
+            f"Document batch uploaded: {batch.id} by {request.user.email} "
+            f"({len(documents)} documents, {len(rejected)} rejected)"
+        )
+        
+        return Response(
+            {
+                'batch_id': str(batch.id),
+                'document_type': batch.document_type,
+                'progress': batch.get_progress(),
+                'documents': [
+                    {
+                        'document_id': str(document.id),
+                        'file_name': document.file_name,
+                        'file_size': document.file_size,
+                        'duplicate_of': str(document.duplicate_of_id) if document.duplicate_of_id else None,
+                    }
+                    for document in documents
+                ],
+                'rejected': rejected,
+                'created_at': batch.created_at.isoformat(),
+                'message': f'{len(documents)} documents queued for extraction.'
+            },
+            status=status.HTTP_201_CREATED if documents else status.HTTP_400_BAD_REQUEST
+        )
+        
+    except Exception as e:
+        logger.error(f"Document batch upload error: {str(e)}", exc_info=True)
+        return Response(
+            {'error': f'Batch upload failed: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@ratelimit(key='user', rate='600/h', method='GET')
+def get_document_batch(request, batch_id):
+    """
+    Poll extraction progress for a batch upload
+    
+    GET /api/v1/carbon/ai/document-batches/<uuid:batch_id>/
+    
+    Returns:
+    - batch_id, document_type, created_at, completed_at
+    - progress: total, pending, processing, completed, failed, percent_complete, is_complete
+    - documents: Per-document status
+    """
+    from .models import DocumentUploadBatch
+    
+    try:
+        company = request.user.company
+    except AttributeError:
+        return Response(
+            {'error': 'User must be associated with a company'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    batch = get_object_or_404(DocumentUploadBatch, id=batch_id, company=company)
+    
+    try:
+        documents = batch.documents.order_by('file_name').values(
+            'id', 'file_name', 'extraction_status', 'confidence_score', 'extraction_error'
+        )
+        
+        return Response(
+            {
+                'batch_id': str(batch.id),
+                'document_type': batch.document_type,
+                'created_at': batch.created_at.isoformat(),
+                'completed_at': batch.completed_at.isoformat() if batch.completed_at else None,
+                'progress': batch.get_progress(),
+                'documents': [
+                    {
+                        'document_id': str(document['id']),
+                        'file_name': document['file_name'],
+                        'extraction_status': document['extraction_status'],
+                        'confidence_score': float(document['confidence_score']) if document['confidence_score'] is not None else None,
+                        'extraction_error': document['extraction_error'],
+                    }
+                    for document in documents
+                ]
+            },
+            status=status.HTTP_200_OK
+        )
+        
+    except Exception as e:
+        logger.error(f"Document batch retrieval error: {str(e)}", exc_info=True)
+        return Response(
+            {'error': f'Failed to retrieve batch: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @ratelimit(key='user', rate='60/h', method='GET')
@@ -1040,19 +1309,24 @@ def validate_document(request, document_id):
         from .models import DocumentExtractionField
         
         if corrections:
+            # One query to load the affected fields, one to update, one to insert
+            existing_fields = {
+                field.field_name: field
+                for field in DocumentExtractionField.objects.filter(
+                    document=document,
+                    field_name__in=list(corrections.keys())
+                )
+            }
+            corrected_fields = []
+            new_fields = []
             for field_name, new_value in corrections.items():
-                # Find the extraction field
-                try:
-                    field = DocumentExtractionField.objects.get(
-                        document=document,
-                        field_name=field_name
-                    )
-                    # Apply correction
-                    field.apply_correction(new_value, request.user)
-                    
-                except DocumentExtractionField.DoesNotExist:
+                field = existing_fields.get(field_name)
+                if field:
+                    field.apply_correction(new_value, request.user, commit=False)
+                    corrected_fields.append(field)
+                else:
                     # Create new field if it doesn't exist
-                    DocumentExtractionField.objects.create(
+                    new_fields.append(DocumentExtractionField(
                         document=document,
                         field_name=field_name,
                         field_value=str(new_value),
@@ -1060,7 +1334,15 @@ def validate_document(request, document_id):
                         confidence=Decimal('100.00'),
                         user_corrected=True,
                         original_value=None
-                    )
+                    ))
+            
+            if corrected_fields:
+                DocumentExtractionField.objects.bulk_update(
+                    corrected_fields,
+                    DocumentExtractionField.CORRECTION_FIELDS
+                )
+            if new_fields:
+                DocumentExtractionField.objects.bulk_create(new_fields)
             
             # Update extracted_data JSON with corrections
             if document.extracted_data:
@@ -1081,7 +1363,10 @@ def validate_document(request, document_id):
                 'corrected_at': timezone.now().isoformat()
             }
         
-        document.save()
+        document.save(update_fields=[
+            'extracted_data', 'user_validated', 'validated_by', 'validated_at',
+            'user_corrections', 'updated_at'
+        ])
         
         logger.info(
             f"Document validated: {document.id} by {request.user.email} "
@@ -1245,12 +1530,14 @@ def apply_document_to_footprint(request, document_id):
             (footprint.scope3_emissions or Decimal('0'))
         )
         
-        footprint.save()
+        footprint.save(update_fields=[
+            'scope1_emissions', 'scope2_emissions', 'scope3_emissions', 'total_emissions'
+        ])
         
         # Mark document as applied
         document.applied_to_footprint = True
         document.footprint = footprint
-        document.save()
+        document.save(update_fields=['applied_to_footprint', 'footprint', 'updated_at'])
         
         # Create conversation message if requested
         create_message = request.data.get('create_conversation_message', False)
@@ -1322,10 +1609,9 @@ def ai_predict_next_value(request):
     Predict next emissions value for a specific activity type
     
     Request body:
-    - company_id: int (required) - Company ID for predictions
+    - company_id: uuid (required) - Company ID for predictions
     - activity_type: str (required) - Activity type (e.g., 'electricity', 'gasoline')
     - target_period: date (required) - Target date for prediction (YYYY-MM-DD)
-    - footprint_id: int (optional) - Specific footprint ID to use
     
     Response:
     - success: bool
@@ -1335,6 +1621,7 @@ def ai_predict_next_value(request):
     - reasoning: str
     - Additional metadata
     """
+    from .forecast_snapshots import get_snapshot_payload
     from .prediction_service import PredictionService
     from .serializers import PredictionRequestSerializer, PredictionResponseSerializer
     from datetime import datetime
@@ -1355,8 +1642,7 @@ def ai_predict_next_value(request):
         validated_data = request_serializer.validated_data
         company_id = validated_data['company_id']
         activity_type = validated_data['activity_type']
-        target_period = validated_data['target_period']
-        footprint_id = validated_data.get('footprint_id')
+        target_period = validated_data['target_period'].strftime('%Y-%m')
         
         # Verify company access
         company = get_object_or_404(
@@ -1370,14 +1656,15 @@ def ai_predict_next_value(request):
             f"activity={activity_type}, target={target_period}"
         )
         
-        # Make prediction
-        prediction_service = PredictionService()
-        result = prediction_service.predict_next_value(
-            company_id=company_id,
-            activity_type=activity_type,
-            target_period=target_period,
-            footprint_id=footprint_id
-        )
+        # Serve the nightly snapshot when it answers this question
+        result = get_snapshot_payload(company.id, 'next_value', activity_type, target_period)
+        if result is None:
+            prediction_service = PredictionService()
+            result = prediction_service.predict_next_value(
+                company_id=company.id,
+                activity_type=activity_type,
+                target_period=target_period
+            )
         
         # Serialize response
         response_serializer = PredictionResponseSerializer(data=result)
@@ -1406,9 +1693,8 @@ def ai_predict_seasonal_patterns(request):
     Analyze seasonal patterns in emissions data
     
     Request body:
-    - company_id: int (required) - Company ID for analysis
+    - company_id: uuid (required) - Company ID for analysis
     - activity_type: str (required) - Activity type to analyze
-    - footprint_id: int (optional) - Specific footprint ID to use
     
     Response:
     - success: bool
@@ -1419,6 +1705,7 @@ def ai_predict_seasonal_patterns(request):
     - low_month: str
     - pattern_strength: float (0-1)
     """
+    from .forecast_snapshots import get_snapshot_payload
     from .prediction_service import PredictionService
     from .serializers import PredictionRequestSerializer, SeasonalPatternSerializer
     
@@ -1426,7 +1713,6 @@ def ai_predict_seasonal_patterns(request):
         # Validate request data (we only need company_id and activity_type)
         company_id = request.data.get('company_id')
         activity_type = request.data.get('activity_type', '').strip().lower()
-        footprint_id = request.data.get('footprint_id')
         
         if not company_id or not activity_type:
             return Response(
@@ -1449,13 +1735,14 @@ def ai_predict_seasonal_patterns(request):
             f"activity={activity_type}"
         )
         
-        # Analyze seasonal patterns
-        prediction_service = PredictionService()
-        result = prediction_service.detect_seasonal_patterns(
-            company_id=company_id,
-            activity_type=activity_type,
-            footprint_id=footprint_id
-        )
+        # Serve the nightly snapshot, analysing on demand if there is none
+        result = get_snapshot_payload(company.id, 'seasonal', activity_type)
+        if result is None:
+            prediction_service = PredictionService()
+            result = prediction_service.detect_seasonal_patterns(
+                company_id=company.id,
+                activity_type=activity_type
+            )
         
         # Serialize response
         response_serializer = SeasonalPatternSerializer(data=result)
@@ -1484,9 +1771,8 @@ def ai_predict_growth_trend(request):
     Calculate growth trend for emissions activity
     
     Request body:
-    - company_id: int (required) - Company ID for analysis
+    - company_id: uuid (required) - Company ID for analysis
     - activity_type: str (required) - Activity type to analyze
-    - footprint_id: int (optional) - Specific footprint ID to use
     
     Response:
     - success: bool
@@ -1497,6 +1783,7 @@ def ai_predict_growth_trend(request):
     - monthly_growth_rates: list of {month, growth_rate}
     - reasoning: str
     """
+    from .forecast_snapshots import get_snapshot_payload
     from .prediction_service import PredictionService
     from .serializers import PredictionRequestSerializer, GrowthTrendSerializer
     
@@ -1504,7 +1791,6 @@ def ai_predict_growth_trend(request):
         # Validate request data
         company_id = request.data.get('company_id')
         activity_type = request.data.get('activity_type', '').strip().lower()
-        footprint_id = request.data.get('footprint_id')
         
         if not company_id or not activity_type:
             return Response(
@@ -1527,13 +1813,14 @@ def ai_predict_growth_trend(request):
             f"activity={activity_type}"
         )
         
-        # Calculate growth trend
-        prediction_service = PredictionService()
-        result = prediction_service.calculate_growth_trend(
-            company_id=company_id,
-            activity_type=activity_type,
-            footprint_id=footprint_id
-        )
+        # Serve the nightly snapshot, calculating on demand if there is none
+        result = get_snapshot_payload(company.id, 'growth_trend', activity_type)
+        if result is None:
+            prediction_service = PredictionService()
+            result = prediction_service.calculate_growth_trend(
+                company_id=company.id,
+                activity_type=activity_type
+            )
         
         # Serialize response
         response_serializer = GrowthTrendSerializer(data=result)
@@ -1552,3 +1839,59 @@ def ai_predict_growth_trend(request):
             },
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@ratelimit(key='user', rate='60/h', method='POST')
+def ai_predict_batch(request):
+    """
+    Predict next values for several activity types in one call
+    
+    Request body:
+    - target_period: str (required) - Target period (YYYY-MM)
+    - activity_types: list (optional) - Activity types to predict (default: all)
+    
+    Response:
+    - success: bool
+    - target_period: str
+    - data_points_used: int
+    - predictions: {activity_type: prediction} in the predict_next_value format
+    """
+    from .prediction_service import PredictionService
+    from .prediction_serializers import PredictBatchRequestSerializer
+    
+    company = request.user.company
+    if not company:
+        return Response(
+            {'error': 'User must be associated with a company'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    request_serializer = PredictBatchRequestSerializer(data=request.data)
+    if not request_serializer.is_valid():
+        return Response(
+            {
+                'success': False,
+                'message': 'Invalid request parameters',
+                'errors': request_serializer.errors
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    validated_data = request_serializer.validated_data
+    result = PredictionService().predict_batch(
+        company_id=company.id,
+        target_period=validated_data['target_period'],
+        activity_types=validated_data.get('activity_types')
+    )
+    
+    if not result['success']:
+        return Response(
+            {
+                'success': False,
+                'message': f"Batch prediction failed: {result['error']}"
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    return Response(result, status=status.HTTP_200_OK)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CarbonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'carbon'
+
+    def ready(self):
+        # Ledger rows reference EmissionFactor, which lives outside models.py
+        from . import emission_factors  # noqa: F401
+        # Invalidate cached AI results when a company's footprints change
+        from . import signals  # noqa: F401
@@ -0,0 +1,110 @@
+"""
+In-process index of the IndustryBenchmark table
+
+The benchmark table is small and changes rarely, but it is consulted for every
+peer comparison. Each worker loads it once into a BenchmarkIndex, which groups
+rows by industry and year and keeps each group's employee ranges sorted, so
+finding the row for a company is a binary search and the whole fallback
+cascade (size bracket, then any bracket, then the previous year) runs in
+memory.
+
+Each worker checks the table's row count and latest updated_at at most every
+BENCHMARK_INDEX_CHECK_INTERVAL seconds and reloads when they differ from what
+its index was built from, so a change made through any worker is picked up
+everywhere within the interval. Saving or deleting a benchmark also drops
+the index of the worker that made the change (see carbon/signals.py). Bulk
+updates that bypass auto_now should set updated_at themselves.
+"""
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .benchmarking_service import IndustryBenchmark
+
+
+class BenchmarkIndex:
+    """IndustryBenchmark rows grouped by (industry, year) with sorted employee ranges"""
+
+    def __init__(self, benchmarks: Iterable[IndustryBenchmark]):
+        groups: Dict[Tuple[str, int], List[IndustryBenchmark]] = {}
+        for benchmark in benchmarks:
+            groups.setdefault((benchmark.industry_sector.lower(), benchmark.year), []).append(benchmark)
+
+        self._groups: Dict[Tuple[str, int], Tuple[List[int], List[IndustryBenchmark]]] = {}
+        for key, rows in groups.items():
+            rows.sort(key=lambda row: (row.employee_range_min, row.employee_range_max))
+            self._groups[key] = ([row.employee_range_min for row in rows], rows)
+
+    def __len__(self):
+        return sum(len(rows) for _, rows in self._groups.values())
+
+    def in_range(self, industry: str, year: int, employees: int) -> Optional[IndustryBenchmark]:
+        """Row whose employee range covers employees (the lowest such range if several do)"""
+        mins, rows = self._groups.get(((industry or '').lower(), year), ([], []))
+        for row in rows[:bisect_right(mins, employees)]:
+            if row.employee_range_max >= employees:
+                return row
+        return None
+
+    def any_range(self, industry: str, year: int) -> Optional[IndustryBenchmark]:
+        """Row with the smallest employee range for the industry and year"""
+        _, rows = self._groups.get(((industry or '').lower(), year), ([], []))
+        return rows[0] if rows else None
+
+    def find(self, industry: str, employees: int, year: int) -> Optional[IndustryBenchmark]:
+        """
+        Best benchmark for a company
+
+        Tries the company's size bracket for the year, then any bracket for
+        the year, then any bracket for the previous year.
+        """
+        return (
+            self.in_range(industry, year, employees)
+            or self.any_range(industry, year)
+            or self.any_range(industry, year - 1)
+        )
+
+
+_lock = threading.Lock()
+_index: Optional[BenchmarkIndex] = None
+_index_version = None
+_checked_at = 0.0
+
+
+def _table_version() -> Tuple[int, object]:
+    """Row count and latest updated_at of the benchmark table, in one aggregate"""
+    state = IndustryBenchmark.objects.aggregate(rows=Count('id'), updated=Max('updated_at'))
+    return state['rows'], state['updated']
+
+
+def _load():
+    global _index, _index_version
+    benchmarks = list(IndustryBenchmark.objects.all())
+    _index = BenchmarkIndex(benchmarks)
+    _index_version = (len(benchmarks), max((row.updated_at for row in benchmarks), default=None))
+
+
+def get_benchmark_index() -> BenchmarkIndex:
+    """This worker's index, reloaded if the benchmark table changed since it was built"""
+    global _checked_at
+    interval = getattr(settings, 'BENCHMARK_INDEX_CHECK_INTERVAL', 60)
+    if _index is not None and time.monotonic() - _checked_at < interval:
+        return _index
+    with _lock:
+        if _index is None:
+            _load()
+        elif time.monotonic() - _checked_at >= interval and _table_version() != _index_version:
+            _load()
+        _checked_at = time.monotonic()
+    return _index
+
+
+def invalidate_benchmark_index():
+    """Make this worker reload its index on the next lookup"""
+    global _index
+    with _lock:
+        _index = None
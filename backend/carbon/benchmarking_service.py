@@ -7,7 +7,8 @@ Helps companies understand how they perform relative to similar organizations.
 """
 
 from django.db import models
-from django.db.models import Avg, Count, StdDev, Min, Max, Q
+from django.db.models import Avg, Count, StdDev, Min, Max, Q, F, FloatField, OuterRef, Subquery, Window
+from django.db.models.functions import Cast, Coalesce, Greatest, Rank
 from decimal import Decimal
 from typing import Dict, List, Optional
 import uuid
@@ -140,6 +141,14 @@ class IndustryBenchmark(models.Model):
         return f"{self.industry_sector} ({self.employee_range_min}-{self.employee_range_max} employees) - {self.year}"
 
 
+def _footprint_year(footprint) -> Optional[int]:
+    """Calendar year a footprint's reporting period starts in"""
+    from .periods import period_start
+    
+    start = footprint.period_start or period_start(footprint.reporting_period)
+    return start.year if start else None
+
+
 class BenchmarkingService:
     """Service for comparing company emissions to industry peers"""
     
@@ -177,9 +186,32 @@ class BenchmarkingService:
             ],
         }
         """
-        # Get relevant benchmark
-        benchmark = self._find_matching_benchmark(footprint.year)
+        return self.get_peer_comparisons([footprint])[0]
+    
+    def get_peer_comparisons(self, footprints) -> List[Dict]:
+        """
+        Compare several of the company's footprints to industry peers
+        
+        Benchmarks are matched from the in-process BenchmarkIndex, so this
+        issues no benchmark queries however many footprints are compared.
+        
+        Returns:
+            One get_peer_comparison result per footprint, in order
+        """
+        from .benchmark_index import get_benchmark_index
         
+        index = get_benchmark_index()
+        industry = getattr(self.company, 'industry', '') or ''
+        employees = getattr(self.company, 'employees', 0) or 0
+        comparisons = []
+        for footprint in footprints:
+            year = _footprint_year(footprint)
+            benchmark = index.find(industry, employees, year) if year else None
+            comparisons.append(self._compare_to_benchmark(footprint, benchmark))
+        return comparisons
+    
+    def _compare_to_benchmark(self, footprint, benchmark: Optional[IndustryBenchmark]) -> Dict:
+        """Build a get_peer_comparison result for one footprint"""
         if not benchmark:
             return {
                 'error': 'No benchmark data available for your industry and company size',
@@ -187,7 +219,7 @@ class BenchmarkingService:
             }
         
         # Calculate company metrics
-        employee_count = getattr(self.company, 'employee_count', 1) or 1
+        employee_count = getattr(self.company, 'employees', 1) or 1
         company_emissions = {
             'total': float(footprint.total_emissions),
             'per_employee': float(footprint.total_emissions) / employee_count,
@@ -268,39 +300,6 @@ class BenchmarkingService:
             'insights': insights,
         }
     
-    def _find_matching_benchmark(self, year: int) -> Optional[IndustryBenchmark]:
-        """Find the best matching benchmark for this company"""
-        industry = getattr(self.company, 'industry', '')
-        employee_count = getattr(self.company, 'employee_count', 0) or 0
-        
-        # Try exact match first
-        benchmark = IndustryBenchmark.objects.filter(
-            industry_sector__iexact=industry,
-            employee_range_min__lte=employee_count,
-            employee_range_max__gte=employee_count,
-            year=year,
-        ).first()
-        
-        if benchmark:
-            return benchmark
-        
-        # Try without employee range constraint
-        benchmark = IndustryBenchmark.objects.filter(
-            industry_sector__iexact=industry,
-            year=year,
-        ).first()
-        
-        if benchmark:
-            return benchmark
-        
-        # Try previous year
-        benchmark = IndustryBenchmark.objects.filter(
-            industry_sector__iexact=industry,
-            year=year-1,
-        ).first()
-        
-        return benchmark
-    
     def _generate_insights(
         self,
         company_emissions: Dict,
@@ -357,28 +356,24 @@ class BenchmarkingService:
         """
         Get anonymized examples of industry leaders (for inspiration)
         
-        Note: This would show anonymized data from actual top performers
+        Ranks every other company in the industry by the emissions per
+        employee of its latest verified footprint.
         """
-        # This is a placeholder - in production, this would query actual anonymized company data
+        leaders = industry_leaderboard(
+            getattr(self.company, 'industry', ''), limit, exclude_company_id=self.company.pk
+        )
         return [
             {
-                'rank': 1,
-                'emissions_per_employee': 0.5,
-                'vs_average': -67,
-                'key_initiatives': ['100% renewable energy', 'Electric vehicle fleet', 'Energy-efficient buildings'],
-            },
-            {
-                'rank': 2,
-                'emissions_per_employee': 0.8,
-                'vs_average': -47,
-                'key_initiatives': ['Solar installation', 'Carbon offset program', 'Remote work policy'],
-            },
-            {
-                'rank': 3,
-                'emissions_per_employee': 1.0,
-                'vs_average': -33,
-                'key_initiatives': ['LED lighting', 'Smart HVAC', 'Sustainable procurement'],
-            },
+                'rank': leader['rank'],
+                'emissions_per_employee': round(leader['emissions_per_employee'], 3),
+                'vs_average': round(
+                    (leader['emissions_per_employee'] - leader['industry_average'])
+                    / leader['industry_average'] * 100
+                ) if leader['industry_average'] else 0,
+                # Initiatives aren't recorded per company yet
+                'key_initiatives': [],
+            }
+            for leader in leaders
         ]
     
     def suggest_improvement_opportunities(self, footprint) -> List[Dict]:
@@ -398,7 +393,7 @@ class BenchmarkingService:
         
         # Scope 2 opportunity (electricity)
         if company['scope2_per_employee'] > industry['scope2_per_employee'] * 1.2:
-            gap_tco2e = (company['scope2_per_employee'] - industry['scope2_per_employee']) * getattr(self.company, 'employee_count', 1)
+            gap_tco2e = (company['scope2_per_employee'] - industry['scope2_per_employee']) * (getattr(self.company, 'employees', 1) or 1)
             opportunities.append({
                 'scope': 'scope2',
                 'title': 'Electricity Efficiency Improvement',
@@ -417,7 +412,7 @@ class BenchmarkingService:
         
         # Scope 1 opportunity (fuel)
         if company['scope1_per_employee'] > industry['scope1_per_employee'] * 1.2:
-            gap_tco2e = (company['scope1_per_employee'] - industry['scope1_per_employee']) * getattr(self.company, 'employee_count', 1)
+            gap_tco2e = (company['scope1_per_employee'] - industry['scope1_per_employee']) * (getattr(self.company, 'employees', 1) or 1)
             opportunities.append({
                 'scope': 'scope1',
                 'title': 'Fleet & Fuel Efficiency',
@@ -437,6 +432,48 @@ class BenchmarkingService:
         return opportunities
 
 
+def industry_leaderboard(industry: str, limit: int = 5, exclude_company_id=None) -> List[Dict]:
+    """
+    Top companies in an industry by emissions per employee, in one query
+    
+    Each company is represented by its latest verified footprint (by reporting
+    period, then creation), picked with a correlated subquery; the ranking and
+    the industry-wide average per employee are window functions over every
+    ranked company, so only the top `limit` rows leave the database.
+    
+    Returns:
+        Dicts with id, name, employees, total_emissions, emissions_per_employee,
+        rank and industry_average (per employee), best first
+    """
+    from companies.models import Company
+    from .models import CarbonFootprint
+    
+    latest_verified = CarbonFootprint.objects.filter(
+        company=OuterRef('pk'),
+        status='verified',
+    ).order_by(F('period_start').desc(nulls_last=True), '-created_at')
+    
+    companies = Company.objects.filter(industry=industry).annotate(
+        total_emissions=Subquery(latest_verified.values('total_emissions')[:1]),
+    ).filter(total_emissions__isnull=False)
+    if exclude_company_id is not None:
+        companies = companies.exclude(pk=exclude_company_id)
+    
+    companies = companies.annotate(
+        emissions_per_employee=Cast('total_emissions', FloatField()) / Greatest(Coalesce('employees', 1), 1),
+    ).annotate(
+        rank=Window(Rank(), order_by=F('emissions_per_employee').asc()),
+        industry_average=Window(Avg('emissions_per_employee')),
+    ).order_by('emissions_per_employee', 'name')
+    
+    return [
+        dict(row, total_emissions=float(row['total_emissions']))
+        for row in companies.values(
+            'id', 'name', 'employees', 'total_emissions', 'emissions_per_employee', 'rank', 'industry_average'
+        )[:limit]
+    ]
+
+
 # Default benchmark data (to be loaded as fixtures)
 DEFAULT_BENCHMARKS = [
     {
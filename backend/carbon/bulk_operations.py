@@ -10,6 +10,7 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from .activity_ledger import _uuid, activity_totals, ingest_activities, ledger_entries, scope_totals
 from .models import CarbonFootprint, CarbonOffset
 from .serializers import CarbonFootprintSerializer, CarbonOffsetSerializer
 
@@ -312,3 +313,117 @@ def export_carbon_offsets(request):
             {'error': f'Export failed: {str(e)}'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_import_activities(request):
+    """
+    Bulk import activity data into the activity ledger
+    
+    Accepts a CSV/Excel file, or JSON:
+    {
+        "activities": [
+            {"activity_type": "electricity", "quantity": 4500, "unit": "kWh",
+             "co2e": 2.04, "period": "2024-03"}
+        ],
+        "footprint_id": "uuid",  // Optional: footprint the rows are reported towards
+        "source": "integration"  // Optional: defaults to "import"
+    }
+    """
+    company = request.user.company
+    if company is None:
+        return Response(
+            {'error': 'User must be associated with a company'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if 'file' in request.FILES:
+        file = request.FILES['file']
+        if file.name.endswith('.csv'):
+            df = pd.read_csv(file)
+        elif file.name.endswith(('.xlsx', '.xls')):
+            df = pd.read_excel(file)
+        else:
+            return Response(
+                {'error': 'Unsupported file format. Use CSV or Excel files.'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        rows = [
+            {column: value for column, value in record.items() if pd.notna(value)}
+            for record in df.to_dict('records')
+        ]
+    else:
+        rows = request.data.get('activities')
+        if not isinstance(rows, list):
+            return Response(
+                {'error': 'Provide a file or an "activities" list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+    footprint = None
+    if request.data.get('footprint_id'):
+        footprint_id = _uuid(request.data['footprint_id'])
+        if footprint_id is None:
+            return Response({'error': 'footprint_id must be a UUID'}, status=status.HTTP_400_BAD_REQUEST)
+        footprint = CarbonFootprint.objects.filter(company=company, id=footprint_id).first()
+        if footprint is None:
+            return Response({'error': 'Footprint not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        created, errors = ingest_activities(
+            company, rows, source=request.data.get('source') or 'import', footprint=footprint
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if errors and not created:
+        return Response(
+            {'error': 'Import failed', 'details': errors}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return Response({
+        'message': f'Successfully imported {len(created)} activities',
+        'imported': len(created),
+        'errors': errors
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def activity_ledger_totals(request):
+    """
+    Scope totals aggregated from the activity ledger
+    
+    Query params: start, end (YYYY-MM-DD, on period_start), footprint_id
+    """
+    company = request.user.company
+    if company is None:
+        return Response(
+            {'error': 'User must be associated with a company'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        start = pd.Timestamp(request.query_params['start']).date() if request.query_params.get('start') else None
+        end = pd.Timestamp(request.query_params['end']).date() if request.query_params.get('end') else None
+    except ValueError:
+        return Response({'error': 'start and end must be dates'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    footprint = None
+    if request.query_params.get('footprint_id'):
+        footprint_id = _uuid(request.query_params['footprint_id'])
+        if footprint_id is None:
+            return Response({'error': 'footprint_id must be a UUID'}, status=status.HTTP_400_BAD_REQUEST)
+        footprint = CarbonFootprint.objects.filter(company=company, id=footprint_id).first()
+        if footprint is None:
+            return Response({'error': 'Footprint not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    entries = ledger_entries(company, start=start, end=end, footprint=footprint)
+    return Response({
+        'start': start,
+        'end': end,
+        'totals': scope_totals(entries),
+        'by_activity': activity_totals(entries),
+    }, status=status.HTTP_200_OK)
@@ -0,0 +1,177 @@
+"""
+Circuit breaker and per-call deadlines for Gemini requests
+
+Without a deadline a slow Gemini ties up the calling worker until the SDK gives
+up, and with every AI view doing the same the whole site degrades. Calls made
+through CircuitBreaker.call run on a bounded thread pool and the caller stops
+waiting at the deadline. After AI_CIRCUIT_FAILURE_THRESHOLD failures (errors or
+timeouts) within AI_CIRCUIT_FAILURE_WINDOW seconds the breaker opens and calls
+go straight to the fallback. After AI_CIRCUIT_RECOVERY_TIMEOUT seconds a single
+probe request is let through (half-open); success closes the breaker, failure
+re-opens it. State lives in the cache so every worker shares it.
+"""
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Callable, Dict, Optional
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the breaker is open"""
+
+
+class CallDeadlineExceeded(Exception):
+    """Raised when an upstream call runs past its deadline"""
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'AI_GEMINI_MAX_CONCURRENT_CALLS', 16),
+                thread_name_prefix='gemini-call'
+            )
+        return _executor
+
+
+class CircuitBreaker:
+    """Cache-backed circuit breaker with per-call deadlines"""
+
+    def __init__(self, name: str, failure_threshold=None, failure_window=None,
+                 recovery_timeout=None, call_timeout=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or getattr(settings, 'AI_CIRCUIT_FAILURE_THRESHOLD', 5)
+        self.failure_window = failure_window or getattr(settings, 'AI_CIRCUIT_FAILURE_WINDOW', 60)
+        self.recovery_timeout = recovery_timeout or getattr(settings, 'AI_CIRCUIT_RECOVERY_TIMEOUT', 30)
+        self.call_timeout = call_timeout or getattr(settings, 'AI_GEMINI_CALL_TIMEOUT', 20)
+
+    @property
+    def _failures_key(self):
+        return f"circuit_{self.name}_failures"
+
+    @property
+    def _opened_key(self):
+        return f"circuit_{self.name}_opened"
+
+    @property
+    def _probe_key(self):
+        return f"circuit_{self.name}_probe"
+
+    def call(self, fn: Callable[[], Any], fallback: Optional[Callable[[str], Any]] = None,
+             timeout: Optional[float] = None) -> Any:
+        """
+        Run fn with a deadline, recording the outcome
+
+        Args:
+            fn: The upstream call
+            fallback: Called with the reason ('circuit_open', 'timeout' or
+                'error') and its value returned when the call can't be made or
+                fails. Without one, CircuitOpenError, CallDeadlineExceeded or
+                fn's exception is raised instead.
+            timeout: Deadline in seconds (defaults to call_timeout)
+        """
+        timeout = timeout or self.call_timeout
+        if not self.allow_request():
+            logger.warning(f"Circuit '{self.name}' is open; skipping upstream call")
+            if fallback:
+                return fallback('circuit_open')
+            raise CircuitOpenError(f"{self.name} is temporarily unavailable")
+
+        future = _get_executor().submit(fn)
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self.record_failure()
+            logger.error(f"Circuit '{self.name}': call exceeded {timeout}s deadline")
+            if fallback:
+                return fallback('timeout')
+            raise CallDeadlineExceeded(f"{self.name} call exceeded {timeout}s")
+        except Exception as e:
+            self.record_failure()
+            logger.error(f"Circuit '{self.name}': call failed: {str(e)}")
+            if fallback:
+                return fallback('error')
+            raise
+
+        self.record_success()
+        return result
+
+    def allow_request(self) -> bool:
+        opened = cache.get(self._opened_key)
+        if opened is None:
+            return True
+        if time.time() < opened['retry_at']:
+            return False
+        # Half-open: let exactly one probe through until it reports back
+        return cache.add(self._probe_key, 1, self.call_timeout + 5)
+
+    def record_success(self):
+        if cache.get(self._opened_key) is not None:
+            logger.info(f"Circuit '{self.name}' closed after successful probe")
+        cache.delete_many([self._failures_key, self._opened_key, self._probe_key])
+
+    def record_failure(self):
+        if cache.get(self._opened_key) is not None:
+            # Failed probe (or a straggler from before opening) - stay open
+            self._open()
+            return
+
+        cache.add(self._failures_key, 0, self.failure_window)
+        try:
+            failures = cache.incr(self._failures_key)
+        except ValueError:
+            cache.add(self._failures_key, 1, self.failure_window)
+            failures = 1
+        if failures >= self.failure_threshold:
+            logger.error(f"Circuit '{self.name}' opened after {failures} failures")
+            self._open()
+
+    def _open(self):
+        cache.set(
+            self._opened_key,
+            {'opened_at': time.time(), 'retry_at': time.time() + self.recovery_timeout},
+            self.recovery_timeout + 3600
+        )
+        cache.delete(self._probe_key)
+
+    def reset(self):
+        cache.delete_many([self._failures_key, self._opened_key, self._probe_key])
+
+    def get_state(self) -> Dict[str, Any]:
+        """Breaker state for health checks"""
+        opened = cache.get(self._opened_key)
+        if opened is None:
+            state = 'closed'
+        elif time.time() < opened['retry_at']:
+            state = 'open'
+        else:
+            state = 'half_open'
+
+        def _iso(timestamp):
+            return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc).isoformat()
+
+        return {
+            'state': state,
+            'recent_failures': cache.get(self._failures_key, 0),
+            'failure_threshold': self.failure_threshold,
+            'call_timeout_seconds': self.call_timeout,
+            'opened_at': _iso(opened['opened_at']) if opened else None,
+            'retry_at': _iso(opened['retry_at']) if opened else None,
+        }
+
+
+# Shared by every Gemini call in the process (text, streaming and vision)
+gemini_breaker = CircuitBreaker('gemini')
@@ -0,0 +1,142 @@
+"""
+Batch completeness scoring for carbon footprints
+
+Every activity in GuidanceService.SCOPE_ACTIVITIES gets one bit, so the set
+of activities reported for a footprint is a single integer and each scope's
+coverage is a popcount of that integer masked with the scope's bits. The
+activity sets of any number of footprints come from one grouped query, which
+makes scoring a whole tenant (or every tenant) one round trip plus a little
+integer arithmetic per footprint.
+
+Scores are stored in FootprintCompleteness for reuse. Writing activity data
+drops the footprint's stored score (see carbon/signals.py); the next read
+recomputes it.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+from django.db.models import Count
+from django.utils import timezone
+
+from .guidance_service import GuidanceService
+from .models import CarbonFootprint, FootprintCompleteness
+
+# Activity -> bit, in SCOPE_ACTIVITIES order
+ACTIVITY_BITS: Dict[str, int] = {}
+SCOPE_MASKS: Dict[str, int] = {}
+for _scope, _activities in GuidanceService.SCOPE_ACTIVITIES.items():
+    SCOPE_MASKS[_scope] = 0
+    for _activity in _activities:
+        ACTIVITY_BITS.setdefault(_activity, 1 << len(ACTIVITY_BITS))
+        SCOPE_MASKS[_scope] |= ACTIVITY_BITS[_activity]
+
+SCOPE_WEIGHTS = {'scope1': 0.35, 'scope2': 0.35, 'scope3': 0.30}
+
+# (lowest overall score, grade), best first
+GRADES = [(0.90, 'A'), (0.75, 'B'), (0.60, 'C'), (0.40, 'D')]
+
+
+def fetch_activity_masks(footprints) -> Dict[object, Tuple[object, int, int]]:
+    """
+    Reported activities for many footprints in one grouped query
+
+    Args:
+        footprints: CarbonFootprint queryset (e.g. one company's, or all)
+
+    Returns:
+        footprint id -> (company id, activity mask, number of activity data
+        entries); footprints without data have a zero mask
+    """
+    masks: Dict[object, Tuple[object, int, int]] = {}
+    rows = footprints.order_by().values_list('id', 'company_id', 'activity_data__activity_type').annotate(
+        entries=Count('activity_data')
+    )
+    for footprint_id, company_id, activity_type, entries in rows:
+        _, mask, total = masks.get(footprint_id, (company_id, 0, 0))
+        masks[footprint_id] = (company_id, mask | ACTIVITY_BITS.get(activity_type, 0), total + entries)
+    return masks
+
+
+def score_mask(mask: int, data_entries: int = 0) -> Dict:
+    """Completeness result (GuidanceService.calculate_completeness_score format) for an activity mask"""
+    scope_scores = {
+        f'{scope}_score': round((mask & scope_mask).bit_count() / scope_mask.bit_count(), 2)
+        for scope, scope_mask in SCOPE_MASKS.items()
+    }
+    overall_score = sum(scope_scores[f'{scope}_score'] * weight for scope, weight in SCOPE_WEIGHTS.items())
+    grade = next((grade for threshold, grade in GRADES if overall_score >= threshold), 'F')
+
+    missing_by_scope = {
+        scope: [activity for activity in activities if not mask & ACTIVITY_BITS[activity]]
+        for scope, activities in GuidanceService.SCOPE_ACTIVITIES.items()
+    }
+    return {
+        'overall_score': round(overall_score, 2),
+        **scope_scores,
+        'missing_activities': [activity for missing in missing_by_scope.values() for activity in missing],
+        'missing_by_scope': missing_by_scope,
+        'completion_percentage': round(overall_score * 100),
+        'grade': grade,
+        'meets_minimum': all(
+            scope_scores[f'{scope}_score'] >= threshold
+            for scope, threshold in GuidanceService.COMPLETENESS_THRESHOLDS.items()
+        ),
+        'data_entries': data_entries,
+    }
+
+
+def score_footprints(footprints) -> Dict[object, Dict]:
+    """Score every footprint in a queryset with one query"""
+    return {
+        footprint_id: score_mask(mask, entries)
+        for footprint_id, (_, mask, entries) in fetch_activity_masks(footprints).items()
+    }
+
+
+def _store_scores(footprints, batch_size: int = 1000) -> Dict[object, FootprintCompleteness]:
+    computed_at = timezone.now()
+    rows = {}
+    for footprint_id, (company_id, mask, entries) in fetch_activity_masks(footprints).items():
+        score = score_mask(mask, entries)
+        rows[footprint_id] = FootprintCompleteness(
+            footprint_id=footprint_id, company_id=company_id, activity_mask=mask, data_entries=entries,
+            scope1_score=score['scope1_score'], scope2_score=score['scope2_score'],
+            scope3_score=score['scope3_score'], overall_score=score['overall_score'],
+            grade=score['grade'], meets_minimum=score['meets_minimum'], computed_at=computed_at,
+        )
+    FootprintCompleteness.objects.bulk_create(
+        list(rows.values()),
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['footprint'],
+        update_fields=[
+            'activity_mask', 'data_entries', 'scope1_score', 'scope2_score', 'scope3_score',
+            'overall_score', 'grade', 'meets_minimum', 'computed_at',
+        ],
+    )
+    return rows
+
+
+def refresh_completeness(footprints) -> int:
+    """Score a queryset of footprints and upsert their FootprintCompleteness rows"""
+    return len(_store_scores(footprints))
+
+
+def get_completeness(footprints: Iterable[CarbonFootprint]) -> List[Dict]:
+    """
+    Completeness results for footprints, from stored scores where present
+
+    Footprints without a stored score are scored together with one query and
+    their scores stored.
+    """
+    footprints = list(footprints)
+    stored = {
+        row.footprint_id: row
+        for row in FootprintCompleteness.objects.filter(footprint__in=footprints)
+    }
+    missing = [footprint.id for footprint in footprints if footprint.id not in stored]
+    if missing:
+        stored.update(_store_scores(CarbonFootprint.objects.filter(id__in=missing)))
+    return [
+        score_mask(stored[footprint.id].activity_mask, stored[footprint.id].data_entries)
+        for footprint in footprints
+    ]
@@ -0,0 +1,221 @@
+"""
+Server-side memory for smart data entry conversations
+
+The extraction prompt gets a bounded view of the conversation: the most recent
+ConversationMessage rows that fit in a token budget, plus a rolling summary of
+everything older. The summary is stored in ConversationSession.session_context
+so older messages are folded in once and never re-read, and the compiled
+context is cached per session so a turn normally costs a single indexed lookup
+instead of a scan of the whole message history.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.dateparse import parse_datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Key in ConversationSession.session_context holding the rolling summary
+MEMORY_CONTEXT_KEY = 'memory'
+
+# Longest user message quoted in the summary when nothing was extracted from it
+SUMMARY_SNIPPET_CHARS = 80
+
+# Share of the token budget reserved for the rolling summary
+SUMMARY_BUDGET_SHARE = 0.3
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (about four characters per token)"""
+    return max(1, len(text or '') // 4)
+
+
+class ConversationMemory:
+    """Token-budgeted conversation context for one ConversationSession"""
+
+    def __init__(self, session, token_budget=None, max_summary_facts=None):
+        self.session = session
+        self.token_budget = token_budget or getattr(settings, 'AI_CONVERSATION_CONTEXT_TOKENS', 1500)
+        self.max_summary_facts = max_summary_facts or getattr(settings, 'AI_CONVERSATION_SUMMARY_MAX_FACTS', 20)
+        self.cache_timeout = getattr(settings, 'AI_CONVERSATION_MEMORY_CACHE_TIMEOUT', 3600)
+
+    @property
+    def summary_budget(self):
+        return int(self.token_budget * SUMMARY_BUDGET_SHARE)
+
+    @property
+    def cache_key(self):
+        return f"conversation_memory_{self.session.id}"
+
+    def get_context(self):
+        """
+        Compiled context for the session's next prompt
+
+        Returns:
+            dict with 'summary' (str) and 'messages' (list of {'role', 'content'},
+            oldest first)
+        """
+        latest_id = self.session.messages.order_by('-created_at').values_list('id', flat=True).first()
+        latest_id = str(latest_id) if latest_id else None
+
+        cached = cache.get(self.cache_key)
+        if cached and cached.get('last_message_id') == latest_id:
+            return self._public(cached)
+
+        compiled = self._rebuild(latest_id)
+        cache.set(self.cache_key, compiled, self.cache_timeout)
+        return self._public(compiled)
+
+    def record_messages(self, *messages):
+        """
+        Add newly saved ConversationMessage rows to the cached context
+
+        Keeps the next get_context() a cache hit. If the cache is cold or out of
+        step with the database the entry is dropped and rebuilt on demand.
+        """
+        cached = cache.get(self.cache_key)
+        if not cached:
+            return
+
+        latest_id = self.session.messages.order_by('-created_at').values_list('id', flat=True).first()
+        expected = [str(message.id) for message in messages]
+        if not expected or str(latest_id) != expected[-1]:
+            cache.delete(self.cache_key)
+            return
+
+        window = cached['window'] + [self._entry(message) for message in messages]
+        compiled = self._fit(window, latest_id=expected[-1])
+        cache.set(self.cache_key, compiled, self.cache_timeout)
+
+    def clear(self):
+        cache.delete(self.cache_key)
+
+    def _rebuild(self, latest_id):
+        """Compile the context from unsummarised messages in the database"""
+        state = self._state()
+        messages = self.session.messages.all()
+        summarized_until = parse_datetime(state['summarized_until']) if state.get('summarized_until') else None
+        if summarized_until:
+            messages = messages.filter(created_at__gt=summarized_until)
+
+        window = [
+            self._entry(message)
+            for message in messages.order_by('created_at').values(
+                'role', 'content', 'extracted_data', 'created_at'
+            )
+        ]
+        return self._fit(window, latest_id=latest_id)
+
+    def _fit(self, window, latest_id):
+        """
+        Keep the newest messages that fit the token budget and fold the rest
+        into the session's rolling summary
+        """
+        state = self._state()
+        budget = self.token_budget - self.summary_budget
+
+        kept = []
+        used = 0
+        for entry in reversed(window):
+            cost = estimate_tokens(entry['content'])
+            if kept and used + cost > budget:
+                break
+            if not kept and cost > budget:
+                # Always keep the latest message, trimmed to the budget
+                entry = dict(entry, content=entry['content'][-max(budget, 1) * 4:])
+                cost = estimate_tokens(entry['content'])
+            kept.append(entry)
+            used += cost
+        kept.reverse()
+
+        overflow = window[:len(window) - len(kept)]
+        if overflow:
+            self._fold_into_summary(state, overflow)
+
+        return {
+            'last_message_id': latest_id,
+            'summary': self._render_summary(state, self.summary_budget),
+            'window': kept,
+        }
+
+    def _fold_into_summary(self, state, entries):
+        facts = state.setdefault('facts', [])
+        for entry in entries:
+            fact = self._summarise_entry(entry)
+            if fact:
+                facts.append(fact)
+        del facts[:-self.max_summary_facts]
+        state['summarized_messages'] = state.get('summarized_messages', 0) + len(entries)
+        state['summarized_until'] = entries[-1]['created_at']
+
+        self.session.session_context = dict(self.session.session_context or {}, **{MEMORY_CONTEXT_KEY: state})
+        self.session.save(update_fields=['session_context'])
+
+    @staticmethod
+    def _summarise_entry(entry):
+        """One-line deterministic summary of a message leaving the window"""
+        data = entry.get('extracted_data') or {}
+        if entry['role'] == 'assistant' and data.get('activity_type'):
+            parts = [str(data['activity_type']).replace('_', ' ')]
+            if data.get('quantity') is not None:
+                parts.append(f"{data['quantity']} {data.get('unit') or ''}".strip())
+            if data.get('period'):
+                parts.append(f"for {data['period']}")
+            if data.get('scope'):
+                parts.append(f"(Scope {data['scope']})")
+            if data.get('calculated_emissions') is not None:
+                parts.append(f"= {data['calculated_emissions']} tCO2e")
+            return 'Recorded ' + ' '.join(parts)
+        if entry['role'] == 'user':
+            content = ' '.join(entry['content'].split())
+            if len(content) > SUMMARY_SNIPPET_CHARS:
+                content = content[:SUMMARY_SNIPPET_CHARS - 3] + '...'
+            return f'User said: "{content}"'
+        return None
+
+    @staticmethod
+    def _render_summary(state, token_budget):
+        """Render the summary, dropping the oldest facts that don't fit the budget"""
+        if not state.get('summarized_messages'):
+            return ''
+        header = f"Earlier in this conversation ({state['summarized_messages']} messages):"
+        used = estimate_tokens(header)
+        lines = []
+        for fact in reversed(state.get('facts', [])):
+            line = f"- {fact}"
+            used += estimate_tokens(line)
+            if used > token_budget:
+                break
+            lines.append(line)
+        lines.append(header)
+        return '\n'.join(reversed(lines))
+
+    def _state(self):
+        return dict((self.session.session_context or {}).get(MEMORY_CONTEXT_KEY, {}))
+
+    @staticmethod
+    def _entry(message):
+        """Window entry from a ConversationMessage or a values() row"""
+        if not isinstance(message, dict):
+            message = {
+                'role': message.role,
+                'content': message.content,
+                'extracted_data': message.extracted_data,
+                'created_at': message.created_at,
+            }
+        return {
+            'role': message['role'],
+            'content': message['content'] or '',
+            'extracted_data': message['extracted_data'],
+            'created_at': message['created_at'].isoformat(),
+        }
+
+    @staticmethod
+    def _public(compiled):
+        return {
+            'summary': compiled['summary'],
+            'messages': [
+                {'role': entry['role'], 'content': entry['content']}
+                for entry in compiled['window']
+            ],
+        }
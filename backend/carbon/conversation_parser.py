@@ -0,0 +1,307 @@
+"""
+Rule-based fast path for conversational data entry
+
+Most chat inputs are simple statements like "450 kWh electricity in March" or
+"120 litres diesel". RuleBasedExtractor recognises those with a small set of
+compiled patterns and calculates emissions from the EmissionFactor table, so
+they can be answered without a Gemini call. Anything ambiguous - several
+quantities, money amounts, references to earlier messages, unknown activities -
+returns None and goes to the LLM as before.
+"""
+from datetime import date
+from typing import Any, Dict, Optional
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+FAST_PATH_HITS_KEY = 'conversation_fast_path_hits'
+FAST_PATH_MISSES_KEY = 'conversation_fast_path_misses'
+FACTOR_CACHE_TIMEOUT = 60 * 60
+
+# unit spelling -> (canonical display unit, unit group, multiplier to the group's base unit)
+UNITS = {
+    'kwh': ('kWh', 'energy', 1.0),
+    'kilowatt hour': ('kWh', 'energy', 1.0),
+    'kilowatt hours': ('kWh', 'energy', 1.0),
+    'kilowatt-hours': ('kWh', 'energy', 1.0),
+    'mwh': ('MWh', 'energy', 1000.0),
+    'megawatt hours': ('MWh', 'energy', 1000.0),
+    'therm': ('therms', 'energy', 29.3071),
+    'therms': ('therms', 'energy', 29.3071),
+    'l': ('liters', 'volume', 0.264172),
+    'litre': ('liters', 'volume', 0.264172),
+    'litres': ('liters', 'volume', 0.264172),
+    'liter': ('liters', 'volume', 0.264172),
+    'liters': ('liters', 'volume', 0.264172),
+    'gal': ('gallons', 'volume', 1.0),
+    'gallon': ('gallons', 'volume', 1.0),
+    'gallons': ('gallons', 'volume', 1.0),
+    'mi': ('miles', 'distance', 1.0),
+    'mile': ('miles', 'distance', 1.0),
+    'miles': ('miles', 'distance', 1.0),
+    'km': ('km', 'distance', 0.621371),
+    'kms': ('km', 'distance', 0.621371),
+    'kilometer': ('km', 'distance', 0.621371),
+    'kilometers': ('km', 'distance', 0.621371),
+    'kilometre': ('km', 'distance', 0.621371),
+    'kilometres': ('km', 'distance', 0.621371),
+}
+
+# Base unit of each group, as it appears after the "/" of EmissionFactor.unit
+BASE_UNITS = {'energy': 'kwh', 'volume': 'gallon', 'distance': 'mile'}
+
+QUANTITY_PATTERN = re.compile(
+    r'(?<![\w.])(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)\s*(?P<unit>%s)(?![\w])' % '|'.join(
+        re.escape(unit).replace(r'\ ', r'\s+') for unit in sorted(UNITS, key=len, reverse=True)
+    ),
+    re.IGNORECASE
+)
+
+# Activity keywords; a message must name exactly one activity
+ACTIVITY_KEYWORDS = [
+    ('diesel', re.compile(r'\bdiesel\b', re.IGNORECASE)),
+    ('gasoline', re.compile(r'\b(gasoline|petrol)\b', re.IGNORECASE)),
+    ('natural_gas', re.compile(r'\b(natural\s+gas|gas)\b', re.IGNORECASE)),
+    ('electricity', re.compile(r'\b(electricity|electric|power|grid)\b', re.IGNORECASE)),
+    ('air_travel', re.compile(r'\b(flights?|flew|flying|fly|air\s+travel|plane)\b', re.IGNORECASE)),
+]
+
+# (activity keyword, unit group) -> how to report and calculate it
+RULES = {
+    ('electricity', 'energy'): {
+        'activity_type': 'electricity_consumption',
+        'label': 'grid electricity',
+        'scope': 2,
+        'factor': ('electricity', ''),
+        'fallback_factor': 0.453,  # kg CO2e/kWh, US average
+    },
+    ('natural_gas', 'energy'): {
+        'activity_type': 'fuel_combustion',
+        'label': 'natural gas',
+        'scope': 1,
+        'factor': ('natural_gas', ''),
+        'fallback_factor': 0.184,  # kg CO2/kWh
+    },
+    ('diesel', 'volume'): {
+        'activity_type': 'vehicle_fuel',
+        'label': 'diesel',
+        'scope': 1,
+        'factor': ('vehicle_fuel', 'diesel'),
+        'fallback_factor': 10.21,  # kg CO2/gallon
+    },
+    ('gasoline', 'volume'): {
+        'activity_type': 'vehicle_fuel',
+        'label': 'gasoline',
+        'scope': 1,
+        'factor': ('vehicle_fuel', 'gasoline'),
+        'fallback_factor': 8.89,  # kg CO2/gallon
+    },
+    # "gas" by the gallon or litre is petrol, not natural gas
+    ('natural_gas', 'volume'): {
+        'activity_type': 'vehicle_fuel',
+        'label': 'gasoline',
+        'scope': 1,
+        'factor': ('vehicle_fuel', 'gasoline'),
+        'fallback_factor': 8.89,
+    },
+    ('air_travel', 'distance'): {
+        'activity_type': 'business_travel',
+        'label': 'air travel',
+        'scope': 3,
+        'factor': ('air_travel', 'domestic_short_haul'),
+        'fallback_factor': 0.255,  # kg CO2e/passenger-mile
+    },
+}
+
+# Inputs that need conversation context, currency conversion or judgement
+DEFER_PATTERN = re.compile(
+    r'[$£€?]|\b(more|less|another|instead|same|that|those|previous|again|'
+    r'bill|cost|spent|paid|correct|change|remove|undo|per)\b',
+    re.IGNORECASE
+)
+HEDGE_PATTERN = re.compile(r'~|\b(about|around|roughly|approx(imately)?|estimated?|nearly|almost)\b', re.IGNORECASE)
+
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+MONTH_PATTERN = re.compile(
+    r'\b(?P<prefix>in|for|during|of)?\s*'
+    r'(?P<month>jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|'
+    r'sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?'
+    r'(?:\s+(?P<year>20\d{2}))?\b',
+    re.IGNORECASE
+)
+QUARTER_PATTERN = re.compile(r'\bq(?P<quarter>[1-4])\s*(?P<year>20\d{2})?\b', re.IGNORECASE)
+ISO_MONTH_PATTERN = re.compile(r'\b(?P<year>20\d{2})-(?P<month>0[1-9]|1[0-2])\b')
+RELATIVE_PERIOD_PATTERN = re.compile(r'\b(?P<which>last|this|previous)\s+(?P<unit>month|year)\b', re.IGNORECASE)
+
+
+class RuleBasedExtractor:
+    """Deterministic extraction for simple quantity + unit + activity messages"""
+
+    def __init__(self, min_confidence=None, today=None):
+        self.min_confidence = min_confidence or getattr(settings, 'AI_CONVERSATION_FAST_PATH_MIN_CONFIDENCE', 0.85)
+        self.today = today or timezone.localdate()
+
+    def extract(self, user_message: str) -> Optional[Dict[str, Any]]:
+        """
+        Extract a single activity from the message
+
+        Returns:
+            A response in the same shape as ConversationalAIService's LLM
+            extraction, or None if the message should go to the LLM
+        """
+        text = ' '.join((user_message or '').split())
+        if not text or DEFER_PATTERN.search(text):
+            return None
+
+        quantities = list(QUANTITY_PATTERN.finditer(text))
+        if len(quantities) != 1:
+            return None
+        match = quantities[0]
+        quantity = float(match.group('number').replace(',', ''))
+        unit, unit_group, to_base = UNITS[re.sub(r'\s+', ' ', match.group('unit').lower())]
+        if quantity <= 0:
+            return None
+
+        activities = {key for key, pattern in ACTIVITY_KEYWORDS if pattern.search(text)}
+        if 'natural_gas' in activities and activities & {'diesel', 'gasoline'}:
+            activities.discard('natural_gas')
+        if len(activities) != 1:
+            return None
+        rule = RULES.get((activities.pop(), unit_group))
+        if not rule:
+            return None
+
+        period = self._parse_period(text)
+        confidence = 0.95 if period else 0.9
+        if HEDGE_PATTERN.search(text):
+            confidence -= 0.1
+        if confidence < self.min_confidence:
+            return None
+
+        factor_per_base, factor_source = self._emission_factor(rule, unit_group)
+        factor = factor_per_base * to_base  # kg CO2e per stated unit
+        emissions = round(quantity * factor / 1000, 4)  # tCO2e
+
+        extracted_data = {
+            'activity_type': rule['activity_type'],
+            'scope': rule['scope'],
+            'quantity': quantity,
+            'unit': unit,
+            'period': period,
+            'emission_factor': round(factor, 6),
+            'emission_factor_source': factor_source,
+            'calculated_emissions': emissions,
+            'confidence': round(confidence, 2),
+            'location': None,
+            'extraction_method': 'rules',
+        }
+        period_text = f" for {period}" if period else ''
+        return {
+            'ai_response': (
+                f"Got it: {quantity:,g} {unit} of {rule['label']}{period_text}. "
+                f"That's about {emissions:,g} tCO2e of Scope {rule['scope']} emissions "
+                f"({round(factor, 4):g} kg CO2e per {unit[:-1] if unit.endswith('s') else unit}, {factor_source}). "
+                f"Shall I add it to your footprint?"
+            ),
+            'extracted_data': extracted_data,
+            'validation': {'status': 'ok', 'anomalies': [], 'warnings': []},
+            'clarifying_questions': [] if period else ['Which month or period does this cover?'],
+            'suggested_actions': [
+                {
+                    'type': 'update_footprint',
+                    'field': f"scope{rule['scope']}_emissions",
+                    'operation': 'add',
+                    'value': emissions,
+                    'requires_confirmation': True,
+                }
+            ],
+        }
+
+    def _emission_factor(self, rule, unit_group):
+        """Factor in kg CO2e per base unit of the group, from the table if available"""
+        activity_type, sub_category = rule['factor']
+        cache_key = f"conversation_parser_factor_{activity_type}_{sub_category}"
+        cached = cache.get(cache_key)
+        if cached:
+            return cached
+
+        from .emission_factors import EmissionFactor
+
+        factors = EmissionFactor.objects.filter(
+            activity_type=activity_type,
+            sub_category=sub_category,
+            is_active=True,
+        )
+        factor = (
+            factors.filter(region_code='US').order_by('-year').first()
+            or factors.filter(region_type='global').order_by('-year').first()
+        )
+        result = (rule['fallback_factor'], 'default factor')
+        if factor:
+            denominator = factor.unit.split('/')[-1].strip().lower().replace('passenger-', '')
+            if denominator == BASE_UNITS[unit_group]:
+                result = (float(factor.factor_value), f"{factor.source} {factor.year}")
+
+        cache.set(cache_key, result, FACTOR_CACHE_TIMEOUT)
+        return result
+
+    def _parse_period(self, text: str) -> Optional[str]:
+        match = ISO_MONTH_PATTERN.search(text)
+        if match:
+            return f"{match.group('year')}-{match.group('month')}"
+
+        match = QUARTER_PATTERN.search(text)
+        if match:
+            year = match.group('year') or self.today.year
+            return f"{year}-Q{match.group('quarter')}"
+
+        for match in MONTH_PATTERN.finditer(text):
+            month_name = match.group('month').lower()
+            if month_name == 'may' and not (match.group('prefix') or match.group('year')):
+                continue  # "may" is usually the verb
+            month = MONTHS.index(month_name[:3]) + 1
+            if match.group('year'):
+                year = int(match.group('year'))
+            else:
+                # Most recent occurrence of that month
+                year = self.today.year if month <= self.today.month else self.today.year - 1
+            return f"{year}-{month:02d}"
+
+        match = RELATIVE_PERIOD_PATTERN.search(text)
+        if match:
+            offset = 0 if match.group('which').lower() == 'this' else 1
+            if match.group('unit').lower() == 'year':
+                return str(self.today.year - offset)
+            first = date(self.today.year, self.today.month, 1)
+            if offset:
+                first = date(first.year - 1, 12, 1) if first.month == 1 else date(first.year, first.month - 1, 1)
+            return f"{first.year}-{first.month:02d}"
+
+        return None
+
+
+def record_fast_path(hit: bool):
+    """Count one conversational extraction as a fast-path hit or miss"""
+    key = FAST_PATH_HITS_KEY if hit else FAST_PATH_MISSES_KEY
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_fast_path_stats() -> Dict[str, Any]:
+    """Fast-path hit counts and hit rate since the cache was last cleared"""
+    hits = cache.get(FAST_PATH_HITS_KEY, 0)
+    misses = cache.get(FAST_PATH_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+    }
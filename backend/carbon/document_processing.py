@@ -0,0 +1,424 @@
+"""
+Helpers for processing uploaded emissions documents
+
+Content-hash deduplication: an identical file uploaded again by the same
+company (e.g. once through chat and once through the upload page) points at
+the blob already in storage and reuses the earlier extraction instead of
+sending the file to Gemini Vision a second time.
+
+Extraction itself is shared by the single-file upload view (synchronous) and
+the batch upload Celery task.
+"""
+import logging
+from decimal import Decimal
+from typing import Optional
+
+from .models import UploadedDocument, DocumentExtractionField
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_DOCUMENT_MIME_TYPES = [
+    'application/pdf',
+    'image/jpeg',
+    'image/jpg',
+    'image/png'
+]
+
+DOCUMENT_TYPES = ['utility_bill', 'fuel_receipt', 'travel_receipt', 'invoice', 'meter_photo', 'other']
+
+# 4MB limit per Gemini Vision spec
+MAX_DOCUMENT_SIZE = 4 * 1024 * 1024
+
+# Columns written when an extraction result is persisted
+EXTRACTION_RESULT_FIELDS = [
+    'extraction_status', 'extracted_data', 'confidence_score', 'processing_time_ms',
+    'gemini_model_used', 'extraction_error', 'updated_at'
+]
+
+
+def find_original_document(company, content_hash: str) -> Optional[UploadedDocument]:
+    """Return the first stored copy of this content for the company, if any"""
+    if not content_hash:
+        return None
+    return (
+        UploadedDocument.objects
+        .filter(company=company, content_hash=content_hash, duplicate_of__isnull=True)
+        .order_by('created_at')
+        .first()
+    )
+
+
+def find_reusable_extraction(document: UploadedDocument) -> Optional[UploadedDocument]:
+    """
+    Return the most recent completed extraction of identical content
+
+    The document type must match because meter photos, receipts and bills are
+    read with different prompts.
+    """
+    if not document.content_hash:
+        return None
+    return (
+        UploadedDocument.objects
+        .filter(
+            company=document.company,
+            content_hash=document.content_hash,
+            document_type=document.document_type,
+            extraction_status='completed',
+        )
+        .exclude(id=document.id)
+        .order_by('-created_at')
+        .first()
+    )
+
+
+def copy_extraction(document: UploadedDocument, source: UploadedDocument) -> None:
+    """
+    Copy extraction results and field rows from source onto document
+
+    Field values are copied as they currently stand, so corrections a user
+    made on the earlier copy carry over. The caller saves the document.
+    """
+    document.extraction_status = 'completed'
+    document.extracted_data = dict(source.extracted_data or {})
+    document.confidence_score = source.confidence_score
+    document.gemini_model_used = source.gemini_model_used
+    document.processing_time_ms = 0
+    document.extraction_error = None
+
+    DocumentExtractionField.objects.bulk_create([
+        DocumentExtractionField(
+            document=document,
+            field_name=field.field_name,
+            field_value=field.field_value,
+            field_type=field.field_type,
+            confidence=field.confidence,
+            bounding_box=field.bounding_box,
+            page_number=field.page_number,
+        )
+        for field in source.extracted_fields.all()
+    ])
+
+    logger.info(f"Reused extraction from document {source.id} for duplicate upload {document.id}")
+
+
+def classify_field_type(field_name: str, field_value) -> str:
+    """Pick a DocumentExtractionField.field_type for an extracted value"""
+    if isinstance(field_value, (int, float)):
+        return 'number'
+    elif 'date' in field_name.lower():
+        return 'date'
+    elif 'cost' in field_name.lower() or 'price' in field_name.lower():
+        return 'currency'
+    return 'text'
+
+
+def build_extraction_fields(document: UploadedDocument, result: dict) -> list:
+    """Build (unsaved) DocumentExtractionField rows for a successful extraction"""
+    # Multi-page PDFs report which page (and how confidently) each field came from
+    field_sources = {field['field_name']: field for field in result.get('fields', [])}
+
+    fields = []
+    for field_name, field_value in (document.extracted_data or {}).items():
+        if field_value is None or isinstance(field_value, (list, dict)):
+            continue
+        source = field_sources.get(field_name, {})
+        fields.append(DocumentExtractionField(
+            document=document,
+            field_name=field_name,
+            field_value=str(field_value),
+            field_type=classify_field_type(field_name, field_value),
+            confidence=Decimal(str(source.get('confidence', document.confidence_score))),
+            bounding_box=source.get('bounding_box'),
+            page_number=source.get('page_number')
+        ))
+    return fields
+
+
+def persist_extraction(document: UploadedDocument, result: dict) -> None:
+    """
+    Write an extraction result to the database
+
+    Costs two queries regardless of how many fields were extracted: one
+    bulk_create for the field rows and one UPDATE of the result columns.
+    """
+    if result.get('success'):
+        document.extraction_status = 'completed'
+        document.extracted_data = result.get('extracted_data', {})
+        document.confidence_score = Decimal(str(result.get('confidence_score', 0)))
+        document.processing_time_ms = result.get('processing_time_ms', 0)
+        document.gemini_model_used = 'gemini-2.0-flash-exp'
+        document.extraction_error = None
+
+        DocumentExtractionField.objects.bulk_create(build_extraction_fields(document, result))
+
+        logger.info(
+            f"Document extraction completed: {document.id} "
+            f"(confidence: {document.confidence_score}%)"
+        )
+    else:
+        document.extraction_status = 'failed'
+        document.extraction_error = result.get('error', 'Unknown extraction error')
+        logger.error(f"Document extraction failed: {document.id} - {document.extraction_error}")
+
+    document.save(update_fields=EXTRACTION_RESULT_FIELDS)
+
+
+def run_vision_extraction(document: UploadedDocument, file_data: bytes) -> dict:
+    """Call the Gemini Vision method matching the document type"""
+    from .ai_services import GeminiVisionService
+    from .ai_telemetry import ai_call_context
+
+    vision_service = GeminiVisionService()
+
+    with ai_call_context(company=document.company_id):
+        if document.document_type == 'utility_bill':
+            return vision_service.extract_from_utility_bill(
+                file_data,
+                document.mime_type,
+                document.document_type
+            )
+        elif document.document_type == 'meter_photo':
+            return vision_service.read_meter_photo(
+                file_data,
+                meter_type='electricity'  # TODO: Make this dynamic
+            )
+        elif document.document_type in ['fuel_receipt', 'travel_receipt']:
+            return vision_service.extract_from_fuel_receipt(
+                file_data,
+                document.mime_type
+            )
+        # Generic extraction for invoices and other types
+        return vision_service.extract_from_utility_bill(
+            file_data,
+            document.mime_type,
+            document.document_type
+        )
+
+
+def extract_document(document: UploadedDocument) -> None:
+    """Run AI extraction on a stored document and persist the results"""
+    try:
+        document.extraction_status = 'processing'
+        document.save(update_fields=['extraction_status'])
+
+        # Read file data
+        document.file.open('rb')
+        try:
+            file_data = document.file.read()
+        finally:
+            document.file.close()
+
+        persist_extraction(document, run_vision_extraction(document, file_data))
+
+    except Exception as e:
+        document.extraction_status = 'failed'
+        document.extraction_error = str(e)
+        document.save(update_fields=['extraction_status', 'extraction_error', 'updated_at'])
+        logger.error(f"Document extraction exception: {document.id} - {str(e)}", exc_info=True)
+
+
+def process_document(document: UploadedDocument) -> Optional[UploadedDocument]:
+    """
+    Reuse an identical earlier extraction if there is one, otherwise extract
+
+    Returns:
+        The document whose extraction was reused, or None if Gemini was called
+    """
+    reused_from = find_reusable_extraction(document)
+    if reused_from:
+        copy_extraction(document, reused_from)
+        document.save(update_fields=EXTRACTION_RESULT_FIELDS)
+        return reused_from
+
+    extract_document(document)
+    return None
+
+
+def settle_batch_copies(document: UploadedDocument) -> int:
+    """
+    Give pending copies of a document's content in its batch the same result
+
+    Identical files in one batch are extracted once (see upload_document_batch);
+    the copies take the extraction, or the failure, of the document that ran.
+
+    Returns:
+        Number of copies settled
+    """
+    if not document.batch_id or not document.content_hash:
+        return 0
+    copies = list(
+        UploadedDocument.objects
+        .filter(batch_id=document.batch_id, content_hash=document.content_hash, extraction_status='pending')
+        .exclude(id=document.id)
+    )
+    for copy in copies:
+        if document.extraction_status == 'completed':
+            copy_extraction(copy, document)
+        else:
+            copy.extraction_status = 'failed'
+            copy.extraction_error = document.extraction_error
+        copy.save(update_fields=EXTRACTION_RESULT_FIELDS)
+    return len(copies)
+
+
+def _spool_zip_member(archive, member):
+    """
+    Copy one archive member into a spooled temp file, hashing as it streams
+
+    Returns:
+        (File, sha256 hex digest)
+    """
+    import hashlib
+    import os
+    import tempfile
+    from django.core.files import File
+
+    digest = hashlib.sha256()
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    with archive.open(member) as source:
+        for chunk in iter(lambda: source.read(64 * 1024), b''):
+            digest.update(chunk)
+            spool.write(chunk)
+    spool.seek(0)
+    return File(spool, name=os.path.basename(member.filename)), digest.hexdigest()
+
+
+def iter_batch_files(uploaded_files):
+    """
+    Expand a batch upload into individual documents
+
+    Zip archives are opened from their on-disk temp file and unpacked member
+    by member; everything else passes through.
+
+    Yields:
+        (file_name, mime_type, file_obj, file_size, content_hash, error)
+        where error is a rejection reason or None
+    """
+    import mimetypes
+    import os
+    import zipfile
+
+    for uploaded_file in uploaded_files:
+        is_zip = (
+            uploaded_file.content_type in ('application/zip', 'application/x-zip-compressed')
+            or uploaded_file.name.lower().endswith('.zip')
+        )
+        if not is_zip:
+            content_hash = getattr(uploaded_file, 'content_hash', None) or \
+                UploadedDocument.compute_content_hash(uploaded_file)
+            yield uploaded_file.name, uploaded_file.content_type, uploaded_file, uploaded_file.size, content_hash, None
+            continue
+
+        try:
+            archive = zipfile.ZipFile(uploaded_file)
+        except zipfile.BadZipFile:
+            yield uploaded_file.name, uploaded_file.content_type, None, uploaded_file.size, None, 'Invalid zip archive'
+            continue
+
+        with archive:
+            for member in archive.infolist():
+                file_name = os.path.basename(member.filename)
+                if member.is_dir() or not file_name or file_name.startswith('.'):
+                    continue
+                mime_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+                # Check the declared size before decompressing anything
+                if mime_type not in ALLOWED_DOCUMENT_MIME_TYPES or member.file_size > MAX_DOCUMENT_SIZE:
+                    yield file_name, mime_type, None, member.file_size, None, None
+                    continue
+                file_obj, content_hash = _spool_zip_member(archive, member)
+                yield file_name, mime_type, file_obj, member.file_size, content_hash, None
+
+
+def create_document_batch(company, user, document_type, uploaded_files):
+    """
+    Store a batch of uploaded files and create their UploadedDocument rows
+
+    Files are written to storage one at a time straight from their temp
+    files. Content already stored for the company (or earlier in the same
+    batch) is not written again. All rows are inserted with one bulk_create,
+    which skips UploadedDocument.save(), so expires_at is set here.
+
+    Returns:
+        (batch, documents, rejected) where rejected lists
+        {'file_name', 'error'} for files that were skipped
+    """
+    from datetime import timedelta
+    from django.conf import settings
+    from django.core.files.storage import default_storage
+    from django.utils import timezone
+    from .models import DocumentUploadBatch
+
+    max_files = getattr(settings, 'AI_DOCUMENT_BATCH_MAX_FILES', 100)
+    file_field = UploadedDocument._meta.get_field('file')
+
+    batch = DocumentUploadBatch.objects.create(
+        company=company,
+        uploaded_by=user,
+        document_type=document_type
+    )
+
+    staged = []
+    rejected = []
+    for file_name, mime_type, file_obj, file_size, content_hash, error in iter_batch_files(uploaded_files):
+        if error is None and mime_type not in ALLOWED_DOCUMENT_MIME_TYPES:
+            error = f'Unsupported file type: {mime_type}'
+        if error is None and file_size > MAX_DOCUMENT_SIZE:
+            error = f'File too large: {file_size} bytes'
+        if error is None and len(staged) >= max_files:
+            error = f'Batch limit of {max_files} files reached'
+        if error:
+            rejected.append({'file_name': file_name, 'error': error})
+            if file_obj is not None and hasattr(file_obj, 'close'):
+                file_obj.close()
+            continue
+        staged.append((file_name, mime_type, file_obj, file_size, content_hash))
+
+    # One query for content the company has already stored
+    originals = {}
+    hashes = {content_hash for _, _, _, _, content_hash in staged}
+    for existing in (
+        UploadedDocument.objects
+        .filter(company=company, content_hash__in=hashes, duplicate_of__isnull=True)
+        .order_by('-created_at')
+    ):
+        originals[existing.content_hash] = existing
+
+    expires_at = timezone.now() + timedelta(days=90)
+    documents = []
+    for file_name, mime_type, file_obj, file_size, content_hash in staged:
+        original = originals.get(content_hash)
+        if original:
+            stored_name = original.file.name
+        else:
+            stored_name = default_storage.save(file_field.generate_filename(None, file_name), file_obj)
+        if hasattr(file_obj, 'close'):
+            file_obj.close()
+
+        document = UploadedDocument(
+            company=company,
+            uploaded_by=user,
+            batch=batch,
+            file=stored_name,
+            file_name=file_name,
+            file_size=file_size,
+            mime_type=mime_type,
+            content_hash=content_hash,
+            duplicate_of=original,
+            document_type=document_type,
+            extraction_status='pending',
+            expires_at=expires_at
+        )
+        if not original:
+            originals[content_hash] = document
+        documents.append(document)
+
+    UploadedDocument.objects.bulk_create(documents)
+
+    batch.total_documents = len(documents)
+    batch.save(update_fields=['total_documents'])
+
+    logger.info(
+        f"Document batch {batch.id} created for {company.name}: "
+        f"{len(documents)} documents, {len(rejected)} rejected"
+    )
+    return batch, documents, rejected
@@ -0,0 +1,336 @@
+"""
+Per-industry emission distributions for percentile ranking
+
+IndustryEmissionDistribution keeps, for every industry, size band and year,
+each company's verified emissions for that year plus a quantile sketch of
+the totals: the sorted totals themselves while there are at most
+SKETCH_POINTS companies, otherwise SKETCH_POINTS evenly spaced quantiles.
+Ranking a company against its peers then reads one row of bounded size and
+does a binary search, no matter how many companies the industry has.
+
+Rows are kept current incrementally. A footprint write that changes the
+company's verified totals queues sync_company for after the commit
+(repeated writes within EMISSION_DISTRIBUTION_SYNC_DELAY share one sync),
+which re-aggregates only that company's footprints and updates the few
+rows it belongs to. Changes to a company's industry or head count are
+picked up by the nightly full rebuild
+(carbon.tasks.rebuild_emission_distributions). Syncs and the rebuild lock
+the company rows first, so they never interleave.
+"""
+import logging
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, Q, Sum
+from django.db.models.functions import ExtractYear
+
+from companies.models import Company
+from .models import CarbonFootprint, IndustryEmissionDistribution
+
+logger = logging.getLogger(__name__)
+
+# (exclusive upper bound on employees, band); larger companies are 'large'
+SIZE_BANDS = [(10, 'micro'), (50, 'small'), (250, 'medium')]
+
+# Fewest peers a size band needs before it is used instead of the whole industry
+MIN_BAND_PEERS = 5
+
+# Member entry layout: [total, scope1, scope2, scope3]
+ENTRY_FIELDS = {
+    'total': 'total_emissions',
+    'scope1': 'scope1_emissions',
+    'scope2': 'scope2_emissions',
+    'scope3': 'scope3_emissions',
+}
+SUM_FIELDS = ['sum_total', 'sum_scope1', 'sum_scope2', 'sum_scope3']
+
+# Size of the quantile sketch: every percentile from 0 to 100
+SKETCH_POINTS = 101
+
+
+def size_band(employees: Optional[int]) -> str:
+    """Size band for a head count, or '' when it isn't known"""
+    if not employees:
+        return ''
+    for limit, band in SIZE_BANDS:
+        if employees < limit:
+            return band
+    return 'large'
+
+
+def _verified_year_totals(footprints, *group_by):
+    """Sum verified footprints per calendar year of period_start (and any extra grouping fields)"""
+    return footprints.filter(
+        status='verified', period_start__isnull=False
+    ).values(*group_by, year=ExtractYear('period_start')).annotate(
+        **{key: Sum(field) for key, field in ENTRY_FIELDS.items()}
+    ).order_by()
+
+
+def _entry(row: Dict) -> List[float]:
+    return [float(row[key] or 0) for key in ENTRY_FIELDS]
+
+
+def company_year_totals(company_id) -> Dict[int, List[float]]:
+    """A company's verified emissions per year, as member entries"""
+    return {
+        row['year']: _entry(row)
+        for row in _verified_year_totals(CarbonFootprint.objects.filter(company_id=company_id))
+    }
+
+
+def quantile_sketch(totals: List[float]) -> List[float]:
+    """The sorted totals, or SKETCH_POINTS evenly spaced quantiles of them"""
+    totals = sorted(totals)
+    if len(totals) <= SKETCH_POINTS:
+        return totals
+    last = len(totals) - 1
+    sketch = []
+    for point in range(SKETCH_POINTS):
+        position = point * last / (SKETCH_POINTS - 1)
+        index = int(position)
+        upper = totals[min(index + 1, last)]
+        sketch.append(totals[index] + (upper - totals[index]) * (position - index))
+    return sketch
+
+
+def count_below(sketch: List[float], member_count: int, value: float) -> float:
+    """How many of member_count totals are strictly below value, read off their sketch"""
+    index = bisect_left(sketch, value)
+    if len(sketch) == member_count or index == 0:
+        return index
+    if index == len(sketch):
+        return member_count
+    # Interpolate the value's rank between the quantiles either side of it
+    lower, upper = sketch[index - 1], sketch[index]
+    point = index - 1 + (value - lower) / (upper - lower)
+    return point * (member_count - 1) / (SKETCH_POINTS - 1)
+
+
+def refresh_sketch(distribution: IndustryEmissionDistribution):
+    distribution.member_count = len(distribution.members)
+    distribution.quantiles = quantile_sketch([entry[0] for entry in distribution.members.values()])
+
+
+def add_member(distribution: IndustryEmissionDistribution, key: str, entry: List[float]):
+    distribution.members[key] = entry
+    for field, value in zip(SUM_FIELDS, entry):
+        setattr(distribution, field, getattr(distribution, field) + value)
+
+
+def remove_member(distribution: IndustryEmissionDistribution, key: str):
+    entry = distribution.members.pop(key)
+    for field, value in zip(SUM_FIELDS, entry):
+        setattr(distribution, field, getattr(distribution, field) - value)
+
+
+def _bands_for(employees) -> List[str]:
+    band = size_band(employees)
+    return [''] + ([band] if band else [])
+
+
+def build_distributions(rows: Iterable[Dict]) -> List[Dict]:
+    """
+    Distribution members and sums from per-company yearly totals
+
+    Args:
+        rows: dicts with industry, employees, company_id, year and the
+            ENTRY_FIELDS keys
+
+    Returns:
+        Field values for each IndustryEmissionDistribution row, without the
+        sketch (see refresh_sketch)
+    """
+    distributions: Dict[tuple, Dict] = {}
+    for row in rows:
+        entry = _entry(row)
+        for band in _bands_for(row['employees']):
+            distribution = distributions.setdefault((row['industry'], band, row['year']), {
+                'industry': row['industry'], 'size_band': band, 'year': row['year'],
+                'members': {}, **{field: 0.0 for field in SUM_FIELDS},
+            })
+            distribution['members'][str(row['company_id'])] = entry
+            for field, value in zip(SUM_FIELDS, entry):
+                distribution[field] += value
+    return list(distributions.values())
+
+
+def rebuild_distributions() -> int:
+    """
+    Recompute every distribution from verified footprints in one aggregate query
+
+    Locks the companies first: syncs queued meanwhile wait for the rebuild
+    and then apply on top of it instead of being overwritten.
+    """
+    with transaction.atomic():
+        list(Company.objects.select_for_update().filter(industry__gt='').order_by('pk').values_list('pk'))
+        rows = _verified_year_totals(
+            CarbonFootprint.objects.filter(company__industry__gt=''),
+            'company_id', 'company__employees', 'company__industry',
+        )
+        distributions = []
+        for fields in build_distributions(
+            dict(row, industry=row['company__industry'], employees=row['company__employees']) for row in rows
+        ):
+            distribution = IndustryEmissionDistribution(**fields)
+            refresh_sketch(distribution)
+            distributions.append(distribution)
+        IndustryEmissionDistribution.objects.all().delete()
+        IndustryEmissionDistribution.objects.bulk_create(distributions)
+    return len(distributions)
+
+
+def sync_company(company_id):
+    """Bring a company's entries in line with its verified footprints"""
+    key = str(company_id)
+    with transaction.atomic():
+        company = Company.objects.select_for_update().filter(pk=company_id).first()
+        if company is None or not company.industry:
+            return
+        wanted = {
+            (band, year): entry
+            for year, entry in company_year_totals(company.id).items()
+            for band in _bands_for(company.employees)
+        }
+        IndustryEmissionDistribution.objects.bulk_create([
+            IndustryEmissionDistribution(industry=company.industry, size_band=band, year=year)
+            for band, year in wanted
+        ], ignore_conflicts=True)
+
+        changed = []
+        for distribution in IndustryEmissionDistribution.objects.select_for_update().filter(
+            Q(year__in={year for _, year in wanted}) | Q(members__has_key=key),
+            industry=company.industry,
+        ).order_by('pk'):
+            entry = wanted.get((distribution.size_band, distribution.year))
+            if distribution.members.get(key) == entry:
+                continue
+            if key in distribution.members:
+                remove_member(distribution, key)
+            if entry is not None:
+                add_member(distribution, key, entry)
+            refresh_sketch(distribution)
+            changed.append(distribution)
+        for distribution in changed:
+            distribution.save()
+
+
+def _distribution_state(company_id, status, period_start, totals):
+    """What a footprint contributes to the distributions, or None if nothing"""
+    if status != 'verified' or period_start is None:
+        return None
+    return company_id, period_start.year, [float(value or 0) for value in totals]
+
+
+def footprint_changes_distributions(footprint, created: bool = False, deleted: bool = False) -> bool:
+    """
+    Whether a footprint write changes any distribution
+
+    Drafts and submitted footprints don't count; a verified footprint does
+    when it is added, removed, or its year or emissions change. Compares
+    with the values the instance was loaded or last saved with (see
+    CarbonFootprint.from_db); an instance without them is assumed to have
+    changed.
+    """
+    new = _distribution_state(
+        footprint.company_id, footprint.status, footprint.period_start,
+        [getattr(footprint, field) for field in ENTRY_FIELDS.values()],
+    )
+    if deleted or created:
+        return new is not None
+    loaded = getattr(footprint, '_loaded_values', None)
+    fields = ['company_id', 'status', 'period_start', *ENTRY_FIELDS.values()]
+    if loaded is None or any(field not in loaded for field in fields):
+        return True
+    old = _distribution_state(
+        loaded['company_id'], loaded['status'], loaded['period_start'],
+        [loaded[field] for field in ENTRY_FIELDS.values()],
+    )
+    return old != new
+
+
+def _sync_pending_key(company_id) -> str:
+    return f"emission_distribution_sync_pending_{company_id}"
+
+
+def schedule_company_sync(company_id):
+    """
+    Queue sync_company for once the write commits
+
+    Only the first write in each EMISSION_DISTRIBUTION_SYNC_DELAY window
+    queues a task; the task clears the flag before syncing, so later writes
+    queue another.
+    """
+    transaction.on_commit(lambda: _queue_company_sync(company_id))
+
+
+def _queue_company_sync(company_id):
+    from .tasks import sync_company_distributions
+
+    delay = getattr(settings, 'EMISSION_DISTRIBUTION_SYNC_DELAY', 30)
+    if not cache.add(_sync_pending_key(company_id), True, delay * 2):
+        return
+    try:
+        sync_company_distributions.apply_async(args=[str(company_id)], countdown=delay)
+    except Exception as e:
+        # Without a broker, sync now rather than wait for the nightly rebuild
+        clear_sync_pending(company_id)
+        logger.warning(f"Could not queue distribution sync for company {company_id}: {str(e)}")
+        sync_company(company_id)
+
+
+def clear_sync_pending(company_id):
+    cache.delete(_sync_pending_key(company_id))
+
+
+def peer_distribution(company, year: int, entry: List[float]) -> Optional[Dict]:
+    """
+    Where a company's emissions for a year sit among its industry peers
+
+    Uses the company's size band when the band has at least MIN_BAND_PEERS
+    other companies, otherwise the whole industry. Reads the one or two
+    candidate rows without their member maps and leaves the company itself
+    out of the counts and averages. The percent below is exact up to
+    SKETCH_POINTS companies and interpolated from the quantiles beyond.
+
+    Args:
+        company: Company being ranked
+        year: Calendar year
+        entry: The company's member entry for the year (see company_year_totals)
+
+    Returns:
+        Size band used, peer count, peer averages and the percent of peers
+        with lower total emissions; None if no other company reported that year
+    """
+    band = size_band(company.employees)
+    rows = {
+        row.size_band: row
+        for row in IndustryEmissionDistribution.objects.filter(
+            industry=company.industry or '', year=year, size_band__in={'', band}
+        ).defer('members').annotate(
+            includes_company=ExpressionWrapper(Q(members__has_key=str(company.id)), output_field=BooleanField())
+        )
+    }
+
+    def peers(row):
+        return row.member_count - (1 if row.includes_company else 0)
+
+    row = rows[band] if band in rows and band and peers(rows[band]) >= MIN_BAND_PEERS else rows.get('')
+    if row is None or peers(row) <= 0:
+        return None
+
+    peer_count = peers(row)
+    sums = [getattr(row, field) for field in SUM_FIELDS]
+    if row.includes_company:
+        sums = [total - value for total, value in zip(sums, entry)]
+    # The company's own total is never strictly below itself, so it isn't counted here
+    below = count_below(row.quantiles, row.member_count, entry[0])
+    return {
+        'size_band': row.size_band,
+        'peer_count': peer_count,
+        'averages': {key: total / peer_count for key, total in zip(ENTRY_FIELDS, sums)},
+        'percent_below': below / peer_count * 100,
+    }
@@ -0,0 +1,164 @@
+"""
+Precomputed forecasts for the prediction endpoints
+
+A nightly task (carbon.tasks.refresh_forecast_snapshots) computes every
+forecast the prediction endpoints and PredictiveAnalyticsView serve and
+upserts them into ForecastSnapshot; the endpoints read those rows and only
+compute on demand when a row is missing or asks about a different period.
+
+Writing footprint data or offset purchases deletes the company's snapshots
+(so nothing stale is served), records the time in ForecastInvalidation and
+schedules a recompute for just that company; repeated writes within
+FORECAST_REFRESH_DELAY share one recompute. Refreshes compute before they
+upsert, so snapshots computed before a company's latest invalidation are
+dropped instead of written back.
+"""
+from datetime import date
+from typing import Any, Dict, List, Optional
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ForecastInvalidation, ForecastSnapshot
+from .periods import add_months
+from .prediction_service import PredictionService
+
+logger = logging.getLogger(__name__)
+
+# PredictiveAnalyticsView caps its horizon at 12 months; shorter requests are sliced
+TRAJECTORY_MONTHS = 12
+
+
+def next_target_period(today: Optional[date] = None) -> str:
+    """The YYYY-MM period after the current month, which next-value snapshots predict"""
+    today = today or timezone.now().date()
+    return add_months(today.replace(day=1), 1).strftime('%Y-%m')
+
+
+def build_company_snapshots(company, computed_at=None) -> List[ForecastSnapshot]:
+    """
+    Compute every snapshot for one company (unsaved)
+
+    The history is read once for the seasonal and trend analyses and once for
+    the fitted next-value models; the trajectory has its own monthly series.
+    """
+    from .advanced_utils import predict_carbon_trajectory
+
+    computed_at = computed_at or timezone.now()
+    service = PredictionService()
+    activities = list(PredictionService.ACTIVITY_SCOPES)
+    target_period = next_target_period(computed_at.date())
+
+    def snapshot(kind, payload, activity_type='', period=''):
+        return ForecastSnapshot(
+            company_id=company.id, kind=kind, activity_type=activity_type,
+            target_period=period, payload=payload, computed_at=computed_at
+        )
+
+    snapshots = [
+        snapshot('next_value', payload, activity, target_period)
+        for activity, payload in service.predict_with_models(company.id, activities, target_period).items()
+    ]
+
+    series = service.fetch_historical_series(company.id, lookback_months=24)
+    for activity in activities:
+        history = series[service.value_field(activity)]
+        snapshots.append(snapshot(
+            'seasonal', service.detect_seasonal_patterns(company.id, activity, historical_data=history), activity
+        ))
+        snapshots.append(snapshot(
+            'growth_trend', service.calculate_growth_trend(company.id, activity, historical_data=history), activity
+        ))
+    snapshots.append(snapshot(
+        'growth_trend',
+        service.calculate_growth_trend(company.id, None, historical_data=series['total_emissions'])
+    ))
+
+    snapshots.append(snapshot('trajectory', predict_carbon_trajectory(company, TRAJECTORY_MONTHS)))
+    return snapshots
+
+
+def save_snapshots(snapshots: List[ForecastSnapshot], computed_at=None) -> int:
+    """
+    Upsert snapshots on (company, kind, activity_type)
+
+    With computed_at, snapshots of companies invalidated since then are
+    skipped: their data changed while the snapshots were being computed.
+    """
+    if computed_at is not None and snapshots:
+        stale = set(
+            ForecastInvalidation.objects.filter(
+                company_id__in={snapshot.company_id for snapshot in snapshots},
+                invalidated_at__gte=computed_at,
+            ).values_list('company_id', flat=True)
+        )
+        snapshots = [snapshot for snapshot in snapshots if snapshot.company_id not in stale]
+        if not snapshots:
+            return 0
+    ForecastSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=['company', 'kind', 'activity_type'],
+        update_fields=['target_period', 'payload', 'computed_at'],
+    )
+    return len(snapshots)
+
+
+def get_snapshot_payload(company_id, kind: str, activity_type: str = '',
+                         target_period: str = '') -> Optional[Dict[str, Any]]:
+    """Precomputed payload, or None if there is no snapshot for that question"""
+    return ForecastSnapshot.objects.filter(
+        company_id=company_id, kind=kind, activity_type=activity_type or '', target_period=target_period
+    ).values_list('payload', flat=True).first()
+
+
+def get_trajectory(company, months_ahead: int) -> Dict[str, Any]:
+    """Carbon trajectory for up to TRAJECTORY_MONTHS ahead, from the snapshot when there is one"""
+    from .advanced_utils import predict_carbon_trajectory, truncate_trajectory
+
+    trajectory = get_snapshot_payload(company.id, 'trajectory')
+    if trajectory is None:
+        return predict_carbon_trajectory(company, months_ahead)
+    return truncate_trajectory(trajectory, months_ahead)
+
+
+def _refresh_pending_key(company_id) -> str:
+    return f"forecast_refresh_pending_{company_id}"
+
+
+def schedule_company_refresh(company_id):
+    """
+    Drop the company's snapshots and queue a recompute once the write commits
+
+    Only the first write in each FORECAST_REFRESH_DELAY window queues a task;
+    the task clears the flag before computing, so later writes queue another.
+    """
+    ForecastSnapshot.objects.filter(company_id=company_id).delete()
+    ForecastInvalidation.objects.bulk_create(
+        [ForecastInvalidation(company_id=company_id, invalidated_at=timezone.now())],
+        update_conflicts=True,
+        unique_fields=['company'],
+        update_fields=['invalidated_at'],
+    )
+    transaction.on_commit(lambda: _queue_company_refresh(company_id))
+
+
+def _queue_company_refresh(company_id):
+    from .tasks import refresh_company_forecasts
+
+    delay = getattr(settings, 'FORECAST_REFRESH_DELAY', 60)
+    if not cache.add(_refresh_pending_key(company_id), True, delay * 2):
+        return
+    try:
+        refresh_company_forecasts.apply_async(args=[str(company_id)], countdown=delay)
+    except Exception as e:
+        # Without a broker the endpoints keep computing on demand until the nightly run
+        clear_refresh_pending(company_id)
+        logger.warning(f"Could not queue forecast refresh for company {company_id}: {str(e)}")
+
+
+def clear_refresh_pending(company_id):
+    cache.delete(_refresh_pending_key(company_id))
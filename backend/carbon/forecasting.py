@@ -0,0 +1,271 @@
+"""
+Holt-Winters forecasting for emission time series
+
+Footprints are bucketed by period_start into a regular series (monthly,
+quarterly or annual, whichever spacing the company reports at) and fitted with
+additive Holt-Winters exponential smoothing: level, trend and, once there are
+two full years of history, a seasonal component. Smoothing parameters are
+chosen by minimising one-step-ahead squared error over a grid, with every
+candidate run through the recursion at once as a NumPy vector.
+
+Fitted models are cached per company and series together with a signature of
+the data they were fitted on, so a model is only refitted when new periods
+arrive (or old ones change). Forecasting any number of horizons from a fitted
+model is a handful of array operations, and prediction intervals come from the
+model's residual variance rather than a fixed percentage.
+"""
+from datetime import date
+from math import gcd
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.core.cache import cache
+
+from .ai_result_cache import input_hash
+from .periods import add_months
+
+# Fitted models are cheap to store and only go stale when the data changes
+MODEL_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+# Fewest points a level-and-trend model is fitted on
+MIN_POINTS = 3
+
+# z-score of the two-sided 95% prediction interval
+INTERVAL_Z = 1.96
+
+ALPHA_GRID = np.linspace(0.05, 0.95, 10)
+BETA_GRID = np.array([0.01, 0.05, 0.1, 0.2, 0.3])
+GAMMA_GRID = np.array([0.05, 0.1, 0.2, 0.3, 0.5])
+
+
+def _months_between(start: date, end: date) -> int:
+    return (end.year - start.year) * 12 + end.month - start.month
+
+
+def build_period_series(rows: Sequence[Tuple[date, float]]) -> Tuple[List[date], np.ndarray, int]:
+    """
+    Turn (period start, value) rows into a regularly spaced series
+
+    Values for the same period are summed. The spacing is the largest step
+    (in months) that divides every gap between periods, so monthly, quarterly
+    and annual reporting each keep their own cadence; missing periods in
+    between are linearly interpolated.
+
+    Returns:
+        (period starts, values, step in months)
+    """
+    totals: Dict[date, float] = {}
+    for start, value in rows:
+        totals[start] = totals.get(start, 0.0) + float(value or 0)
+    if not totals:
+        return [], np.zeros(0), 1
+
+    starts = sorted(totals)
+    step = 0
+    for previous, current in zip(starts, starts[1:]):
+        step = gcd(step, _months_between(previous, current))
+    step = step or 1
+
+    offsets = np.array([_months_between(starts[0], start) // step for start in starts])
+    grid = np.arange(offsets[-1] + 1)
+    values = np.interp(grid, offsets, [totals[start] for start in starts])
+    return [add_months(starts[0], int(index) * step) for index in grid], values, step
+
+
+class HoltWintersModel:
+    """
+    Additive Holt-Winters model fitted to one series
+
+    With fewer than two seasons of history the seasonal component is dropped
+    (Holt's linear trend method).
+    """
+
+    def __init__(self, alpha, beta, gamma, level, trend, season, sigma,
+                 season_length, step_months, last_period, n_points):
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.level = level
+        self.trend = trend
+        # Seasonal offsets for the next season_length periods, in order
+        self.season = list(season)
+        self.sigma = sigma
+        self.season_length = season_length
+        self.step_months = step_months
+        self.last_period = last_period
+        self.n_points = n_points
+
+    @property
+    def is_seasonal(self) -> bool:
+        return self.season_length > 1
+
+    @property
+    def method(self) -> str:
+        return 'holt_winters' if self.is_seasonal else 'holt_linear'
+
+    @property
+    def periods_per_year(self) -> float:
+        return 12 / self.step_months
+
+    @property
+    def annual_growth_rate(self) -> float:
+        """Trend over a year relative to the current level"""
+        if self.level <= 0:
+            return 0.0
+        return self.trend * self.periods_per_year / self.level
+
+    @classmethod
+    def fit(cls, dates: List[date], values: np.ndarray, step_months: int = 1) -> Optional['HoltWintersModel']:
+        """Fit to a regular series from build_period_series; None if it is too short"""
+        values = np.asarray(values, dtype=float)
+        n = len(values)
+        if n < MIN_POINTS:
+            return None
+
+        season_length = 12 // step_months if 12 % step_months == 0 else 1
+        if season_length > 1 and n >= 2 * season_length:
+            grid = np.array(np.meshgrid(ALPHA_GRID, BETA_GRID, GAMMA_GRID)).reshape(3, -1)
+        else:
+            season_length = 1
+            grid = np.array(np.meshgrid(ALPHA_GRID, BETA_GRID, [0.0])).reshape(3, -1)
+
+        level, trend, season, sse, n_errors = cls._smooth(values, season_length, *grid)
+        best = int(np.argmin(sse))
+        fitted_params = 3 if season_length > 1 else 2
+        sigma = float(np.sqrt(sse[best] / max(n_errors - fitted_params, 1)))
+
+        # Rotate so season[0] is the offset for the period after the last one
+        next_index = n % season_length
+        rotated = np.roll(season[best], -next_index) if season_length > 1 else np.zeros(1)
+
+        return cls(
+            alpha=float(grid[0, best]), beta=float(grid[1, best]), gamma=float(grid[2, best]),
+            level=float(level[best]), trend=float(trend[best]), season=[float(s) for s in rotated],
+            sigma=sigma, season_length=season_length, step_months=step_months,
+            last_period=dates[-1], n_points=n
+        )
+
+    @staticmethod
+    def _smooth(values, season_length, alpha, beta, gamma):
+        """
+        Run the Holt-Winters recursion for every (alpha, beta, gamma) column
+
+        Returns final level, trend and seasonal state per candidate, the
+        one-step-ahead sum of squared errors and the number of errors summed.
+        """
+        candidates = alpha.shape[0]
+        if season_length > 1:
+            # Detrend the first season so the seasonal offsets don't absorb
+            # the slope; the level is placed at its last period
+            first_mean = values[:season_length].mean()
+            initial_trend = (values[season_length:2 * season_length].mean() - first_mean) / season_length
+            centred = np.arange(season_length) - (season_length - 1) / 2
+            initial_level = first_mean + initial_trend * (season_length - 1) / 2
+            season = np.tile(values[:season_length] - (first_mean + initial_trend * centred), (candidates, 1))
+            start = season_length
+        else:
+            initial_level = values[0]
+            initial_trend = values[1] - values[0]
+            season = np.zeros((candidates, 1))
+            start = 1
+
+        level = np.full(candidates, initial_level)
+        trend = np.full(candidates, initial_trend)
+        sse = np.zeros(candidates)
+        for t in range(start, len(values)):
+            slot = t % season_length
+            seasonal = season[:, slot]
+            error = values[t] - (level + trend + seasonal)
+            sse += error ** 2
+            new_level = alpha * (values[t] - seasonal) + (1 - alpha) * (level + trend)
+            trend = beta * (new_level - level) + (1 - beta) * trend
+            level = new_level
+            if season_length > 1:
+                season[:, slot] = gamma * (values[t] - level) + (1 - gamma) * seasonal
+        return level, trend, season, sse, len(values) - start
+
+    def forecast(self, horizons: int) -> Dict[str, np.ndarray]:
+        """
+        Point forecasts, standard errors and 95% prediction intervals for 1..horizons periods ahead
+
+        Interval variance follows the additive Holt-Winters state space form:
+        sigma^2 * (1 + sum over j < h of (alpha * (1 + j * beta) + gamma * [j % m == 0])^2).
+        """
+        steps = np.arange(1, horizons + 1)
+        season = np.asarray(self.season)
+        point = self.level + steps * self.trend + season[(steps - 1) % len(season)]
+
+        lags = np.arange(1, horizons)
+        weights = self.alpha * (1 + lags * self.beta)
+        if self.is_seasonal:
+            weights = weights + self.gamma * (lags % self.season_length == 0)
+        variance = self.sigma ** 2 * (1 + np.concatenate(([0.0], np.cumsum(weights ** 2))))
+        std = np.sqrt(variance)
+        margin = INTERVAL_Z * std
+
+        return {
+            'periods': [add_months(self.last_period, int(step) * self.step_months) for step in steps],
+            'point': np.maximum(point, 0),
+            'std': std,
+            'lower': np.maximum(point - margin, 0),
+            'upper': np.maximum(point + margin, 0),
+        }
+
+    def horizon_for(self, target: date) -> int:
+        """Periods ahead of the last observation needed to reach target (at least 1)"""
+        months = _months_between(self.last_period, target)
+        return max(1, -(-months // self.step_months))
+
+    def to_dict(self) -> Dict:
+        return {
+            'alpha': self.alpha, 'beta': self.beta, 'gamma': self.gamma,
+            'level': self.level, 'trend': self.trend, 'season': self.season, 'sigma': self.sigma,
+            'season_length': self.season_length, 'step_months': self.step_months,
+            'last_period': self.last_period.isoformat(), 'n_points': self.n_points,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'HoltWintersModel':
+        return cls(**dict(data, last_period=date.fromisoformat(data['last_period'])))
+
+
+class ForecastEngine:
+    """Fit, cache and reuse Holt-Winters models"""
+
+    def model_for_series(self, cache_key: str, dates: List[date], values: np.ndarray,
+                         step_months: int = 1) -> Optional[HoltWintersModel]:
+        """
+        Cached model for a series, refitted only when the series changes
+
+        The cache entry remembers a signature of the periods and values the
+        model was fitted on; any new or edited period changes it.
+        """
+        signature = input_hash([[d.isoformat() for d in dates], np.round(values, 6).tolist(), step_months])
+        cached = cache.get(cache_key)
+        if cached and cached['signature'] == signature:
+            return HoltWintersModel.from_dict(cached['model']) if cached['model'] else None
+
+        model = HoltWintersModel.fit(dates, values, step_months)
+        cache.set(cache_key, {'signature': signature, 'model': model.to_dict() if model else None},
+                  MODEL_CACHE_TIMEOUT)
+        return model
+
+    def company_model(self, company_id, value_field: str = 'total_emissions') -> Optional[HoltWintersModel]:
+        """Model of one footprint column (e.g. scope2_emissions) for a company, from one query"""
+        return self.company_models(company_id, [value_field])[value_field]
+
+    def company_models(self, company_id, value_fields: List[str]) -> Dict[str, Optional[HoltWintersModel]]:
+        """Models of several footprint columns for a company, loaded with one query"""
+        from carbon.models import CarbonFootprint
+
+        rows = list(CarbonFootprint.objects.filter(
+            company_id=company_id, period_start__isnull=False
+        ).values_list('period_start', *value_fields))
+
+        models = {}
+        for column, value_field in enumerate(value_fields, start=1):
+            dates, values, step = build_period_series([(row[0], row[column]) for row in rows])
+            models[value_field] = self.model_for_series(
+                f"forecast_model_{company_id}_{value_field}", dates, values, step
+            )
+        return models
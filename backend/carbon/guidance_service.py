@@ -66,70 +66,23 @@ class GuidanceService:
             'missing_activities': ['natural_gas', 'business_travel'],
             'completion_percentage': 75,
             'grade': 'B',  # A/B/C/D/F
+            'data_entries': 12,  # activity data rows behind the score
         }
         """
-        from .models import CarbonFootprintData
-        
-        # Get all activities reported for this footprint
-        reported_activities = set(
-            CarbonFootprintData.objects.filter(footprint=footprint)
-            .values_list('activity_type', flat=True)
-            .distinct()
-        )
-        
-        # Calculate completeness by scope
-        scope_scores = {}
-        missing_by_scope = {}
-        
-        for scope, required_activities in self.SCOPE_ACTIVITIES.items():
-            required_set = set(required_activities)
-            reported_in_scope = required_set.intersection(reported_activities)
-            
-            if len(required_set) > 0:
-                score = len(reported_in_scope) / len(required_set)
-            else:
-                score = 0.0
-            
-            scope_scores[f'{scope}_score'] = round(score, 2)
-            missing_by_scope[scope] = list(required_set - reported_in_scope)
-        
-        # Calculate overall score (weighted by importance)
-        overall_score = (
-            scope_scores['scope1_score'] * 0.35 +
-            scope_scores['scope2_score'] * 0.35 +
-            scope_scores['scope3_score'] * 0.30
-        )
-        
-        # Determine grade
-        if overall_score >= 0.90:
-            grade = 'A'
-        elif overall_score >= 0.75:
-            grade = 'B'
-        elif overall_score >= 0.60:
-            grade = 'C'
-        elif overall_score >= 0.40:
-            grade = 'D'
-        else:
-            grade = 'F'
-        
-        # Flatten missing activities
-        all_missing = []
-        for scope, activities in missing_by_scope.items():
-            all_missing.extend(activities)
-        
-        return {
-            'overall_score': round(overall_score, 2),
-            **scope_scores,
-            'missing_activities': all_missing,
-            'missing_by_scope': missing_by_scope,
-            'completion_percentage': round(overall_score * 100),
-            'grade': grade,
-            'meets_minimum': all([
-                scope_scores['scope1_score'] >= self.COMPLETENESS_THRESHOLDS['scope1'],
-                scope_scores['scope2_score'] >= self.COMPLETENESS_THRESHOLDS['scope2'],
-                scope_scores['scope3_score'] >= self.COMPLETENESS_THRESHOLDS['scope3'],
-            ]),
-        }
+        from .completeness import get_completeness
+        
+        return get_completeness([footprint])[0]
+    
+    def calculate_completeness_scores(self, footprints) -> List[Dict]:
+        """
+        Completeness scores for many footprints at once
+        
+        Stored scores are reused; the rest are computed together from one
+        grouped query (see carbon/completeness.py).
+        """
+        from .completeness import get_completeness
+        
+        return get_completeness(footprints)
     
     def detect_missing_data(self, footprint) -> List[Dict]:
         """
@@ -458,8 +411,6 @@ class GuidanceService:
             }
         ]
         """
-        from .models import CarbonFootprintData
-        
         actions = []
         completeness = self.calculate_completeness_score(footprint)
         
@@ -475,7 +426,7 @@ class GuidanceService:
             })
         
         # Check for incomplete months
-        data_count = CarbonFootprintData.objects.filter(footprint=footprint).count()
+        data_count = completeness['data_entries']
         if data_count < 3:
             actions.append({
                 'priority': 'high',
@@ -0,0 +1,263 @@
+"""
+Load test the AI endpoints of a running server and report throughput and tail
+latency.
+
+Usage:
+    AI_BACKEND=fake RATELIMIT_ENABLE=False gunicorn scn_esg_platform.wsgi -w 4 --threads 4
+    python manage.py benchmark_ai_endpoints --user demo@example.com --concurrency 16 --duration 60
+    python manage.py benchmark_ai_endpoints --user demo@example.com --scenarios conversation,document
+
+Run the server with AI_BACKEND=fake so every request waits on a simulated model
+(see carbon/ai_backends.py and the AI_FAKE_* settings) without spending quota,
+and with RATELIMIT_ENABLE=False so the per-user rate limits don't turn the run
+into a 429/403 benchmark. The user must belong to a company; a CSRD assessment
+is created for it if the compliance scenario needs one. Each worker thread
+cycles through the selected scenarios until the duration or request budget
+runs out.
+"""
+import io
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from PIL import Image, ImageDraw
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Inputs the rule-based fast path declines, so every request reaches the model
+CONVERSATION_MESSAGES = [
+    "Our electricity bill for last month was about $500, can you work out the emissions?",
+    "We flew the sales team to Berlin and back twice this quarter",
+    "The delivery vans used roughly the same diesel as last month, maybe a bit more",
+    "Heating at the warehouse ran on natural gas all winter, the bill says 3,200 therms",
+    "How much would switching the office to a green tariff save us?",
+]
+
+SCENARIOS = ('conversation', 'conversation_stream', 'document', 'compliance')
+
+
+def _percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    index = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def _bill_image(seed: int) -> bytes:
+    """A small bill-like PNG; the seed keeps uploads from being deduplicated"""
+    image = Image.new('RGB', (800, 1000), 'white')
+    draw = ImageDraw.Draw(image)
+    draw.text((60, 60), f'CITY ELECTRIC CO - ACCOUNT {seed:09d}', fill='black')
+    draw.text((60, 120), 'Billing period: 2024-01-01 to 2024-01-31', fill='black')
+    draw.text((60, 900), f'TOTAL {400 + seed % 100}.5 kWh', fill='black')
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'Drive the conversational, document and compliance AI endpoints concurrently and report latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000', help='Server to load')
+        parser.add_argument('--user', required=True, help='Username or email of a user with a company')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent client threads')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+        parser.add_argument('--requests', type=int, default=0, help='Stop after this many requests (0 = no limit)')
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+        parser.add_argument('--timeout', type=float, default=120, help='Per-request client timeout in seconds')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown or not scenarios:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown)) or '(none)'}")
+
+        user = self._get_user(options['user'])
+        self.base_url = options['base_url'].rstrip('/')
+        self.timeout = options['timeout']
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+        if 'compliance' in scenarios:
+            self.assessment_id = self._get_assessment(user)
+
+        samples = {name: [] for name in scenarios}
+        samples_lock = threading.Lock()
+        budget = {'remaining': options['requests'] or math.inf}
+        deadline = time.monotonic() + options['duration']
+        counter = iter(range(random.randrange(10 ** 6), 10 ** 9))
+
+        def take_request():
+            with samples_lock:
+                if budget['remaining'] <= 0:
+                    return False
+                budget['remaining'] -= 1
+                return True
+
+        def worker(worker_index):
+            session = requests.Session()
+            session.headers.update(self.headers)
+            turn = worker_index
+            while time.monotonic() < deadline and take_request():
+                name = scenarios[turn % len(scenarios)]
+                turn += 1
+                started = time.monotonic()
+                try:
+                    ok, first_byte = getattr(self, f'_run_{name}')(session, started, counter)
+                except requests.RequestException:
+                    ok, first_byte = False, None
+                elapsed_ms = (time.monotonic() - started) * 1000
+                with samples_lock:
+                    samples[name].append((elapsed_ms, ok, first_byte))
+
+        self.stdout.write(
+            f"Loading {self.base_url} with {options['concurrency']} clients "
+            f"for up to {options['duration']:g}s: {', '.join(scenarios)}"
+        )
+        run_started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            list(executor.map(worker, range(options['concurrency'])))
+        wall_seconds = time.monotonic() - run_started
+
+        report = self._build_report(samples, wall_seconds, options['concurrency'])
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print_report(report)
+
+    def _get_user(self, identifier):
+        User = get_user_model()
+        user = User.objects.filter(Q(username=identifier) | Q(email=identifier)).first()
+        if user is None:
+            raise CommandError(f'User not found: {identifier}')
+        if not user.company_id:
+            raise CommandError(f'User {identifier} is not associated with a company')
+        return user
+
+    def _get_assessment(self, user):
+        from compliance.models import CSRDAssessment
+
+        assessment = CSRDAssessment.objects.filter(company=user.company).first()
+        if assessment is None:
+            assessment = CSRDAssessment.objects.create(
+                company=user.company,
+                created_by=user,
+                company_size='medium',
+                employee_count=user.company.employees,
+                has_eu_operations=True,
+            )
+        return assessment.id
+
+    def _url(self, path):
+        return f'{self.base_url}{path}'
+
+    @staticmethod
+    def _message(counter):
+        # Unique text so identical prompts aren't coalesced or served from cache
+        return f"{random.choice(CONVERSATION_MESSAGES)} (ref {next(counter)})"
+
+    def _run_conversation(self, session, started, counter):
+        response = session.post(
+            self._url('/api/v1/carbon/ai/extract-from-conversation/'),
+            json={'message': self._message(counter)},
+            timeout=self.timeout,
+        )
+        return response.ok, None
+
+    def _run_conversation_stream(self, session, started, counter):
+        """Time to the first token event is reported alongside the full response time"""
+        first_token = None
+        ok = True
+        with session.post(
+            self._url('/api/v1/carbon/ai/extract-from-conversation/stream/'),
+            json={'message': self._message(counter)},
+            stream=True,
+            timeout=self.timeout,
+        ) as response:
+            if not response.ok:
+                return False, None
+            for line in response.iter_lines(decode_unicode=True):
+                if line == 'event: token' and first_token is None:
+                    first_token = (time.monotonic() - started) * 1000
+                elif line == 'event: error':
+                    ok = False
+        return ok, first_token
+
+    def _run_document(self, session, started, counter):
+        seed = next(counter)
+        response = session.post(
+            self._url('/api/v1/carbon/ai/upload-document/'),
+            files={'file': (f'bill_{seed}.png', _bill_image(seed), 'image/png')},
+            data={'document_type': 'utility_bill'},
+            timeout=self.timeout,
+        )
+        return response.ok, None
+
+    def _run_compliance(self, session, started, counter):
+        response = session.post(
+            self._url(f'/compliance/api/v1/compliance/assessments/{self.assessment_id}/run_ai_analysis/'),
+            timeout=self.timeout,
+        )
+        return response.ok, None
+
+    @staticmethod
+    def _build_report(samples, wall_seconds, concurrency):
+        scenarios = {}
+        for name, rows in samples.items():
+            latencies = sorted(elapsed for elapsed, _, _ in rows)
+            first_bytes = sorted(first for _, _, first in rows if first is not None)
+            entry = {
+                'requests': len(rows),
+                'errors': sum(1 for _, ok, _ in rows if not ok),
+                'throughput_rps': round(len(rows) / wall_seconds, 2) if wall_seconds else 0,
+                'p50_ms': _percentile(latencies, 0.50),
+                'p95_ms': _percentile(latencies, 0.95),
+                'p99_ms': _percentile(latencies, 0.99),
+                'max_ms': latencies[-1] if latencies else None,
+            }
+            if first_bytes:
+                entry['first_token_p50_ms'] = _percentile(first_bytes, 0.50)
+                entry['first_token_p95_ms'] = _percentile(first_bytes, 0.95)
+            for key, value in entry.items():
+                if isinstance(value, float) and key.endswith('_ms'):
+                    entry[key] = round(value, 1)
+            scenarios[name] = entry
+
+        total = sum(entry['requests'] for entry in scenarios.values())
+        return {
+            'concurrency': concurrency,
+            'wall_seconds': round(wall_seconds, 2),
+            'total_requests': total,
+            'total_errors': sum(entry['errors'] for entry in scenarios.values()),
+            'throughput_rps': round(total / wall_seconds, 2) if wall_seconds else 0,
+            'scenarios': scenarios,
+        }
+
+    def _print_report(self, report):
+        def fmt(value):
+            return '-' if value is None else f'{value:,.0f}'
+
+        self.stdout.write(
+            f"{'scenario':<22}{'reqs':>7}{'errors':>8}{'req/s':>8}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'ttft p95':>10}"
+        )
+        for name, entry in report['scenarios'].items():
+            self.stdout.write(
+                f"{name:<22}{entry['requests']:>7}{entry['errors']:>8}{entry['throughput_rps']:>8.2f}"
+                f"{fmt(entry['p50_ms']):>9}{fmt(entry['p95_ms']):>9}{fmt(entry['p99_ms']):>9}"
+                f"{fmt(entry['max_ms']):>9}{fmt(entry.get('first_token_p95_ms')):>10}"
+            )
+        style = self.style.SUCCESS if not report['total_errors'] else self.style.WARNING
+        self.stdout.write(style(
+            f"{report['total_requests']} requests in {report['wall_seconds']}s "
+            f"({report['throughput_rps']} req/s, {report['total_errors']} errors) "
+            f"at concurrency {report['concurrency']}"
+        ))
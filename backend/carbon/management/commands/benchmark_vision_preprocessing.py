@@ -0,0 +1,173 @@
+"""
+Benchmark Gemini Vision payload size and extraction latency with and without
+image preprocessing.
+
+Usage:
+    python manage.py benchmark_vision_preprocessing --fixtures path/to/dir
+    python manage.py benchmark_vision_preprocessing --runs 3
+
+Fixture files whose name contains "meter" are sent through read_meter_photo,
+everything else through extract_from_utility_bill. Without a fixtures
+directory a small synthetic set (a scanned bill, a bill PDF and a meter photo)
+is generated in memory. Latency is only measured when GEMINI_API_KEY is set.
+"""
+import io
+import mimetypes
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image, ImageDraw, ImageFilter
+
+from carbon.ai_services import GeminiVisionService
+from carbon.image_preprocessing import VisionImagePreprocessor, baseline_payload_bytes
+
+FIXTURE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.pdf')
+
+
+def _synthetic_bill() -> Image.Image:
+    """A letter-size page at 300 DPI with a bill layout and a wide scanner margin"""
+    image = Image.new('RGB', (2550, 3300), (235, 235, 230))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((200, 200, 2350, 3100), fill='white')
+    draw.text((300, 300), 'CITY ELECTRIC CO - ACCOUNT 123456789', fill='black')
+    draw.text((300, 400), 'Billing period: 2024-01-01 to 2024-01-31', fill='black')
+    for row in range(40):
+        y = 600 + row * 55
+        draw.text((300, y), f'Line item {row + 1:02d}    {row * 11.5:8.2f} kWh    ${row * 1.37:7.2f}', fill='black')
+        draw.line((300, y + 40, 2250, y + 40), fill=(200, 200, 200))
+    draw.text((300, 2900), 'TOTAL 450.5 kWh    $125.30', fill='black')
+    return _add_sensor_noise(image)
+
+
+def _synthetic_meter_photo() -> Image.Image:
+    """A slightly blurred 12MP phone photo of a meter display"""
+    image = Image.new('RGB', (4032, 3024), (90, 110, 95))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((1000, 500, 3000, 2500), fill=(220, 220, 210))
+    draw.rectangle((1400, 1300, 2600, 1600), fill=(20, 20, 20))
+    draw.text((1500, 1400), '1 0 4 5 0 . 5  kWh', fill=(240, 240, 240))
+    return _add_sensor_noise(image.filter(ImageFilter.GaussianBlur(2)))
+
+
+def _add_sensor_noise(image: Image.Image) -> Image.Image:
+    """Scanner/camera grain - flat synthetic images compress unrealistically well"""
+    noise = Image.effect_noise(image.size, 40).convert('RGB')
+    return Image.blend(image, noise, 0.06)
+
+
+def _encode(image: Image.Image, fmt: str, **kwargs) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'Compare vision payload size and extraction latency before/after image preprocessing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixtures', type=str, help='Directory of bill/meter images and PDFs')
+        parser.add_argument('--runs', type=int, default=1, help='Extraction runs per fixture and mode')
+
+    def handle(self, *args, **options):
+        fixtures = self._load_fixtures(options.get('fixtures'))
+        if not fixtures:
+            raise CommandError('No fixtures found')
+
+        preprocessor = VisionImagePreprocessor()
+        service = GeminiVisionService()
+        measure_latency = service.model is not None
+        if not measure_latency:
+            self.stdout.write(self.style.WARNING(
+                'Gemini not configured - reporting payload sizes only'
+            ))
+
+        header = f"{'fixture':<28}{'before':>12}{'after':>12}{'ratio':>8}{'q':>5}"
+        if measure_latency:
+            header += f"{'lat before':>13}{'lat after':>12}"
+        self.stdout.write(header)
+
+        total_before = total_after = 0
+        for name, data, mime_type in fixtures:
+            image = self._first_page(service, preprocessor, data, mime_type)
+            before = self._baseline_bytes(data, mime_type)
+            _, stats = preprocessor.process(image)
+            after = stats['payload_bytes']
+            total_before += before
+            total_after += after
+
+            line = f"{name:<28}{before:>12,}{after:>12,}{before / after:>7.1f}x{stats['quality']:>5}"
+            if measure_latency:
+                lat_before = self._time_extraction(service, None, name, data, mime_type, options['runs'])
+                lat_after = self._time_extraction(service, preprocessor, name, data, mime_type, options['runs'])
+                line += f"{lat_before:>11}ms{lat_after:>10}ms"
+            self.stdout.write(line)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Total payload {total_before:,} -> {total_after:,} bytes "
+            f"({100 * (1 - total_after / total_before):.1f}% smaller)"
+        ))
+
+    def _load_fixtures(self, directory):
+        if not directory:
+            bill = _synthetic_bill()
+            return [
+                ('synthetic_bill.png', _encode(bill, 'PNG'), 'image/png'),
+                ('synthetic_bill.pdf', _encode(bill, 'PDF', resolution=300.0), 'application/pdf'),
+                ('synthetic_meter_photo.jpg', _encode(_synthetic_meter_photo(), 'JPEG', quality=95), 'image/jpeg'),
+            ]
+
+        if not os.path.isdir(directory):
+            raise CommandError(f'Fixture directory not found: {directory}')
+
+        fixtures = []
+        for file_name in sorted(os.listdir(directory)):
+            if not file_name.lower().endswith(FIXTURE_EXTENSIONS):
+                continue
+            with open(os.path.join(directory, file_name), 'rb') as handle:
+                data = handle.read()
+            mime_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+            fixtures.append((file_name, data, mime_type))
+        return fixtures
+
+    def _first_page(self, service, preprocessor, data, mime_type):
+        if mime_type != 'application/pdf':
+            return Image.open(io.BytesIO(data))
+        import fitz  # PyMuPDF
+        pdf_document = fitz.open(stream=data, filetype='pdf')
+        original = service.preprocessor
+        service.preprocessor = preprocessor
+        try:
+            return service._render_pdf_page(pdf_document, 0)
+        finally:
+            service.preprocessor = original
+            pdf_document.close()
+
+    def _baseline_bytes(self, data, mime_type):
+        """What the old code path sent: the full-resolution image as lossless WebP"""
+        if mime_type != 'application/pdf':
+            return baseline_payload_bytes(Image.open(io.BytesIO(data)))
+        import fitz  # PyMuPDF
+        pdf_document = fitz.open(stream=data, filetype='pdf')
+        try:
+            pix = pdf_document[0].get_pixmap(matrix=fitz.Matrix(300 / 72, 300 / 72))
+            return baseline_payload_bytes(Image.open(io.BytesIO(pix.tobytes('png'))))
+        finally:
+            pdf_document.close()
+
+    def _time_extraction(self, service, preprocessor, name, data, mime_type, runs):
+        original = service.preprocessor
+        service.preprocessor = preprocessor
+        timings = []
+        try:
+            for _ in range(max(1, runs)):
+                start = time.time()
+                if 'meter' in name.lower():
+                    service.read_meter_photo(data)
+                else:
+                    service.extract_from_utility_bill(data, mime_type)
+                timings.append(int((time.time() - start) * 1000))
+        finally:
+            service.preprocessor = original
+        return int(statistics.median(timings))
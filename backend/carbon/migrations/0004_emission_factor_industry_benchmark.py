@@ -0,0 +1,102 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:20
+
+import django.core.validators
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carbon', '0003_add_document_upload_models'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmissionFactor',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('activity_type', models.CharField(help_text='Type of activity: electricity, natural_gas, vehicle_fuel, etc.', max_length=100)),
+                ('sub_category', models.CharField(blank=True, help_text='Sub-category: grid_electricity, diesel, gasoline, etc.', max_length=100)),
+                ('region_type', models.CharField(choices=[('global', 'Global'), ('country', 'Country'), ('state', 'State/Province'), ('city', 'City'), ('utility', 'Utility Provider')], default='global', max_length=50)),
+                ('region_code', models.CharField(blank=True, help_text='ISO country code, state abbreviation, or custom identifier', max_length=50)),
+                ('region_name', models.CharField(help_text='Human-readable region name', max_length=200)),
+                ('industry_sector', models.CharField(blank=True, help_text='Industry sector if factor is industry-specific', max_length=100)),
+                ('year', models.IntegerField(help_text='Year this factor applies to', validators=[django.core.validators.MinValueValidator(2000), django.core.validators.MaxValueValidator(2100)])),
+                ('valid_from', models.DateField(blank=True, help_text='Start date of validity period', null=True)),
+                ('valid_until', models.DateField(blank=True, help_text='End date of validity period', null=True)),
+                ('factor_value', models.DecimalField(decimal_places=6, help_text='Emission factor value', max_digits=12, validators=[django.core.validators.MinValueValidator(0)])),
+                ('unit', models.CharField(help_text='Unit of emission factor (e.g., kg CO2/kWh, kg CO2e/gallon)', max_length=50)),
+                ('co2_percentage', models.DecimalField(decimal_places=2, default=100.0, help_text='Percentage of emissions that are CO2', max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)])),
+                ('ch4_percentage', models.DecimalField(decimal_places=2, default=0.0, help_text='Percentage of emissions that are CH4 (methane)', max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)])),
+                ('n2o_percentage', models.DecimalField(decimal_places=2, default=0.0, help_text='Percentage of emissions that are N2O (nitrous oxide)', max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)])),
+                ('source', models.CharField(help_text='Data source (EPA, BEIS, EEA, etc.)', max_length=200)),
+                ('source_url', models.URLField(blank=True, help_text='URL to original data source')),
+                ('methodology', models.TextField(blank=True, help_text='Calculation methodology or notes')),
+                ('confidence_level', models.CharField(choices=[('high', 'High'), ('medium', 'Medium'), ('low', 'Low'), ('estimated', 'Estimated')], default='high', max_length=20)),
+                ('usage_count', models.IntegerField(default=0, help_text='Number of times this factor has been used in calculations')),
+                ('is_default', models.BooleanField(default=False, help_text='Whether this is the default factor for this activity/region')),
+                ('is_active', models.BooleanField(default=True, help_text='Whether this factor is currently active and should be used')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-year', 'region_type', 'region_code', 'activity_type'],
+            },
+        ),
+        migrations.CreateModel(
+            name='IndustryBenchmark',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('industry_sector', models.CharField(help_text='Industry sector (Manufacturing, Technology, Retail, etc.)', max_length=100)),
+                ('sub_sector', models.CharField(blank=True, help_text='Sub-sector for more specific comparison', max_length=100)),
+                ('employee_range_min', models.IntegerField(help_text='Minimum employees in this benchmark bracket')),
+                ('employee_range_max', models.IntegerField(help_text='Maximum employees in this benchmark bracket')),
+                ('region', models.CharField(default='global', help_text='Geographic region (US, EU, UK, global)', max_length=50)),
+                ('year', models.IntegerField(help_text='Year this benchmark data applies to')),
+                ('avg_scope1_per_employee', models.DecimalField(decimal_places=3, help_text='Average Scope 1 emissions per employee (tCO2e)', max_digits=10)),
+                ('avg_scope2_per_employee', models.DecimalField(decimal_places=3, help_text='Average Scope 2 emissions per employee (tCO2e)', max_digits=10)),
+                ('avg_scope3_per_employee', models.DecimalField(blank=True, decimal_places=3, help_text='Average Scope 3 emissions per employee (tCO2e)', max_digits=10, null=True)),
+                ('avg_total_per_employee', models.DecimalField(decimal_places=3, help_text='Average total emissions per employee (tCO2e)', max_digits=10)),
+                ('median_total_per_employee', models.DecimalField(blank=True, decimal_places=3, max_digits=10, null=True)),
+                ('percentile_25', models.DecimalField(blank=True, decimal_places=3, help_text='25th percentile (bottom quartile)', max_digits=10, null=True)),
+                ('percentile_75', models.DecimalField(blank=True, decimal_places=3, help_text='75th percentile (top quartile)', max_digits=10, null=True)),
+                ('sample_size', models.IntegerField(help_text='Number of companies in this benchmark')),
+                ('source', models.CharField(help_text='Data source (CDP, EPA, internal, etc.)', max_length=200)),
+                ('confidence_level', models.CharField(choices=[('high', 'High'), ('medium', 'Medium'), ('low', 'Low')], default='medium', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-year', 'industry_sector', 'employee_range_min'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='industrybenchmark',
+            index=models.Index(fields=['industry_sector', 'year'], name='carbon_indu_industr_2bfe71_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='industrybenchmark',
+            index=models.Index(fields=['employee_range_min', 'employee_range_max'], name='carbon_indu_employe_554289_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='industrybenchmark',
+            unique_together={('industry_sector', 'sub_sector', 'employee_range_min', 'employee_range_max', 'year', 'region')},
+        ),
+        migrations.AddIndex(
+            model_name='emissionfactor',
+            index=models.Index(fields=['activity_type', 'region_code', 'year'], name='carbon_emis_activit_97c9c2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emissionfactor',
+            index=models.Index(fields=['region_type', 'region_code'], name='carbon_emis_region__8aaaf5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emissionfactor',
+            index=models.Index(fields=['is_active', 'is_default'], name='carbon_emis_is_acti_db5345_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='emissionfactor',
+            unique_together={('activity_type', 'sub_category', 'region_code', 'year', 'industry_sector')},
+        ),
+    ]
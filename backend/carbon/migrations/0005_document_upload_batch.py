@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('companies', '0001_initial'),
+        ('carbon', '0004_uploaded_document_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentUploadBatch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('document_type', models.CharField(default='other', max_length=50)),
+                ('total_documents', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_batches', to='companies.company')),
+                ('uploaded_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='document_batches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='uploadeddocument',
+            name='batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='documents', to='carbon.documentuploadbatch'),
+        ),
+        migrations.AddIndex(
+            model_name='documentuploadbatch',
+            index=models.Index(fields=['company', 'created_at'], name='carbon_docu_company_ad122b_idx'),
+        ),
+    ]
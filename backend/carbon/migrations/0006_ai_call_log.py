@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('carbon', '0005_document_upload_batch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AICallLog',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('feature', models.CharField(max_length=100)),
+                ('model_name', models.CharField(blank=True, max_length=100)),
+                ('prompt_tokens', models.IntegerField(default=0)),
+                ('response_tokens', models.IntegerField(default=0)),
+                ('latency_ms', models.IntegerField(default=0)),
+                ('outcome', models.CharField(choices=[('success', 'Success'), ('error', 'Error'), ('timeout', 'Timeout'), ('circuit_open', 'Circuit Open'), ('mock', 'Mock Response'), ('cache_hit', 'Cache Hit'), ('coalesced', 'Coalesced')], default='success', max_length=20)),
+                ('cache_hit', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('company', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='companies.company')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['feature', 'created_at'], name='carbon_aica_feature_3f56d3_idx'), models.Index(fields=['company', 'created_at'], name='carbon_aica_company_dc5393_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:00
+
+from django.db import migrations, models
+
+from carbon.periods import parse_reporting_period
+
+BACKFILL_BATCH_SIZE = 2000
+
+
+def backfill_period_bounds(apps, schema_editor):
+    CarbonFootprint = apps.get_model('carbon', 'CarbonFootprint')
+    batch = []
+    for footprint in CarbonFootprint.objects.only('id', 'reporting_period').iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        bounds = parse_reporting_period(footprint.reporting_period)
+        if bounds is None:
+            continue
+        footprint.period_start, footprint.period_end = bounds
+        batch.append(footprint)
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            CarbonFootprint.objects.bulk_update(batch, ['period_start', 'period_end'])
+            batch = []
+    if batch:
+        CarbonFootprint.objects.bulk_update(batch, ['period_start', 'period_end'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carbon', '0006_ai_call_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carbonfootprint',
+            name='period_end',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='carbonfootprint',
+            name='period_start',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_period_bounds, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='carbonfootprint',
+            index=models.Index(fields=['company', 'period_start', 'period_end'], name='carbon_fp_company_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carbonfootprint',
+            index=models.Index(fields=['period_start', 'period_end'], name='carbon_fp_period_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('carbon', '0007_carbon_footprint_period_bounds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastSnapshot',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('next_value', 'Next Value'), ('seasonal', 'Seasonal Pattern'), ('growth_trend', 'Growth Trend'), ('trajectory', 'Carbon Trajectory')], max_length=20)),
+                ('activity_type', models.CharField(blank=True, default='', max_length=50)),
+                ('target_period', models.CharField(blank=True, default='', max_length=20)),
+                ('payload', models.JSONField(default=dict)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_snapshots', to='companies.company')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='forecastsnapshot',
+            constraint=models.UniqueConstraint(fields=('company', 'kind', 'activity_type'), name='unique_forecast_snapshot'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:20
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import ExtractYear
+
+
+def build_emission_distributions(apps, schema_editor):
+    from carbon.emission_distributions import ENTRY_FIELDS, build_distributions
+
+    CarbonFootprint = apps.get_model('carbon', 'CarbonFootprint')
+    IndustryEmissionDistribution = apps.get_model('carbon', 'IndustryEmissionDistribution')
+    rows = CarbonFootprint.objects.filter(
+        status='verified', period_start__isnull=False, company__industry__gt=''
+    ).values(
+        'company_id', 'company__employees', 'company__industry', year=ExtractYear('period_start')
+    ).annotate(**{key: Sum(field) for key, field in ENTRY_FIELDS.items()}).order_by()
+    IndustryEmissionDistribution.objects.bulk_create([
+        IndustryEmissionDistribution(**fields)
+        for fields in build_distributions(
+            dict(row, industry=row['company__industry'], employees=row['company__employees']) for row in rows
+        )
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carbon', '0008_forecast_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndustryEmissionDistribution',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('industry', models.CharField(max_length=100)),
+                ('size_band', models.CharField(blank=True, choices=[('micro', 'Micro (<10 employees)'), ('small', 'Small (10-49 employees)'), ('medium', 'Medium (50-249 employees)'), ('large', 'Large (250+ employees)')], default='', max_length=20)),
+                ('year', models.IntegerField()),
+                ('members', models.JSONField(default=dict)),
+                ('values', models.JSONField(default=list)),
+                ('sum_total', models.FloatField(default=0)),
+                ('sum_scope1', models.FloatField(default=0)),
+                ('sum_scope2', models.FloatField(default=0)),
+                ('sum_scope3', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='industryemissiondistribution',
+            constraint=models.UniqueConstraint(fields=('industry', 'size_band', 'year'), name='unique_emission_distribution'),
+        ),
+        migrations.RunPython(build_emission_distributions, migrations.RunPython.noop),
+    ]
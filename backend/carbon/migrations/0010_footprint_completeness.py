@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('carbon', '0009_industry_emission_distribution'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FootprintCompleteness',
+            fields=[
+                ('footprint', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='completeness', serialize=False, to='carbon.carbonfootprint')),
+                ('activity_mask', models.IntegerField(default=0)),
+                ('data_entries', models.IntegerField(default=0)),
+                ('scope1_score', models.FloatField(default=0)),
+                ('scope2_score', models.FloatField(default=0)),
+                ('scope3_score', models.FloatField(default=0)),
+                ('overall_score', models.FloatField(default=0)),
+                ('grade', models.CharField(max_length=1)),
+                ('meets_minimum', models.BooleanField(default=False)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='footprint_completeness', to='companies.company')),
+            ],
+            options={
+                'verbose_name_plural': 'Footprint completeness',
+                'indexes': [models.Index(fields=['company', 'overall_score'], name='carbon_fp_compl_score_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CarbonFootprintData',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('activity_type', models.CharField(max_length=50)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('footprint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_data', to='carbon.carbonfootprint')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['footprint', 'activity_type'], name='carbon_fp_data_activity_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_ledger_columns(apps, schema_editor):
+    """Fill company, scope and period_start of rows written before the ledger columns existed"""
+    from carbon.guidance_service import GuidanceService
+
+    CarbonFootprintData = apps.get_model('carbon', 'CarbonFootprintData')
+    scopes = {
+        activity: int(scope[-1])
+        for scope, activities in GuidanceService.SCOPE_ACTIVITIES.items()
+        for activity in activities
+    }
+    rows = list(CarbonFootprintData.objects.select_related('footprint'))
+    for row in rows:
+        row.company_id = row.footprint.company_id
+        row.scope = scopes.get(row.activity_type, 3)
+        row.period_start = row.footprint.period_start or row.created_at.date()
+    CarbonFootprintData.objects.bulk_update(rows, ['company', 'scope', 'period_start'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('carbon', '0010_footprint_completeness'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='carbonfootprintdata',
+            options={'verbose_name_plural': 'Carbon footprint data'},
+        ),
+        migrations.AddField(
+            model_name='carbonfootprintdata',
+            name='company',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='activity_ledger', to='companies.company'),
+        ),
+        migrations.AddField(
+            model_name='carbonfootprintdata',
+            name='scope',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Scope 1'), (2, 'Scope 2'), (3, 'Scope 3')], null=True),
+        ),
+        migrations.AddField(
+            model_name='carbonfootprintdata',
+            name='period_start',
+            field=models.DateField(null=True),
+        ),
+        migrations.AddField(
+            model_name='carbonfootprintdata',
+            name='quantity',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=16),
+        ),
+        migrations.AddField(
+            model_name='carbonfootprintdata',
+            name='unit',
+            field=models.CharField(blank=True, max_length=30),
+        ),
+        migrations.AddField(
+            model_name='carbonfootprintdata',
+            name='factor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='carbon.emissionfactor'),
+        ),
+        migrations.AddField(
+            model_name='carbonfootprintdata',
+            name='co2e',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='carbonfootprintdata',
+            name='source',
+            field=models.CharField(choices=[('manual', 'Manual Entry'), ('import', 'File Import'), ('integration', 'Integration'), ('chat', 'Conversational Entry'), ('document', 'Document Extraction')], default='manual', max_length=20),
+        ),
+        migrations.RunPython(backfill_ledger_columns, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='carbonfootprintdata',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_ledger', to='companies.company'),
+        ),
+        migrations.AlterField(
+            model_name='carbonfootprintdata',
+            name='scope',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Scope 1'), (2, 'Scope 2'), (3, 'Scope 3')]),
+        ),
+        migrations.AlterField(
+            model_name='carbonfootprintdata',
+            name='period_start',
+            field=models.DateField(),
+        ),
+        migrations.AlterField(
+            model_name='carbonfootprintdata',
+            name='footprint',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='activity_data', to='carbon.carbonfootprint'),
+        ),
+        migrations.AddIndex(
+            model_name='carbonfootprintdata',
+            index=models.Index(fields=['company', 'period_start'], name='carbon_fp_data_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carbonfootprintdata',
+            index=models.Index(fields=['company', 'activity_type', 'period_start'], name='carbon_fp_data_company_act_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:05
+
+from django.db import migrations, models
+
+
+def backfill_confidence_entries(apps, schema_editor):
+    """Count the scored extractions of existing sessions and recompute their mean from them"""
+    ConversationSession = apps.get_model('carbon', 'ConversationSession')
+    scored = (
+        ConversationSession.objects
+        .annotate(
+            scored_entries=models.Count('messages', filter=models.Q(
+                messages__extracted_data__isnull=False, messages__confidence_score__isnull=False
+            )),
+            scored_average=models.Avg('messages__confidence_score', filter=models.Q(
+                messages__extracted_data__isnull=False, messages__confidence_score__isnull=False
+            )),
+        )
+        .filter(scored_entries__gt=0)
+    )
+    for session in scored:
+        ConversationSession.objects.filter(pk=session.pk).update(
+            confidence_entries_count=session.scored_entries,
+            average_confidence=round(session.scored_average, 2),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carbon', '0011_activity_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversationsession',
+            name='confidence_entries_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_confidence_entries, migrations.RunPython.noop),
+    ]
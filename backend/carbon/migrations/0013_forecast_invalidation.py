@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('carbon', '0012_conversation_confidence_entries_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastInvalidation',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='forecast_invalidation', serialize=False, to='companies.company')),
+                ('invalidated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:50
+
+from django.db import migrations, models
+
+
+def fill_quantiles(apps, schema_editor):
+    """Sketch each existing distribution from its member totals"""
+    from carbon.emission_distributions import quantile_sketch
+
+    IndustryEmissionDistribution = apps.get_model('carbon', 'IndustryEmissionDistribution')
+    distributions = list(IndustryEmissionDistribution.objects.all())
+    for distribution in distributions:
+        distribution.member_count = len(distribution.members)
+        distribution.quantiles = quantile_sketch([entry[0] for entry in distribution.members.values()])
+    IndustryEmissionDistribution.objects.bulk_update(distributions, ['member_count', 'quantiles'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carbon', '0013_forecast_invalidation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='industryemissiondistribution',
+            name='member_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='industryemissiondistribution',
+            name='quantiles',
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(fill_quantiles, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='industryemissiondistribution',
+            name='values',
+        ),
+    ]
@@ -3,6 +3,7 @@ from django.db import models
 from django.utils import timezone
 from django.conf import settings
 from decimal import Decimal
+from .periods import parse_reporting_period
 
 
 class CarbonFootprint(models.Model):
@@ -21,6 +22,9 @@ class CarbonFootprint(models.Model):
         related_name='carbon_footprints'
     )
     reporting_period = models.CharField(max_length=20)  # e.g., "2024-Q1"
+    # Calendar span of reporting_period, filled in on save (see carbon/periods.py)
+    period_start = models.DateField(blank=True, null=True)
+    period_end = models.DateField(blank=True, null=True)
     
     # Scope emissions
     scope1_emissions = models.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -35,11 +39,24 @@ class CarbonFootprint(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['company', 'reporting_period']
+        indexes = [
+            models.Index(fields=['company', 'period_start', 'period_end'], name='carbon_fp_company_period_idx'),
+            models.Index(fields=['period_start', 'period_end'], name='carbon_fp_period_idx'),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Stored values, so signal receivers can tell what a save changed
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
     
     def save(self, *args, **kwargs):
         # Auto-calculate total emissions
         self.total_emissions = self.scope1_emissions + self.scope2_emissions + self.scope3_emissions
+        self.period_start, self.period_end = parse_reporting_period(self.reporting_period) or (None, None)
         super().save(*args, **kwargs)
+        self._loaded_values = {field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields}
     
     def __str__(self):
         return f"{self.company.name} - {self.reporting_period}"
@@ -153,6 +170,8 @@ class ConversationSession(models.Model):
     session_context = models.JSONField(default=dict, blank=True)  # Store company context, current state
     total_emissions_added = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     data_entries_count = models.IntegerField(default=0)
+    # Entries that carried a confidence score; the denominator of average_confidence
+    confidence_entries_count = models.IntegerField(default=0)
     average_confidence = models.DecimalField(max_digits=5, decimal_places=2, default=0)
     
     # Timestamps
@@ -173,6 +192,47 @@ class ConversationSession(models.Model):
     def get_message_count(self):
         return self.messages.count()
     
+    def record_extraction(self, confidence=None, emissions=None):
+        """
+        Add one extracted data entry to the running session statistics
+        
+        Issues a single UPDATE computed from the stored values, so the cost
+        doesn't grow with the session and concurrent messages can't overwrite
+        each other's counts. average_confidence is a running mean over entries
+        that carried a confidence score.
+        
+        Args:
+            confidence: Confidence score (0-100) of the entry, or None
+            emissions: Emissions added by the entry (tCO2e), or None
+        """
+        decimal_field = models.DecimalField(max_digits=12, decimal_places=4)
+        updates = {
+            'data_entries_count': models.F('data_entries_count') + 1,
+            'updated_at': timezone.now(),
+        }
+        if emissions:
+            updates['total_emissions_added'] = models.F('total_emissions_added') + Decimal(str(emissions))
+        if confidence is not None:
+            # Running mean: (mean * n + x) / (n + 1) over scored entries only,
+            # evaluated against the row's current values; the first scored
+            # entry just takes the new score
+            updates['confidence_entries_count'] = models.F('confidence_entries_count') + 1
+            updates['average_confidence'] = models.Case(
+                models.When(confidence_entries_count=0, then=models.Value(Decimal(str(confidence)))),
+                default=models.ExpressionWrapper(
+                    (models.F('average_confidence') * models.F('confidence_entries_count') + Decimal(str(confidence)))
+                    / (models.F('confidence_entries_count') + 1),
+                    output_field=decimal_field
+                ),
+                output_field=decimal_field
+            )
+        
+        ConversationSession.objects.filter(pk=self.pk).update(**updates)
+        self.refresh_from_db(fields=[
+            'data_entries_count', 'confidence_entries_count', 'total_emissions_added',
+            'average_confidence', 'updated_at'
+        ])
+    
     def get_summary(self):
         """Get conversation summary statistics"""
         return {
@@ -284,6 +344,54 @@ class ConversationMessage(models.Model):
         }
 
 
+class DocumentUploadBatch(models.Model):
+    """A group of documents uploaded in one request and extracted in the background"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='document_batches'
+    )
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='document_batches'
+    )
+    document_type = models.CharField(max_length=50, default='other')
+    total_documents = models.IntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['company', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Batch {self.id} - {self.total_documents} documents ({self.company.name})"
+    
+    def get_progress(self):
+        """Aggregate extraction progress across the batch in a single query"""
+        counts = self.documents.aggregate(
+            pending=models.Count('id', filter=models.Q(extraction_status='pending')),
+            processing=models.Count('id', filter=models.Q(extraction_status='processing')),
+            completed=models.Count('id', filter=models.Q(extraction_status='completed')),
+            failed=models.Count('id', filter=models.Q(extraction_status='failed')),
+        )
+        finished = counts['completed'] + counts['failed']
+        total = self.total_documents or sum(counts.values())
+        return {
+            'total': total,
+            **counts,
+            'percent_complete': round(100.0 * finished / total, 1) if total else 100.0,
+            'is_complete': finished >= total,
+        }
+
+
 class UploadedDocument(models.Model):
     """Store uploaded documents (utility bills, receipts, invoices) for AI extraction"""
     
@@ -322,6 +430,13 @@ class UploadedDocument(models.Model):
         blank=True,
         related_name='documents'
     )
+    batch = models.ForeignKey(
+        DocumentUploadBatch,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='documents'
+    )
     
     # File storage
     file = models.FileField(upload_to='emissions_documents/%Y/%m/')
@@ -329,6 +444,16 @@ class UploadedDocument(models.Model):
     file_size = models.IntegerField()  # bytes
     mime_type = models.CharField(max_length=100)
     
+    # Deduplication - identical uploads share one stored blob and one extraction
+    content_hash = models.CharField(max_length=64, blank=True, default='')  # SHA-256 hex digest
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='duplicates'
+    )
+    
     # Document classification
     document_type = models.CharField(
         max_length=50,
@@ -398,6 +523,7 @@ class UploadedDocument(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['company', 'document_type']),
+            models.Index(fields=['company', 'content_hash']),
             models.Index(fields=['extraction_status']),
             models.Index(fields=['expires_at']),
             models.Index(fields=['created_at']),
@@ -413,6 +539,16 @@ class UploadedDocument(models.Model):
     def __str__(self):
         return f"{self.document_type} - {self.file_name} ({self.company.name})"
     
+    @staticmethod
+    def compute_content_hash(uploaded_file):
+        """SHA-256 of an uploaded file, read in chunks so large files aren't loaded at once"""
+        import hashlib
+        digest = hashlib.sha256()
+        for chunk in uploaded_file.chunks():
+            digest.update(chunk)
+        uploaded_file.seek(0)
+        return digest.hexdigest()
+    
     def get_file_size_display(self):
         """Return human-readable file size"""
         size = self.file_size
@@ -468,11 +604,279 @@ class DocumentExtractionField(models.Model):
     def __str__(self):
         return f"{self.field_name}: {self.field_value[:50]} (confidence: {self.confidence})"
     
-    def apply_correction(self, new_value, corrected_by=None):
-        """Apply user correction to extracted field"""
+    # Columns touched by apply_correction, for bulk_update
+    CORRECTION_FIELDS = ['field_value', 'user_corrected', 'original_value', 'corrected_at']
+    
+    def apply_correction(self, new_value, corrected_by=None, commit=True):
+        """
+        Apply user correction to extracted field
+        
+        Pass commit=False to collect several corrections and write them with
+        bulk_update(fields, DocumentExtractionField.CORRECTION_FIELDS).
+        """
         if not self.user_corrected:
             self.original_value = self.field_value
         self.field_value = new_value
         self.user_corrected = True
         self.corrected_at = timezone.now()
-        self.save()
+        if commit:
+            self.save(update_fields=self.CORRECTION_FIELDS)
+
+
+class AICallLog(models.Model):
+    """
+    Append-only record of one AI call, for latency and token accounting
+    
+    Rows are written in batches by carbon.ai_telemetry. The company link has no
+    database constraint so the ledger survives company deletion.
+    """
+    
+    OUTCOME_CHOICES = [
+        ('success', 'Success'),
+        ('error', 'Error'),
+        ('timeout', 'Timeout'),
+        ('circuit_open', 'Circuit Open'),
+        ('mock', 'Mock Response'),
+        ('cache_hit', 'Cache Hit'),
+        ('coalesced', 'Coalesced'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    feature = models.CharField(max_length=100)
+    model_name = models.CharField(max_length=100, blank=True)
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    prompt_tokens = models.IntegerField(default=0)
+    response_tokens = models.IntegerField(default=0)
+    latency_ms = models.IntegerField(default=0)
+    outcome = models.CharField(max_length=20, choices=OUTCOME_CHOICES, default='success')
+    cache_hit = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['feature', 'created_at']),
+            models.Index(fields=['company', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.feature} ({self.outcome}, {self.latency_ms}ms)"
+
+
+class ForecastSnapshot(models.Model):
+    """
+    Precomputed forecast served by the prediction endpoints
+    
+    One row per company, kind and activity, rewritten in place by
+    carbon.tasks.refresh_forecast_snapshots. activity_type is blank for
+    company-wide forecasts (total-emissions trend, trajectory).
+    """
+    
+    KIND_CHOICES = [
+        ('next_value', 'Next Value'),
+        ('seasonal', 'Seasonal Pattern'),
+        ('growth_trend', 'Growth Trend'),
+        ('trajectory', 'Carbon Trajectory'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='forecast_snapshots'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    activity_type = models.CharField(max_length=50, blank=True, default='')
+    target_period = models.CharField(max_length=20, blank=True, default='')  # YYYY-MM for next_value
+    payload = models.JSONField(default=dict)
+    computed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company', 'kind', 'activity_type'], name='unique_forecast_snapshot'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.company_id} {self.kind} {self.activity_type or 'total'}"
+
+
+class ForecastInvalidation(models.Model):
+    """
+    When a company's forecast snapshots were last dropped
+    
+    Snapshot refreshes compute first and upsert later; rows computed before
+    the company's latest invalidation are stale and are not written back
+    (see carbon/forecast_snapshots.py).
+    """
+    
+    company = models.OneToOneField(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='forecast_invalidation'
+    )
+    invalidated_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.company_id} invalidated {self.invalidated_at}"
+
+
+class IndustryEmissionDistribution(models.Model):
+    """
+    Verified emissions of an industry's companies in one year
+    
+    One row per industry, size band and year; size_band is blank for the
+    industry as a whole. Each company contributes the sum of its verified
+    footprints for the year, and `quantiles` keeps a sketch of those totals
+    of at most 101 points, so a percentile is a binary search over a bounded
+    list. Maintained by carbon.emission_distributions.
+    """
+    
+    SIZE_BAND_CHOICES = [
+        ('micro', 'Micro (<10 employees)'),
+        ('small', 'Small (10-49 employees)'),
+        ('medium', 'Medium (50-249 employees)'),
+        ('large', 'Large (250+ employees)'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    industry = models.CharField(max_length=100)
+    size_band = models.CharField(max_length=20, choices=SIZE_BAND_CHOICES, blank=True, default='')
+    year = models.IntegerField()
+    members = models.JSONField(default=dict)  # company id -> [total, scope1, scope2, scope3]
+    member_count = models.IntegerField(default=0)
+    quantiles = models.JSONField(default=list)  # member totals or their percentiles, ascending
+    sum_total = models.FloatField(default=0)
+    sum_scope1 = models.FloatField(default=0)
+    sum_scope2 = models.FloatField(default=0)
+    sum_scope3 = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['industry', 'size_band', 'year'], name='unique_emission_distribution'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.industry} {self.size_band or 'all sizes'} {self.year} ({self.member_count} companies)"
+
+
+class CarbonFootprintData(models.Model):
+    """
+    Append-only ledger of reported activities (electricity, natural gas, ...)
+    
+    Imports, integrations and chat extraction write one row per activity and
+    period instead of rewriting the scope totals on CarbonFootprint; totals
+    are derived by aggregating the ledger (see carbon/activity_ledger.py).
+    Rows are never updated: a correction is a new row with a negative co2e.
+    """
+    
+    SCOPE_CHOICES = [
+        (1, 'Scope 1'),
+        (2, 'Scope 2'),
+        (3, 'Scope 3'),
+    ]
+    
+    SOURCE_CHOICES = [
+        ('manual', 'Manual Entry'),
+        ('import', 'File Import'),
+        ('integration', 'Integration'),
+        ('chat', 'Conversational Entry'),
+        ('document', 'Document Extraction'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='activity_ledger'
+    )
+    footprint = models.ForeignKey(
+        CarbonFootprint,
+        on_delete=models.CASCADE,
+        related_name='activity_data',
+        blank=True,
+        null=True
+    )
+    activity_type = models.CharField(max_length=50)  # GuidanceService.SCOPE_ACTIVITIES names
+    scope = models.PositiveSmallIntegerField(choices=SCOPE_CHOICES)
+    quantity = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    unit = models.CharField(max_length=30, blank=True)
+    factor = models.ForeignKey(
+        'carbon.EmissionFactor',
+        on_delete=models.SET_NULL,
+        related_name='ledger_entries',
+        blank=True,
+        null=True
+    )
+    co2e = models.DecimalField(max_digits=14, decimal_places=4, default=0)  # tCO2e
+    period_start = models.DateField()
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default='manual')
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name_plural = 'Carbon footprint data'
+        indexes = [
+            models.Index(fields=['footprint', 'activity_type'], name='carbon_fp_data_activity_idx'),
+            models.Index(fields=['company', 'period_start'], name='carbon_fp_data_period_idx'),
+            models.Index(fields=['company', 'activity_type', 'period_start'], name='carbon_fp_data_company_act_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Activity ledger entries are append-only')
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return f"{self.company_id} {self.activity_type} {self.period_start}: {self.co2e} tCO2e"
+
+
+class FootprintCompleteness(models.Model):
+    """
+    Stored completeness score for a footprint
+    
+    activity_mask has one bit per GuidanceService.SCOPE_ACTIVITIES activity
+    (see carbon/completeness.py). Rows are dropped when the footprint's
+    activity data changes and recomputed in batches.
+    """
+    
+    footprint = models.OneToOneField(
+        CarbonFootprint,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='completeness'
+    )
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='footprint_completeness'
+    )
+    activity_mask = models.IntegerField(default=0)
+    data_entries = models.IntegerField(default=0)
+    scope1_score = models.FloatField(default=0)
+    scope2_score = models.FloatField(default=0)
+    scope3_score = models.FloatField(default=0)
+    overall_score = models.FloatField(default=0)
+    grade = models.CharField(max_length=1)
+    meets_minimum = models.BooleanField(default=False)
+    computed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name_plural = 'Footprint completeness'
+        indexes = [
+            models.Index(fields=['company', 'overall_score'], name='carbon_fp_compl_score_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.footprint_id} {self.grade} ({self.overall_score:.2f})"
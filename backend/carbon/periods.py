@@ -0,0 +1,65 @@
+"""
+Reporting period parsing
+
+CarbonFootprint.reporting_period is a free-form label ("2024", "2024-Q1",
+"2024-05"). parse_reporting_period turns it into the first and last day it
+covers; the model stores both as indexed period_start/period_end columns so
+time-series queries can filter and bucket by date instead of by label.
+"""
+from calendar import monthrange
+from datetime import date, datetime
+from typing import Optional, Tuple
+import re
+
+PERIOD_PATTERN = re.compile(
+    r'^(?P<year>\d{4})'
+    r'(?:[-/ ]?(?:Q(?P<quarter>[1-4])|H(?P<half>[12])|(?P<month>\d{1,2})(?:[-/](?P<day>\d{1,2}))?))?$',
+    re.IGNORECASE
+)
+
+
+def _month_end(year: int, month: int) -> date:
+    return date(year, month, monthrange(year, month)[1])
+
+
+def add_months(first_day: date, months: int) -> date:
+    """First day of the month that is a number of months after first_day"""
+    index = first_day.year * 12 + first_day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def parse_reporting_period(label) -> Optional[Tuple[date, date]]:
+    """
+    First and last day covered by a reporting period label
+
+    Understands years ("2024"), quarters ("2024-Q1"), halves ("2024-H2") and
+    months ("2024-05"). A full date, as a string or a date, stands for its
+    month. Returns None for labels that can't be placed on a calendar.
+    """
+    if isinstance(label, datetime):
+        label = label.date()
+    if isinstance(label, date):
+        return date(label.year, label.month, 1), _month_end(label.year, label.month)
+
+    match = PERIOD_PATTERN.match((label or '').strip())
+    if not match:
+        return None
+
+    year = int(match.group('year'))
+    if match.group('quarter'):
+        first_month, months = (int(match.group('quarter')) - 1) * 3 + 1, 3
+    elif match.group('half'):
+        first_month, months = (int(match.group('half')) - 1) * 6 + 1, 6
+    elif match.group('month'):
+        first_month, months = int(match.group('month')), 1
+        if not 1 <= first_month <= 12:
+            return None
+    else:
+        first_month, months = 1, 12
+    return date(year, first_month, 1), _month_end(year, first_month + months - 1)
+
+
+def period_start(label) -> Optional[date]:
+    """First day of a reporting period label, or None if it can't be parsed"""
+    bounds = parse_reporting_period(label)
+    return bounds[0] if bounds else None
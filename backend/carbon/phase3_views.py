@@ -45,7 +45,7 @@ def get_completeness_score(request, footprint_id):
         "meets_minimum": true
     }
     """
-    footprint = get_object_or_404(CarbonFootprint, id=footprint_id, company__user=request.user)
+    footprint = get_object_or_404(CarbonFootprint, id=footprint_id, company__users=request.user)
     
     guidance_service = GuidanceService(footprint.company)
     completeness = guidance_service.calculate_completeness_score(footprint)
@@ -53,6 +53,43 @@ def get_completeness_score(request, footprint_id):
     return Response(completeness, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_company_completeness(request):
+    """
+    GET /api/v1/carbon/guidance/completeness/
+    
+    Completeness scores for every footprint of the user's company
+    
+    Response:
+    {
+        "footprints": [
+            {"footprint_id": "...", "reporting_period": "2024-Q1", "overall_score": 0.75, "grade": "B", ...}
+        ],
+        "count": 4,
+        "average_score": 0.68
+    }
+    """
+    company = request.user.company
+    if company is None:
+        return Response({
+            'error': 'Company profile not found.',
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    footprints = list(CarbonFootprint.objects.filter(company=company).order_by('period_start', 'reporting_period'))
+    scores = GuidanceService(company).calculate_completeness_scores(footprints)
+    results = [
+        {'footprint_id': str(footprint.id), 'reporting_period': footprint.reporting_period, **score}
+        for footprint, score in zip(footprints, scores)
+    ]
+    
+    return Response({
+        'footprints': results,
+        'count': len(results),
+        'average_score': round(sum(score['overall_score'] for score in scores) / len(scores), 2) if scores else None,
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_missing_data_alerts(request, footprint_id):
@@ -76,7 +113,7 @@ def get_missing_data_alerts(request, footprint_id):
         "count": 3
     }
     """
-    footprint = get_object_or_404(CarbonFootprint, id=footprint_id, company__user=request.user)
+    footprint = get_object_or_404(CarbonFootprint, id=footprint_id, company__users=request.user)
     
     guidance_service = GuidanceService(footprint.company)
     alerts = guidance_service.detect_missing_data(footprint)
@@ -194,7 +231,7 @@ def get_next_actions(request, footprint_id):
         "count": 4
     }
     """
-    footprint = get_object_or_404(CarbonFootprint, id=footprint_id, company__user=request.user)
+    footprint = get_object_or_404(CarbonFootprint, id=footprint_id, company__users=request.user)
     
     guidance_service = GuidanceService(footprint.company)
     actions = guidance_service.suggest_next_actions(footprint)
@@ -391,7 +428,7 @@ def get_peer_comparison(request, footprint_id):
         "insights": [...]
     }
     """
-    footprint = get_object_or_404(CarbonFootprint, id=footprint_id, company__user=request.user)
+    footprint = get_object_or_404(CarbonFootprint, id=footprint_id, company__users=request.user)
     
     benchmarking_service = BenchmarkingService(footprint.company)
     comparison = benchmarking_service.get_peer_comparison(footprint)
@@ -422,7 +459,7 @@ def get_improvement_opportunities(request, footprint_id):
         "count": 2
     }
     """
-    footprint = get_object_or_404(CarbonFootprint, id=footprint_id, company__user=request.user)
+    footprint = get_object_or_404(CarbonFootprint, id=footprint_id, company__users=request.user)
     
     benchmarking_service = BenchmarkingService(footprint.company)
     opportunities = benchmarking_service.suggest_improvement_opportunities(footprint)
@@ -453,9 +490,8 @@ def get_industry_leaders(request):
         ]
     }
     """
-    try:
-        company = Company.objects.get(user=request.user)
-    except Company.DoesNotExist:
+    company = request.user.company
+    if company is None:
         return Response({
             'error': 'Company profile not found.',
         }, status=status.HTTP_404_NOT_FOUND)
@@ -241,3 +241,30 @@ class CalculateGrowthTrendResponseSerializer(serializers.Serializer):
         required=False,
         help_text="Error message if failed"
     )
+
+
+class PredictBatchRequestSerializer(serializers.Serializer):
+    """Request serializer for batch prediction across activities."""
+    
+    activity_types = serializers.ListField(
+        child=serializers.ChoiceField(
+            choices=[
+                'electricity',
+                'natural_gas',
+                'gasoline',
+                'diesel',
+                'fuel_oil',
+                'business_travel',
+                'commuting',
+                'purchased_goods',
+            ]
+        ),
+        required=False,
+        allow_empty=False,
+        help_text="Activities to predict (defaults to all)"
+    )
+    target_period = serializers.RegexField(
+        regex=r'^\d{4}-\d{2}$',
+        required=True,
+        help_text="Target period in YYYY-MM format"
+    )
@@ -12,9 +12,10 @@ Features:
 
 import logging
 import statistics
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from decimal import Decimal
+import numpy as np
 from django.db.models import Avg, Count, Q, Sum
 from django.utils import timezone
 
@@ -77,12 +78,10 @@ class PredictionService:
             }
         """
         try:
-            # Fetch historical data if not provided
+            # Without pre-fetched data, forecast from the company's cached model
             if historical_data is None:
-                historical_data = self._fetch_historical_data(
-                    company_id, activity_type, lookback_months=12
-                )
-            
+                return self._predict_with_model(company_id, activity_type, target_period)
+
             # Check if we have enough data
             if len(historical_data) < self.MIN_DATA_POINTS:
                 return self._insufficient_data_response(historical_data)
@@ -148,7 +147,8 @@ class PredictionService:
     def detect_seasonal_patterns(
         self,
         company_id: str,
-        activity_type: str
+        activity_type: str,
+        historical_data: Optional[List[Dict]] = None
     ) -> Dict:
         """
         Analyze historical data to detect seasonal usage patterns.
@@ -156,6 +156,7 @@ class PredictionService:
         Args:
             company_id: UUID of the company
             activity_type: Type of activity
+            historical_data: Optional pre-fetched 24-month history
         
         Returns:
             dict: {
@@ -169,9 +170,10 @@ class PredictionService:
         """
         try:
             # Fetch 24 months of data for better seasonal analysis
-            historical_data = self._fetch_historical_data(
-                company_id, activity_type, lookback_months=24
-            )
+            if historical_data is None:
+                historical_data = self._fetch_historical_data(
+                    company_id, activity_type, lookback_months=24
+                )
             
             if len(historical_data) < 6:
                 return {
@@ -229,7 +231,8 @@ class PredictionService:
     def calculate_growth_trend(
         self,
         company_id: str,
-        activity_type: Optional[str] = None
+        activity_type: Optional[str] = None,
+        historical_data: Optional[List[Dict]] = None
     ) -> Dict:
         """
         Calculate year-over-year growth trend.
@@ -237,6 +240,7 @@ class PredictionService:
         Args:
             company_id: UUID of the company
             activity_type: Optional activity type (if None, calculates for total emissions)
+            historical_data: Optional pre-fetched 24-month history
         
         Returns:
             dict: {
@@ -250,9 +254,10 @@ class PredictionService:
         """
         try:
             # Fetch historical data
-            historical_data = self._fetch_historical_data(
-                company_id, activity_type, lookback_months=24
-            )
+            if historical_data is None:
+                historical_data = self._fetch_historical_data(
+                    company_id, activity_type, lookback_months=24
+                )
             
             if len(historical_data) < 6:
                 return {
@@ -309,8 +314,267 @@ class PredictionService:
                 'success': False,
                 'error': str(e)
             }
-    
+
+    def predict_batch(
+        self,
+        company_id: str,
+        target_period: str,
+        activity_types: Optional[List[str]] = None,
+        lookback_months: int = 12
+    ) -> Dict:
+        """
+        Predict the next value for several activities at once.
+
+        Loads the company's history with a single query into a
+        periods x activities matrix and computes the same average, seasonal,
+        growth and confidence figures as predict_next_value for every column
+        in one pass, so a data-entry form can prefill all its fields with
+        one request.
+
+        Args:
+            company_id: UUID of the company
+            target_period: Target period in YYYY-MM format
+            activity_types: Activities to predict (defaults to all known activities)
+            lookback_months: History window, as in predict_next_value
+
+        Returns:
+            dict: {
+                'success': bool,
+                'target_period': str,
+                'data_points_used': int,
+                'predictions': {activity_type: <predict_next_value result>}
+            }
+        """
+        activity_types = list(activity_types or self.ACTIVITY_SCOPES)
+        try:
+            target_month = datetime.strptime(target_period, '%Y-%m').month
+            dates, values = self._fetch_history_matrix(company_id, activity_types, lookback_months)
+
+            if len(dates) < self.MIN_DATA_POINTS:
+                insufficient = self._insufficient_data_response(dates)
+                predictions = {activity: dict(insufficient) for activity in activity_types}
+            else:
+                forecast = self._forecast_matrix(dates, values, target_month)
+                predictions = {
+                    activity: self._batch_prediction_result(
+                        activity, target_month, len(dates), forecast, column
+                    )
+                    for column, activity in enumerate(activity_types)
+                }
+
+            return {
+                'success': True,
+                'target_period': target_period,
+                'data_points_used': len(dates),
+                'predictions': predictions
+            }
+
+        except Exception as e:
+            self.logger.error(f"Batch prediction error: {str(e)}", exc_info=True)
+            return {
+                'success': False,
+                'error': str(e),
+                'predictions': {}
+            }
+
+    def predict_with_models(
+        self,
+        company_id: str,
+        activity_types: List[str],
+        target_period: str
+    ) -> Dict[str, Dict]:
+        """
+        predict_next_value for several activities from one query.
+
+        Activities sharing a scope share a fitted model, so at most three
+        series are loaded (and refitted only if they changed).
+
+        Returns:
+            dict: {activity_type: <predict_next_value result>}
+        """
+        from carbon.forecasting import ForecastEngine
+
+        fields = {activity: self.value_field(activity) for activity in activity_types}
+        models = ForecastEngine().company_models(company_id, sorted(set(fields.values())))
+        return {
+            activity: self._model_prediction(models[field], activity, target_period)
+            for activity, field in fields.items()
+        }
+
     # ==================== Private Helper Methods ====================
+
+    def _predict_with_model(
+        self,
+        company_id: str,
+        activity_type: str,
+        target_period: str
+    ) -> Dict:
+        """
+        Predict from the company's fitted Holt-Winters model (see carbon/forecasting.py).
+
+        The model is only refitted when new periods arrive, and the interval
+        comes from its residual variance at the forecast horizon.
+        """
+        from carbon.forecasting import ForecastEngine
+
+        model = ForecastEngine().company_model(company_id, self.value_field(activity_type))
+        return self._model_prediction(model, activity_type, target_period)
+
+    def _model_prediction(self, model, activity_type: str, target_period: str) -> Dict:
+        """Shape a fitted model's forecast for target_period like predict_next_value."""
+        if model is None:
+            return self._insufficient_data_response([])
+
+        target_date = datetime.strptime(target_period, '%Y-%m').date()
+        horizon = model.horizon_for(target_date)
+        forecast = model.forecast(horizon)
+        predicted_value = float(forecast['point'][-1])
+        lower = float(forecast['lower'][-1])
+        upper = float(forecast['upper'][-1])
+
+        # Narrow intervals relative to the forecast mean a confident prediction
+        relative_width = (upper - lower) / predicted_value if predicted_value > 0 else 1.0
+        confidence = max(0.3, min(1.0, 1.0 - relative_width / 2))
+        seasonal_factor = (
+            (model.level + model.season[(horizon - 1) % len(model.season)]) / model.level
+            if model.level > 0 else 1.0
+        )
+
+        return {
+            'success': True,
+            'predicted_value': round(predicted_value, 2),
+            'confidence': round(confidence, 2),
+            'confidence_interval': {
+                'lower': round(lower, 2),
+                'upper': round(upper, 2)
+            },
+            'prediction_method': model.method,
+            'reasoning': self._generate_prediction_reasoning(
+                activity_type,
+                target_date.month,
+                model.level,
+                seasonal_factor,
+                model.annual_growth_rate,
+                model.n_points
+            ),
+            'historical_avg': round(model.level, 2),
+            'seasonal_factor': round(seasonal_factor, 3),
+            'growth_factor': round(model.annual_growth_rate, 3),
+            'data_points_used': model.n_points
+        }
+
+    def _fetch_history_matrix(
+        self,
+        company_id: str,
+        activity_types: List[str],
+        lookback_months: int = 12
+    ) -> Tuple[List[date], np.ndarray]:
+        """
+        Fetch a company's history as a (periods x activities) float matrix.
+
+        One query reads the three scope columns over the period_start range;
+        each activity then takes the column of the scope it maps to, like
+        _fetch_historical_data.
+        """
+        from carbon.models import CarbonFootprint
+
+        cutoff = (timezone.now() - timedelta(days=lookback_months * 30)).date().replace(day=1)
+        history = list(
+            CarbonFootprint.objects.filter(company_id=company_id, period_start__gte=cutoff)
+            .order_by('period_start')
+            .values_list('period_start', 'scope1_emissions', 'scope2_emissions', 'scope3_emissions')
+        )
+
+        scope_columns = [self.ACTIVITY_SCOPES.get(activity, 2) - 1 for activity in activity_types]
+        scopes = np.array(
+            [[float(value or 0) for value in row[1:]] for row in history], dtype=float
+        ).reshape(len(history), 3)
+        return [row[0] for row in history], scopes[:, scope_columns]
+
+    @staticmethod
+    def _forecast_matrix(
+        dates: List[date],
+        values: np.ndarray,
+        target_month: int
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorised predict_next_value over every column of a history matrix.
+
+        Rows must be sorted by date. Mirrors _calculate_average,
+        _calculate_seasonal_factor, _calculate_growth_trend and
+        _calculate_confidence, returning one array entry per column.
+        """
+        n = values.shape[0]
+        average = values.mean(axis=0)
+        nonzero_average = np.where(average == 0, 1.0, average)
+
+        # Same-month average relative to the overall average
+        same_month = np.array([d.month == target_month for d in dates])
+        if same_month.any():
+            month_average = values[same_month].mean(axis=0)
+            seasonal = np.where(average == 0, 1.0, month_average / nonzero_average)
+        else:
+            seasonal = np.ones_like(average)
+
+        # Second half against first half, annualised
+        mid_point = n // 2
+        first_half = values[:mid_point].mean(axis=0)
+        second_half = values[mid_point:].mean(axis=0)
+        safe_first_half = np.where(first_half == 0, 1.0, first_half)
+        growth = np.where(
+            first_half == 0, 0.0, (second_half - first_half) / safe_first_half * (12 / (n / 2))
+        )
+
+        # Lower coefficient of variation means higher confidence
+        cv = values.std(axis=0, ddof=1) / nonzero_average
+        confidence = np.clip(1.0 - cv, 0.3, 1.0) + min(0.1, n / 100)
+        confidence = np.where(average == 0, 0.5, np.minimum(confidence, 1.0))
+
+        predicted = average * seasonal * (1 + growth)
+        interval_width = predicted * (0.15 / confidence)
+
+        return {
+            'predicted': predicted,
+            'lower': np.maximum(0, predicted - interval_width),
+            'upper': predicted + interval_width,
+            'average': average,
+            'seasonal': seasonal,
+            'growth': growth,
+            'confidence': confidence,
+        }
+
+    def _batch_prediction_result(
+        self,
+        activity_type: str,
+        target_month: int,
+        data_points: int,
+        forecast: Dict[str, np.ndarray],
+        column: int
+    ) -> Dict:
+        """Shape one column of _forecast_matrix like predict_next_value's response."""
+        figures = {name: float(array[column]) for name, array in forecast.items()}
+        return {
+            'success': True,
+            'predicted_value': round(figures['predicted'], 2),
+            'confidence': round(figures['confidence'], 2),
+            'confidence_interval': {
+                'lower': round(figures['lower'], 2),
+                'upper': round(figures['upper'], 2)
+            },
+            'prediction_method': 'seasonal_growth_adjusted',
+            'reasoning': self._generate_prediction_reasoning(
+                activity_type,
+                target_month,
+                figures['average'],
+                figures['seasonal'],
+                figures['growth'],
+                data_points
+            ),
+            'historical_avg': round(figures['average'], 2),
+            'seasonal_factor': round(figures['seasonal'], 3),
+            'growth_factor': round(figures['growth'], 3),
+            'data_points_used': data_points
+        }
     
     def _fetch_historical_data(
         self,
@@ -323,35 +587,48 @@ class PredictionService:
         
         Returns list of dicts with 'period' (YYYY-MM) and 'value' (float)
         """
+        return self.fetch_historical_series(company_id, lookback_months)[self.value_field(activity_type)]
+    
+    def fetch_historical_series(
+        self,
+        company_id: str,
+        lookback_months: int = 12
+    ) -> Dict[str, List[Dict]]:
+        """
+        Fetch historical data for every scope and the total with one query.
+        
+        Returns {value field: [{'period', 'value', 'date'}, ...]} for
+        scope1_emissions, scope2_emissions, scope3_emissions and
+        total_emissions, each in the format of _fetch_historical_data.
+        """
         from carbon.models import CarbonFootprint
         
         # Calculate cutoff date
-        cutoff_date = timezone.now() - timedelta(days=lookback_months * 30)
+        cutoff_date = (timezone.now() - timedelta(days=lookback_months * 30)).date().replace(day=1)
         
-        # Fetch footprints
-        footprints = CarbonFootprint.objects.filter(
+        # Fetch footprints by the calendar start of their reporting period
+        fields = ['scope1_emissions', 'scope2_emissions', 'scope3_emissions', 'total_emissions']
+        rows = CarbonFootprint.objects.filter(
             company_id=company_id,
-            reporting_period__gte=cutoff_date
-        ).order_by('reporting_period')
-        
-        # Extract values based on activity type
-        historical_data = []
-        for fp in footprints:
-            if activity_type:
-                # Map activity type to scope
-                scope = self.ACTIVITY_SCOPES.get(activity_type, 2)
-                value = float(getattr(fp, f'scope{scope}_emissions', 0))
-            else:
-                # Total emissions
-                value = float(fp.total_emissions)
-            
-            historical_data.append({
-                'period': fp.reporting_period.strftime('%Y-%m'),
-                'value': value,
-                'date': fp.reporting_period
-            })
-        
-        return historical_data
+            period_start__gte=cutoff_date
+        ).order_by('period_start').values_list('period_start', *fields)
+        
+        series = {field: [] for field in fields}
+        for period_start, *values in rows:
+            for field, value in zip(fields, values):
+                series[field].append({
+                    'period': period_start.strftime('%Y-%m'),
+                    'value': float(value or 0),
+                    'date': period_start
+                })
+        
+        return series
+    
+    def value_field(self, activity_type: Optional[str]) -> str:
+        """Footprint column an activity is read from (total emissions when None)."""
+        if not activity_type:
+            return 'total_emissions'
+        return f'scope{self.ACTIVITY_SCOPES.get(activity_type, 2)}_emissions'
     
     def _calculate_average(self, data: List[Dict]) -> float:
         """Calculate average value from historical data."""
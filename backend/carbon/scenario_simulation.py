@@ -0,0 +1,132 @@
+"""
+Monte Carlo scenarios for the carbon trajectory
+
+Emission and offset paths are simulated from a predict_carbon_trajectory
+result, so a request needs no data beyond the trajectory it already has.
+Emission paths accumulate normal shocks whose spread at each month matches the
+Holt-Winters forecast's standard error; offsets compound a log-normal monthly
+growth whose median is the fitted growth rate and whose spread is its
+historical volatility. All paths are drawn at once as (simulations, months)
+arrays, and the scenarios share the same random draws so they differ only in
+the offset growth they assume.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .forecasting import INTERVAL_Z
+
+SIMULATIONS = 2000
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Monthly offset growth volatility assumed when the trajectory doesn't carry one
+DEFAULT_OFFSETS_VOLATILITY = 0.1
+
+# (name, description, multiplier on the fitted offset growth rate)
+SCENARIOS = (
+    ('Conservative', 'Offset purchases grow at half their recent pace', 0.5),
+    ('Current Pace', 'Maintaining current pace of offset purchases', 1.0),
+    ('Aggressive', 'Doubling the growth of offset purchases', 2.0),
+)
+
+
+def _bands(paths: np.ndarray) -> List[Dict[str, float]]:
+    """Percentiles of each month's simulated values (one sort instead of a selection per percentile)"""
+    ordered = np.sort(paths, axis=0)
+    positions = np.array(PERCENTILES) / 100 * (len(ordered) - 1)
+    below = np.floor(positions).astype(int)
+    above = np.minimum(below + 1, len(ordered) - 1)
+    weight = (positions - below)[:, None]
+    values = ordered[below] * (1 - weight) + ordered[above] * weight
+    return [
+        {f'p{percentile}': float(value) for percentile, value in zip(PERCENTILES, month)}
+        for month in values.T
+    ]
+
+
+def simulate_emissions(point: np.ndarray, std: np.ndarray, shocks: np.ndarray) -> np.ndarray:
+    """
+    Emission paths around the point forecast
+
+    Shocks accumulate month over month, with each month's increment sized so
+    the spread of the paths at every horizon equals the forecast standard error.
+    """
+    increments = np.sqrt(np.clip(np.diff(np.square(std), prepend=0.0), 0, None))
+    return np.maximum(point + np.cumsum(shocks * increments, axis=1), 0)
+
+
+def simulate_offsets(current: float, growth: float, volatility: float, shocks: np.ndarray) -> np.ndarray:
+    """Offset paths compounding log-normal monthly growth from the current level"""
+    log_growth = np.log1p(max(growth, -0.99)) + volatility * shocks
+    return current * np.exp(np.cumsum(log_growth, axis=1))
+
+
+def simulate_scenarios(trajectory: Dict, simulations: int = SIMULATIONS,
+                       seed: Optional[int] = None) -> List[Dict]:
+    """
+    Simulate offset scenarios against the forecast emissions
+
+    Args:
+        trajectory: predict_carbon_trajectory (or snapshot) result
+        simulations: Number of paths per scenario
+        seed: Random seed, for reproducible results
+
+    Returns:
+        One entry per scenario with monthly percentile bands for emissions,
+        offsets and net emissions, the probability of having reached carbon
+        neutrality by each month, and the first month that probability is at
+        least 50%
+    """
+    predictions = trajectory.get('predictions') or []
+    if 'error' in trajectory or not predictions:
+        return []
+
+    trends = trajectory.get('trends', {})
+    growth = trends.get('offsets_growth_rate', 10) / 100
+    volatility = trends.get('offsets_growth_volatility', DEFAULT_OFFSETS_VOLATILITY * 100) / 100
+    current_offsets = trends.get('current_offsets')
+    if current_offsets is None:
+        current_offsets = predictions[0]['projected_offsets'] / max(1 + growth, 0.01)
+
+    point = np.array([p['projected_emissions'] for p in predictions])
+    std = np.array([
+        p.get('projected_emissions_std',
+              (p['projected_emissions_upper'] - p['projected_emissions_lower']) / (2 * INTERVAL_Z))
+        for p in predictions
+    ])
+
+    rng = np.random.default_rng(seed)
+    emission_shocks, offset_shocks = rng.standard_normal((2, simulations, len(predictions)))
+    emissions = simulate_emissions(point, std, emission_shocks)
+    emission_bands = _bands(emissions)
+
+    scenarios = []
+    for name, description, multiplier in SCENARIOS:
+        scenario_growth = growth * multiplier
+        offsets = simulate_offsets(current_offsets, scenario_growth, volatility, offset_shocks)
+        neutral = offsets >= np.maximum(emissions, 1)
+        neutral_by_month = np.logical_or.accumulate(neutral, axis=1).mean(axis=0)
+
+        likely = np.flatnonzero(neutral_by_month >= 0.5)
+        scenarios.append({
+            'name': name,
+            'description': description,
+            'offset_growth_rate': scenario_growth * 100,
+            'carbon_neutral_months': int(likely[0]) + 1 if likely.size else None,
+            'neutrality_probability': float(neutral_by_month[-1]),
+            'months': [
+                {
+                    'month_offset': month + 1,
+                    'emissions': emission_band,
+                    'offsets': offset_band,
+                    'net_emissions': net_band,
+                    'neutrality_probability': float(neutral_by_month[month]),
+                }
+                for month, (emission_band, offset_band, net_band) in enumerate(
+                    zip(emission_bands, _bands(offsets), _bands(emissions - offsets))
+                )
+            ],
+        })
+
+    return scenarios
@@ -122,8 +122,9 @@ class UploadedDocumentSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'company', 'uploaded_by', 'uploaded_by_email',
             'conversation_session', 'file', 'file_url', 'file_name',
-            'file_size', 'file_size_display', 'mime_type', 'document_type',
-            'extraction_status', 'extracted_data', 'confidence_score',
+            'file_size', 'file_size_display', 'mime_type', 'content_hash',
+            'duplicate_of', 'document_type', 'extraction_status',
+            'extracted_data', 'confidence_score',
             'processing_time_ms', 'gemini_model_used', 'extraction_error',
             'user_validated', 'validated_by', 'validated_by_email',
             'validated_at', 'user_corrections', 'applied_to_footprint',
@@ -131,8 +132,9 @@ class UploadedDocumentSerializer(serializers.ModelSerializer):
             'updated_at', 'expires_at', 'extracted_fields'
         ]
         read_only_fields = [
-            'id', 'file_size', 'uploaded_by_email', 'validated_by_email',
-            'extraction_status', 'extracted_data', 'confidence_score',
+            'id', 'file_size', 'content_hash', 'duplicate_of',
+            'uploaded_by_email', 'validated_by_email', 'extraction_status',
+            'extracted_data', 'confidence_score',
             'processing_time_ms', 'extraction_error', 'created_at',
             'updated_at', 'expires_at', 'file_size_display',
             'extracted_fields', 'file_url'
@@ -169,7 +171,7 @@ class UploadedDocumentListSerializer(serializers.ModelSerializer):
 class PredictionRequestSerializer(serializers.Serializer):
     """Serializer for prediction request parameters"""
     
-    company_id = serializers.IntegerField(
+    company_id = serializers.UUIDField(
         required=True,
         help_text="Company ID for which to make predictions"
     )
@@ -182,11 +184,6 @@ class PredictionRequestSerializer(serializers.Serializer):
         required=True,
         help_text="Target date for prediction (YYYY-MM-DD format)"
     )
-    footprint_id = serializers.IntegerField(
-        required=False,
-        allow_null=True,
-        help_text="Optional: Specific footprint ID to use for predictions"
-    )
     
     def validate_activity_type(self, value):
         """Ensure activity type is not empty"""
@@ -0,0 +1,61 @@
+"""
+Signal handlers for the carbon app
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .ai_result_cache import invalidate_company_ai_results
+from .benchmark_index import invalidate_benchmark_index
+from .benchmarking_service import IndustryBenchmark
+from .emission_distributions import footprint_changes_distributions, schedule_company_sync
+from .forecast_snapshots import schedule_company_refresh
+from .models import CarbonFootprint, CarbonFootprintData, FootprintCompleteness, OffsetPurchase
+
+
+@receiver(post_save, sender=CarbonFootprint)
+@receiver(post_delete, sender=CarbonFootprint)
+def invalidate_ai_results_on_footprint_change(sender, instance, **kwargs):
+    """Cached benchmarks, action plans and trajectories describe the old numbers"""
+    invalidate_company_ai_results(instance.company_id)
+
+
+@receiver(post_save, sender=CarbonFootprint)
+@receiver(post_delete, sender=CarbonFootprint)
+def refresh_forecasts_on_footprint_change(sender, instance, **kwargs):
+    """Precomputed forecasts are dropped and recomputed for the company"""
+    schedule_company_refresh(instance.company_id)
+
+
+@receiver(post_save, sender=OffsetPurchase)
+@receiver(post_delete, sender=OffsetPurchase)
+def refresh_forecasts_on_offset_purchase_change(sender, instance, **kwargs):
+    """The trajectory snapshot projects offsets from purchases"""
+    schedule_company_refresh(instance.company_id)
+
+
+@receiver(post_save, sender=CarbonFootprint)
+@receiver(post_delete, sender=CarbonFootprint)
+def sync_emission_distributions_on_footprint_change(sender, instance, created=False, **kwargs):
+    """Industry percentile tables follow the company's verified totals, once the write commits"""
+    if not footprint_changes_distributions(instance, created=created, deleted=kwargs['signal'] is post_delete):
+        return
+    schedule_company_sync(instance.company_id)
+    loaded_company = getattr(instance, '_loaded_values', {}).get('company_id')
+    if loaded_company and loaded_company != instance.company_id:
+        schedule_company_sync(loaded_company)
+
+
+@receiver(post_save, sender=IndustryBenchmark)
+@receiver(post_delete, sender=IndustryBenchmark)
+def invalidate_benchmark_index_on_change(sender, instance, **kwargs):
+    """This worker reloads its benchmark index once the change is committed; others notice on their next check"""
+    transaction.on_commit(invalidate_benchmark_index)
+
+
+@receiver(post_save, sender=CarbonFootprintData)
+@receiver(post_delete, sender=CarbonFootprintData)
+def drop_completeness_on_activity_change(sender, instance, **kwargs):
+    """The stored score is recomputed on the next read"""
+    if instance.footprint_id:
+        FootprintCompleteness.objects.filter(footprint_id=instance.footprint_id).delete()
@@ -0,0 +1,126 @@
+"""
+Helpers for streaming AI responses to the browser as server-sent events
+"""
+import json
+import re
+from typing import Any, Optional
+
+from rest_framework.renderers import BaseRenderer
+
+# Escapes allowed inside a JSON string, other than \uXXXX
+_SIMPLE_ESCAPES = {
+    '"': '"',
+    '\\': '\\',
+    '/': '/',
+    'b': '\b',
+    'f': '\f',
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets DRF content negotiation accept text/event-stream
+
+    Streaming views return a StreamingHttpResponse that bypasses rendering;
+    this only renders the plain Responses such views return before streaming
+    starts (validation and auth errors), as a single error event.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, (bytes, str)):
+            return data
+        return sse_event('error', data).encode(self.charset)
+
+
+class JSONStringFieldStreamer:
+    """
+    Incrementally decode one string field out of a JSON document that is
+    still being generated
+
+    Feed raw model output chunks to ``feed``; it returns the newly decoded
+    characters of the field's value (possibly empty) so they can be forwarded
+    to the user before the JSON object is complete. Decoding stops at the
+    closing quote. Escape sequences split across chunks are held back until
+    the rest arrives.
+    """
+
+    def __init__(self, field_name: str):
+        self._key_pattern = re.compile(r'"%s"\s*:\s*"' % re.escape(field_name))
+        self._buffer = ''
+        self._position: Optional[int] = None
+        self.value = ''
+        self.complete = False
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        if self.complete:
+            return ''
+
+        if self._position is None:
+            match = self._key_pattern.search(self._buffer)
+            if not match:
+                return ''
+            self._position = match.end()
+
+        decoded = []
+        buffer = self._buffer
+        position = self._position
+        while position < len(buffer):
+            char = buffer[position]
+            if char == '"':
+                self.complete = True
+                position += 1
+                break
+            if char != '\\':
+                decoded.append(char)
+                position += 1
+                continue
+
+            # Escape sequence - wait for the rest if it was split across chunks
+            if position + 1 >= len(buffer):
+                break
+            escape = buffer[position + 1]
+            if escape == 'u':
+                if position + 6 > len(buffer):
+                    break
+                try:
+                    code = int(buffer[position + 2:position + 6], 16)
+                except ValueError:
+                    code = None
+                if code is not None and 0xD800 <= code < 0xDC00:
+                    # High surrogate - combine with the following low surrogate (emoji etc.)
+                    if position + 12 > len(buffer):
+                        break
+                    if buffer[position + 6:position + 8] == '\\u':
+                        try:
+                            low = int(buffer[position + 8:position + 12], 16)
+                        except ValueError:
+                            low = None
+                        if low is not None and 0xDC00 <= low < 0xE000:
+                            decoded.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                            position += 12
+                            continue
+                if code is not None:
+                    decoded.append(chr(code))
+                position += 6
+            else:
+                decoded.append(_SIMPLE_ESCAPES.get(escape, escape))
+                position += 2
+
+        self._position = position
+        text = ''.join(decoded)
+        self.value += text
+        return text
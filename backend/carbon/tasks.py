@@ -0,0 +1,178 @@
+"""
+Celery tasks for carbon document processing
+"""
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Slot counters expire so a crashed worker can't hold a company's slot forever
+EXTRACTION_SLOT_TIMEOUT = 15 * 60
+
+
+def _extraction_slot_key(company_id):
+    return f"document_extraction_slots_{company_id}"
+
+
+def acquire_extraction_slot(company_id):
+    """Claim one of the company's concurrent extraction slots"""
+    limit = getattr(settings, 'AI_DOCUMENT_EXTRACTION_CONCURRENCY', 2)
+    key = _extraction_slot_key(company_id)
+    cache.add(key, 0, EXTRACTION_SLOT_TIMEOUT)
+    try:
+        in_use = cache.incr(key)
+    except ValueError:
+        # Key expired between add and incr
+        cache.add(key, 1, EXTRACTION_SLOT_TIMEOUT)
+        in_use = 1
+    if in_use > limit:
+        release_extraction_slot(company_id)
+        return False
+    return True
+
+
+def release_extraction_slot(company_id):
+    """Give back a slot claimed with acquire_extraction_slot"""
+    try:
+        cache.decr(_extraction_slot_key(company_id))
+    except ValueError:
+        pass
+
+
+@shared_task(bind=True, max_retries=120)
+def extract_uploaded_document(self, document_id):
+    """
+    Run AI extraction for one document from a batch upload
+
+    At most AI_DOCUMENT_EXTRACTION_CONCURRENCY documents per company are
+    extracted at once; further tasks are retried after a short delay so one
+    company's year of bills can't monopolise the workers or the Gemini quota.
+
+    Args:
+        document_id: UUID of the UploadedDocument
+    """
+    from .models import UploadedDocument
+    from .document_processing import process_document, settle_batch_copies
+
+    try:
+        document = UploadedDocument.objects.select_related('company').get(id=document_id)
+    except UploadedDocument.DoesNotExist:
+        logger.error(f"Document {document_id} not found")
+        return
+
+    if document.extraction_status != 'pending':
+        return
+
+    if not acquire_extraction_slot(document.company_id):
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=getattr(settings, 'AI_DOCUMENT_EXTRACTION_RETRY_DELAY', 10))
+        # Out of retries: fail the document rather than leave it (and its batch) pending
+        document.extraction_status = 'failed'
+        document.extraction_error = 'Timed out waiting for an extraction slot'
+        document.save(update_fields=['extraction_status', 'extraction_error', 'updated_at'])
+        logger.error(f"Document {document_id} gave up waiting for an extraction slot")
+    else:
+        try:
+            process_document(document)
+        finally:
+            release_extraction_slot(document.company_id)
+
+    settle_batch_copies(document)
+    complete_batch_if_finished(document.batch_id)
+
+
+def complete_batch_if_finished(batch_id):
+    """Stamp the batch once its last document has finished"""
+    from .models import UploadedDocument, DocumentUploadBatch
+
+    if not batch_id:
+        return
+    still_running = UploadedDocument.objects.filter(
+        batch_id=batch_id,
+        extraction_status__in=['pending', 'processing']
+    ).exists()
+    if not still_running:
+        DocumentUploadBatch.objects.filter(
+            id=batch_id,
+            completed_at__isnull=True
+        ).update(completed_at=timezone.now())
+
+
+@shared_task
+def refresh_forecast_snapshots(chunk_size=None):
+    """
+    Recompute every company's ForecastSnapshot rows
+
+    Companies are walked in primary-key chunks of FORECAST_SNAPSHOT_CHUNK_SIZE;
+    each chunk's snapshots are upserted with a single bulk_create. A company
+    whose forecasts fail is logged and skipped so it can't stall the run.
+    """
+    from companies.models import Company
+    from .forecast_snapshots import build_company_snapshots, save_snapshots
+
+    chunk_size = chunk_size or getattr(settings, 'FORECAST_SNAPSHOT_CHUNK_SIZE', 100)
+    computed_at = timezone.now()
+    written = 0
+    last_pk = None
+    while True:
+        companies = Company.objects.order_by('pk')
+        if last_pk is not None:
+            companies = companies.filter(pk__gt=last_pk)
+        chunk = list(companies[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+
+        snapshots = []
+        for company in chunk:
+            try:
+                snapshots.extend(build_company_snapshots(company, computed_at))
+            except Exception as e:
+                logger.error(f"Forecast snapshot failed for company {company.pk}: {str(e)}", exc_info=True)
+        if snapshots:
+            written += save_snapshots(snapshots, computed_at)
+
+    logger.info(f"Refreshed {written} forecast snapshots")
+    return written
+
+
+@shared_task
+def refresh_company_forecasts(company_id):
+    """Recompute one company's ForecastSnapshot rows after it wrote footprint data"""
+    from companies.models import Company
+    from .forecast_snapshots import build_company_snapshots, clear_refresh_pending, save_snapshots
+
+    clear_refresh_pending(company_id)
+    company = Company.objects.filter(pk=company_id).first()
+    if company is None:
+        return 0
+    computed_at = timezone.now()
+    return save_snapshots(build_company_snapshots(company, computed_at), computed_at)
+
+
+@shared_task
+def sync_company_distributions(company_id):
+    """Update one company's IndustryEmissionDistribution entries after its verified totals changed"""
+    from .emission_distributions import clear_sync_pending, sync_company
+
+    clear_sync_pending(company_id)
+    sync_company(company_id)
+
+
+@shared_task
+def rebuild_emission_distributions():
+    """
+    Rebuild every IndustryEmissionDistribution row from verified footprints
+
+    Footprint writes keep the rows current (sync_company_distributions); the
+    rebuild also catches companies that changed industry or head count since
+    their footprints were written.
+    """
+    from .emission_distributions import rebuild_distributions
+
+    rebuilt = rebuild_distributions()
+    logger.info(f"Rebuilt {rebuilt} industry emission distributions")
+    return rebuilt
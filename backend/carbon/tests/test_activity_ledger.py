@@ -0,0 +1,190 @@
+"""
+Tests for the activity ledger
+"""
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from carbon.activity_ledger import (
+    footprint_scope_totals, ingest_activities, ledger_entries, scope_totals,
+)
+from carbon.completeness import get_completeness
+from carbon.emission_factors import EmissionFactor
+from carbon.models import CarbonFootprint, CarbonFootprintData, FootprintCompleteness
+from companies.models import Company
+
+User = get_user_model()
+
+
+class ActivityLedgerTests(TestCase):
+    """Test suite for ledger ingestion and aggregated totals"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Test Corp', industry='Technology', employees=50)
+        self.footprint = CarbonFootprint.objects.create(company=self.company, reporting_period='2024-Q1')
+
+    def test_bulk_ingestion(self):
+        other = Company.objects.create(name='Other', industry='Retail', employees=5)
+        foreign = CarbonFootprint.objects.create(company=other, reporting_period='2024')
+
+        # One insert and one completeness delete, inside a savepoint
+        with self.assertNumQueries(4):
+            created, errors = ingest_activities(self.company, [
+                {'activity_type': 'electricity', 'quantity': 4500, 'unit': 'kWh', 'co2e': '2.04', 'period': '2024-03'},
+                {'activity_type': 'diesel', 'scope': 'scope1', 'calculated_emissions': 1.5},
+                {'activity_type': 'custom', 'co2e': 1},
+                {'activity_type': 'natural_gas', 'co2e': 'lots', 'period': '2024-01'},
+                {'activity_type': 'natural_gas', 'co2e': 1, 'period': 'sometime'},
+            ], source='integration', footprint=self.footprint)
+
+        self.assertEqual(len(created), 2)
+        self.assertEqual(errors, [
+            'Row 3: scope is required for activity type custom',
+            'Row 4: co2e must be a number',
+            'Row 5: Unrecognised period: sometime',
+        ])
+        electricity, diesel = CarbonFootprintData.objects.order_by('id')
+        self.assertEqual((electricity.scope, electricity.period_start, electricity.source), (2, date(2024, 3, 1), 'integration'))
+        # Without a period the row takes the footprint's
+        self.assertEqual((diesel.scope, diesel.period_start), (1, date(2024, 1, 1)))
+
+        _, errors = ingest_activities(self.company, [
+            {'activity_type': 'diesel', 'co2e': 1, 'footprint_id': foreign.id},
+            {'activity_type': 'diesel', 'co2e': 1, 'footprint_id': 'not-a-uuid'},
+        ])
+        self.assertEqual(errors, ['Row 1: footprint not found', 'Row 2: footprint not found'])
+
+    def test_emission_factor_ids(self):
+        factor = EmissionFactor.objects.create(
+            activity_type='electricity', region_type='country', region_code='US', region_name='United States',
+            year=2024, factor_value=Decimal('0.4'), unit='kg CO2/kWh', source='EPA'
+        )
+
+        # One factor lookup, then the insert and completeness delete inside a savepoint
+        with self.assertNumQueries(5):
+            created, errors = ingest_activities(self.company, [
+                {'activity_type': 'electricity', 'co2e': 1, 'factor_id': str(factor.id)},
+                {'activity_type': 'electricity', 'co2e': 1, 'factor_id': 'not-a-uuid'},
+                {'activity_type': 'electricity', 'co2e': 1, 'factor_id': str(uuid.uuid4())},
+            ], footprint=self.footprint)
+
+        self.assertEqual([entry.factor_id for entry in created], [factor.id])
+        self.assertEqual(errors, [
+            'Row 2: factor_id is not a valid id: not-a-uuid',
+            'Row 3: emission factor not found',
+        ])
+
+    def test_spreadsheet_numbers(self):
+        created, errors = ingest_activities(self.company, [
+            {'activity_type': 'electricity', 'co2e': 1, 'period': np.int64(2023)},
+            {'activity_type': 'diesel', 'co2e': 1, 'period': np.float64(2024.0), 'scope': np.float64(1.0)},
+            {'activity_type': 'custom', 'co2e': 1, 'period': 2024, 'scope': '3.0'},
+            {'activity_type': 'custom', 'co2e': 1, 'period': 2024.5, 'scope': 3},
+            {'activity_type': 'custom', 'co2e': 1, 'period': 2024, 'scope': 2.5},
+        ])
+
+        self.assertEqual([(entry.scope, entry.period_start) for entry in created], [
+            (2, date(2023, 1, 1)), (1, date(2024, 1, 1)), (3, date(2024, 1, 1)),
+        ])
+        self.assertEqual(errors, ['Row 4: Unrecognised period: 2024.5', 'Row 5: scope must be 1, 2 or 3'])
+
+    def test_ledger_is_append_only(self):
+        created, _ = ingest_activities(self.company, [{'activity_type': 'diesel', 'co2e': 1}], footprint=self.footprint)
+        with self.assertRaises(ValueError):
+            created[0].save()
+
+    def test_ingestion_drops_stored_completeness(self):
+        get_completeness([self.footprint])
+        self.assertTrue(FootprintCompleteness.objects.filter(footprint=self.footprint).exists())
+
+        ingest_activities(self.company, [{'activity_type': 'electricity', 'co2e': 1}], footprint=self.footprint)
+
+        self.assertFalse(FootprintCompleteness.objects.filter(footprint=self.footprint).exists())
+        self.assertEqual(get_completeness([self.footprint])[0]['scope2_score'], 1.0)
+
+    def test_scope_totals(self):
+        second = CarbonFootprint.objects.create(company=self.company, reporting_period='2024-Q2')
+        ingest_activities(self.company, [
+            {'activity_type': 'natural_gas', 'co2e': 3, 'period_start': '2024-01-15'},
+            {'activity_type': 'electricity', 'co2e': 2, 'period_start': '2024-02-01'},
+            {'activity_type': 'electricity', 'co2e': '-0.5', 'period_start': '2024-02-01'},
+        ], footprint=self.footprint)
+        ingest_activities(self.company, [
+            {'activity_type': 'business_travel', 'co2e': 4, 'period': '2024-05'},
+        ], footprint=second)
+
+        with self.assertNumQueries(1):
+            totals = scope_totals(ledger_entries(self.company, start=date(2024, 2, 1)))
+        self.assertEqual(totals, {
+            'scope1_emissions': 0.0, 'scope2_emissions': 1.5, 'scope3_emissions': 4.0, 'total_emissions': 5.5,
+        })
+
+        with self.assertNumQueries(1):
+            by_footprint = footprint_scope_totals([self.footprint.id, second.id])
+        self.assertEqual(by_footprint[self.footprint.id]['total_emissions'], 4.5)
+        self.assertEqual(by_footprint[second.id]['scope3_emissions'], 4.0)
+
+    def test_endpoints(self):
+        user = User.objects.create_user(username='user', email='user@example.com', password='testpass123')
+        user.company = self.company
+        user.save()
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = client.post(reverse('bulk-import-activities'), {
+            'activities': [
+                {'activity_type': 'electricity', 'quantity': 1000, 'unit': 'kWh', 'co2e': 0.45, 'period': '2024-02'},
+                {'activity_type': 'unknown', 'co2e': 1},
+            ],
+            'footprint_id': str(self.footprint.id),
+            'source': 'chat',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['imported'], 1)
+        self.assertEqual(len(response.json()['errors']), 1)
+
+        upload = SimpleUploadedFile(
+            'activities.csv', b'activity_type,quantity,unit,co2e,period_start\ndiesel,100,liters,0.27,2024-03-01\n'
+        )
+        response = client.post(reverse('bulk-import-activities'), {'file': upload})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # pandas reads the years as int64 and the scopes, with a blank cell, as float64
+        upload = SimpleUploadedFile(
+            'activities.csv', b'activity_type,scope,co2e,period\ncustom,2,0.1,2023\ndiesel,,0.2,2023\n'
+        )
+        response = client.post(reverse('bulk-import-activities'), {'file': upload})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.json()['imported'], response.json()['errors']), (2, []))
+
+        response = client.get(reverse('activity-ledger-totals'), {'start': '2024-01-01', 'end': '2024-12-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['totals']['total_emissions'], 0.72)
+        self.assertEqual([row['activity_type'] for row in response.json()['by_activity']], ['electricity', 'diesel'])
+
+        response = client.get(reverse('activity-ledger-totals'), {'footprint_id': str(self.footprint.id)})
+        self.assertEqual(response.json()['totals']['scope2_emissions'], 0.45)
+
+    def test_endpoints_reject_bad_footprint_ids(self):
+        user = User.objects.create_user(username='user', email='user@example.com', password='testpass123')
+        user.company = self.company
+        user.save()
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        activities = [{'activity_type': 'electricity', 'co2e': 0.45, 'period': '2024-02'}]
+
+        for footprint_id, expected in (('abc', status.HTTP_400_BAD_REQUEST), (str(uuid.uuid4()), status.HTTP_404_NOT_FOUND)):
+            response = client.post(reverse('bulk-import-activities'), {
+                'activities': activities, 'footprint_id': footprint_id,
+            }, content_type='application/json')
+            self.assertEqual(response.status_code, expected)
+
+            response = client.get(reverse('activity-ledger-totals'), {'footprint_id': footprint_id})
+            self.assertEqual(response.status_code, expected)
+        self.assertFalse(ledger_entries(self.company).exists())
@@ -0,0 +1,115 @@
+"""
+Tests for the fake latency-injecting AI backend
+"""
+import io
+import random
+import statistics
+import time
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from carbon.ai_backends import (
+    DEFAULT_FAKE_BACKEND, FakeBackendError, FakeDeadlineExceeded, FakeGenerativeModel,
+    LatencyDistribution, first_json_example,
+)
+from carbon.ai_services import ConversationalAIService, GeminiAIService, GeminiVisionService
+from carbon.circuit_breaker import gemini_breaker
+
+
+def fake_config(**overrides):
+    config = dict(DEFAULT_FAKE_BACKEND, latency_distribution='fixed', latency_median_ms=0,
+                  vision_latency_median_ms=0, seed=1)
+    config.update(overrides)
+    return config
+
+
+class LatencyDistributionTests(TestCase):
+    """Test suite for LatencyDistribution"""
+
+    def test_lognormal_matches_median_and_p95(self):
+        distribution = LatencyDistribution('lognormal', 800, 2500, rng=random.Random(7))
+        samples = sorted(distribution.sample_ms() for _ in range(20000))
+
+        self.assertAlmostEqual(statistics.median(samples), 800, delta=40)
+        self.assertAlmostEqual(samples[int(0.95 * len(samples))], 2500, delta=150)
+
+    def test_fixed_returns_median(self):
+        self.assertEqual(LatencyDistribution('fixed', 250).sample_ms(), 250)
+
+    def test_unknown_distribution_is_rejected(self):
+        with self.assertRaises(ValueError):
+            LatencyDistribution('pareto', 100)
+
+
+class FakeGenerativeModelTests(TestCase):
+    """Test suite for FakeGenerativeModel"""
+
+    def test_injected_errors_raise(self):
+        model = FakeGenerativeModel('test', config=fake_config(error_rate=1.0))
+        with self.assertRaises(FakeBackendError):
+            model.generate_content('hello')
+
+    def test_slow_call_fails_at_request_deadline(self):
+        model = FakeGenerativeModel('test', config=fake_config(latency_median_ms=5000))
+
+        started = time.monotonic()
+        with self.assertRaises(FakeDeadlineExceeded):
+            model.generate_content('hello', request_options={'timeout': 0.05})
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_streaming_chunks_rebuild_response_with_usage_on_last(self):
+        model = FakeGenerativeModel('test', config=fake_config(stream_chunk_chars=10))
+        chunks = list(model.generate_content('Return JSON: "ai_response"', stream=True))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(chunk.usage_metadata is None for chunk in chunks[:-1]))
+        self.assertIsNotNone(chunks[-1].usage_metadata)
+        self.assertTrue(''.join(chunk.text for chunk in chunks).startswith('{"ai_response"'))
+
+    def test_first_json_example_skips_templates(self):
+        prompt = 'Template: {"value": <number>}\nExample:\n{"meter_reading": 1.5, "unit": "kWh"}'
+        self.assertEqual(first_json_example(prompt), '{"meter_reading": 1.5, "unit": "kWh"}')
+
+
+@override_settings(AI_BACKEND='fake', AI_FAKE_BACKEND=fake_config())
+class FakeBackendServiceTests(TestCase):
+    """Test that the AI services run against the fake backend when selected"""
+
+    def setUp(self):
+        cache.clear()
+        gemini_breaker.reset()
+        self.addCleanup(gemini_breaker.reset)
+
+    def test_text_service_uses_fake_model(self):
+        service = GeminiAIService()
+
+        self.assertIsInstance(service.model, FakeGenerativeModel)
+        self.assertEqual(
+            service._call_gemini('benchmark this company'),
+            service._get_mock_response('benchmark this company')
+        )
+
+    @override_settings(AI_CONVERSATION_FAST_PATH_ENABLED=False)
+    def test_conversation_streams_through_fake_model(self):
+        events = list(ConversationalAIService().stream_extraction(
+            user_message='Our electricity bill was $500',
+            conversation_history=[],
+            current_footprint=None,
+            company_context={'name': 'Test Corp'},
+        ))
+
+        tokens = ''.join(payload for event, payload in events if event == 'token')
+        result = events[-1][1]
+        self.assertEqual(tokens, result['ai_response'])
+        self.assertEqual(result['extracted_data']['unit'], 'kWh')
+
+    def test_vision_service_answers_in_prompt_format(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64), 'white').save(buffer, format='PNG')
+
+        result = GeminiVisionService().read_meter_photo(buffer.getvalue())
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['meter_reading'], 12345.67)
@@ -0,0 +1,147 @@
+"""
+Tests for coalescing identical concurrent AI calls
+"""
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from carbon.ai_coalescing import SingleFlight, prompt_key
+from carbon.ai_services import GeminiAIService
+
+
+class SingleFlightTests(TestCase):
+    """Test suite for SingleFlight"""
+
+    def setUp(self):
+        cache.clear()
+        self.flight = SingleFlight('test', wait_timeout=5, result_timeout=5, poll_interval=0.01)
+
+    def _run_concurrently(self, fn, callers=5):
+        results = []
+        barrier = threading.Barrier(callers)
+
+        def worker():
+            barrier.wait()
+            results.append(fn())
+
+        threads = [threading.Thread(target=worker) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_callers_share_one_call(self):
+        calls = []
+
+        def slow_call():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'percentile_ranking': 65}
+
+        results = self._run_concurrently(lambda: self.flight.do('same-prompt', slow_call))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'percentile_ranking': 65}] * 5)
+
+    def test_waiters_get_their_own_copy(self):
+        def slow_call():
+            time.sleep(0.2)
+            return {'opportunities': ['LED lighting']}
+
+        results = self._run_concurrently(lambda: self.flight.do('same-prompt', slow_call), callers=3)
+        results[0]['opportunities'].append('changed by one caller')
+
+        self.assertEqual([result['opportunities'] for result in results[1:]], [['LED lighting']] * 2)
+
+    def test_unpublishable_results_are_not_cached(self):
+        self.flight.do('fallback', lambda: 'mock', publish=lambda result: result != 'mock')
+        self.assertEqual(self.flight.do('fallback', lambda: 'real'), 'real')
+        self.assertEqual(self.flight.do('fallback', lambda: 'later'), 'real')
+
+    def test_different_keys_are_not_coalesced(self):
+        calls = []
+        self.flight.do('a', lambda: calls.append('a'))
+        self.flight.do('b', lambda: calls.append('b'))
+        self.assertEqual(calls, ['a', 'b'])
+
+    def test_waits_for_call_in_progress_on_another_worker(self):
+        key = prompt_key('benchmark prompt')
+        cache.add(f'singleflight_test_lock_{key}', 1, 5)
+
+        def other_worker_finishes():
+            time.sleep(0.1)
+            cache.set(f'singleflight_test_result_{key}', {'value': 'from other worker'}, 5)
+            cache.delete(f'singleflight_test_lock_{key}')
+
+        threading.Thread(target=other_worker_finishes).start()
+        fn = MagicMock(return_value='local call')
+
+        self.assertEqual(self.flight.do(key, fn), 'from other worker')
+        fn.assert_not_called()
+
+    def test_errors_are_raised_to_every_waiter(self):
+        def failing_call():
+            time.sleep(0.1)
+            raise RuntimeError('upstream down')
+
+        errors = []
+
+        def caller():
+            try:
+                self.flight.do('failing', failing_call)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        self._run_concurrently(caller, callers=3)
+        self.assertEqual(errors, ['upstream down'] * 3)
+
+
+class GeminiCoalescingTests(TestCase):
+    """Test that GeminiAIService coalesces identical prompts"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_identical_concurrent_prompts_make_one_request(self):
+        service = GeminiAIService()
+        model = MagicMock()
+
+        def generate(prompt, **kwargs):
+            time.sleep(0.2)
+            return SimpleNamespace(text='{"percentile_ranking": 40}')
+
+        model.generate_content.side_effect = generate
+        service.model = model
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(service._call_gemini('benchmark this company')))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(model.generate_content.call_count, 1)
+        self.assertEqual(results, [{'percentile_ranking': 40}] * 4)
+
+    def test_fallback_responses_are_not_shared(self):
+        service = GeminiAIService()
+        model = MagicMock()
+        model.generate_content.side_effect = [
+            RuntimeError('upstream down'),
+            SimpleNamespace(text='{"percentile_ranking": 40}'),
+        ]
+        service.model = model
+
+        fallback = service._call_gemini('benchmark this company')
+        self.assertEqual(fallback, service._get_mock_response('benchmark this company'))
+
+        self.assertEqual(service._call_gemini('benchmark this company'), {'percentile_ranking': 40})
+        self.assertEqual(model.generate_content.call_count, 2)
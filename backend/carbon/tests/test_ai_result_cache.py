@@ -0,0 +1,157 @@
+"""
+Tests for company-scoped caching of AI benchmark, action plan and trajectory results
+"""
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from carbon.ai_result_cache import company_result_key, invalidate_company_ai_results
+from carbon.ai_services import (
+    AIActionPlanGenerator, AIBenchmarkingService, AIPredictiveAnalytics, GeminiAIService,
+)
+from carbon.circuit_breaker import gemini_breaker
+from carbon.models import CarbonFootprint
+from companies.models import Company
+
+User = get_user_model()
+
+
+class CompanyResultKeyTests(TestCase):
+    """Test suite for company_result_key"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_key_depends_on_company_and_inputs(self):
+        key = company_result_key('benchmark', 1, {'total': '450.00'})
+
+        self.assertEqual(key, company_result_key('benchmark', 1, {'total': '450.00'}))
+        self.assertNotEqual(key, company_result_key('benchmark', 2, {'total': '450.00'}))
+        self.assertNotEqual(key, company_result_key('benchmark', 1, {'total': '451.00'}))
+
+    def test_invalidation_changes_key(self):
+        key = company_result_key('benchmark', 1, {'total': '450.00'})
+        invalidate_company_ai_results(1)
+
+        self.assertNotEqual(key, company_result_key('benchmark', 1, {'total': '450.00'}))
+        self.assertEqual(
+            company_result_key('benchmark', 2, {}), company_result_key('benchmark', 2, {})
+        )
+
+
+class AIResultCachingTests(TestCase):
+    """Test that expensive AI results are reused per company until its data changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name='Test Corp', industry='Manufacturing', employees=100)
+        for period, scope1 in (('2024', '90.00'), ('2025', '100.00')):
+            self.footprint = CarbonFootprint.objects.create(
+                company=self.company, reporting_period=period,
+                scope1_emissions=Decimal(scope1), scope2_emissions=Decimal('200.00'),
+                scope3_emissions=Decimal('150.00')
+            )
+        patcher = patch.object(
+            GeminiAIService, '_call_gemini', side_effect=lambda prompt, **kwargs: {'calls': self.calls.append(prompt)}
+        )
+        self.calls = []
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_action_plan_is_cached_until_footprint_changes(self):
+        generator = AIActionPlanGenerator()
+        generator.generate_action_plan(self.company)
+        generator.generate_action_plan(self.company)
+        self.assertEqual(len(self.calls), 1)
+
+        self.footprint.scope1_emissions = Decimal('120.00')
+        self.footprint.save()
+        generator.generate_action_plan(self.company)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_deleting_a_footprint_invalidates(self):
+        service = AIPredictiveAnalytics()
+        service.predict_carbon_trajectory(self.company)
+        CarbonFootprint.objects.create(
+            company=self.company, reporting_period='2023',
+            scope1_emissions=Decimal('80.00'), scope2_emissions=Decimal('0'), scope3_emissions=Decimal('0')
+        ).delete()
+        service.predict_carbon_trajectory(self.company)
+
+        self.assertEqual(len(self.calls), 2)
+
+    def test_trajectory_is_keyed_on_growth_plans(self):
+        service = AIPredictiveAnalytics()
+        service.predict_carbon_trajectory(self.company, {'revenue_growth': 10})
+        service.predict_carbon_trajectory(self.company, {'revenue_growth': 10})
+        service.predict_carbon_trajectory(self.company, {'revenue_growth': 25})
+
+        self.assertEqual(len(self.calls), 2)
+
+    def test_benchmark_endpoint_is_not_shared_between_companies(self):
+        other_company = Company.objects.create(name='Other Corp', industry='Manufacturing', employees=100)
+        CarbonFootprint.objects.create(
+            company=other_company, reporting_period='2025',
+            scope1_emissions=Decimal('100.00'), scope2_emissions=Decimal('200.00'),
+            scope3_emissions=Decimal('150.00')
+        )
+
+        for index, company in enumerate((self.company, other_company)):
+            user = User.objects.create_user(
+                username=f'user{index}', email=f'user{index}@example.com', password='testpass123'
+            )
+            user.company = company
+            user.save()
+            response = Client().get(
+                reverse('ai-benchmark'),
+                HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}'
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()['company_name'], company.name)
+
+        self.assertEqual(len(self.calls), 2)
+
+
+class FallbackCachingTests(TestCase):
+    """Test that mock fallbacks are not cached in place of model answers"""
+
+    def setUp(self):
+        cache.clear()
+        gemini_breaker.reset()
+        self.addCleanup(gemini_breaker.reset)
+        self.company = Company.objects.create(name='Test Corp', industry='Manufacturing', employees=100)
+        for period in ('2024', '2025'):
+            CarbonFootprint.objects.create(
+                company=self.company, reporting_period=period,
+                scope1_emissions=Decimal('100.00'), scope2_emissions=Decimal('200.00'),
+                scope3_emissions=Decimal('150.00')
+            )
+
+    def test_open_breaker_leaves_cache_empty(self):
+        for service, method in (
+            (AIBenchmarkingService(), 'benchmark_company_performance'),
+            (AIActionPlanGenerator(), 'generate_action_plan'),
+            (AIPredictiveAnalytics(), 'predict_carbon_trajectory'),
+        ):
+            with self.subTest(method=method):
+                cache.clear()
+                service.ai_service.model = MagicMock()
+                service.ai_service.model.generate_content.return_value = SimpleNamespace(text='{"answer": 1}')
+                for _ in range(gemini_breaker.failure_threshold):
+                    gemini_breaker.record_failure()
+
+                fallback = getattr(service, method)(self.company)
+                self.assertNotEqual(fallback, {'answer': 1})
+                service.ai_service.model.generate_content.assert_not_called()
+
+                gemini_breaker.reset()
+                self.assertEqual(getattr(service, method)(self.company), {'answer': 1})
+                self.assertEqual(getattr(service, method)(self.company), {'answer': 1})
+                service.ai_service.model.generate_content.assert_called_once()
@@ -0,0 +1,168 @@
+"""
+Tests for AI call telemetry
+"""
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from carbon.ai_services import AIBenchmarkingService, GeminiAIService
+from carbon.ai_telemetry import ai_call_context, record_ai_call, summarize_calls, telemetry_buffer
+from carbon.circuit_breaker import gemini_breaker
+from carbon.models import AICallLog, CarbonFootprint
+from companies.models import Company
+
+User = get_user_model()
+
+
+class AITelemetryTests(TestCase):
+    """Test that Gemini calls are recorded in AICallLog"""
+
+    def setUp(self):
+        cache.clear()
+        gemini_breaker.reset()
+        telemetry_buffer.clear()
+        self.addCleanup(telemetry_buffer.clear)
+        self.company = Company.objects.create(name='Test Corp', industry='Manufacturing', employees=100)
+
+    def test_call_records_usage_metadata(self):
+        service = GeminiAIService()
+        service.model = MagicMock(model_name='models/gemini-test')
+        service.model.generate_content.return_value = SimpleNamespace(
+            text='{"percentile_ranking": 40}',
+            usage_metadata=SimpleNamespace(prompt_token_count=120, candidates_token_count=30)
+        )
+
+        with ai_call_context('benchmarking', company=self.company):
+            service._call_gemini('benchmark this company')
+        telemetry_buffer.flush()
+
+        log = AICallLog.objects.get()
+        self.assertEqual(log.feature, 'benchmarking')
+        self.assertEqual(log.company_id, self.company.id)
+        self.assertEqual(log.model_name, 'models/gemini-test')
+        self.assertEqual((log.prompt_tokens, log.response_tokens), (120, 30))
+        self.assertEqual(log.outcome, 'success')
+        self.assertFalse(log.cache_hit)
+
+    def test_upstream_error_is_recorded(self):
+        service = GeminiAIService()
+        service.model = MagicMock()
+        service.model.generate_content.side_effect = RuntimeError('upstream error')
+
+        service._call_gemini('benchmark this company')
+        telemetry_buffer.flush()
+
+        self.assertEqual(AICallLog.objects.get().outcome, 'error')
+
+    def test_cached_benchmark_is_recorded_as_cache_hit(self):
+        CarbonFootprint.objects.create(
+            company=self.company, reporting_period='2025-Q3',
+            scope1_emissions=Decimal('100.00'), scope2_emissions=Decimal('200.00'), scope3_emissions=Decimal('150.00')
+        )
+        service = AIBenchmarkingService()
+        # Only model answers are cached, not the mock fallback
+        service.ai_service.model = MagicMock()
+        service.ai_service.model.generate_content.return_value = SimpleNamespace(text='{"percentile_ranking": 40}')
+
+        service.benchmark_company_performance(self.company)
+        service.benchmark_company_performance(self.company)
+        telemetry_buffer.flush()
+
+        log = AICallLog.objects.get(outcome='cache_hit')
+        self.assertEqual((log.feature, log.cache_hit), ('benchmarking', True))
+
+    def test_summary_reports_latency_percentiles_and_tokens(self):
+        AICallLog.objects.bulk_create([
+            AICallLog(feature='benchmarking', prompt_tokens=100, response_tokens=50,
+                      latency_ms=latency, outcome='success')
+            for latency in range(10, 210, 10)
+        ] + [
+            AICallLog(feature='benchmarking', outcome='cache_hit', cache_hit=True),
+            AICallLog(feature='benchmarking', latency_ms=30000, outcome='timeout'),
+            AICallLog(feature='validation', latency_ms=4567, outcome='success'),
+        ])
+
+        with self.assertNumQueries(2):
+            benchmarking, validation = summarize_calls(AICallLog.objects.all(), ['feature'])
+
+        self.assertEqual(benchmarking['calls'], 22)
+        self.assertEqual(benchmarking['total_tokens'], 3000)
+        self.assertEqual(benchmarking['p50_latency_ms'], 110)
+        self.assertEqual(benchmarking['p95_latency_ms'], 200)
+        self.assertAlmostEqual(benchmarking['cache_hit_rate'], 1 / 22, places=4)
+        self.assertAlmostEqual(benchmarking['error_rate'], 1 / 22, places=4)
+        # Slow calls are bucketed to 100ms
+        self.assertEqual(validation['p50_latency_ms'], 4500)
+
+    def test_summary_latency_ignores_calls_that_never_reached_the_model(self):
+        AICallLog.objects.bulk_create([
+            AICallLog(feature='benchmarking', latency_ms=800, outcome='success'),
+            AICallLog(feature='benchmarking', latency_ms=1200, outcome='error'),
+            AICallLog(feature='benchmarking', latency_ms=1, outcome='circuit_open'),
+            AICallLog(feature='benchmarking', latency_ms=2, outcome='circuit_open'),
+            AICallLog(feature='benchmarking', latency_ms=0, outcome='mock'),
+            AICallLog(feature='benchmarking', outcome='coalesced', cache_hit=True),
+            AICallLog(feature='validation', latency_ms=0, outcome='mock'),
+        ])
+
+        benchmarking, validation = summarize_calls(AICallLog.objects.all(), ['feature'])
+
+        self.assertEqual(benchmarking['calls'], 6)
+        self.assertEqual(benchmarking['p50_latency_ms'], 800)
+        self.assertEqual(benchmarking['p95_latency_ms'], 1200)
+        self.assertIsNone(validation['p50_latency_ms'])
+
+
+class AITelemetryReportTests(TestCase):
+    """Test the telemetry report endpoint"""
+
+    def setUp(self):
+        telemetry_buffer.clear()
+        self.addCleanup(telemetry_buffer.clear)
+        self.company = Company.objects.create(name='Test Corp', industry='Manufacturing', employees=100)
+        self.other_company = Company.objects.create(name='Other Corp', industry='Retail', employees=20)
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        self.user.company = self.company
+        self.user.save()
+
+        record_ai_call(feature='benchmarking', company=self.company, prompt_tokens=100, latency_ms=800)
+        record_ai_call(feature='action_plan', company=self.other_company, prompt_tokens=300, latency_ms=1200)
+
+    def _get(self, user):
+        return Client().get(
+            reverse('ai-telemetry'),
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}'
+        )
+
+    def test_report_is_scoped_to_users_company(self):
+        response = self._get(self.user)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['total_calls'], 1)
+        self.assertEqual([row['feature'] for row in data['by_feature']], ['benchmarking'])
+        self.assertEqual(data['by_feature'][0]['p50_latency_ms'], 800)
+
+    def test_superuser_sees_all_companies(self):
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='testpass123')
+
+        data = self._get(admin).json()
+
+        self.assertEqual(data['total_calls'], 2)
+        self.assertEqual(data['by_feature'][0]['feature'], 'action_plan')  # most tokens first
+
+    def test_days_are_capped(self):
+        response = Client().get(
+            reverse('ai-telemetry'), {'days': 100000},
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['period_days'], 90)
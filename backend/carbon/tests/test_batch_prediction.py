@@ -0,0 +1,96 @@
+"""
+Tests for batch multi-activity prediction
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from carbon.models import CarbonFootprint
+from carbon.prediction_service import PredictionService
+from companies.models import Company
+
+User = get_user_model()
+
+
+def months_ago(count):
+    today = timezone.now().date()
+    month_index = today.year * 12 + today.month - 1 - count
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+class BatchPredictionTests(TestCase):
+    """Test suite for PredictionService.predict_batch"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Test Corp', industry='Manufacturing', employees=100)
+        self.service = PredictionService()
+        self.history = []
+        for offset, (scope1, scope2) in enumerate(
+            [('90', '210'), ('95', '190'), ('100', '240'), ('110', '200'), ('105', '260'), ('120', '230')]
+        ):
+            period = months_ago(6 - offset)
+            CarbonFootprint.objects.create(
+                company=self.company, reporting_period=period.strftime('%Y-%m'),
+                scope1_emissions=Decimal(scope1), scope2_emissions=Decimal(scope2),
+                scope3_emissions=Decimal('50')
+            )
+            self.history.append((period, float(scope1), float(scope2)))
+        self.target_period = months_ago(-1).strftime('%Y-%m')
+
+    def test_matches_single_activity_predictions(self):
+        result = self.service.predict_batch(
+            self.company.id, self.target_period, ['natural_gas', 'electricity']
+        )
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['data_points_used'], 6)
+        for activity, column in (('natural_gas', 1), ('electricity', 2)):
+            single = self.service.predict_next_value(
+                self.company.id, activity, self.target_period,
+                historical_data=[
+                    {'period': row[0].strftime('%Y-%m'), 'value': row[column], 'date': row[0]}
+                    for row in self.history
+                ]
+            )
+            self.assertEqual(result['predictions'][activity], single)
+
+    def test_single_query_for_all_activities(self):
+        with self.assertNumQueries(1):
+            result = self.service.predict_batch(self.company.id, self.target_period)
+
+        self.assertEqual(set(result['predictions']), set(PredictionService.ACTIVITY_SCOPES))
+
+    def test_insufficient_history(self):
+        CarbonFootprint.objects.filter(company=self.company).exclude(
+            reporting_period__in=[row[0].strftime('%Y-%m') for row in self.history[:2]]
+        ).delete()
+
+        result = self.service.predict_batch(self.company.id, self.target_period, ['diesel'])
+
+        self.assertTrue(result['success'])
+        self.assertIsNone(result['predictions']['diesel']['predicted_value'])
+
+    def test_endpoint(self):
+        user = User.objects.create_user(username='user', email='user@example.com', password='testpass123')
+        user.company = self.company
+        user.save()
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = client.post(
+            reverse('ai-predict-batch'),
+            {'target_period': self.target_period, 'activity_types': ['electricity', 'commuting']},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.json()['predictions']), {'electricity', 'commuting'})
+
+        response = client.post(
+            reverse('ai-predict-batch'), {'target_period': '2025/01'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
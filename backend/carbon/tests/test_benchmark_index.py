@@ -0,0 +1,124 @@
+"""
+Tests for the in-process IndustryBenchmark index
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from carbon import benchmark_index
+from carbon.benchmark_index import get_benchmark_index, invalidate_benchmark_index
+from carbon.benchmarking_service import BenchmarkingService, IndustryBenchmark
+from carbon.models import CarbonFootprint
+from companies.models import Company
+
+User = get_user_model()
+
+
+def benchmark(industry, low, high, year, average='8.0'):
+    return IndustryBenchmark.objects.create(
+        industry_sector=industry, employee_range_min=low, employee_range_max=high, year=year,
+        avg_scope1_per_employee=Decimal('2.0'), avg_scope2_per_employee=Decimal('1.5'),
+        avg_scope3_per_employee=Decimal('4.5'), avg_total_per_employee=Decimal(average),
+        median_total_per_employee=Decimal('7.5'), percentile_25=Decimal('5.0'),
+        percentile_75=Decimal('10.0'), sample_size=120, source='test'
+    )
+
+
+class BenchmarkIndexTests(TestCase):
+    """Test suite for BenchmarkIndex and BenchmarkingService lookups"""
+
+    def setUp(self):
+        cache.clear()
+        self.small = benchmark('Manufacturing', 1, 49, 2024)
+        self.medium = benchmark('Manufacturing', 50, 249, 2024)
+        self.large = benchmark('Manufacturing', 250, 100000, 2024)
+        self.previous = benchmark('Manufacturing', 50, 249, 2022)
+        invalidate_benchmark_index()
+
+    def test_fallback_cascade(self):
+        index = get_benchmark_index()
+
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.find('manufacturing', 120, 2024), self.medium)
+        self.assertEqual(index.find('Manufacturing', 249, 2024), self.medium)
+        self.assertEqual(index.find('Manufacturing', 250, 2024), self.large)
+        # No bracket covers 0 employees: smallest bracket for the year
+        self.assertEqual(index.find('Manufacturing', 0, 2024), self.small)
+        # Previous year, then nothing
+        self.assertEqual(index.find('Manufacturing', 120, 2025), self.small)
+        self.assertEqual(index.find('Manufacturing', 120, 2023), self.previous)
+        self.assertIsNone(index.find('Manufacturing', 120, 2021))
+        self.assertIsNone(index.find('Retail', 120, 2024))
+
+    def test_index_reloads_after_benchmark_changes(self):
+        self.assertIsNone(get_benchmark_index().find('Retail', 100, 2024))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            retail = benchmark('Retail', 1, 500, 2024)
+        self.assertEqual(get_benchmark_index().find('Retail', 100, 2024), retail)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            retail.delete()
+        self.assertIsNone(get_benchmark_index().find('Retail', 100, 2024))
+
+    def test_other_workers_changes_are_picked_up_on_the_next_check(self):
+        get_benchmark_index()
+        # Written by another worker: no signal reaches this one
+        retail = benchmark('Retail', 1, 500, 2024)
+
+        with self.settings(BENCHMARK_INDEX_CHECK_INTERVAL=60), self.assertNumQueries(0):
+            self.assertIsNone(get_benchmark_index().find('Retail', 100, 2024))
+
+        later = benchmark_index.time.monotonic() + 61
+        with self.settings(BENCHMARK_INDEX_CHECK_INTERVAL=60), \
+                patch.object(benchmark_index.time, 'monotonic', return_value=later):
+            # One aggregate to compare versions, one to reload
+            with self.assertNumQueries(2):
+                self.assertEqual(get_benchmark_index().find('Retail', 100, 2024), retail)
+            with self.assertNumQueries(0):
+                get_benchmark_index()
+
+    def test_batch_peer_comparison_without_benchmark_queries(self):
+        company = Company.objects.create(name='Test Corp', industry='Manufacturing', employees=100)
+        footprints = [
+            CarbonFootprint.objects.create(
+                company=company, reporting_period=period,
+                scope1_emissions=Decimal('200'), scope2_emissions=Decimal('150'), scope3_emissions=Decimal('50')
+            )
+            for period in ('2024-Q1', '2024', '2023', '2019')
+        ]
+        get_benchmark_index()
+
+        with self.assertNumQueries(0):
+            comparisons = BenchmarkingService(company).get_peer_comparisons(footprints)
+
+        self.assertEqual([c.get('benchmark_info', {}).get('year') for c in comparisons], [2024, 2024, 2022, None])
+        self.assertEqual(comparisons[0]['benchmark_info']['employee_range'], '50-249')
+        self.assertEqual(comparisons[0]['company_emissions']['per_employee'], 4.0)
+        self.assertEqual(comparisons[0]['comparison']['performance'], 'excellent')
+        self.assertIn('error', comparisons[3])
+
+    def test_peer_comparison_endpoint(self):
+        company = Company.objects.create(name='Test Corp', industry='Manufacturing', employees=100)
+        footprint = CarbonFootprint.objects.create(
+            company=company, reporting_period='2024', scope1_emissions=Decimal('1200')
+        )
+        user = User.objects.create_user(username='user', email='user@example.com', password='testpass123')
+        user.company = company
+        user.save()
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = client.get(reverse('benchmarking-compare', args=[footprint.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['comparison']['performance'], 'needs_improvement')
+
+        response = client.get(reverse('benchmarking-opportunities', args=[footprint.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['opportunities'][0]['scope'], 'scope1')
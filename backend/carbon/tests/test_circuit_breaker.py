@@ -0,0 +1,124 @@
+"""
+Tests for the Gemini circuit breaker and call deadlines
+"""
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+
+from carbon.ai_services import GeminiAIService
+from carbon.circuit_breaker import CircuitBreaker, CircuitOpenError, CallDeadlineExceeded, gemini_breaker
+from companies.models import Company
+
+User = get_user_model()
+
+
+class CircuitBreakerTests(TestCase):
+    """Test suite for CircuitBreaker"""
+
+    def setUp(self):
+        cache.clear()
+        self.breaker = CircuitBreaker(
+            'test', failure_threshold=3, failure_window=60, recovery_timeout=30, call_timeout=0.2
+        )
+
+    def _fail(self):
+        def boom():
+            raise RuntimeError('upstream error')
+        return self.breaker.call(boom, fallback=lambda reason: 'fallback')
+
+    def test_successful_call_returns_result(self):
+        self.assertEqual(self.breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(self.breaker.get_state()['state'], 'closed')
+
+    def test_call_past_deadline_returns_fallback(self):
+        started = time.monotonic()
+        result = self.breaker.call(lambda: time.sleep(1) or 'late', fallback=lambda reason: 'fallback')
+
+        self.assertEqual(result, 'fallback')
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertEqual(self.breaker.get_state()['recent_failures'], 1)
+
+    def test_deadline_without_fallback_raises(self):
+        with self.assertRaises(CallDeadlineExceeded):
+            self.breaker.call(lambda: time.sleep(1))
+
+    def test_opens_after_threshold_and_skips_upstream(self):
+        for _ in range(3):
+            self.assertEqual(self._fail(), 'fallback')
+        self.assertEqual(self.breaker.get_state()['state'], 'open')
+
+        upstream = MagicMock(return_value='ok')
+        self.assertEqual(self.breaker.call(upstream, fallback=lambda reason: 'fallback'), 'fallback')
+        upstream.assert_not_called()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(upstream)
+
+    def test_half_open_allows_one_probe_then_closes_on_success(self):
+        for _ in range(3):
+            self._fail()
+
+        with patch('carbon.circuit_breaker.time.time', return_value=time.time() + 31):
+            self.assertEqual(self.breaker.get_state()['state'], 'half_open')
+            self.assertTrue(self.breaker.allow_request())
+            self.assertFalse(self.breaker.allow_request())  # only one probe
+            self.breaker.record_success()
+
+        self.assertEqual(self.breaker.get_state()['state'], 'closed')
+        self.assertEqual(self.breaker.call(lambda: 'ok'), 'ok')
+
+    def test_failed_probe_reopens(self):
+        for _ in range(3):
+            self._fail()
+
+        with patch('carbon.circuit_breaker.time.time', return_value=time.time() + 31):
+            self.assertEqual(self._fail(), 'fallback')
+            self.assertEqual(self.breaker.get_state()['state'], 'open')
+
+
+class GeminiCircuitBreakerTests(TestCase):
+    """Test that Gemini calls fall back under the breaker"""
+
+    def setUp(self):
+        cache.clear()
+        gemini_breaker.reset()
+        self.addCleanup(gemini_breaker.reset)
+
+    def test_slow_gemini_returns_mock_response(self):
+        service = GeminiAIService()
+        service.model = MagicMock()
+        service.model.generate_content.side_effect = lambda prompt, **kwargs: (
+            time.sleep(1) or SimpleNamespace(text='{"percentile_ranking": 10}')
+        )
+
+        with patch.object(gemini_breaker, 'call_timeout', 0.1):
+            result = service._call_gemini('benchmark this company')
+
+        self.assertEqual(result, service._get_mock_response('benchmark this company'))
+        self.assertEqual(
+            service.model.generate_content.call_args.kwargs['request_options'],
+            {'timeout': 0.1}
+        )
+
+    def test_open_breaker_is_reported_in_health_check(self):
+        for _ in range(gemini_breaker.failure_threshold):
+            gemini_breaker.record_failure()
+
+        company = Company.objects.create(name='Test Corp', industry='Manufacturing', employees=100)
+        user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        user.company = company
+        user.save()
+
+        from rest_framework_simplejwt.tokens import RefreshToken
+        response = Client().get(
+            reverse('ai-health'),
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['circuit_breakers']['gemini']['state'], 'open')
@@ -0,0 +1,94 @@
+"""
+Tests for batch footprint completeness scoring
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from carbon.activity_ledger import ingest_activities
+from carbon.completeness import ACTIVITY_BITS, get_completeness, score_footprints
+from carbon.guidance_service import GuidanceService
+from carbon.models import CarbonFootprint, CarbonFootprintData, FootprintCompleteness
+from companies.models import Company
+
+User = get_user_model()
+
+
+class CompletenessTests(TestCase):
+    """Test suite for completeness scores built from activity bitmasks"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Test Corp', industry='Technology', employees=50)
+        self.complete = self.footprint('2024-Q1', [
+            'natural_gas', 'diesel', 'gasoline', 'electricity', 'business_travel', 'employee_commuting',
+        ])
+        self.partial = self.footprint('2024-Q2', ['natural_gas', 'natural_gas', 'business_travel', 'unknown'])
+        self.empty = self.footprint('2024-Q3', [])
+
+    def footprint(self, period, activities):
+        footprint = CarbonFootprint.objects.create(company=self.company, reporting_period=period)
+        ingest_activities(self.company, [
+            {'activity_type': activity, 'scope': 3, 'co2e': 1} for activity in activities
+        ], footprint=footprint)
+        return footprint
+
+    def test_bitmask_scores(self):
+        self.assertEqual(len(ACTIVITY_BITS), 11)
+
+        with self.assertNumQueries(1):
+            scores = score_footprints(CarbonFootprint.objects.filter(company=self.company))
+
+        complete = scores[self.complete.id]
+        self.assertEqual((complete['scope1_score'], complete['scope2_score'], complete['scope3_score']),
+                         (0.6, 1.0, 0.4))
+        self.assertEqual(complete['overall_score'], 0.68)
+        self.assertEqual(complete['grade'], 'C')
+        self.assertTrue(complete['meets_minimum'])
+        self.assertEqual(complete['data_entries'], 6)
+
+        partial = scores[self.partial.id]
+        self.assertEqual(partial['scope1_score'], 0.2)
+        self.assertEqual(partial['missing_by_scope']['scope2'], ['electricity'])
+        self.assertFalse(partial['meets_minimum'])
+        self.assertEqual(partial['data_entries'], 4)
+
+        self.assertEqual(scores[self.empty.id]['overall_score'], 0)
+        self.assertEqual(scores[self.empty.id]['grade'], 'F')
+        self.assertEqual(scores[self.empty.id]['data_entries'], 0)
+
+    def test_scores_are_stored_and_invalidated(self):
+        footprints = [self.complete, self.partial, self.empty]
+        with self.assertNumQueries(3):
+            first = get_completeness(footprints)
+        self.assertEqual(FootprintCompleteness.objects.count(), 3)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_completeness(footprints), first)
+
+        CarbonFootprintData.objects.create(
+            company=self.company, footprint=self.partial, activity_type='electricity', scope=2,
+            co2e=1, period_start=self.partial.period_start
+        )
+        self.assertFalse(FootprintCompleteness.objects.filter(footprint=self.partial).exists())
+
+        score = GuidanceService(self.company).calculate_completeness_score(self.partial)
+        self.assertEqual(score['scope2_score'], 1.0)
+        self.assertEqual(FootprintCompleteness.objects.get(footprint=self.partial).data_entries, 5)
+
+    def test_company_completeness_endpoint(self):
+        user = User.objects.create_user(username='user', email='user@example.com', password='testpass123')
+        user.company = self.company
+        user.save()
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = client.get(reverse('guidance-completeness-all'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual([row['grade'] for row in response.json()['footprints']], ['C', 'F', 'F'])
+
+        response = client.get(reverse('guidance-completeness', args=[self.complete.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['grade'], 'C')
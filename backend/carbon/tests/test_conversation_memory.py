@@ -0,0 +1,182 @@
+"""
+Tests for server-side conversation memory
+"""
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from carbon.conversation_memory import ConversationMemory, estimate_tokens
+from carbon.models import ConversationSession, ConversationMessage
+from companies.models import Company
+
+User = get_user_model()
+
+
+class ConversationMemoryTests(TestCase):
+    """Test suite for ConversationMemory"""
+
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(
+            name='Test Corp',
+            industry='Manufacturing',
+            employees=100
+        )
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.session = ConversationSession.objects.create(
+            company=self.company,
+            created_by=self.user,
+            status='active'
+        )
+        self.start = timezone.now() - timedelta(hours=1)
+        self.count = 0
+
+    def _add(self, role, content, extracted_data=None):
+        self.count += 1
+        return ConversationMessage.objects.create(
+            session=self.session,
+            role=role,
+            content=content,
+            extracted_data=extracted_data,
+            created_at=self.start + timedelta(seconds=self.count)
+        )
+
+    def _add_turns(self, turns):
+        for index in range(turns):
+            self._add('user', f'We used {1000 + index} kWh in month {index} ' + 'x' * 200)
+            self._add('assistant', f'Recorded month {index} ' + 'y' * 200, {
+                'activity_type': 'electricity_consumption',
+                'scope': 2,
+                'quantity': 1000 + index,
+                'unit': 'kWh',
+                'calculated_emissions': 0.45,
+            })
+
+    def test_short_conversation_is_kept_verbatim(self):
+        self._add('user', 'We used 5000 kWh')
+        self._add('assistant', 'Recorded 5000 kWh')
+
+        context = ConversationMemory(self.session).get_context()
+
+        self.assertEqual(context['summary'], '')
+        self.assertEqual(
+            [message['role'] for message in context['messages']],
+            ['user', 'assistant']
+        )
+
+    def test_long_conversation_fits_budget_and_summarises_older_turns(self):
+        self._add_turns(30)
+        memory = ConversationMemory(self.session, token_budget=600)
+
+        context = memory.get_context()
+
+        history_tokens = sum(estimate_tokens(message['content']) for message in context['messages'])
+        self.assertLessEqual(history_tokens + estimate_tokens(context['summary']), 600)
+        self.assertLess(len(context['messages']), 60)
+        self.assertTrue(context['messages'][-1]['content'].startswith('Recorded month 29'))
+        self.assertIn('Earlier in this conversation', context['summary'])
+        self.assertIn('Recorded electricity consumption', context['summary'])
+
+        self.session.refresh_from_db()
+        state = self.session.session_context['memory']
+        self.assertEqual(state['summarized_messages'], 60 - len(context['messages']))
+
+    def test_summarised_messages_are_not_read_again(self):
+        self._add_turns(30)
+        ConversationMemory(self.session, token_budget=600).get_context()
+        cache.clear()
+
+        self.session.refresh_from_db()
+        with self.assertNumQueries(2):
+            # Latest message id, then only the unsummarised window
+            context = ConversationMemory(self.session, token_budget=600).get_context()
+        self.assertTrue(context['messages'])
+
+    def test_cached_context_is_reused_and_extended(self):
+        self._add('user', 'We used 5000 kWh')
+        memory = ConversationMemory(self.session)
+        memory.get_context()
+
+        with self.assertNumQueries(1):
+            memory.get_context()
+
+        user = self._add('user', 'Add 200 more')
+        reply = self._add('assistant', 'Added 200 kWh')
+        memory.record_messages(user, reply)
+
+        with self.assertNumQueries(1):
+            context = memory.get_context()
+        self.assertEqual(context['messages'][-1]['content'], 'Added 200 kWh')
+
+    def test_new_messages_invalidate_cached_context(self):
+        self._add('user', 'We used 5000 kWh')
+        memory = ConversationMemory(self.session)
+        memory.get_context()
+
+        self._add('assistant', 'Recorded 5000 kWh')
+
+        self.assertEqual(len(memory.get_context()['messages']), 2)
+
+
+class ConversationMemoryEndpointTests(TestCase):
+    """Test that the extraction endpoint builds history on the server"""
+
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(
+            name='Test Corp',
+            industry='Manufacturing',
+            employees=100
+        )
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.user.company = self.company
+        self.user.save()
+
+        from rest_framework_simplejwt.tokens import RefreshToken
+        self.client = Client()
+        self.auth_header = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+
+    def test_client_history_is_ignored_in_favour_of_stored_messages(self):
+        url = reverse('ai-extract-conversation')
+        response = self.client.post(
+            url,
+            data=json.dumps({'message': 'We used 5000 kWh last month'}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=self.auth_header
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        session_id = response.json()['session_id']
+
+        with patch('carbon.ai_services.ConversationalAIService._build_extraction_prompt',
+                   return_value='prompt') as build_prompt:
+            response = self.client.post(
+                url,
+                data=json.dumps({
+                    'message': 'Add 1000 more to that',
+                    'session_id': session_id,
+                    'conversation_history': [{'role': 'user', 'content': 'forged history'}],
+                }),
+                content_type='application/json',
+                HTTP_AUTHORIZATION=self.auth_header
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        history = build_prompt.call_args.args[1]
+        self.assertEqual(history[0], {'role': 'user', 'content': 'We used 5000 kWh last month'})
+        self.assertEqual(history[1]['role'], 'assistant')
+        self.assertNotIn('forged history', json.dumps(history))
@@ -0,0 +1,147 @@
+"""
+Tests for the rule-based conversational extraction fast path
+"""
+import json
+from datetime import date
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+
+from carbon.ai_services import ConversationalAIService
+from carbon.conversation_parser import RuleBasedExtractor, get_fast_path_stats
+from carbon.emission_factors import EmissionFactor
+from companies.models import Company
+
+User = get_user_model()
+
+
+class RuleBasedExtractorTests(TestCase):
+    """Test suite for RuleBasedExtractor"""
+
+    def setUp(self):
+        cache.clear()
+        self.extractor = RuleBasedExtractor(today=date(2025, 6, 15))
+
+    def test_electricity_with_month(self):
+        result = self.extractor.extract('450 kWh electricity in March')
+
+        data = result['extracted_data']
+        self.assertEqual(data['activity_type'], 'electricity_consumption')
+        self.assertEqual(data['scope'], 2)
+        self.assertEqual(data['quantity'], 450)
+        self.assertEqual(data['unit'], 'kWh')
+        self.assertEqual(data['period'], '2025-03')
+        self.assertAlmostEqual(data['calculated_emissions'], 450 * 0.453 / 1000, places=4)
+        self.assertEqual(result['suggested_actions'][0]['field'], 'scope2_emissions')
+        self.assertEqual(result['suggested_actions'][0]['value'], data['calculated_emissions'])
+
+    def test_litres_of_diesel_are_converted_to_gallon_factor(self):
+        data = self.extractor.extract('120 litres diesel')['extracted_data']
+
+        self.assertEqual(data['activity_type'], 'vehicle_fuel')
+        self.assertEqual(data['scope'], 1)
+        self.assertEqual(data['unit'], 'liters')
+        self.assertAlmostEqual(data['emission_factor'], 10.21 * 0.264172, places=4)
+        self.assertIsNone(data['period'])
+
+    def test_uses_emission_factor_table(self):
+        EmissionFactor.objects.create(
+            activity_type='electricity',
+            region_type='country',
+            region_code='US',
+            region_name='United States',
+            year=2025,
+            factor_value='0.400000',
+            unit='kg CO2e/kWh',
+            source='US EPA eGRID',
+        )
+
+        data = self.extractor.extract('We used 1,000 kWh of electricity last month')['extracted_data']
+
+        self.assertEqual(data['quantity'], 1000)
+        self.assertEqual(data['period'], '2025-05')
+        self.assertAlmostEqual(data['calculated_emissions'], 0.4)
+        self.assertIn('US EPA eGRID', data['emission_factor_source'])
+
+    def test_periods(self):
+        cases = {
+            '300 kWh electricity for 2024-11': '2024-11',
+            '300 kWh electricity in Q1 2025': '2025-Q1',
+            '300 kWh electricity in December': '2024-12',
+            '300 kWh electricity in May 2023': '2023-05',
+        }
+        for message, period in cases.items():
+            self.assertEqual(self.extractor.extract(message)['extracted_data']['period'], period, message)
+
+    def test_ambiguous_input_is_left_to_the_llm(self):
+        for message in [
+            'Add 200 more to that',
+            'Our $500 electricity bill',
+            'We used 5000 kWh',  # no activity
+            '300 kWh electricity and 40 litres diesel',  # two quantities
+            'Roughly 300 kWh of electricity',  # hedged and no period
+            'We drove 120 miles',  # scope depends on who owns the car
+            'Electricity went up this year',
+        ]:
+            self.assertIsNone(self.extractor.extract(message), message)
+
+
+class FastPathServiceTests(TestCase):
+    """Test that simple inputs skip the Gemini call"""
+
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(
+            name='Test Corp',
+            industry='Manufacturing',
+            employees=100
+        )
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.user.company = self.company
+        self.user.save()
+
+        from rest_framework_simplejwt.tokens import RefreshToken
+        self.client = Client()
+        self.auth_header = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+
+    def test_simple_input_does_not_call_gemini(self):
+        with patch('carbon.ai_services.GeminiAIService._call_gemini') as call_gemini:
+            result = ConversationalAIService().extract_from_conversation(
+                '450 kWh electricity in March', [], None, {'name': 'Test Corp'}
+            )
+        call_gemini.assert_not_called()
+        self.assertEqual(result['extracted_data']['extraction_method'], 'rules')
+
+    def test_hit_rate_is_reported_in_health_check(self):
+        service = ConversationalAIService()
+        with patch('carbon.ai_services.GeminiAIService._call_gemini', return_value={}):
+            service.extract_from_conversation('450 kWh electricity in March', [], None, {})
+            service.extract_from_conversation('120 litres diesel', [], None, {})
+            service.extract_from_conversation('Add 200 more to that', [], None, {})
+
+        self.assertEqual(get_fast_path_stats(), {'hits': 2, 'misses': 1, 'hit_rate': 0.6667})
+
+        response = self.client.get(reverse('ai-health'), HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['conversation_fast_path']['hits'], 2)
+
+    def test_endpoint_saves_fast_path_extraction(self):
+        response = self.client.post(
+            reverse('ai-extract-conversation'),
+            data=json.dumps({'message': '120 litres diesel in April 2025'}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=self.auth_header
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = response.json()
+        self.assertEqual(result['extracted_data']['scope'], 1)
+        self.assertEqual(result['session_summary']['data_entries'], 1)
@@ -0,0 +1,172 @@
+"""
+Tests for streaming conversational extraction over server-sent events
+"""
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from carbon.ai_services import ConversationalAIService
+from carbon.models import ConversationMessage
+from carbon.streaming import JSONStringFieldStreamer
+from companies.models import Company
+
+User = get_user_model()
+
+MODEL_OUTPUT = json.dumps({
+    'ai_response': 'Got it: 5,000 kWh of "grid" electricity.\nAnything else? \U0001F331',
+    'extracted_data': {
+        'activity_type': 'electricity_consumption',
+        'scope': 2,
+        'quantity': 5000,
+        'unit': 'kWh',
+        'calculated_emissions': 2.265,
+        'confidence': 0.9,
+    },
+    'validation': {'status': 'ok', 'anomalies': [], 'warnings': []},
+    'clarifying_questions': [],
+    'suggested_actions': [
+        {'type': 'update_footprint', 'field': 'scope2_emissions', 'operation': 'add', 'value': 2.265}
+    ],
+})
+
+
+def _chunks(text, size=7):
+    return [SimpleNamespace(text=text[index:index + size]) for index in range(0, len(text), size)]
+
+
+def _parse_events(body):
+    events = []
+    for block in body.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+class JSONStringFieldStreamerTests(TestCase):
+    """Test suite for JSONStringFieldStreamer"""
+
+    def test_decodes_field_across_arbitrary_chunk_boundaries(self):
+        expected = json.loads(MODEL_OUTPUT)['ai_response']
+        for size in (1, 2, 3, 5, 11):
+            streamer = JSONStringFieldStreamer('ai_response')
+            text = ''.join(streamer.feed(chunk.text) for chunk in _chunks(MODEL_OUTPUT, size))
+            self.assertEqual(text, expected, f'chunk size {size}')
+            self.assertTrue(streamer.complete)
+
+    def test_ignores_text_before_field_and_after_close(self):
+        streamer = JSONStringFieldStreamer('ai_response')
+        self.assertEqual(streamer.feed('```json\n{"other": "x", '), '')
+        self.assertEqual(streamer.feed('"ai_response": "Hel'), 'Hel')
+        self.assertEqual(streamer.feed('lo", "more": "ignored"}'), 'lo')
+        self.assertEqual(streamer.value, 'Hello')
+
+
+@override_settings(AI_CONVERSATION_FAST_PATH_ENABLED=False)
+class ConversationStreamingEndpointTests(TestCase):
+    """Test suite for the SSE conversational extraction endpoint"""
+
+    def setUp(self):
+        self.company = Company.objects.create(
+            name='Test Corp',
+            industry='Manufacturing',
+            employees=100
+        )
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.user.company = self.company
+        self.user.save()
+
+        from rest_framework_simplejwt.tokens import RefreshToken
+        self.client = Client()
+        self.auth_header = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+
+    def _fake_model(self):
+        model = MagicMock()
+        model.generate_content.side_effect = lambda prompt, stream=False, **kwargs: iter(_chunks(MODEL_OUTPUT))
+        return model
+
+    def test_stream_extraction_yields_tokens_then_result(self):
+        service = ConversationalAIService()
+        service.ai_service.model = self._fake_model()
+
+        events = list(service.stream_extraction('We used 5000 kWh', [], None, {'name': 'Test Corp'}))
+
+        self.assertEqual(events[-1][0], 'result')
+        tokens = [payload for event, payload in events if event == 'token']
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual(''.join(tokens), json.loads(MODEL_OUTPUT)['ai_response'])
+        self.assertEqual(events[-1][1]['extracted_data']['quantity'], 5000)
+        self.assertTrue(service.ai_service.model.generate_content.call_args.kwargs['stream'])
+
+    def test_endpoint_streams_events_and_persists_message(self):
+        with patch('carbon.ai_services.GeminiAIService.__init__', lambda svc: setattr(svc, 'model', self._fake_model())):
+            response = self.client.post(
+                reverse('ai-extract-conversation-stream'),
+                data=json.dumps({'message': 'We used 5000 kWh of electricity last month'}),
+                content_type='application/json',
+                HTTP_AUTHORIZATION=self.auth_header
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            body = b''.join(response.streaming_content).decode()
+
+        events = _parse_events(body)
+        names = [name for name, _ in events]
+        self.assertEqual(names[0], 'session')
+        self.assertEqual(names[-1], 'result')
+        self.assertIn('token', names)
+
+        result = events[-1][1]
+        self.assertTrue(result['success'])
+        self.assertEqual(result['session_id'], events[0][1]['session_id'])
+        self.assertEqual(result['suggested_actions'][0]['field'], 'scope2_emissions')
+
+        assistant = ConversationMessage.objects.get(id=result['message_id'])
+        self.assertEqual(assistant.role, 'assistant')
+        self.assertEqual(assistant.content, json.loads(MODEL_OUTPUT)['ai_response'])
+        self.assertEqual(assistant.extracted_data['unit'], 'kWh')
+
+    def test_event_source_accept_header(self):
+        with patch('carbon.ai_services.GeminiAIService.__init__', lambda svc: setattr(svc, 'model', self._fake_model())):
+            response = self.client.post(
+                reverse('ai-extract-conversation-stream'),
+                data=json.dumps({'message': 'We used 5000 kWh of electricity last month'}),
+                content_type='application/json',
+                HTTP_ACCEPT='text/event-stream',
+                HTTP_AUTHORIZATION=self.auth_header
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            events = _parse_events(b''.join(response.streaming_content).decode())
+
+        self.assertEqual(events[0][0], 'session')
+        self.assertEqual(events[-1][0], 'result')
+        self.assertEqual(''.join(payload['text'] for name, payload in events if name == 'token'),
+                         json.loads(MODEL_OUTPUT)['ai_response'])
+
+        response = self.client.post(
+            reverse('ai-extract-conversation-stream'),
+            data=json.dumps({'message': ''}),
+            content_type='application/json',
+            HTTP_ACCEPT='text/event-stream',
+            HTTP_AUTHORIZATION=self.auth_header
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(_parse_events(response.content.decode())[0][0], 'error')
+
+    def test_endpoint_requires_message(self):
+        response = self.client.post(
+            reverse('ai-extract-conversation-stream'),
+            data=json.dumps({'message': ''}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=self.auth_header
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -82,7 +82,7 @@ class ConversationalAIEndpointTests(TestCase):
         if result['extracted_data']:
             extracted = result['extracted_data']
             self.assertEqual(extracted['scope'], 2)  # Electricity is Scope 2
-            self.assertIn('kWh', extracted.get('unit', '').lower() or 'kwh')
+            self.assertEqual(extracted.get('unit', '').lower(), 'kwh')
             self.assertGreater(extracted['confidence'], 0.5)
     
     def test_extract_with_conversation_history(self):
@@ -449,4 +449,62 @@ class ConversationalAIIntegrationTests(TestCase):
         self.assertGreaterEqual(session_data['summary']['total_messages'], 2)
 
 
+
+class ConversationSessionStatisticsTests(TestCase):
+    """Test suite for running conversation session statistics"""
+    
+    def setUp(self):
+        self.company = Company.objects.create(
+            name='Test Corp',
+            industry='Manufacturing',
+            employees=100
+        )
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.session = ConversationSession.objects.create(
+            company=self.company,
+            created_by=self.user,
+            status='active'
+        )
+    
+    def test_record_extraction_keeps_running_aggregates(self):
+        for confidence, emissions in [(90, 2.5), (60, 1.25), (75, None)]:
+            self.session.record_extraction(confidence=Decimal(confidence), emissions=emissions)
+        
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.data_entries_count, 3)
+        self.assertEqual(self.session.total_emissions_added, Decimal('3.75'))
+        self.assertEqual(self.session.average_confidence, Decimal('75.00'))
+    
+    def test_entries_without_confidence_do_not_dilute_average(self):
+        self.session.record_extraction(confidence=None, emissions=1)
+        self.session.record_extraction(confidence=Decimal('80'), emissions=1)
+        self.session.record_extraction(confidence=None, emissions=None)
+        self.session.record_extraction(confidence=Decimal('60'), emissions=None)
+        
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.data_entries_count, 4)
+        self.assertEqual(self.session.confidence_entries_count, 2)
+        self.assertEqual(self.session.average_confidence, Decimal('70.00'))
+    
+    def test_record_extraction_is_a_single_update(self):
+        with self.assertNumQueries(2):
+            # The UPDATE, then refreshing the in-memory instance
+            self.session.record_extraction(confidence=Decimal('80'), emissions=1.5)
+    
+    def test_stale_instances_do_not_overwrite_each_other(self):
+        other = ConversationSession.objects.get(pk=self.session.pk)
+        
+        self.session.record_extraction(confidence=Decimal('100'), emissions=1)
+        other.record_extraction(confidence=Decimal('50'), emissions=2)
+        
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.data_entries_count, 2)
+        self.assertEqual(self.session.total_emissions_added, Decimal('3.00'))
+        self.assertEqual(self.session.average_confidence, Decimal('75.00'))
+
+
 # Run tests with: python manage.py test carbon.tests.test_conversational_ai
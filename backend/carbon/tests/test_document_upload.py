@@ -0,0 +1,376 @@
+"""
+Tests for document upload: deduplication, batch upload and extraction persistence
+"""
+import io
+import shutil
+import tempfile
+import zipfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from carbon.models import UploadedDocument, DocumentExtractionField, DocumentUploadBatch
+from carbon.document_processing import persist_extraction
+from carbon.tasks import extract_uploaded_document, acquire_extraction_slot, release_extraction_slot
+from companies.models import Company
+
+User = get_user_model()
+
+MOCK_EXTRACTION = {
+    'success': True,
+    'extracted_data': {
+        'utility_type': 'electricity',
+        'kwh_consumed': 450.5,
+        'billing_period_start': '2024-12-01',
+        'supplier_name': 'Mock Electric Co',
+    },
+    'confidence_score': 88.0,
+    'processing_time_ms': 100,
+    'fields': []
+}
+
+
+class DocumentUploadDeduplicationTests(TestCase):
+    """Identical uploads share one stored file and one vision extraction"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        self.company = Company.objects.create(
+            name='Test Corp',
+            industry='Manufacturing',
+            employees=100
+        )
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.user.company = self.company
+        self.user.save()
+
+        from rest_framework_simplejwt.tokens import RefreshToken
+        self.client = Client()
+        self.auth_header = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+        self.url = reverse('upload-document')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _upload(self, content=b'%PDF-1.4 identical bill', name='bill.pdf', document_type='utility_bill'):
+        return self.client.post(
+            self.url,
+            {
+                'file': SimpleUploadedFile(name, content, content_type='application/pdf'),
+                'document_type': document_type,
+            },
+            HTTP_AUTHORIZATION=self.auth_header
+        )
+
+    @patch('carbon.ai_services.GeminiVisionService.extract_from_utility_bill', return_value=MOCK_EXTRACTION)
+    def test_duplicate_upload_reuses_extraction_and_blob(self, mock_extract):
+        first = self._upload(name='bill-from-chat.pdf')
+        second = self._upload(name='bill-from-upload-page.pdf')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(mock_extract.call_count, 1)
+        self.assertFalse(first.json()['reused_extraction'])
+        self.assertTrue(second.json()['reused_extraction'])
+        self.assertEqual(second.json()['duplicate_of'], first.json()['document_id'])
+
+        original = UploadedDocument.objects.get(id=first.json()['document_id'])
+        duplicate = UploadedDocument.objects.get(id=second.json()['document_id'])
+        self.assertEqual(original.content_hash, duplicate.content_hash)
+        self.assertEqual(len(original.content_hash), 64)
+        self.assertEqual(duplicate.file.name, original.file.name)
+        self.assertEqual(duplicate.file_name, 'bill-from-upload-page.pdf')
+        self.assertEqual(duplicate.extraction_status, 'completed')
+        self.assertEqual(duplicate.extracted_data, original.extracted_data)
+        self.assertEqual(
+            DocumentExtractionField.objects.filter(document=duplicate).count(),
+            DocumentExtractionField.objects.filter(document=original).count()
+        )
+
+    @patch('carbon.ai_services.GeminiVisionService.extract_from_utility_bill', return_value=MOCK_EXTRACTION)
+    def test_different_content_is_extracted_separately(self, mock_extract):
+        self._upload(content=b'%PDF-1.4 january bill')
+        response = self._upload(content=b'%PDF-1.4 february bill')
+
+        self.assertEqual(mock_extract.call_count, 2)
+        self.assertIsNone(response.json()['duplicate_of'])
+        self.assertFalse(response.json()['reused_extraction'])
+
+    @patch('carbon.ai_services.GeminiVisionService.extract_from_utility_bill', return_value=MOCK_EXTRACTION)
+    def test_duplicates_are_scoped_per_company(self, mock_extract):
+        self._upload()
+
+        other_company = Company.objects.create(name='Other Corp', industry='Retail', employees=10)
+        self.user.company = other_company
+        self.user.save()
+        response = self._upload()
+
+        self.assertEqual(mock_extract.call_count, 2)
+        self.assertIsNone(response.json()['duplicate_of'])
+
+
+class DocumentBatchUploadTests(TestCase):
+    """Batch upload stores many files in one request and queues extraction"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        self.company = Company.objects.create(
+            name='Test Corp',
+            industry='Manufacturing',
+            employees=100
+        )
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.user.company = self.company
+        self.user.save()
+
+        from rest_framework_simplejwt.tokens import RefreshToken
+        self.client = Client()
+        self.auth_header = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+        self.url = reverse('upload-document-batch')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _zip(self, members):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for name, content in members.items():
+                archive.writestr(name, content)
+        return SimpleUploadedFile('bills.zip', buffer.getvalue(), content_type='application/zip')
+
+    def _post(self, files, document_type='utility_bill'):
+        return self.client.post(
+            self.url,
+            {'files': files, 'document_type': document_type},
+            HTTP_AUTHORIZATION=self.auth_header
+        )
+
+    @patch('carbon.tasks.extract_uploaded_document.delay')
+    def test_batch_upload_with_files_and_zip(self, mock_delay):
+        response = self._post([
+            SimpleUploadedFile('jan.pdf', b'%PDF-1.4 january', content_type='application/pdf'),
+            SimpleUploadedFile('notes.txt', b'not a bill', content_type='text/plain'),
+            self._zip({
+                'q1/feb.pdf': b'%PDF-1.4 february',
+                'q1/mar.png': b'png march',
+                'readme.txt': b'ignored',
+            }),
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        result = response.json()
+        self.assertEqual(result['progress']['total'], 3)
+        self.assertEqual(result['progress']['pending'], 3)
+        self.assertEqual(
+            sorted(document['file_name'] for document in result['documents']),
+            ['feb.pdf', 'jan.pdf', 'mar.png']
+        )
+        self.assertEqual(
+            sorted(item['file_name'] for item in result['rejected']),
+            ['notes.txt', 'readme.txt']
+        )
+        self.assertEqual(mock_delay.call_count, 3)
+
+        batch = DocumentUploadBatch.objects.get(id=result['batch_id'])
+        documents = UploadedDocument.objects.filter(batch=batch)
+        self.assertEqual(documents.count(), 3)
+        for document in documents:
+            self.assertIsNotNone(document.expires_at)
+            self.assertEqual(len(document.content_hash), 64)
+            self.assertTrue(document.file.storage.exists(document.file.name))
+
+    @patch('carbon.tasks.extract_uploaded_document.delay')
+    def test_identical_files_in_batch_share_one_blob(self, mock_delay):
+        response = self._post([
+            SimpleUploadedFile('bill.pdf', b'%PDF-1.4 same', content_type='application/pdf'),
+            SimpleUploadedFile('bill-copy.pdf', b'%PDF-1.4 same', content_type='application/pdf'),
+        ])
+
+        first, second = UploadedDocument.objects.filter(
+            batch_id=response.json()['batch_id']
+        ).order_by('file_name')
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(first.duplicate_of, second)
+
+    @patch('carbon.ai_services.GeminiVisionService.extract_from_utility_bill', return_value=MOCK_EXTRACTION)
+    @patch('carbon.tasks.extract_uploaded_document.delay')
+    def test_task_extracts_and_progress_completes(self, mock_delay, mock_extract):
+        response = self._post([
+            SimpleUploadedFile('jan.pdf', b'%PDF-1.4 january', content_type='application/pdf'),
+            SimpleUploadedFile('feb.pdf', b'%PDF-1.4 february', content_type='application/pdf'),
+        ])
+        batch_id = response.json()['batch_id']
+
+        for call in mock_delay.call_args_list:
+            extract_uploaded_document(*call.args)
+
+        detail = self.client.get(
+            reverse('document-batch-detail', args=[batch_id]),
+            HTTP_AUTHORIZATION=self.auth_header
+        )
+        self.assertEqual(detail.status_code, status.HTTP_200_OK)
+        progress = detail.json()['progress']
+        self.assertEqual(progress['completed'], 2)
+        self.assertEqual(progress['percent_complete'], 100.0)
+        self.assertTrue(progress['is_complete'])
+        self.assertIsNotNone(detail.json()['completed_at'])
+        self.assertEqual(mock_extract.call_count, 2)
+
+    @patch('carbon.ai_services.GeminiVisionService.extract_from_utility_bill', return_value=MOCK_EXTRACTION)
+    @patch('carbon.tasks.extract_uploaded_document.delay')
+    def test_identical_files_in_batch_are_extracted_once(self, mock_delay, mock_extract):
+        response = self._post([
+            SimpleUploadedFile('bill.pdf', b'%PDF-1.4 same', content_type='application/pdf'),
+            SimpleUploadedFile('bill-copy.pdf', b'%PDF-1.4 same', content_type='application/pdf'),
+            SimpleUploadedFile('other.pdf', b'%PDF-1.4 other', content_type='application/pdf'),
+        ])
+        self.assertEqual(mock_delay.call_count, 2)
+
+        for call in mock_delay.call_args_list:
+            extract_uploaded_document(*call.args)
+
+        self.assertEqual(mock_extract.call_count, 2)
+        documents = UploadedDocument.objects.filter(batch_id=response.json()['batch_id'])
+        self.assertEqual({document.extraction_status for document in documents}, {'completed'})
+        copy = documents.get(file_name='bill-copy.pdf')
+        self.assertEqual(copy.extracted_data['kwh_consumed'], 450.5)
+        self.assertIsNotNone(DocumentUploadBatch.objects.get(id=response.json()['batch_id']).completed_at)
+
+    @override_settings(AI_DOCUMENT_EXTRACTION_CONCURRENCY=0)
+    @patch('carbon.tasks.extract_uploaded_document.delay')
+    def test_document_fails_when_slot_retries_run_out(self, mock_delay):
+        response = self._post([
+            SimpleUploadedFile('bill.pdf', b'%PDF-1.4 same', content_type='application/pdf'),
+            SimpleUploadedFile('bill-copy.pdf', b'%PDF-1.4 same', content_type='application/pdf'),
+        ])
+        document_id = mock_delay.call_args.args[0]
+
+        extract_uploaded_document.apply(args=[document_id], retries=extract_uploaded_document.max_retries)
+
+        documents = UploadedDocument.objects.filter(batch_id=response.json()['batch_id'])
+        self.assertEqual({document.extraction_status for document in documents}, {'failed'})
+        self.assertIn('extraction slot', documents.get(id=document_id).extraction_error)
+        self.assertIsNotNone(DocumentUploadBatch.objects.get(id=response.json()['batch_id']).completed_at)
+
+    @override_settings(AI_DOCUMENT_EXTRACTION_CONCURRENCY=1)
+    def test_extraction_slots_are_capped_per_company(self):
+        self.assertTrue(acquire_extraction_slot(self.company.id))
+        self.assertFalse(acquire_extraction_slot(self.company.id))
+        release_extraction_slot(self.company.id)
+        self.assertTrue(acquire_extraction_slot(self.company.id))
+        release_extraction_slot(self.company.id)
+
+
+class ExtractionPersistenceTests(TestCase):
+    """Extraction fields are written in bulk with a fixed number of queries"""
+
+    def setUp(self):
+        self.company = Company.objects.create(
+            name='Test Corp',
+            industry='Manufacturing',
+            employees=100
+        )
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.user.company = self.company
+        self.user.save()
+        self.document = UploadedDocument.objects.create(
+            company=self.company,
+            uploaded_by=self.user,
+            file='emissions_documents/2024/12/bill.pdf',
+            file_name='bill.pdf',
+            file_size=1024,
+            mime_type='application/pdf',
+            document_type='utility_bill',
+            extraction_status='processing'
+        )
+
+        from rest_framework_simplejwt.tokens import RefreshToken
+        self.client = Client()
+        self.auth_header = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+
+    def test_persist_extraction_costs_two_queries(self):
+        extracted = {f'field_{index}': index * 1.5 for index in range(25)}
+        extracted['statement_date'] = '2024-12-01'
+        extracted['missing'] = None
+        result = {
+            'success': True,
+            'extracted_data': extracted,
+            'confidence_score': 90.0,
+            'processing_time_ms': 120,
+            'fields': [{'field_name': 'field_3', 'confidence': 75.0, 'page_number': 2}]
+        }
+
+        with self.assertNumQueries(2):
+            persist_extraction(self.document, result)
+
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.extraction_status, 'completed')
+        fields = {field.field_name: field for field in self.document.extracted_fields.all()}
+        self.assertEqual(len(fields), 26)
+        self.assertEqual(fields['statement_date'].field_type, 'date')
+        self.assertEqual(fields['field_3'].page_number, 2)
+        self.assertEqual(float(fields['field_3'].confidence), 75.0)
+
+    def test_failed_extraction_costs_one_query(self):
+        with self.assertNumQueries(1):
+            persist_extraction(self.document, {'success': False, 'error': 'Unreadable'})
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.extraction_status, 'failed')
+
+    def _validate(self, corrections):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('validate-document', args=[self.document.id]),
+                data={'approve': True, 'corrections': corrections},
+                content_type='application/json',
+                HTTP_AUTHORIZATION=self.auth_header
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_validate_document_applies_corrections_in_bulk(self):
+        persist_extraction(self.document, {
+            'success': True,
+            'extracted_data': {f'field_{index}': index for index in range(6)},
+            'confidence_score': 90.0,
+        })
+
+        one = self._validate({'field_0': '100'})
+        many = self._validate({
+            'field_1': '101', 'field_2': '102', 'field_3': '103',
+            'extra_a': 'a', 'extra_b': 'b'
+        })
+        self.assertLessEqual(many, one + 1)
+
+        fields = {field.field_name: field for field in self.document.extracted_fields.all()}
+        self.assertEqual(fields['field_2'].field_value, '102')
+        self.assertEqual(fields['field_2'].original_value, '2')
+        self.assertTrue(fields['field_2'].user_corrected)
+        self.assertTrue(fields['extra_b'].user_corrected)
+        self.assertIsNone(fields['extra_b'].original_value)
@@ -0,0 +1,190 @@
+"""
+Tests for per-industry emission distributions
+"""
+from contextlib import contextmanager
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from carbon.advanced_utils import calculate_industry_benchmarks
+from carbon.emission_distributions import (
+    MIN_BAND_PEERS, SKETCH_POINTS, peer_distribution, rebuild_distributions, size_band,
+)
+from carbon.models import CarbonFootprint, IndustryEmissionDistribution
+from carbon.tasks import refresh_company_forecasts, sync_company_distributions
+from companies.models import Company
+
+
+class DistributionSyncMixin:
+    """Runs the distribution syncs that footprint writes queue"""
+
+    def setUp(self):
+        cache.clear()
+
+    @contextmanager
+    def synced(self, run=True):
+        run_now = (lambda args, countdown: sync_company_distributions(*args)) if run else None
+        with patch.object(sync_company_distributions, 'apply_async', side_effect=run_now) as apply_async, \
+                patch.object(refresh_company_forecasts, 'apply_async'):
+            with self.captureOnCommitCallbacks(execute=True):
+                yield apply_async
+
+    def verified_footprint(self, company, period, total, status='verified'):
+        with self.synced():
+            return CarbonFootprint.objects.create(
+                company=company, reporting_period=period, status=status,
+                scope1_emissions=Decimal(total) / 2, scope2_emissions=Decimal(total) / 2,
+            )
+
+
+class EmissionDistributionTests(DistributionSyncMixin, TestCase):
+    """Test suite for keeping IndustryEmissionDistribution current"""
+
+    def setUp(self):
+        super().setUp()
+        self.small = Company.objects.create(name='Small Co', industry='Retail', employees=20)
+        self.large = Company.objects.create(name='Large Co', industry='Retail', employees=400)
+
+    def distribution(self, band='', year=2024):
+        return IndustryEmissionDistribution.objects.get(industry='Retail', size_band=band, year=year)
+
+    def test_size_band(self):
+        self.assertEqual([size_band(count) for count in (None, 5, 10, 249, 250)],
+                         ['', 'micro', 'small', 'medium', 'large'])
+
+    def test_footprint_writes_update_sorted_totals(self):
+        self.verified_footprint(self.small, '2024-Q1', 300)
+        quarter = self.verified_footprint(self.small, '2024-Q2', 100)
+        self.verified_footprint(self.large, '2024', 250)
+        self.verified_footprint(self.large, '2025', 50, status='draft')
+
+        industry = self.distribution()
+        self.assertEqual((industry.member_count, industry.quantiles), (2, [250.0, 400.0]))
+        self.assertEqual(industry.sum_scope1, 325.0)
+        self.assertEqual(self.distribution('small').quantiles, [400.0])
+        self.assertFalse(IndustryEmissionDistribution.objects.filter(year=2025).exists())
+
+        quarter.status = 'draft'
+        with self.synced():
+            quarter.save()
+        self.assertEqual(self.distribution().quantiles, [250.0, 300.0])
+
+        quarter.reporting_period = '2023-Q4'
+        quarter.status = 'verified'
+        with self.synced():
+            quarter.save()
+        self.assertEqual(self.distribution().quantiles, [250.0, 300.0])
+        self.assertEqual(self.distribution(year=2023).quantiles, [100.0])
+
+        with self.synced():
+            quarter.delete()
+        self.assertEqual((self.distribution(year=2023).member_count, self.distribution(year=2023).quantiles), (0, []))
+
+    def test_only_verified_changes_queue_one_sync(self):
+        with self.synced() as apply_async:
+            draft = CarbonFootprint.objects.create(company=self.small, reporting_period='2024', status='draft')
+            draft.scope1_emissions = Decimal('10')
+            draft.save()
+        apply_async.assert_not_called()
+
+        with self.synced(run=False) as apply_async:
+            draft.status = 'verified'
+            draft.save()
+            CarbonFootprint.objects.create(company=self.small, reporting_period='2023', status='verified')
+        apply_async.assert_called_once()
+
+        # Saving a verified footprint without touching its emissions queues nothing
+        cache.clear()
+        footprint = CarbonFootprint.objects.get(pk=draft.pk)
+        with self.synced() as apply_async:
+            footprint.verified_at = footprint.created_at
+            footprint.save()
+        apply_async.assert_not_called()
+
+    def test_rebuild_matches_incremental_rows(self):
+        self.verified_footprint(self.small, '2024-03', 120)
+        self.verified_footprint(self.small, '2024-04', 80)
+        self.verified_footprint(self.large, '2024-H1', 500)
+        incremental = {
+            (row.size_band, row.year): (row.members, row.member_count, row.quantiles, row.sum_total)
+            for row in IndustryEmissionDistribution.objects.all()
+        }
+
+        IndustryEmissionDistribution.objects.all().delete()
+        self.assertEqual(rebuild_distributions(), 3)
+
+        rebuilt = {
+            (row.size_band, row.year): (row.members, row.member_count, row.quantiles, row.sum_total)
+            for row in IndustryEmissionDistribution.objects.all()
+        }
+        self.assertEqual(rebuilt, incremental)
+
+    def test_large_industries_keep_a_fixed_size_sketch(self):
+        for index in range(200):
+            company = Company.objects.create(name=f'Shop {index}', industry='Retail', employees=5)
+            CarbonFootprint.objects.create(
+                company=company, reporting_period='2024', status='verified', scope1_emissions=index + 1
+            )
+        rebuild_distributions()
+
+        industry = self.distribution()
+        self.assertEqual(industry.member_count, 200)
+        self.assertEqual(len(industry.quantiles), SKETCH_POINTS)
+        self.assertEqual((industry.quantiles[0], industry.quantiles[50], industry.quantiles[-1]), (1.0, 100.5, 200.0))
+
+        # 49 shops emit less than 50, interpolated from the quantiles
+        result = peer_distribution(self.small, 2024, [50.0, 50.0, 0.0, 0.0])
+        self.assertEqual(result['peer_count'], 200)
+        self.assertAlmostEqual(result['percent_below'], 24.5)
+
+
+class IndustryBenchmarksTests(DistributionSyncMixin, TestCase):
+    """Test suite for calculate_industry_benchmarks"""
+
+    def setUp(self):
+        super().setUp()
+        self.company = Company.objects.create(name='Me', industry='Technology', employees=100)
+        for index, total in enumerate([100, 200, 300, 400]):
+            peer = Company.objects.create(name=f'Peer {index}', industry='Technology', employees=30)
+            self.verified_footprint(peer, '2024', total)
+        self.verified_footprint(Company.objects.create(name='Other', industry='Retail', employees=100), '2024', 1)
+
+    def test_ranks_against_peers_with_lookup(self):
+        self.verified_footprint(self.company, '2024-Q1', 125)
+        self.verified_footprint(self.company, '2024-Q2', 125)
+
+        with self.assertNumQueries(2):
+            result = calculate_industry_benchmarks(self.company)
+
+        # Two of four peers emit less than 250, the company is left out of its own averages
+        self.assertEqual(result['year'], 2024)
+        self.assertEqual(result['size_band'], '')
+        self.assertEqual(result['industry_size'], 4)
+        self.assertEqual(result['company_performance']['total_emissions'], 250.0)
+        self.assertEqual(result['company_performance']['percentile_ranking'], 50.0)
+        self.assertEqual(result['industry_averages']['total_emissions'], 250.0)
+        self.assertEqual(result['industry_averages']['scope1_emissions'], 125.0)
+        self.assertEqual(result['comparison']['performance_category'], 'above_average')
+
+    def test_uses_size_band_with_enough_peers(self):
+        for index in range(MIN_BAND_PEERS):
+            peer = Company.objects.create(name=f'Mid {index}', industry='Technology', employees=120)
+            self.verified_footprint(peer, '2024', 1000 + index)
+        self.verified_footprint(self.company, '2024', 50)
+
+        result = calculate_industry_benchmarks(self.company)
+
+        self.assertEqual(result['size_band'], 'medium')
+        self.assertEqual(result['industry_size'], MIN_BAND_PEERS)
+        self.assertEqual(result['company_performance']['percentile_ranking'], 100.0)
+        self.assertEqual(result['comparison']['performance_category'], 'top_performer')
+
+    def test_errors(self):
+        self.assertEqual(calculate_industry_benchmarks(self.company),
+                         {'error': 'No verified footprint found for company'})
+
+        self.verified_footprint(self.company, '2023', 50)
+        self.assertEqual(calculate_industry_benchmarks(self.company),
+                         {'error': 'No industry peers found for benchmarking'})
@@ -0,0 +1,167 @@
+"""
+Tests for precomputed forecast snapshots
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from carbon.forecast_snapshots import build_company_snapshots, next_target_period, save_snapshots
+from carbon.models import CarbonFootprint, CarbonOffset, ForecastSnapshot, OffsetPurchase
+from carbon.periods import add_months
+from carbon.prediction_service import PredictionService
+from carbon.tasks import refresh_company_forecasts, refresh_forecast_snapshots
+from companies.models import Company
+
+User = get_user_model()
+
+# Next value, seasonal and trend per activity, plus total trend and trajectory
+SNAPSHOTS_PER_COMPANY = 3 * len(PredictionService.ACTIVITY_SCOPES) + 2
+
+
+class ForecastSnapshotTestMixin:
+    """Companies with a few months of footprints"""
+
+    def setUp(self):
+        cache.clear()
+        self.companies = [
+            Company.objects.create(name=f'Corp {index}', industry='Manufacturing', employees=100)
+            for index in range(3)
+        ]
+        this_month = timezone.now().date().replace(day=1)
+        for company in self.companies:
+            for offset in range(1, 7):
+                self.add_footprint(company, add_months(this_month, -offset), 100 + offset)
+        ForecastSnapshot.objects.all().delete()
+
+    def add_footprint(self, company, period, scope2):
+        return CarbonFootprint.objects.create(
+            company=company, reporting_period=period.strftime('%Y-%m'),
+            scope1_emissions=Decimal('20'), scope2_emissions=Decimal(scope2), scope3_emissions=Decimal('5')
+        )
+
+
+class RefreshForecastSnapshotsTests(ForecastSnapshotTestMixin, TestCase):
+    """Test suite for the snapshot refresh tasks"""
+
+    def test_refresh_upserts_in_chunks(self):
+        written = refresh_forecast_snapshots(chunk_size=2)
+
+        self.assertEqual(written, Company.objects.count() * SNAPSHOTS_PER_COMPANY)
+        for company in self.companies:
+            self.assertEqual(ForecastSnapshot.objects.filter(company=company).count(), SNAPSHOTS_PER_COMPANY)
+        snapshot = ForecastSnapshot.objects.get(
+            company=self.companies[0], kind='next_value', activity_type='electricity'
+        )
+        self.assertEqual(snapshot.target_period, next_target_period())
+        self.assertTrue(snapshot.payload['success'])
+
+        first_run = snapshot.computed_at
+        refresh_forecast_snapshots()
+        snapshot.refresh_from_db()
+        self.assertEqual(ForecastSnapshot.objects.count(), written)
+        self.assertGreater(snapshot.computed_at, first_run)
+
+    def test_footprint_write_drops_snapshots_and_queues_one_refresh(self):
+        company = self.companies[0]
+        refresh_company_forecasts(str(company.id))
+        self.assertEqual(ForecastSnapshot.objects.filter(company=company).count(), SNAPSHOTS_PER_COMPANY)
+
+        with patch.object(refresh_company_forecasts, 'apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                footprint = self.add_footprint(company, timezone.now().date(), 150)
+                footprint.scope1_emissions = Decimal('25')
+                footprint.save()
+
+        self.assertFalse(ForecastSnapshot.objects.filter(company=company).exists())
+        apply_async.assert_called_once()
+        self.assertEqual(apply_async.call_args.kwargs['args'], [str(company.id)])
+
+    def test_offset_purchase_drops_snapshots(self):
+        company = self.companies[0]
+        refresh_company_forecasts(str(company.id))
+        offset = CarbonOffset.objects.create(
+            name='Forest', type='forestry', price_per_tonne=Decimal('12'), co2_offset_per_unit=Decimal('1'),
+            description='Reforestation', available_quantity=100, category='forestry', verification_standard='VCS'
+        )
+
+        with patch.object(refresh_company_forecasts, 'apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                purchase = OffsetPurchase.objects.create(company=company, offset=offset, quantity=5)
+        self.assertFalse(ForecastSnapshot.objects.filter(company=company).exists())
+        apply_async.assert_called_once()
+
+        refresh_company_forecasts(str(company.id))
+        purchase.delete()
+        self.assertFalse(ForecastSnapshot.objects.filter(company=company).exists())
+
+    def test_snapshots_computed_before_an_invalidation_are_not_written(self):
+        stale, fresh = self.companies[0], self.companies[1]
+        computed_at = timezone.now()
+        snapshots = build_company_snapshots(stale, computed_at) + build_company_snapshots(fresh, computed_at)
+
+        # A footprint write lands between computing and upserting
+        self.add_footprint(stale, timezone.now().date(), 150)
+
+        self.assertEqual(save_snapshots(snapshots, computed_at), SNAPSHOTS_PER_COMPANY)
+        self.assertFalse(ForecastSnapshot.objects.filter(company=stale).exists())
+        self.assertEqual(ForecastSnapshot.objects.filter(company=fresh).count(), SNAPSHOTS_PER_COMPANY)
+
+
+class SnapshotEndpointTests(ForecastSnapshotTestMixin, TestCase):
+    """Test that prediction endpoints read precomputed rows"""
+
+    def setUp(self):
+        super().setUp()
+        self.company = self.companies[0]
+        self.user = User.objects.create_user(username='user', email='user@example.com', password='testpass123')
+        self.user.company = self.company
+        self.user.save()
+        self.client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def test_next_value_endpoint_reads_snapshot(self):
+        refresh_company_forecasts(str(self.company.id))
+        target = f'{next_target_period()}-01'
+
+        with patch.object(PredictionService, 'predict_next_value') as predict:
+            response = self.client.post(
+                reverse('ai-predict-next-value'),
+                {'company_id': str(self.company.id), 'activity_type': 'electricity', 'target_period': target},
+                content_type='application/json'
+            )
+
+        predict.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()['predicted_value'],
+            ForecastSnapshot.objects.get(
+                company=self.company, kind='next_value', activity_type='electricity'
+            ).payload['predicted_value']
+        )
+
+    def test_growth_trend_endpoint_falls_back_without_snapshot(self):
+        response = self.client.post(
+            reverse('ai-predict-trend'),
+            {'company_id': str(self.company.id), 'activity_type': 'electricity'},
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()['success'])
+
+    def test_predictive_analytics_slices_trajectory_snapshot(self):
+        refresh_company_forecasts(str(self.company.id))
+
+        with patch('carbon.advanced_utils.predict_carbon_trajectory') as predict:
+            response = self.client.get(reverse('predictive-analytics'), {'months': 3})
+
+        predict.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['predictions']['predictions']), 3)
+        self.assertTrue(all(len(scenario['months']) == 3 for scenario in response.json()['scenarios']))
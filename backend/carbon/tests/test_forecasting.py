@@ -0,0 +1,117 @@
+"""
+Tests for the Holt-Winters forecasting engine
+"""
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase
+
+from carbon.advanced_utils import predict_carbon_trajectory
+from carbon.forecasting import ForecastEngine, HoltWintersModel, build_period_series
+from carbon.models import CarbonFootprint
+from carbon.prediction_service import PredictionService
+from companies.models import Company
+
+
+def monthly_dates(count, start=date(2022, 1, 1)):
+    return [date(start.year + (start.month - 1 + i) // 12, (start.month - 1 + i) % 12 + 1, 1) for i in range(count)]
+
+
+class BuildPeriodSeriesTests(TestCase):
+    """Test suite for build_period_series"""
+
+    def test_quarterly_gaps_are_interpolated(self):
+        dates, values, step = build_period_series([
+            (date(2024, 1, 1), 100), (date(2024, 7, 1), 140), (date(2024, 4, 1), 20), (date(2024, 4, 1), 0),
+            (date(2025, 1, 1), 200),
+        ])
+
+        self.assertEqual(step, 3)
+        self.assertEqual(dates, [date(2024, 1, 1), date(2024, 4, 1), date(2024, 7, 1),
+                                 date(2024, 10, 1), date(2025, 1, 1)])
+        np.testing.assert_allclose(values, [100, 20, 140, 170, 200])
+
+
+class HoltWintersModelTests(TestCase):
+    """Test suite for HoltWintersModel"""
+
+    def test_seasonal_series_is_tracked(self):
+        months = np.arange(36)
+        values = 100 + 2 * months + 20 * np.sin(2 * np.pi * months / 12)
+        model = HoltWintersModel.fit(monthly_dates(36), values)
+
+        self.assertEqual(model.method, 'holt_winters')
+        forecast = model.forecast(12)
+        expected = 100 + 2 * np.arange(36, 48) + 20 * np.sin(2 * np.pi * np.arange(36, 48) / 12)
+        np.testing.assert_allclose(forecast['point'], expected, rtol=0.05)
+        self.assertEqual(forecast['periods'][0], date(2025, 1, 1))
+
+    def test_intervals_widen_with_horizon(self):
+        rng = np.random.default_rng(7)
+        values = 200 + 3 * np.arange(18) + rng.normal(0, 10, 18)
+        model = HoltWintersModel.fit(monthly_dates(18), values)
+        forecast = model.forecast(6)
+
+        self.assertEqual(model.method, 'holt_linear')
+        widths = forecast['upper'] - forecast['lower']
+        self.assertTrue(np.all(np.diff(widths) > 0))
+        self.assertTrue(np.all(forecast['lower'] <= forecast['point']))
+
+    def test_too_short_series(self):
+        self.assertIsNone(HoltWintersModel.fit(monthly_dates(2), [10, 12]))
+
+    def test_round_trips_through_dict(self):
+        model = HoltWintersModel.fit(monthly_dates(6), [10, 12, 13, 15, 16, 18])
+        restored = HoltWintersModel.from_dict(model.to_dict())
+
+        np.testing.assert_allclose(restored.forecast(3)['point'], model.forecast(3)['point'])
+
+
+class ForecastEngineTests(TestCase):
+    """Test that models are cached and refitted only when new periods arrive"""
+
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name='Test Corp', industry='Manufacturing', employees=100)
+        for index, period in enumerate(monthly_dates(8, date(2024, 1, 1))):
+            self.add_footprint(period, 100 + 5 * index + 4 * (index % 2))
+
+    def add_footprint(self, period, scope2):
+        CarbonFootprint.objects.create(
+            company=self.company, reporting_period=period.strftime('%Y-%m'),
+            scope1_emissions=Decimal('10'), scope2_emissions=Decimal(scope2), scope3_emissions=Decimal('0')
+        )
+
+    def test_refits_only_for_new_periods(self):
+        engine = ForecastEngine()
+        with patch.object(HoltWintersModel, 'fit', wraps=HoltWintersModel.fit) as fit:
+            engine.company_model(self.company.id, 'scope2_emissions')
+            engine.company_model(self.company.id, 'scope2_emissions')
+            self.assertEqual(fit.call_count, 1)
+
+            self.add_footprint(date(2024, 9, 1), 140)
+            model = engine.company_model(self.company.id, 'scope2_emissions')
+            self.assertEqual(fit.call_count, 2)
+
+        self.assertEqual(model.last_period, date(2024, 9, 1))
+        self.assertEqual(model.n_points, 9)
+
+    def test_predict_next_value_uses_model(self):
+        result = PredictionService().predict_next_value(self.company.id, 'electricity', '2024-10')
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['prediction_method'], 'holt_linear')
+        self.assertAlmostEqual(result['predicted_value'], 147, delta=6)
+        self.assertLess(result['confidence_interval']['lower'], result['predicted_value'])
+        self.assertGreater(result['confidence_interval']['upper'], result['predicted_value'])
+
+    def test_trajectory_has_prediction_intervals(self):
+        result = predict_carbon_trajectory(self.company, months_ahead=3)
+
+        self.assertEqual(len(result['predictions']), 3)
+        for prediction in result['predictions']:
+            self.assertLessEqual(prediction['projected_emissions_lower'], prediction['projected_emissions'])
+            self.assertGreaterEqual(prediction['projected_emissions_upper'], prediction['projected_emissions'])
@@ -0,0 +1,118 @@
+"""
+Tests for Gemini Vision image preprocessing
+"""
+import io
+from unittest.mock import MagicMock
+
+from django.test import TestCase, override_settings
+from PIL import Image, ImageDraw, ImageFilter
+
+from carbon.ai_services import GeminiVisionService
+from carbon.image_preprocessing import VisionImagePreprocessor, MAX_PDF_DPI
+
+
+def _document_image(size=(3000, 4000), margin=400):
+    """White page with dark text rows inside a grey scanner margin"""
+    image = Image.new('RGB', size, (120, 120, 120))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((margin, margin, size[0] - margin, size[1] - margin), fill='white')
+    for row in range(margin + 50, size[1] - margin - 50, 60):
+        draw.rectangle((margin + 50, row, size[0] - margin - 50, row + 20), fill='black')
+    return image
+
+
+class VisionImagePreprocessorTests(TestCase):
+    """Test suite for VisionImagePreprocessor"""
+
+    def setUp(self):
+        self.preprocessor = VisionImagePreprocessor(
+            target_long_edge=1000, grayscale=True, image_format='JPEG',
+            min_quality=60, max_quality=90
+        )
+
+    def test_downscales_to_target_long_edge(self):
+        image = Image.new('RGB', (4000, 3000), 'white')
+        resized = self.preprocessor.downscale(image)
+        self.assertEqual(resized.size, (1000, 750))
+
+    def test_never_upscales(self):
+        image = Image.new('RGB', (800, 600), 'white')
+        self.assertEqual(self.preprocessor.downscale(image).size, (800, 600))
+
+    def test_autocrop_removes_margins(self):
+        image = _document_image(size=(1000, 1000), margin=200)
+        cropped = self.preprocessor.autocrop(image)
+        self.assertLess(cropped.width, 700)
+        self.assertLess(cropped.height, 700)
+
+    def test_autocrop_keeps_full_bleed_image(self):
+        image = Image.effect_noise((1000, 1000), 80)
+        self.assertEqual(self.preprocessor.autocrop(image).size, (1000, 1000))
+
+    def test_blurry_images_keep_higher_quality(self):
+        sharp = _document_image(size=(1000, 1000), margin=0).convert('L')
+        blurry = sharp.filter(ImageFilter.GaussianBlur(6))
+        sharp_quality = self.preprocessor.choose_quality(self.preprocessor.sharpness(sharp))
+        blurry_quality = self.preprocessor.choose_quality(self.preprocessor.sharpness(blurry))
+        self.assertGreater(blurry_quality, sharp_quality)
+        self.assertTrue(60 <= sharp_quality <= 90)
+        self.assertTrue(60 <= blurry_quality <= 90)
+
+    def test_process_returns_grayscale_jpeg_blob(self):
+        blob, stats = self.preprocessor.process(_document_image())
+        self.assertEqual(blob['mime_type'], 'image/jpeg')
+        self.assertEqual(stats['payload_bytes'], len(blob['data']))
+
+        decoded = Image.open(io.BytesIO(blob['data']))
+        self.assertEqual(decoded.format, 'JPEG')
+        self.assertEqual(decoded.mode, 'L')
+        self.assertLessEqual(max(decoded.size), 1000)
+
+    def test_webp_output(self):
+        preprocessor = VisionImagePreprocessor(target_long_edge=1000, image_format='webp')
+        blob, _ = preprocessor.process(_document_image())
+        self.assertEqual(blob['mime_type'], 'image/webp')
+        self.assertEqual(Image.open(io.BytesIO(blob['data'])).format, 'WEBP')
+
+    def test_pdf_zoom_fits_target_and_caps_dpi(self):
+        # US letter is 612 x 792 points
+        self.assertAlmostEqual(self.preprocessor.pdf_zoom(612, 792), 1000 / 792)
+        large = VisionImagePreprocessor(target_long_edge=10000)
+        self.assertAlmostEqual(large.pdf_zoom(612, 792), MAX_PDF_DPI / 72)
+
+
+class GeminiVisionPreprocessingTests(TestCase):
+    """GeminiVisionService sends the preprocessed blob instead of the raw image"""
+
+    def _service_with_model(self):
+        service = GeminiVisionService()
+        service.model = MagicMock()
+        service.model.generate_content.return_value.text = (
+            '{"meter_reading": 10450.5, "meter_type": "electricity", "unit": "kWh", "confidence": 90}'
+        )
+        return service
+
+    def _photo_bytes(self):
+        buffer = io.BytesIO()
+        _document_image().save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    @override_settings(AI_VISION_PREPROCESSING_ENABLED=True, AI_VISION_TARGET_LONG_EDGE=1200)
+    def test_meter_photo_is_preprocessed(self):
+        service = self._service_with_model()
+        result = service.read_meter_photo(self._photo_bytes())
+
+        self.assertTrue(result['success'])
+        part = service.model.generate_content.call_args[0][0][1]
+        self.assertEqual(part['mime_type'], 'image/jpeg')
+        self.assertLessEqual(max(result['preprocessing']['processed_size']), 1200)
+
+    @override_settings(AI_VISION_PREPROCESSING_ENABLED=False)
+    def test_preprocessing_can_be_disabled(self):
+        service = self._service_with_model()
+        result = service.read_meter_photo(self._photo_bytes())
+
+        self.assertTrue(result['success'])
+        part = service.model.generate_content.call_args[0][0][1]
+        self.assertIsInstance(part, Image.Image)
+        self.assertIsNone(result['preprocessing'])
@@ -0,0 +1,79 @@
+"""
+Tests for the industry leaderboard
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from carbon.benchmarking_service import BenchmarkingService, industry_leaderboard
+from carbon.emission_distributions import rebuild_distributions
+from carbon.models import CarbonFootprint
+from companies.models import Company
+
+User = get_user_model()
+
+
+class IndustryLeaderboardTests(TestCase):
+    """Test suite for industry_leaderboard and its endpoints"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Me', industry='Technology', employees=10)
+        self.footprint(self.company, '2024', 100)
+        # Alphabetically early companies are the worst performers
+        for index, per_employee in enumerate([90, 80, 70, 60, 50, 40, 5, 3]):
+            peer = Company.objects.create(name=f'Peer {index}', industry='Technology', employees=10)
+            self.footprint(peer, '2024', per_employee * 10)
+        Company.objects.create(name='No Footprints', industry='Technology', employees=10)
+        self.footprint(Company.objects.create(name='Other', industry='Retail', employees=10), '2024', 1)
+
+        # Latest verified footprint counts, not the best or most recently created one
+        self.changed = Company.objects.create(name='Changed', industry='Technology', employees=20)
+        self.footprint(self.changed, '2024', 20)
+        self.footprint(self.changed, '2023', 10)
+        self.footprint(self.changed, '2025', 5, status='draft')
+
+    def footprint(self, company, period, total, status='verified'):
+        return CarbonFootprint.objects.create(
+            company=company, reporting_period=period, status=status, scope1_emissions=Decimal(total)
+        )
+
+    def test_ranks_whole_industry_in_one_query(self):
+        with self.assertNumQueries(1):
+            leaders = industry_leaderboard('Technology', 3, exclude_company_id=self.company.id)
+
+        self.assertEqual([leader['name'] for leader in leaders], ['Changed', 'Peer 7', 'Peer 6'])
+        self.assertEqual([leader['rank'] for leader in leaders], [1, 2, 3])
+        self.assertEqual(leaders[0]['emissions_per_employee'], 1.0)
+        self.assertEqual(leaders[0]['total_emissions'], 20.0)
+        # Average per employee over the nine ranked peers
+        self.assertAlmostEqual(leaders[0]['industry_average'], (90 + 80 + 70 + 60 + 50 + 40 + 5 + 3 + 1) / 9)
+
+    def test_get_industry_leaders(self):
+        leaders = BenchmarkingService(self.company).get_industry_leaders(limit=2)
+
+        self.assertEqual([leader['rank'] for leader in leaders], [1, 2])
+        self.assertEqual(leaders[1]['emissions_per_employee'], 3.0)
+        self.assertEqual(leaders[0]['vs_average'], -98)
+
+    def test_endpoints(self):
+        user = User.objects.create_user(username='user', email='user@example.com', password='testpass123')
+        user.company = self.company
+        user.save()
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = client.get(reverse('benchmarking-leaders'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['count'], 5)
+
+        # Footprint writes sync the distributions after commit; build them directly here
+        rebuild_distributions()
+        response = client.get(reverse('industry-benchmarks'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [performer['company_name'] for performer in response.json()['competitive_analysis']['top_performers']],
+            ['Changed', 'Peer 7', 'Peer 6']
+        )
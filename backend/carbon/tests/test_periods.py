@@ -0,0 +1,76 @@
+"""
+Tests for reporting period parsing and the period_start/period_end columns
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from carbon.advanced_utils import calculate_monthly_trends
+from carbon.models import CarbonFootprint
+from carbon.periods import add_months, parse_reporting_period
+from carbon.prediction_service import PredictionService
+from companies.models import Company
+
+
+class ParseReportingPeriodTests(TestCase):
+    """Test suite for parse_reporting_period"""
+
+    def test_supported_labels(self):
+        self.assertEqual(parse_reporting_period('2024'), (date(2024, 1, 1), date(2024, 12, 31)))
+        self.assertEqual(parse_reporting_period('2024-Q3'), (date(2024, 7, 1), date(2024, 9, 30)))
+        self.assertEqual(parse_reporting_period('2024 q1'), (date(2024, 1, 1), date(2024, 3, 31)))
+        self.assertEqual(parse_reporting_period('2024-H2'), (date(2024, 7, 1), date(2024, 12, 31)))
+        self.assertEqual(parse_reporting_period('2024-02'), (date(2024, 2, 1), date(2024, 2, 29)))
+        self.assertEqual(parse_reporting_period('2024-05-17'), (date(2024, 5, 1), date(2024, 5, 31)))
+        self.assertEqual(parse_reporting_period(date(2024, 5, 17)), (date(2024, 5, 1), date(2024, 5, 31)))
+
+    def test_unparseable_labels(self):
+        for label in ('FY24', '2024-13', 'Q1 2024', '', None):
+            self.assertIsNone(parse_reporting_period(label))
+
+
+class FootprintPeriodColumnsTests(TestCase):
+    """Test that footprints carry their calendar span and queries use it"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Test Corp', industry='Manufacturing', employees=100)
+
+    def footprint(self, period, scope2='100'):
+        return CarbonFootprint.objects.create(
+            company=self.company, reporting_period=period,
+            scope1_emissions=Decimal('0'), scope2_emissions=Decimal(scope2), scope3_emissions=Decimal('0')
+        )
+
+    def test_save_fills_period_bounds(self):
+        footprint = self.footprint('2024-Q2')
+        self.assertEqual((footprint.period_start, footprint.period_end), (date(2024, 4, 1), date(2024, 6, 30)))
+
+        footprint.reporting_period = 'legacy label'
+        footprint.save()
+        self.assertIsNone(footprint.period_start)
+
+    def test_historical_data_is_filtered_by_period(self):
+        this_month = timezone.now().date().replace(day=1)
+        for offset in range(4):
+            self.footprint(add_months(this_month, -offset).strftime('%Y-%m'))
+        self.footprint(add_months(this_month, -30).strftime('%Y-%m'))
+
+        data = PredictionService()._fetch_historical_data(self.company.id, 'electricity', lookback_months=12)
+
+        self.assertEqual([entry['date'] for entry in data], [add_months(this_month, -offset) for offset in (3, 2, 1, 0)])
+
+    def test_monthly_trends_spread_quarters_over_months(self):
+        this_month = timezone.now().date().replace(day=1)
+        quarter_start = add_months(this_month, -((this_month.month - 1) % 3) - 3)
+        self.footprint(f'{quarter_start.year}-Q{(quarter_start.month - 1) // 3 + 1}', scope2='300')
+
+        trends = {trend['month']: trend['emissions']['scope2'] for trend in calculate_monthly_trends(self.company)}
+
+        for offset in range(3):
+            month = add_months(quarter_start, offset)
+            days = (add_months(month, 1) - month).days
+            quarter_days = (add_months(quarter_start, 3) - quarter_start).days
+            self.assertAlmostEqual(trends[month.strftime('%Y-%m')], 300 * days / quarter_days)
+        self.assertAlmostEqual(sum(trends.values()), 300)
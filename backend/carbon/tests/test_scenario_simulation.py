@@ -0,0 +1,71 @@
+"""
+Tests for the Monte Carlo scenario simulator
+"""
+from django.test import TestCase
+
+from carbon.scenario_simulation import PERCENTILES, simulate_scenarios
+
+
+def trajectory(emissions, std, offsets_growth, offsets_volatility, current_offsets):
+    return {
+        'predictions': [
+            {'month_offset': month, 'projected_emissions': value, 'projected_emissions_std': spread,
+             'projected_emissions_lower': value - 1.96 * spread, 'projected_emissions_upper': value + 1.96 * spread,
+             'projected_offsets': current_offsets * (1 + offsets_growth / 100) ** month}
+            for month, (value, spread) in enumerate(zip(emissions, std), start=1)
+        ],
+        'trends': {
+            'emissions_growth_rate': 0.0, 'offsets_growth_rate': offsets_growth,
+            'offsets_growth_volatility': offsets_volatility, 'current_offsets': current_offsets,
+        },
+        'insights': {},
+    }
+
+
+class SimulateScenariosTests(TestCase):
+    """Test suite for simulate_scenarios"""
+
+    def test_without_volatility_matches_deterministic_path(self):
+        # Offsets of 50 doubling monthly pass 1000 emissions in month 5 at the current pace
+        scenarios = simulate_scenarios(
+            trajectory([1000.0] * 6, [0.0] * 6, 100.0, 0.0, 50.0), simulations=200, seed=1
+        )
+
+        by_name = {scenario['name']: scenario for scenario in scenarios}
+        self.assertEqual(set(by_name), {'Conservative', 'Current Pace', 'Aggressive'})
+        current = by_name['Current Pace']
+        self.assertEqual(current['carbon_neutral_months'], 5)
+        self.assertEqual([month['neutrality_probability'] for month in current['months']], [0, 0, 0, 0, 1, 1])
+        self.assertAlmostEqual(current['months'][0]['offsets']['p50'], 100.0)
+        self.assertIsNone(by_name['Conservative']['carbon_neutral_months'])
+        self.assertEqual(by_name['Aggressive']['carbon_neutral_months'], 3)
+
+    def test_bands_and_probabilities(self):
+        scenarios = simulate_scenarios(
+            trajectory([1000.0] * 12, [20.0 * (month + 1) ** 0.5 for month in range(12)], 15.0, 20.0, 400.0),
+            seed=7
+        )
+
+        months = scenarios[1]['months']
+        self.assertEqual(len(months), 12)
+        for month in months:
+            values = [month['emissions'][f'p{percentile}'] for percentile in PERCENTILES]
+            self.assertEqual(values, sorted(values))
+            self.assertAlmostEqual(month['emissions']['p50'], 1000.0, delta=5)
+        first, last = months[0]['emissions'], months[-1]['emissions']
+        self.assertGreater(last['p95'] - last['p5'], first['p95'] - first['p5'])
+
+        probabilities = [month['neutrality_probability'] for month in months]
+        self.assertEqual(probabilities, sorted(probabilities))
+        self.assertTrue(0 < probabilities[-1] < 1)
+        conservative, _, aggressive = scenarios
+        self.assertGreater(aggressive['neutrality_probability'], conservative['neutrality_probability'])
+
+    def test_runs_without_queries(self):
+        with self.assertNumQueries(0):
+            scenarios = simulate_scenarios(trajectory([500.0] * 3, [10.0] * 3, 10.0, 5.0, 100.0))
+
+        self.assertEqual(len(scenarios), 3)
+
+    def test_error_trajectory_has_no_scenarios(self):
+        self.assertEqual(simulate_scenarios({'error': 'Insufficient data for predictions'}), [])
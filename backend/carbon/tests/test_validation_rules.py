@@ -0,0 +1,139 @@
+"""
+Tests for rule-based footprint validation
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from carbon.ai_services import AIDataValidator, GeminiAIService
+from carbon.benchmark_index import invalidate_benchmark_index
+from carbon.benchmarking_service import IndustryBenchmark
+from carbon.models import CarbonFootprint
+from carbon.validation_rules import RuleBasedValidator
+from companies.models import Company
+
+
+class RuleValidationTestMixin:
+    """Company, benchmark and footprint helpers"""
+
+    def setUp(self):
+        cache.clear()
+        invalidate_benchmark_index()
+        self.company = Company.objects.create(name='Test Corp', industry='Manufacturing', employees=100)
+        IndustryBenchmark.objects.create(
+            industry_sector='Manufacturing', employee_range_min=50, employee_range_max=249, year=2024,
+            avg_scope1_per_employee=Decimal('2.0'), avg_scope2_per_employee=Decimal('1.5'),
+            avg_scope3_per_employee=Decimal('4.5'), avg_total_per_employee=Decimal('8.0'),
+            median_total_per_employee=Decimal('7.5'), percentile_25=Decimal('5.0'),
+            percentile_75=Decimal('10.0'), sample_size=120, source='test'
+        )
+
+    def footprint(self, scope1, scope2, scope3, period='2025'):
+        return CarbonFootprint.objects.create(
+            company=self.company, reporting_period=period,
+            scope1_emissions=Decimal(scope1), scope2_emissions=Decimal(scope2), scope3_emissions=Decimal(scope3)
+        )
+
+
+class RuleBasedValidatorTests(RuleValidationTestMixin, TestCase):
+    """Test suite for RuleBasedValidator"""
+
+    def test_typical_footprint_passes_without_llm(self):
+        result = RuleBasedValidator().validate(self.footprint('200', '150', '450'))
+
+        self.assertFalse(result.needs_llm)
+        self.assertEqual(result.anomalies, [])
+        self.assertEqual(result.validation_score, 100)
+        self.assertEqual(result.industry_comparison['status'], 'average')
+        self.assertEqual(result.industry_comparison['benchmark'], 8.0)
+
+    def test_negative_value_is_a_hard_failure(self):
+        result = RuleBasedValidator().validate(self.footprint('-10', '150', '450'))
+
+        self.assertFalse(result.needs_llm)
+        self.assertEqual(result.anomalies[0]['field'], 'scope1_emissions')
+        self.assertEqual(result.anomalies[0]['severity'], 'high')
+
+    def test_intensity_beyond_outer_fence_is_flagged(self):
+        # 100 tCO2e per employee against an IQR of 5-10
+        result = RuleBasedValidator().validate(self.footprint('4000', '3000', '3000'))
+
+        self.assertFalse(result.needs_llm)
+        self.assertEqual(result.anomalies[0]['field'], 'total_emissions')
+        self.assertIn('far above', result.anomalies[0]['message'])
+
+    def test_intensity_between_iqr_and_fence_is_borderline(self):
+        result = RuleBasedValidator().validate(self.footprint('500', '500', '1000'))
+
+        self.assertTrue(result.needs_llm)
+        self.assertIn('outside the typical', result.borderline_reasons[0])
+
+    def test_missing_benchmark_is_settled_by_rules(self):
+        self.company.industry = 'Aerospace'
+        result = RuleBasedValidator().validate(self.footprint('200', '150', '450'), self.company)
+
+        self.assertFalse(result.needs_llm)
+        self.assertEqual(result.borderline_reasons, [])
+        self.assertEqual(result.validation_score, 100)
+        self.assertEqual(
+            [(suggestion['category'], suggestion['priority']) for suggestion in result.suggestions],
+            [('benchmarking', 'low')]
+        )
+
+    def test_benchmarks_come_from_the_index(self):
+        validator = RuleBasedValidator()
+        footprints = [self.footprint('200', '150', '450', period=f'2025-Q{quarter}') for quarter in range(1, 4)]
+
+        # Loading the index is the only benchmark query
+        with self.assertNumQueries(1):
+            for footprint in footprints:
+                validator.validate(footprint, self.company)
+
+
+class AIDataValidatorTests(RuleValidationTestMixin, TestCase):
+    """Test that AIDataValidator only escalates borderline footprints"""
+
+    def test_clear_cases_skip_gemini(self):
+        with patch.object(GeminiAIService, '_call_gemini') as call_gemini:
+            result = AIDataValidator().validate_emission_data(self.footprint('200', '150', '450'))
+
+        call_gemini.assert_not_called()
+        self.assertEqual(result['validation_method'], 'rules')
+        self.assertEqual(result['validation_score'], 100)
+
+    def test_borderline_case_merges_gemini_findings(self):
+        ai_result = {
+            'validation_score': 70,
+            'anomalies': [{'field': 'scope2_emissions', 'severity': 'medium',
+                           'message': 'Scope 2 is high for the sector', 'suggested_value': None}],
+            'suggestions': [{'category': 'data', 'message': 'Check meter data', 'priority': 'low'}],
+            'industry_comparison': {'percentile': 90, 'benchmark': 8.0, 'status': 'above'},
+        }
+        with patch.object(GeminiAIService, '_call_gemini', return_value=ai_result) as call_gemini:
+            result = AIDataValidator().validate_emission_data(self.footprint('500', '500', '1000'))
+
+        self.assertIn('outside the typical', call_gemini.call_args.args[0])
+        self.assertEqual(result['validation_method'], 'rules+ai')
+        self.assertEqual(result['validation_score'], 70)
+        self.assertEqual(result['anomalies'], ai_result['anomalies'])
+        self.assertEqual(result['suggestions'], ai_result['suggestions'])
+        # The rules' own comparison against the benchmark table is kept
+        self.assertEqual(result['industry_comparison']['benchmark'], 8.0)
+        self.assertNotEqual(result['industry_comparison']['percentile'], 90)
+
+    def test_fallback_returns_rule_result(self):
+        def fallback(prompt, on_fallback=None):
+            on_fallback('circuit_open')
+            return GeminiAIService()._get_mock_response(prompt)
+
+        with patch.object(GeminiAIService, '_call_gemini', side_effect=fallback) as call_gemini:
+            result = AIDataValidator().validate_emission_data(self.footprint('500', '500', '1000'))
+            AIDataValidator().validate_emission_data(CarbonFootprint.objects.get())
+
+        self.assertEqual(call_gemini.call_count, 2)
+        self.assertEqual(result['validation_method'], 'rules')
+        self.assertEqual(result['ai_fallback'], 'circuit_open')
+        self.assertEqual(result['anomalies'], [])
+        self.assertEqual(result['industry_comparison']['benchmark'], 8.0)
@@ -0,0 +1,169 @@
+"""
+Tests for multi-page PDF extraction in GeminiVisionService
+"""
+from unittest.mock import MagicMock, patch
+
+import fitz  # PyMuPDF
+from django.test import TestCase, override_settings
+
+from carbon.ai_services import GeminiVisionService
+
+
+def _pdf_bytes(page_texts):
+    """Build a PDF with one page per text entry"""
+    document = fitz.open()
+    for text in page_texts:
+        page = document.new_page()
+        if text:
+            page.insert_text((72, 72), text)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+# Per-page model output keyed by page index (see _render_pdf_page patch)
+PAGE_DATA = {
+    0: {
+        'supplier_name': 'City Electric Co',
+        'account_number': '123456789',
+        'kwh_consumed': None,
+        'confidence': 70.0,
+    },
+    1: {
+        'supplier_name': 'City Electric',
+        'kwh_consumed': 1350.5,
+        'billing_period_start': '2024-01-01',
+        'confidence': 92.0,
+    },
+    2: {
+        'total_cost': 310.2,
+        'confidence': 85.0,
+    },
+}
+
+
+class MultiPagePdfExtractionTests(TestCase):
+    """Test suite for multi-page PDF extraction"""
+
+    def setUp(self):
+        self.service = GeminiVisionService()
+        self.service.model = MagicMock()
+
+    def test_merge_prefers_most_confident_non_null_value(self):
+        extracted, fields, confidence = GeminiVisionService._merge_page_results(
+            [(page + 1, data) for page, data in PAGE_DATA.items()]
+        )
+
+        self.assertEqual(extracted['supplier_name'], 'City Electric')
+        self.assertEqual(extracted['kwh_consumed'], 1350.5)
+        self.assertEqual(extracted['account_number'], '123456789')
+        self.assertEqual(extracted['total_cost'], 310.2)
+
+        pages = {field['field_name']: field['page_number'] for field in fields}
+        self.assertEqual(pages['supplier_name'], 2)
+        self.assertEqual(pages['account_number'], 1)
+        self.assertEqual(pages['total_cost'], 3)
+        self.assertAlmostEqual(confidence, (70.0 + 92.0 + 85.0) / 3, places=2)
+
+    def test_merge_sums_pages_covering_different_periods(self):
+        extracted, fields, _ = GeminiVisionService._merge_page_results([
+            (1, {'supplier_name': 'City Electric', 'account_number': '42', 'confidence': 90.0}),
+            (2, {'billing_period_start': '2024-01-01', 'billing_period_end': '2024-01-31',
+                 'kwh_consumed': 400.0, 'total_cost': 80.0, 'confidence': 95.0}),
+            (3, {'billing_period_start': '2024-02-01', 'billing_period_end': '2024-02-29',
+                 'kwh_consumed': 350.5, 'total_cost': 70.0, 'confidence': 85.0}),
+            # Same period as page 2, read again from a summary table
+            (4, {'billing_period_start': '2024-01-01', 'billing_period_end': '2024-01-31',
+                 'kwh_consumed': 400.0, 'confidence': 75.0}),
+        ])
+
+        self.assertEqual(extracted['kwh_consumed'], 750.5)
+        self.assertEqual(extracted['total_cost'], 150.0)
+        self.assertEqual(extracted['billing_period_start'], '2024-01-01')
+        self.assertEqual(extracted['billing_period_end'], '2024-02-29')
+        self.assertEqual(extracted['supplier_name'], 'City Electric')
+        self.assertEqual([item['page_numbers'] for item in extracted['line_items']], [[2, 4], [3]])
+        self.assertEqual([item['kwh_consumed'] for item in extracted['line_items']], [400.0, 350.5])
+
+        kwh = next(field for field in fields if field['field_name'] == 'kwh_consumed')
+        self.assertEqual((kwh['field_value'], kwh['confidence'], kwh['page_numbers']), (750.5, 85.0, [2, 3, 4]))
+
+    def test_merge_fills_in_summary_and_detail_page_for_same_period(self):
+        extracted, fields, _ = GeminiVisionService._merge_page_results([
+            (1, {'billing_period_start': '2024-01-01', 'billing_period_end': '2024-01-31',
+                 'kwh_consumed': 450.0, 'total_cost': 90.0, 'confidence': 90.0}),
+            # Detail page for the same period, with meter readings the summary lacks
+            (2, {'billing_period_start': '2024-01-01', 'billing_period_end': '2024-01-31',
+                 'kwh_consumed': 450.0, 'meter_reading_start': 10000.0,
+                 'meter_reading_end': 10450.0, 'confidence': 85.0}),
+        ])
+
+        self.assertEqual(extracted['kwh_consumed'], 450.0)
+        self.assertEqual(extracted['total_cost'], 90.0)
+        self.assertEqual(extracted['meter_reading_end'], 10450.0)
+        self.assertNotIn('line_items', extracted)
+        kwh = next(field for field in fields if field['field_name'] == 'kwh_consumed')
+        self.assertEqual(kwh['page_number'], 1)
+
+    def test_merge_sums_meters_for_same_period(self):
+        extracted, _, _ = GeminiVisionService._merge_page_results([
+            (1, {'billing_period_start': '2024-01-01', 'billing_period_end': '2024-01-31',
+                 'meter_number': 'M-1', 'kwh_consumed': 300.0, 'confidence': 90.0}),
+            (2, {'billing_period_start': '2024-01-01', 'billing_period_end': '2024-01-31',
+                 'meter_number': 'M-2', 'kwh_consumed': 150.0, 'confidence': 90.0}),
+        ])
+
+        self.assertEqual(extracted['kwh_consumed'], 450.0)
+        self.assertEqual([item['meter_number'] for item in extracted['line_items']], ['M-1', 'M-2'])
+
+    @override_settings(AI_VISION_MAX_PDF_PAGES=2)
+    def test_page_selection_uses_keywords(self):
+        pdf_document = fitz.open(stream=_pdf_bytes([
+            'Account summary',
+            'Terms and conditions apply.',
+            'Usage: 1350 kWh consumption, meter reading 12345, total amount due',
+            'Marketing insert',
+        ]), filetype='pdf')
+
+        self.assertEqual(self.service._select_pdf_pages(pdf_document), [0, 2])
+        pdf_document.close()
+
+    @override_settings(AI_VISION_MAX_PDF_PAGES=2)
+    def test_scanned_pdf_falls_back_to_leading_pages(self):
+        pdf_document = fitz.open(stream=_pdf_bytes(['', '', '', '']), filetype='pdf')
+        self.assertEqual(self.service._select_pdf_pages(pdf_document), [0, 1])
+        pdf_document.close()
+
+    @override_settings(AI_VISION_MAX_PDF_PAGES=4, AI_VISION_PAGE_WORKERS=2)
+    def test_extracts_all_pages_of_short_pdf(self):
+        with patch.object(self.service, '_render_pdf_page', side_effect=lambda doc, index: index), \
+                patch.object(self.service, '_extract_page', side_effect=lambda prompt, index: dict(PAGE_DATA[index])):
+            result = self.service.extract_from_utility_bill(
+                _pdf_bytes(['page one', 'page two', 'page three']),
+                'application/pdf'
+            )
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['pages_processed'], [1, 2, 3])
+        self.assertEqual(result['extracted_data']['kwh_consumed'], 1350.5)
+        self.assertEqual(
+            {field['field_name']: field['page_number'] for field in result['fields']}['total_cost'],
+            3
+        )
+
+    def test_failed_pages_are_skipped(self):
+        def extract(prompt, index):
+            if index == 1:
+                raise ValueError('model timeout')
+            return dict(PAGE_DATA[index])
+
+        with patch.object(self.service, '_render_pdf_page', side_effect=lambda doc, index: index), \
+                patch.object(self.service, '_extract_page', side_effect=extract):
+            result = self.service.extract_from_utility_bill(
+                _pdf_bytes(['page one', 'page two', 'page three']),
+                'application/pdf'
+            )
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['pages_processed'], [1, 3])
+        self.assertIsNone(result['extracted_data']['kwh_consumed'])
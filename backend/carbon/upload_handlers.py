@@ -0,0 +1,29 @@
+"""
+Upload handlers for document ingestion
+"""
+import hashlib
+
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class HashingTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Spool every uploaded file to a temporary file on disk (never into memory)
+    and compute its SHA-256 while the chunks stream through
+
+    The digest is attached to the resulting file as ``content_hash`` so batch
+    uploads don't need a second pass over each file for deduplication.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded_file = super().file_complete(file_size)
+        uploaded_file.content_hash = self.digest.hexdigest()
+        return uploaded_file
@@ -16,6 +16,8 @@ urlpatterns = [
     path('bulk/export-footprints/', bulk_operations.export_carbon_footprints, name='bulk-export-footprints'),
     path('bulk/import-offsets/', bulk_operations.bulk_import_carbon_offsets, name='bulk-import-offsets'),
     path('bulk/export-offsets/', bulk_operations.export_carbon_offsets, name='bulk-export-offsets'),
+    path('bulk/import-activities/', bulk_operations.bulk_import_activities, name='bulk-import-activities'),
+    path('activity-ledger/totals/', bulk_operations.activity_ledger_totals, name='activity-ledger-totals'),
     
     # AI-powered endpoints (Phase 5)
     path('ai/validate/', ai_views.ai_validate_emission_data, name='ai-validate-data'),
@@ -25,15 +27,19 @@ urlpatterns = [
     path('ai/predict-trajectory/', ai_views.ai_predict_carbon_trajectory, name='ai-predict-trajectory'),
     path('ai/conversational/', ai_views.ai_conversational_data_entry, name='ai-conversational'),  # DEPRECATED
     path('ai/health/', ai_views.ai_service_health, name='ai-health'),
+    path('ai/telemetry/', ai_views.ai_telemetry_report, name='ai-telemetry'),
     
     # Smart Data Entry System - Phase 1 MVP (New endpoints per vision doc)
     path('ai/extract-from-conversation/', ai_views.ai_extract_from_conversation, name='ai-extract-conversation'),
+    path('ai/extract-from-conversation/stream/', ai_views.ai_extract_from_conversation_stream, name='ai-extract-conversation-stream'),
     path('ai/update-with-context/', ai_views.ai_update_with_context, name='ai-update-context'),
     path('ai/conversations/<uuid:session_id>/', ai_views.conversation_session, name='conversation-session-detail'),
     path('ai/conversations/', ai_views.conversation_session, name='conversation-session-create'),
     
     # Smart Data Entry System - Phase 2: Multi-Modal Document Upload
     path('ai/upload-document/', ai_views.upload_document, name='upload-document'),
+    path('ai/upload-documents/batch/', ai_views.upload_document_batch, name='upload-document-batch'),
+    path('ai/document-batches/<uuid:batch_id>/', ai_views.get_document_batch, name='document-batch-detail'),
     path('ai/documents/<uuid:document_id>/', ai_views.get_document, name='get-document'),
     path('ai/documents/<uuid:document_id>/validate/', ai_views.validate_document, name='validate-document'),
     path('ai/documents/<uuid:document_id>/apply/', ai_views.apply_document_to_footprint, name='apply-document'),
@@ -42,6 +48,7 @@ urlpatterns = [
     path('ai/predict/', ai_views.ai_predict_next_value, name='ai-predict-next-value'),
     path('ai/predict/seasonal/', ai_views.ai_predict_seasonal_patterns, name='ai-predict-seasonal'),
     path('ai/predict/trend/', ai_views.ai_predict_growth_trend, name='ai-predict-trend'),
+    path('ai/predict/batch/', ai_views.ai_predict_batch, name='ai-predict-batch'),
     
     # Smart Data Entry System - Phase 3 Week 2-4: Guidance, Smart Calculations, Benchmarking
     # Import phase3_views at top of file
@@ -51,6 +58,7 @@ from . import phase3_views
 
 urlpatterns += [
     # Proactive Guidance
+    path('guidance/completeness/', phase3_views.get_company_completeness, name='guidance-completeness-all'),
     path('guidance/completeness/<uuid:footprint_id>/', phase3_views.get_completeness_score, name='guidance-completeness'),
     path('guidance/missing-data/<uuid:footprint_id>/', phase3_views.get_missing_data_alerts, name='guidance-missing-data'),
     path('guidance/onboarding/', phase3_views.get_onboarding_flow, name='guidance-onboarding'),
@@ -0,0 +1,214 @@
+"""
+Deterministic pre-validation of carbon footprints
+
+Most footprints can be judged without a model: negative or missing values,
+totals that don't add up, implausible scope splits and per-employee intensity
+far from the industry benchmark are all simple arithmetic. RuleBasedValidator
+runs those checks and reports whether the outcome is settled or borderline;
+AIDataValidator only asks Gemini about the borderline ones (intensity between
+the benchmark's interquartile range and its outer fences, or unusual scope
+splits). Without a benchmark to compare against the rules settle the
+footprint and suggest adding one.
+
+Findings use the same schema as the model's response (anomalies with field,
+severity, message and suggested_value; suggestions; industry_comparison) so the
+two can be merged.
+"""
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from .benchmark_index import get_benchmark_index
+from .benchmarking_service import _footprint_year
+
+SEVERITY_PENALTY = {'high': 30, 'medium': 15, 'low': 5}
+
+# Total tCO2e per employee no real organisation reaches (heavy industry tops
+# out in the low thousands)
+MAX_PLAUSIBLE_INTENSITY = Decimal('5000')
+
+# Share of the total one scope can take before the split is worth a second look
+DOMINANT_SCOPE_SHARE = Decimal('0.95')
+
+SCOPE_FIELDS = ('scope1_emissions', 'scope2_emissions', 'scope3_emissions')
+
+
+class RuleValidationResult:
+    """Outcome of the rule checks for one footprint"""
+
+    def __init__(self):
+        self.anomalies: List[Dict[str, Any]] = []
+        self.suggestions: List[Dict[str, Any]] = []
+        self.industry_comparison: Optional[Dict[str, Any]] = None
+        self.borderline_reasons: List[str] = []
+
+    def add_anomaly(self, field: str, severity: str, message: str, suggested_value=None):
+        self.anomalies.append({
+            'field': field,
+            'severity': severity,
+            'message': message,
+            'suggested_value': suggested_value,
+        })
+
+    def add_suggestion(self, category: str, message: str, priority: str = 'medium'):
+        self.suggestions.append({'category': category, 'message': message, 'priority': priority})
+
+    @property
+    def needs_llm(self) -> bool:
+        """Borderline cases go to the model; hard failures and clean passes don't"""
+        has_hard_failure = any(anomaly['severity'] == 'high' for anomaly in self.anomalies)
+        return bool(self.borderline_reasons) and not has_hard_failure
+
+    @property
+    def validation_score(self) -> int:
+        penalty = sum(SEVERITY_PENALTY[anomaly['severity']] for anomaly in self.anomalies)
+        return max(0, 100 - penalty)
+
+    def as_response(self) -> Dict[str, Any]:
+        return {
+            'validation_score': self.validation_score,
+            'anomalies': list(self.anomalies),
+            'suggestions': list(self.suggestions),
+            'industry_comparison': self.industry_comparison,
+            'validation_method': 'rules',
+        }
+
+
+class RuleBasedValidator:
+    """
+    Validate footprints with fixed rules and the IndustryBenchmark table
+
+    Benchmarks are matched from the in-process BenchmarkIndex, the same
+    lookup BenchmarkingService uses, so checking a whole import issues no
+    benchmark queries once the index is loaded.
+    """
+
+    def validate(self, footprint, company=None) -> RuleValidationResult:
+        company = company or footprint.company
+        result = RuleValidationResult()
+        scopes = {field: Decimal(getattr(footprint, field) or 0) for field in SCOPE_FIELDS}
+        total = sum(scopes.values())
+
+        self._check_values(result, footprint, scopes, total)
+        if total > 0 and not any(anomaly['severity'] == 'high' for anomaly in result.anomalies):
+            self._check_scope_split(result, scopes, total)
+            self._check_intensity(result, company, footprint, total)
+        return result
+
+    def _check_values(self, result, footprint, scopes, total):
+        for field, value in scopes.items():
+            if value < 0:
+                result.add_anomaly(field, 'high', f"{field.replace('_', ' ').capitalize()} cannot be negative", 0)
+
+        recorded_total = Decimal(footprint.total_emissions or 0)
+        if abs(recorded_total - total) > Decimal('0.01'):
+            result.add_anomaly(
+                'total_emissions', 'high',
+                f"Total emissions ({recorded_total}) don't match the sum of scopes ({total})",
+                float(total)
+            )
+
+        if all(value == 0 for value in scopes.values()):
+            result.add_anomaly('total_emissions', 'high', 'No emissions recorded for this period')
+
+    def _check_scope_split(self, result, scopes, total):
+        if scopes['scope3_emissions'] == 0:
+            result.add_suggestion(
+                'completeness',
+                'Scope 3 is empty; value-chain emissions are usually the largest share - '
+                'start with business travel, purchased goods and commuting',
+                'medium'
+            )
+        if scopes['scope1_emissions'] + scopes['scope2_emissions'] == 0:
+            result.add_anomaly(
+                'scope2_emissions', 'medium',
+                'No Scope 1 or Scope 2 emissions recorded; most organisations use some purchased energy'
+            )
+
+        # A dominant Scope 3 is normal for service businesses; Scope 1 or 2 alone isn't
+        for field in ('scope1_emissions', 'scope2_emissions'):
+            share = scopes[field] / total
+            if share >= DOMINANT_SCOPE_SHARE:
+                result.borderline_reasons.append(f"{field} is {share * 100:.0f}% of total emissions")
+
+    def _check_intensity(self, result, company, footprint, total):
+        employees = getattr(company, 'employees', 0) or 0
+        if employees <= 0:
+            result.add_suggestion(
+                'company_profile', 'Add the employee count to compare emissions with industry peers', 'low'
+            )
+            return
+
+        intensity = total / employees
+        if intensity > MAX_PLAUSIBLE_INTENSITY:
+            result.add_anomaly(
+                'total_emissions', 'high',
+                f"{intensity:.1f} tCO2e per employee is implausibly high - check units (kg vs tonnes)",
+                float(total / 1000)
+            )
+            return
+
+        year = _footprint_year(footprint)
+        benchmark = get_benchmark_index().find(company.industry, employees, year) if year else None
+        if benchmark is None:
+            # Nothing to compare against; the model has no better reference, so the rules settle it
+            result.add_suggestion(
+                'benchmarking',
+                f"No industry benchmark for {company.industry or 'an unknown industry'} at this size; "
+                "intensity was not compared with peers",
+                'low'
+            )
+            return
+
+        average = Decimal(benchmark.avg_total_per_employee)
+        result.industry_comparison = {
+            'percentile': self._estimate_percentile(benchmark, intensity),
+            'benchmark': float(average),
+            'status': 'below' if intensity < average * Decimal('0.9')
+            else 'above' if intensity > average * Decimal('1.1') else 'average',
+        }
+
+        low, high, outer_low, outer_high = self._fences(benchmark, average)
+        if intensity > outer_high or intensity < outer_low:
+            direction = 'above' if intensity > outer_high else 'below'
+            result.add_anomaly(
+                'total_emissions', 'high',
+                f"{intensity:.2f} tCO2e per employee is far {direction} the {benchmark.industry_sector} "
+                f"benchmark ({average:.2f})"
+            )
+        elif intensity > high or intensity < low:
+            result.borderline_reasons.append(
+                f"intensity {intensity:.2f} tCO2e/employee is outside the typical "
+                f"{benchmark.industry_sector} range {low:.2f}-{high:.2f}"
+            )
+
+    @staticmethod
+    def _fences(benchmark, average):
+        """
+        Typical range and outer fences for intensity
+
+        With quartiles this is the IQR and Tukey's far-out fences (3 x IQR);
+        without them, half to double the average, and a tenth to five times.
+        """
+        if benchmark.percentile_25 is not None and benchmark.percentile_75 is not None:
+            p25, p75 = Decimal(benchmark.percentile_25), Decimal(benchmark.percentile_75)
+            iqr = p75 - p25
+            return p25, p75, max(p25 - 3 * iqr, Decimal('0')), p75 + 3 * iqr
+        return average / 2, average * 2, average / 10, average * 5
+
+    @staticmethod
+    def _estimate_percentile(benchmark, intensity) -> Optional[int]:
+        """Rough percentile by interpolating between the benchmark's quartiles"""
+        points = [(Decimal('0'), 0)]
+        for value, percentile in ((benchmark.percentile_25, 25), (benchmark.median_total_per_employee, 50),
+                                  (benchmark.percentile_75, 75)):
+            if value is not None and Decimal(value) > points[-1][0]:
+                points.append((Decimal(value), percentile))
+        if len(points) < 2:
+            return None
+        for (low_value, low_pct), (high_value, high_pct) in zip(points, points[1:]):
+            if intensity <= high_value:
+                share = (intensity - low_value) / (high_value - low_value)
+                return int(low_pct + share * (high_pct - low_pct))
+        last_value, last_pct = points[-1]
+        # Above the top quartile: approach 100 as intensity doubles
+        return min(99, int(last_pct + (intensity - last_value) / last_value * (100 - last_pct)))
@@ -4,14 +4,20 @@ from typing import Dict, List, Any
 import json
 import logging
 
+from carbon.ai_backends import FakeGenerativeModel, fake_backend_enabled
+from carbon.ai_telemetry import track_ai_call
+
 logger = logging.getLogger(__name__)
 
 class CSRDAIService:
     """AI Service for CSRD Compliance Analysis"""
     
     def __init__(self):
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-2.5-flash-lite-preview-09-2025')
+        if fake_backend_enabled():
+            self.model = FakeGenerativeModel('gemini-2.5-flash-lite-preview-09-2025')
+        else:
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            self.model = genai.GenerativeModel('gemini-2.5-flash-lite-preview-09-2025')
     
     def analyze_csrd_readiness(self, assessment_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -80,7 +86,9 @@ class CSRDAIService:
         """
         
         try:
-            response = self.model.generate_content(prompt)
+            with track_ai_call('csrd_readiness', self.model, prompt) as call:
+                response = self.model.generate_content(prompt)
+                call.set_response(response)
             
             # Parse JSON response
             response_text = response.text.strip()
@@ -131,7 +139,9 @@ class CSRDAIService:
         """
         
         try:
-            response = self.model.generate_content(prompt)
+            with track_ai_call('materiality_assessment', self.model, prompt) as call:
+                response = self.model.generate_content(prompt)
+                call.set_response(response)
             response_text = response.text.strip()
             
             if response_text.startswith('```json'):
@@ -184,7 +194,9 @@ class CSRDAIService:
         """
         
         try:
-            response = self.model.generate_content(prompt)
+            with track_ai_call('regulatory_update', self.model, prompt) as call:
+                response = self.model.generate_content(prompt)
+                call.set_response(response)
             response_text = response.text.strip()
             
             if response_text.startswith('```json'):
@@ -242,7 +254,9 @@ class CSRDAIService:
         """
         
         try:
-            response = self.model.generate_content(prompt)
+            with track_ai_call('executive_summary', self.model, prompt) as call:
+                response = self.model.generate_content(prompt)
+                call.set_response(response)
             return response.text.strip()
             
         except Exception as e:
@@ -343,13 +357,18 @@ class ComplianceAIService:
     """AI Service for General Compliance Tasks"""
     
     def __init__(self):
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-2.5-flash-lite-preview-09-2025')
+        if fake_backend_enabled():
+            self.model = FakeGenerativeModel('gemini-2.5-flash-lite-preview-09-2025')
+        else:
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            self.model = genai.GenerativeModel('gemini-2.5-flash-lite-preview-09-2025')
     
     def generate_content(self, prompt: str) -> str:
         """Generate AI content for compliance guidance"""
         try:
-            response = self.model.generate_content(prompt)
+            with track_ai_call('compliance_guidance', self.model, prompt) as call:
+                response = self.model.generate_content(prompt)
+                call.set_response(response)
             return response.text
         except Exception as e:
             logger.error(f"Error generating AI content: {str(e)}")
@@ -373,7 +392,9 @@ class ComplianceAIService:
         """
         
         try:
-            response = self.model.generate_content(prompt)
+            with track_ai_call('regulatory_impact', self.model, prompt) as call:
+                response = self.model.generate_content(prompt)
+                call.set_response(response)
             # Parse JSON response
             import re
             json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
@@ -80,7 +80,7 @@ class CSRDAssessmentViewSet(viewsets.ModelViewSet):
                 'csrd_applicable': assessment.csrd_applicable,
                 'first_reporting_year': assessment.first_reporting_year,
                 'has_carbon_data': carbon_data['has_data'],
-                'has_ewaste_data': company.ewasteentry_set.exists(),
+                'has_ewaste_data': company.ewaste_entries.exists(),
                 'has_social_data': False,  # Add social data check when implemented
                 'has_governance_data': False,  # Add governance data check when implemented
             }
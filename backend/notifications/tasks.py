@@ -187,10 +187,15 @@ def check_data_quality():
     Check data quality and send alerts if issues are found
     """
     from carbon.models import CarbonFootprint
+    from carbon.completeness import score_footprints
     
     companies = Company.objects.all()
     issues_found = []
     
+    # Completeness of every recent footprint, scored in one query
+    recent_all = CarbonFootprint.objects.filter(created_at__gte=timezone.now() - timedelta(days=90))
+    completeness = score_footprints(recent_all)
+    
     for company in companies:
         # Check for missing recent data
         latest_footprint = CarbonFootprint.objects.filter(
@@ -212,6 +217,17 @@ def check_data_quality():
             created_at__gte=timezone.now() - timedelta(days=90)
         )
         
+        for footprint in recent_footprints:
+            score = completeness.get(footprint.id)
+            if score and not score['meets_minimum']:
+                issues_found.append({
+                    'company': company.name,
+                    'issue': 'Incomplete footprint data',
+                    'reporting_period': footprint.reporting_period,
+                    'completeness_grade': score['grade'],
+                    'missing_activities': score['missing_activities'],
+                })
+        
         if recent_footprints.count() >= 3:
             avg_emissions = recent_footprints.aggregate(
                 Avg('scope1_emissions'),
@@ -46,6 +46,16 @@ app.conf.beat_schedule = {
         'task': 'notifications.tasks.check_data_quality',
         'schedule': crontab(hour=8, minute=0),
     },
+    # Precompute forecasts for the prediction endpoints daily at 3 AM
+    'refresh-forecast-snapshots': {
+        'task': 'carbon.tasks.refresh_forecast_snapshots',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    # Rebuild industry emission distributions for benchmarking daily at 3:30 AM
+    'rebuild-emission-distributions': {
+        'task': 'carbon.tasks.rebuild_emission_distributions',
+        'schedule': crontab(hour=3, minute=30),
+    },
 }
 
 app.conf.timezone = 'UTC'
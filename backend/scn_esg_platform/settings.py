@@ -293,7 +293,7 @@ CACHES = {
 }
 
 # Rate Limiting Configuration
-RATELIMIT_ENABLE = True
+RATELIMIT_ENABLE = os.getenv('RATELIMIT_ENABLE', 'True').lower() == 'true'
 RATELIMIT_USE_CACHE = 'default'
 
 # Celery Configuration (for async tasks)
@@ -313,6 +313,72 @@ AI_CACHE_TIMEOUT = 3600  # 1 hour default
 AI_PREDICTION_CACHE_TIMEOUT = 43200  # 12 hours
 AI_BENCHMARK_CACHE_TIMEOUT = 21600  # 6 hours
 
+# Gemini Vision image preprocessing (downscale, grayscale, crop, recompress)
+AI_VISION_PREPROCESSING_ENABLED = os.getenv('AI_VISION_PREPROCESSING_ENABLED', 'True').lower() == 'true'
+AI_VISION_TARGET_LONG_EDGE = int(os.getenv('AI_VISION_TARGET_LONG_EDGE', '1600'))  # pixels
+AI_VISION_GRAYSCALE = True
+AI_VISION_IMAGE_FORMAT = 'JPEG'  # JPEG or WEBP
+AI_VISION_MIN_QUALITY = 60  # used for crisp, high-contrast scans
+AI_VISION_MAX_QUALITY = 90  # used for blurry photos
+AI_VISION_MAX_PDF_PAGES = 4  # most relevant pages extracted from multi-page PDFs
+AI_VISION_PAGE_WORKERS = 3  # concurrent Gemini Vision calls per document
+
+# Batch document upload
+AI_DOCUMENT_BATCH_MAX_FILES = 100
+AI_DOCUMENT_EXTRACTION_CONCURRENCY = 2  # extraction tasks running at once per company
+AI_DOCUMENT_EXTRACTION_RETRY_DELAY = 10  # seconds before a capped task retries
+
+# Smart data entry conversation memory (recent messages + rolling summary)
+AI_CONVERSATION_CONTEXT_TOKENS = 1500  # prompt budget for history incl. summary
+AI_CONVERSATION_SUMMARY_MAX_FACTS = 20
+AI_CONVERSATION_MEMORY_CACHE_TIMEOUT = 3600
+
+# Rule-based parsing of simple chat inputs before falling back to Gemini
+AI_CONVERSATION_FAST_PATH_ENABLED = os.getenv('AI_CONVERSATION_FAST_PATH_ENABLED', 'True').lower() == 'true'
+AI_CONVERSATION_FAST_PATH_MIN_CONFIDENCE = 0.85
+
+# Coalescing of identical concurrent Gemini prompts (singleflight)
+AI_COALESCE_ENABLED = True
+AI_COALESCE_WAIT_TIMEOUT = 30  # seconds a duplicate caller waits for the in-flight call
+AI_COALESCE_RESULT_TTL = 30  # seconds the result stays available to other workers
+
+# Gemini call deadlines and circuit breaker
+AI_GEMINI_CALL_TIMEOUT = 20  # seconds per text call
+AI_VISION_CALL_TIMEOUT = 60  # seconds per vision call
+AI_GEMINI_MAX_CONCURRENT_CALLS = 16  # threads making upstream calls per process
+AI_CIRCUIT_FAILURE_THRESHOLD = 5  # failures within the window that open the breaker
+AI_CIRCUIT_FAILURE_WINDOW = 60
+AI_CIRCUIT_RECOVERY_TIMEOUT = 30  # seconds open before a half-open probe
+
+# AI call telemetry (AICallLog)
+AI_TELEMETRY_ENABLED = os.getenv('AI_TELEMETRY_ENABLED', 'True').lower() == 'true'
+AI_TELEMETRY_BUFFER_SIZE = 50  # records buffered before a bulk insert
+AI_TELEMETRY_FLUSH_INTERVAL = 30  # seconds between flushes at most
+
+# AI model backend: 'gemini' (the real API, or mock responses without a key) or
+# 'fake' (offline, latency-injecting stand-in for load tests; see carbon/ai_backends.py)
+AI_BACKEND = os.getenv('AI_BACKEND', 'gemini')
+AI_FAKE_BACKEND = {
+    'latency_distribution': os.getenv('AI_FAKE_LATENCY_DISTRIBUTION', 'lognormal'),
+    'latency_median_ms': int(os.getenv('AI_FAKE_LATENCY_MEDIAN_MS', '800')),
+    'latency_p95_ms': int(os.getenv('AI_FAKE_LATENCY_P95_MS', '2500')),
+    'vision_latency_median_ms': int(os.getenv('AI_FAKE_VISION_LATENCY_MEDIAN_MS', '3000')),
+    'vision_latency_p95_ms': int(os.getenv('AI_FAKE_VISION_LATENCY_P95_MS', '8000')),
+    'error_rate': float(os.getenv('AI_FAKE_ERROR_RATE', '0')),
+    'hang_rate': float(os.getenv('AI_FAKE_HANG_RATE', '0')),
+    'stream_chunk_chars': int(os.getenv('AI_FAKE_STREAM_CHUNK_CHARS', '40')),
+}
+
+# Precomputed forecasts (ForecastSnapshot), refreshed nightly by Celery beat
+FORECAST_SNAPSHOT_CHUNK_SIZE = 100  # companies per bulk upsert
+FORECAST_REFRESH_DELAY = 60  # seconds a footprint write waits before its company is recomputed
+
+# Industry emission distributions (IndustryEmissionDistribution), rebuilt nightly by Celery beat
+EMISSION_DISTRIBUTION_SYNC_DELAY = 30  # seconds a verified footprint change waits before its company is synced
+
+# In-process IndustryBenchmark index (carbon/benchmark_index.py)
+BENCHMARK_INDEX_CHECK_INTERVAL = 60  # seconds between a worker's checks for benchmark table changes
+
 # Demo/test user seeding controls
 ENABLE_DEMO_USERS = os.getenv('ENABLE_DEMO_USERS', 'True').lower() == 'true'
 RESET_DEMO_PASSWORDS = os.getenv('RESET_DEMO_PASSWORDS', 'True').lower() == 'true'